@@ -0,0 +1,7 @@
+"""Бенчмарки горячих путей мониторинга и HTTP API SupraLottery."""
+
+__all__ = [
+    "loadtest",
+    "runner",
+    "suites",
+]
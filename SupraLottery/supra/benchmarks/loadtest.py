@@ -0,0 +1,426 @@
+"""Нагрузочный генератор для HTTP и WebSocket API внутри одного процесса.
+
+Сценарии запускаются против ``api_server.app`` без сетевого стека: HTTP-запросы
+идут через ``httpx.ASGITransport``, WebSocket-подключения — через минимальный
+ASGI-драйвер. Вызовы Supra CLI обслуживает симулятор, данные пишутся во
+временную SQLite. Для каждого сценария выводятся пропускная способность и
+перцентили задержек.
+
+Пример использования::
+
+    python -m supra.scripts.cli loadtest -- --scenario chat --subscribers 500 --requests 200
+    python -m supra.scripts.cli loadtest -- --concurrency 64 --output load.json
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import math
+import sys
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+from .suites import api_environment
+
+DEFAULT_REQUESTS = 200
+DEFAULT_CONCURRENCY = 16
+DEFAULT_SUBSCRIBERS = 50
+DEFAULT_PROFILES = 100
+DEFAULT_DELIVERY_TIMEOUT = 10.0
+
+
+@dataclass(slots=True)
+class LoadOptions:
+    """Параметры нагрузочного прогона."""
+
+    requests: int = DEFAULT_REQUESTS
+    concurrency: int = DEFAULT_CONCURRENCY
+    subscribers: int = DEFAULT_SUBSCRIBERS
+    profiles: int = DEFAULT_PROFILES
+    lotteries: int = 10
+    delivery_timeout: float = DEFAULT_DELIVERY_TIMEOUT
+
+
+@dataclass(slots=True)
+class LatencyRecorder:
+    """Накопитель задержек и ошибок одного потока измерений."""
+
+    samples: List[float] = field(default_factory=list)
+    errors: int = 0
+    started: float = field(default_factory=time.perf_counter)
+    finished: Optional[float] = None
+
+    def add(self, seconds: float) -> None:
+        self.samples.append(seconds)
+
+    def stop(self) -> None:
+        self.finished = time.perf_counter()
+
+    def summary(self) -> Dict[str, Any]:
+        duration = (self.finished or time.perf_counter()) - self.started
+        ordered = sorted(self.samples)
+
+        def percentile(fraction: float) -> Optional[float]:
+            if not ordered:
+                return None
+            index = min(len(ordered) - 1, max(0, math.ceil(fraction * len(ordered)) - 1))
+            return round(ordered[index] * 1000, 3)
+
+        return {
+            "count": len(ordered),
+            "errors": self.errors,
+            "duration_s": round(duration, 4),
+            "throughput_per_s": round(len(ordered) / duration, 2) if duration > 0 else None,
+            "p50_ms": percentile(0.50),
+            "p90_ms": percentile(0.90),
+            "p99_ms": percentile(0.99),
+            "max_ms": round(ordered[-1] * 1000, 3) if ordered else None,
+        }
+
+
+class AsgiWebSocket:
+    """Клиент WebSocket, подключающийся к ASGI-приложению напрямую."""
+
+    def __init__(self, app: Any, path: str) -> None:
+        self._app = app
+        self._path = path
+        self._incoming: asyncio.Queue[Dict[str, Any]] = asyncio.Queue()
+        self.messages: asyncio.Queue[Tuple[float, str]] = asyncio.Queue()
+        self._accepted = asyncio.Event()
+        self._closed = asyncio.Event()
+        self._task: Optional[asyncio.Task[None]] = None
+
+    async def connect(self, timeout: float = 5.0) -> None:
+        scope = {
+            "type": "websocket",
+            "asgi": {"version": "3.0"},
+            "scheme": "ws",
+            "path": self._path,
+            "raw_path": self._path.encode(),
+            "query_string": b"",
+            "headers": [],
+            "client": ("loadtest", 0),
+            "server": ("loadtest", 80),
+            "subprotocols": [],
+        }
+        await self._incoming.put({"type": "websocket.connect"})
+        self._task = asyncio.create_task(self._app(scope, self._incoming.get, self._send))
+        await asyncio.wait_for(self._accepted.wait(), timeout)
+
+    async def _send(self, message: Dict[str, Any]) -> None:
+        kind = message["type"]
+        if kind == "websocket.accept":
+            self._accepted.set()
+        elif kind == "websocket.send":
+            text = message.get("text")
+            if text is None:
+                text = (message.get("bytes") or b"").decode()
+            await self.messages.put((time.perf_counter(), text))
+        elif kind == "websocket.close":
+            self._closed.set()
+
+    async def send_text(self, text: str) -> None:
+        await self._incoming.put({"type": "websocket.receive", "text": text})
+
+    async def receive_json(self, timeout: float) -> Any:
+        return (await self.receive_timed(timeout))[1]
+
+    async def receive_timed(self, timeout: float) -> Tuple[float, Any]:
+        """Сообщение вместе с моментом его отправки приложением (``perf_counter``)."""
+
+        arrived, text = await asyncio.wait_for(self.messages.get(), timeout)
+        return arrived, json.loads(text)
+
+    async def close(self) -> None:
+        await self._incoming.put({"type": "websocket.disconnect", "code": 1000})
+        if self._task is not None:
+            try:
+                await asyncio.wait_for(self._task, 5.0)
+            except (asyncio.TimeoutError, Exception):  # pragma: no cover - приложение уже завершилось
+                self._task.cancel()
+
+
+@asynccontextmanager
+async def app_lifespan(app: Any) -> AsyncIterator[None]:
+    """Выполняет ASGI lifespan startup/shutdown (обработчики ``on_event``)."""
+
+    incoming: asyncio.Queue[Dict[str, Any]] = asyncio.Queue()
+    outgoing: asyncio.Queue[Dict[str, Any]] = asyncio.Queue()
+    task = asyncio.create_task(
+        app({"type": "lifespan", "asgi": {"version": "3.0"}, "state": {}}, incoming.get, outgoing.put)
+    )
+    await incoming.put({"type": "lifespan.startup"})
+    message = await outgoing.get()
+    if message["type"] != "lifespan.startup.complete":
+        raise RuntimeError(f"Не удалось запустить приложение: {message.get('message')}")
+    try:
+        yield
+    finally:
+        await incoming.put({"type": "lifespan.shutdown"})
+        await outgoing.get()
+        await task
+
+
+async def run_workers(
+    total: int,
+    concurrency: int,
+    request: Callable[[int], Awaitable[Any]],
+    recorder: LatencyRecorder,
+) -> None:
+    """Выполняет ``total`` запросов ``concurrency`` параллельными воркерами."""
+
+    counter = iter(range(total))
+
+    async def worker() -> None:
+        for index in counter:
+            started = time.perf_counter()
+            try:
+                response = await request(index)
+            except Exception:  # noqa: BLE001 - ошибка учитывается в статистике
+                recorder.errors += 1
+                continue
+            status_code = getattr(response, "status_code", 200)
+            if status_code >= 400:
+                recorder.errors += 1
+            else:
+                recorder.add(time.perf_counter() - started)
+
+    await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+    recorder.stop()
+
+
+async def _subscribe(app: Any, room: str, count: int) -> List[AsgiWebSocket]:
+    sockets = [AsgiWebSocket(app, f"/chat/ws/{room}") for _ in range(count)]
+    await asyncio.gather(*(socket.connect() for socket in sockets))
+    return sockets
+
+
+async def _collect_deliveries(
+    sockets: Sequence[AsgiWebSocket],
+    expected: int,
+    sent_at: Dict[str, float],
+    key: str,
+    timeout: float,
+) -> LatencyRecorder:
+    """Ждёт ``expected`` сообщений на каждом сокете; задержка — от POST до отправки в сокет."""
+
+    recorder = LatencyRecorder(started=min(sent_at.values(), default=time.perf_counter()))
+    last_arrival = recorder.started
+
+    async def drain(socket: AsgiWebSocket) -> None:
+        nonlocal last_arrival
+        received = 0
+        while received < expected:
+            try:
+                arrived, payload = await socket.receive_timed(timeout)
+            except asyncio.TimeoutError:
+                recorder.errors += expected - received
+                return
+            marker = payload.get(key)
+            if marker in sent_at:
+                recorder.add(arrived - sent_at[marker])
+                last_arrival = max(last_arrival, arrived)
+                received += 1
+
+    await asyncio.gather(*(drain(socket) for socket in sockets))
+    recorder.finished = last_arrival
+    return recorder
+
+
+async def scenario_chat(client: Any, app: Any, options: LoadOptions) -> Dict[str, Any]:
+    """POST сообщений в чат и доставка каждому подписчику комнаты."""
+
+    sockets = await _subscribe(app, "load", options.subscribers)
+    sent_at: Dict[str, float] = {}
+
+    async def post(index: int) -> Any:
+        body = f"load-{index}"
+        sent_at[body] = time.perf_counter()
+        return await client.post(
+            "/chat/messages", json={"address": f"0x{index:040x}", "body": body, "room": "load"}
+        )
+
+    posts = LatencyRecorder()
+    await run_workers(options.requests, options.concurrency, post, posts)
+    deliveries = await _collect_deliveries(
+        sockets, len(posts.samples), sent_at, "body", options.delivery_timeout
+    )
+    await asyncio.gather(*(socket.close() for socket in sockets))
+    return {
+        "subscribers": options.subscribers,
+        "post": posts.summary(),
+        "delivery": deliveries.summary(),
+        "expected_deliveries": len(posts.samples) * options.subscribers,
+    }
+
+
+async def scenario_announcements(client: Any, app: Any, options: LoadOptions) -> Dict[str, Any]:
+    """Всплеск объявлений: все запросы отправляются одновременно."""
+
+    sockets = await _subscribe(app, "announcements", options.subscribers)
+    sent_at: Dict[str, float] = {}
+
+    async def post(index: int) -> Any:
+        title = f"burst-{index}"
+        sent_at[title] = time.perf_counter()
+        return await client.post(
+            "/chat/announcements", json={"title": title, "body": "Нагрузочный тест", "lottery_id": "1"}
+        )
+
+    posts = LatencyRecorder()
+    await run_workers(options.requests, options.requests, post, posts)
+    deliveries = await _collect_deliveries(
+        sockets, len(posts.samples), sent_at, "title", options.delivery_timeout
+    )
+    await asyncio.gather(*(socket.close() for socket in sockets))
+    return {
+        "subscribers": options.subscribers,
+        "post": posts.summary(),
+        "delivery": deliveries.summary(),
+        "expected_deliveries": len(posts.samples) * options.subscribers,
+    }
+
+
+async def scenario_profiles(client: Any, app: Any, options: LoadOptions) -> Dict[str, Any]:
+    """Чтение профилей аккаунтов (предварительно создаётся ``profiles`` записей)."""
+
+    addresses = [f"0x{index + 1:040x}" for index in range(options.profiles)]
+    for address in addresses:
+        await client.put(f"/accounts/{address}", json={"nickname": f"player-{address[-4:]}"})
+
+    reads = LatencyRecorder()
+    await run_workers(
+        options.requests,
+        options.concurrency,
+        lambda index: client.get(f"/accounts/{addresses[index % len(addresses)]}"),
+        reads,
+    )
+    return {"profiles": options.profiles, "get": reads.summary()}
+
+
+async def scenario_status_cached(client: Any, app: Any, options: LoadOptions) -> Dict[str, Any]:
+    """Опрос ``/status`` с попаданием в кэш."""
+
+    await client.get("/status")
+    polls = LatencyRecorder()
+    await run_workers(options.requests, options.concurrency, lambda _: client.get("/status"), polls)
+    return {"lotteries": options.lotteries, "get": polls.summary()}
+
+
+async def scenario_status_uncached(client: Any, app: Any, options: LoadOptions) -> Dict[str, Any]:
+    """Опрос ``/status?refresh=true``: каждый запрос собирает отчёт заново."""
+
+    polls = LatencyRecorder()
+    await run_workers(
+        options.requests,
+        options.concurrency,
+        lambda _: client.get("/status", params={"refresh": "true"}),
+        polls,
+    )
+    return {"lotteries": options.lotteries, "get": polls.summary()}
+
+
+Scenario = Callable[[Any, Any, LoadOptions], Awaitable[Dict[str, Any]]]
+
+SCENARIOS: Dict[str, Scenario] = {
+    "chat": scenario_chat,
+    "announcements": scenario_announcements,
+    "profiles": scenario_profiles,
+    "status-cached": scenario_status_cached,
+    "status-uncached": scenario_status_uncached,
+}
+
+
+async def run_scenarios(names: Sequence[str], options: LoadOptions) -> Dict[str, Any]:
+    """Запускает сценарии последовательно на одном экземпляре приложения."""
+
+    import httpx
+
+    from ..scripts import api_server
+
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        raise ValueError(f"Неизвестные сценарии: {', '.join(unknown)}")
+
+    results: Dict[str, Any] = {}
+    with api_environment(options.lotteries):
+        async with app_lifespan(api_server.app):
+            transport = httpx.ASGITransport(app=api_server.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://loadtest") as client:
+                for name in names:
+                    results[name] = await SCENARIOS[name](client, api_server.app, options)
+    return {
+        "options": {
+            "requests": options.requests,
+            "concurrency": options.concurrency,
+            "subscribers": options.subscribers,
+            "profiles": options.profiles,
+            "lotteries": options.lotteries,
+        },
+        "scenarios": results,
+    }
+
+
+def _format_summary(report: Dict[str, Any]) -> str:
+    lines = []
+    for scenario, result in report["scenarios"].items():
+        for phase, stats in result.items():
+            if not isinstance(stats, dict):
+                continue
+            lines.append(
+                f"{scenario:<16} {phase:<9} n={stats['count']:<7} err={stats['errors']:<5} "
+                f"rps={stats['throughput_per_s']} p50={stats['p50_ms']}ms "
+                f"p99={stats['p99_ms']}ms max={stats['max_ms']}ms"
+            )
+    return "\n".join(lines)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Нагрузочный тест HTTP/WebSocket API SupraLottery")
+    parser.add_argument(
+        "--scenario",
+        action="append",
+        choices=sorted(SCENARIOS),
+        help="сценарий (можно повторять; по умолчанию — все)",
+    )
+    parser.add_argument("--requests", type=int, default=DEFAULT_REQUESTS, help="запросов на сценарий")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="параллельных клиентов")
+    parser.add_argument("--subscribers", type=int, default=DEFAULT_SUBSCRIBERS, help="WebSocket-подписчиков")
+    parser.add_argument("--profiles", type=int, default=DEFAULT_PROFILES, help="профилей для чтения")
+    parser.add_argument("--lotteries", type=int, default=10, help="лотерей в симуляторе CLI")
+    parser.add_argument(
+        "--delivery-timeout",
+        type=float,
+        default=DEFAULT_DELIVERY_TIMEOUT,
+        help="ожидание доставки сообщения подписчику, секунд",
+    )
+    parser.add_argument("--output", help="путь для сохранения результатов в JSON")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    options = LoadOptions(
+        requests=args.requests,
+        concurrency=args.concurrency,
+        subscribers=args.subscribers,
+        profiles=args.profiles,
+        lotteries=args.lotteries,
+        delivery_timeout=args.delivery_timeout,
+    )
+    report = asyncio.run(run_scenarios(args.scenario or list(SCENARIOS), options))
+    print(_format_summary(report), file=sys.stderr)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            json.dump(report, handle, indent=2, ensure_ascii=False)
+            handle.write("\n")
+    else:
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
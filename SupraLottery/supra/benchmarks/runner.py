@@ -0,0 +1,280 @@
+"""Запуск микро- и макробенчмарков SupraLottery с выводом в JSON.
+
+Бенчмарки выполняются офлайн: вызовы Supra CLI обслуживает симулятор
+(``lib.simulator``), а HTTP-запросы — ``TestClient`` поверх ``api_server.app``.
+
+Пример использования::
+
+    python -m supra.scripts.cli benchmark -- --output bench.json
+    python -m supra.scripts.cli benchmark -- --filter gather_data --baseline bench.json
+
+При указании ``--baseline`` медианы сравниваются с сохранёнными результатами,
+а замедление сверх ``--threshold`` считается регрессией (код выхода 1).
+"""
+from __future__ import annotations
+
+import argparse
+import fnmatch
+import json
+import math
+import platform
+import statistics
+import sys
+import time
+from contextlib import ExitStack
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+
+RESULTS_FORMAT_VERSION = 1
+DEFAULT_ROUNDS = 5
+DEFAULT_MIN_ROUND_TIME = 0.05
+DEFAULT_THRESHOLD = 0.2
+
+Operation = Callable[[], Any]
+Setup = Callable[[ExitStack], Operation]
+
+
+@dataclass(slots=True)
+class Benchmark:
+    """Описание бенчмарка: ``setup`` готовит окружение и возвращает измеряемую операцию."""
+
+    name: str
+    group: str
+    setup: Setup
+    params: Dict[str, Any] = field(default_factory=dict)
+
+
+BENCHMARKS: Dict[str, Benchmark] = {}
+
+
+def register(name: str, group: str, **params: Any) -> Callable[[Setup], Setup]:
+    """Декоратор регистрации функции-``setup`` как бенчмарка."""
+
+    def decorator(setup: Setup) -> Setup:
+        if name in BENCHMARKS:
+            raise ValueError(f"Бенчмарк {name} уже зарегистрирован")
+        BENCHMARKS[name] = Benchmark(name=name, group=group, setup=setup, params=dict(params))
+        return setup
+
+    return decorator
+
+
+def select_benchmarks(patterns: Optional[Sequence[str]] = None) -> List[Benchmark]:
+    """Бенчмарки, имя или группа которых совпадает с одним из glob-шаблонов."""
+
+    _load_suites()
+    selected = []
+    for name in sorted(BENCHMARKS):
+        benchmark = BENCHMARKS[name]
+        if not patterns or any(
+            fnmatch.fnmatch(name, pattern) or fnmatch.fnmatch(benchmark.group, pattern) or pattern in name
+            for pattern in patterns
+        ):
+            selected.append(benchmark)
+    return selected
+
+
+def _percentile(values: Sequence[float], fraction: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, math.ceil(fraction * len(ordered)) - 1))
+    return ordered[index]
+
+
+def measure(
+    operation: Operation,
+    *,
+    rounds: int = DEFAULT_ROUNDS,
+    min_round_time: float = DEFAULT_MIN_ROUND_TIME,
+) -> Dict[str, Any]:
+    """Измеряет время одной операции: калибрует число итераций и повторяет раунды."""
+
+    if rounds <= 0:
+        raise ValueError("rounds должен быть положительным")
+
+    operation()  # прогрев: импорты, кэши, JIT в зависимостях
+    iterations = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(iterations):
+            operation()
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_round_time or iterations >= 1 << 20:
+            break
+        iterations *= 2
+
+    samples = [elapsed / iterations]
+    for _ in range(rounds - 1):
+        started = time.perf_counter()
+        for _ in range(iterations):
+            operation()
+        samples.append((time.perf_counter() - started) / iterations)
+
+    median = statistics.median(samples)
+    return {
+        "rounds": rounds,
+        "iterations": iterations,
+        "min": min(samples),
+        "median": median,
+        "mean": statistics.fmean(samples),
+        "stdev": statistics.pstdev(samples),
+        "p95": _percentile(samples, 0.95),
+        "ops_per_sec": (1.0 / median) if median > 0 else None,
+    }
+
+
+def run_benchmarks(
+    benchmarks: Iterable[Benchmark],
+    *,
+    rounds: int = DEFAULT_ROUNDS,
+    min_round_time: float = DEFAULT_MIN_ROUND_TIME,
+    progress: Optional[Callable[[str], None]] = None,
+) -> Dict[str, Any]:
+    """Выполняет бенчмарки и возвращает машиночитаемый отчёт."""
+
+    results: Dict[str, Any] = {}
+    for benchmark in benchmarks:
+        with ExitStack() as stack:
+            operation = benchmark.setup(stack)
+            stats = measure(operation, rounds=rounds, min_round_time=min_round_time)
+        results[benchmark.name] = {"group": benchmark.group, "params": benchmark.params, **stats}
+        if progress is not None:
+            progress(f"{benchmark.name:<40} median {stats['median'] * 1000:10.3f} ms")
+    return {
+        "version": RESULTS_FORMAT_VERSION,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+
+
+def compare_results(
+    current: Dict[str, Any],
+    baseline: Dict[str, Any],
+    threshold: float = DEFAULT_THRESHOLD,
+) -> List[Dict[str, Any]]:
+    """Сравнивает медианы с базовой линией; статус ``regression`` при замедлении > threshold."""
+
+    rows: List[Dict[str, Any]] = []
+    current_results = current.get("results", {})
+    baseline_results = baseline.get("results", {})
+    for name in sorted(set(current_results) | set(baseline_results)):
+        now = current_results.get(name)
+        before = baseline_results.get(name)
+        if now is None:
+            rows.append({"name": name, "status": "missing", "baseline": before["median"], "current": None})
+            continue
+        if before is None:
+            rows.append({"name": name, "status": "new", "baseline": None, "current": now["median"]})
+            continue
+        ratio = now["median"] / before["median"] if before["median"] else math.inf
+        if ratio > 1.0 + threshold:
+            status = "regression"
+        elif ratio < 1.0 - threshold:
+            status = "improvement"
+        else:
+            status = "ok"
+        rows.append(
+            {
+                "name": name,
+                "status": status,
+                "baseline": before["median"],
+                "current": now["median"],
+                "ratio": ratio,
+            }
+        )
+    return rows
+
+
+def _format_comparison(rows: Sequence[Dict[str, Any]]) -> str:
+    lines = []
+    for row in rows:
+        ratio = row.get("ratio")
+        ratio_text = f"x{ratio:.2f}" if ratio is not None else "-"
+        lines.append(f"[{row['status']:<11}] {row['name']:<40} {ratio_text}")
+    return "\n".join(lines)
+
+
+def _load_suites() -> None:
+    from . import suites  # noqa: F401  # регистрирует бенчмарки через декоратор
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Запустить бенчмарки мониторинга и API SupraLottery",
+    )
+    parser.add_argument(
+        "--filter",
+        action="append",
+        default=[],
+        help="glob-шаблон имени или группы бенчмарка (можно повторять)",
+    )
+    parser.add_argument("--list", action="store_true", help="показать бенчмарки и выйти")
+    parser.add_argument("--rounds", type=int, default=DEFAULT_ROUNDS, help="количество раундов измерения")
+    parser.add_argument(
+        "--min-round-time",
+        type=float,
+        default=DEFAULT_MIN_ROUND_TIME,
+        help="минимальная длительность раунда в секундах (для калибровки итераций)",
+    )
+    parser.add_argument("--output", help="путь для сохранения результатов в JSON")
+    parser.add_argument(
+        "--input",
+        help="не запускать бенчмарки, а взять результаты из JSON (для сравнения)",
+    )
+    parser.add_argument("--baseline", help="JSON с базовыми результатами для сравнения")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help="допустимое относительное замедление медианы (0.2 = 20%%)",
+    )
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    if args.list:
+        for benchmark in select_benchmarks(args.filter):
+            print(f"{benchmark.name:<40} [{benchmark.group}] {benchmark.params or ''}")
+        return
+
+    if args.input:
+        with open(args.input, encoding="utf-8") as handle:
+            report = json.load(handle)
+    else:
+        selected = select_benchmarks(args.filter)
+        if not selected:
+            parser.error("Ни один бенчмарк не соответствует фильтру")
+        report = run_benchmarks(
+            selected,
+            rounds=args.rounds,
+            min_round_time=args.min_round_time,
+            progress=lambda line: print(line, file=sys.stderr),
+        )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            json.dump(report, handle, indent=2, ensure_ascii=False)
+            handle.write("\n")
+    elif not args.baseline:
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as handle:
+            baseline = json.load(handle)
+        rows = compare_results(report, baseline, args.threshold)
+        print(_format_comparison(rows))
+        if any(row["status"] == "regression" for row in rows):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    # Под ``python -m`` этот файл — модуль ``__main__``, а suites регистрирует
+    # бенчмарки в импортируемом ``supra.benchmarks.runner``: запускаем его main.
+    from supra.benchmarks.runner import main as _main
+
+    _main()
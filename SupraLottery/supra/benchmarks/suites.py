@@ -0,0 +1,156 @@
+"""Набор бенчмарков горячих путей мониторинга и HTTP API."""
+from __future__ import annotations
+
+import os
+import tempfile
+from contextlib import ExitStack, contextmanager
+from typing import Any, Dict, Iterator, List
+
+from ..scripts.lib import monitoring
+from ..scripts.lib.monitoring import extract_optional, normalize_int
+from ..scripts.lib.simulator import SimulatedChain, SimulatorConfig
+from ..scripts.lib.vrf_audit import _filter_by_lottery
+from .runner import Operation, register
+
+GATHER_LOTTERY_COUNTS = (1, 10, 100, 1_000)
+API_LOTTERY_COUNT = 10
+PAYLOAD_SIZE = 100_000
+
+
+def _monitor_config() -> monitoring.MonitorConfig:
+    return monitoring.MonitorConfig(
+        profile="bench",
+        lottery_addr="0x1",
+        deposit_addr="0x2",
+        client_addr="0x3",
+        max_gas_price=1000,
+        max_gas_limit=500000,
+        verification_gas=1,
+    )
+
+
+@contextmanager
+def _simulated_backend(lottery_count: int) -> Iterator[SimulatedChain]:
+    chain = SimulatedChain(SimulatorConfig(lottery_count=lottery_count))
+    previous = monitoring.set_cli_backend(chain)
+    try:
+        yield chain
+    finally:
+        monitoring.set_cli_backend(previous)
+
+
+@contextmanager
+def api_environment(lottery_count: int = API_LOTTERY_COUNT, cache_ttl: float = 3600) -> Iterator[str]:
+    """Окружение ``api_server``: симулятор CLI и временная SQLite (путь к ней — в ``yield``)."""
+
+    from ..scripts.accounts.db import reset_engine
+
+    saved_env = os.environ.copy()
+    with tempfile.TemporaryDirectory() as tmpdir:
+        database_url = f"sqlite:///{os.path.join(tmpdir, 'bench.db')}"
+        os.environ.update(
+            {
+                "PROFILE": "bench",
+                "LOTTERY_ADDR": "0x1",
+                "DEPOSIT_ADDR": "0x2",
+                "CLIENT_ADDR": "0x3",
+                "MAX_GAS_PRICE": "1000",
+                "MAX_GAS_LIMIT": "500000",
+                "VERIFICATION_GAS_VALUE": "1",
+                "SUPRA_API_CACHE_TTL": str(cache_ttl),
+                "SUPRA_ACCOUNTS_DB_URL": database_url,
+                "SUPRA_CLI_BACKEND": "simulator",
+                "SUPRA_SIM_LOTTERIES": str(lottery_count),
+            }
+        )
+        # Нагрузка идёт от нескольких адресов в одну комнату: меряем сервер, а не лимиты.
+        os.environ.setdefault("SUPRA_CHAT_RATE_LIMIT", "off")
+        try:
+            yield database_url
+        finally:
+            reset_engine()
+            monitoring.set_cli_backend(None)
+            os.environ.clear()
+            os.environ.update(saved_env)
+
+
+@contextmanager
+def _api_client(lottery_count: int = API_LOTTERY_COUNT) -> Iterator[Any]:
+    """``TestClient`` для ``api_server.app`` в окружении :func:`api_environment`."""
+
+    from fastapi.testclient import TestClient
+
+    from ..scripts import api_server
+
+    with api_environment(lottery_count):
+        with TestClient(api_server.app) as client:
+            yield client
+
+
+def _register_gather(lottery_count: int) -> None:
+    @register(f"gather_data[{lottery_count}]", "monitoring", lotteries=lottery_count)
+    def _setup(stack: ExitStack) -> Operation:
+        stack.enter_context(_simulated_backend(lottery_count))
+        config = _monitor_config()
+        return lambda: monitoring.gather_data(config)
+
+
+for _count in GATHER_LOTTERY_COUNTS:
+    _register_gather(_count)
+
+
+@register("api_status[cache_hit]", "api", lotteries=API_LOTTERY_COUNT)
+def _status_cache_hit(stack: ExitStack) -> Operation:
+    client = stack.enter_context(_api_client())
+    client.get("/status")
+    return lambda: client.get("/status")
+
+
+@register("api_status[cache_miss]", "api", lotteries=API_LOTTERY_COUNT)
+def _status_cache_miss(stack: ExitStack) -> Operation:
+    client = stack.enter_context(_api_client())
+    return lambda: client.get("/status", params={"refresh": "true"})
+
+
+@register("api_vrf_log", "api", lotteries=API_LOTTERY_COUNT)
+def _vrf_log(stack: ExitStack) -> Operation:
+    client = stack.enter_context(_api_client())
+    return lambda: client.get("/lotteries/5/vrf-log", params={"limit": 200})
+
+
+def _mixed_int_payload(size: int) -> List[Any]:
+    samples: List[Any] = ["12345", "0x1f", 42, ["7"], 3.0, "", None]
+    return [samples[index % len(samples)] for index in range(size)]
+
+
+@register("normalize_int", "normalize", items=PAYLOAD_SIZE)
+def _normalize_int(stack: ExitStack) -> Operation:
+    payload = _mixed_int_payload(PAYLOAD_SIZE)
+
+    def run() -> None:
+        for value in payload:
+            normalize_int(value)
+
+    return run
+
+
+@register("extract_optional", "normalize", items=PAYLOAD_SIZE)
+def _extract_optional(stack: ExitStack) -> Operation:
+    samples: List[Any] = [[], [{"ticket_count": "1"}], ["a", "b"], {"raw": 1}]
+    payload = [samples[index % len(samples)] for index in range(PAYLOAD_SIZE)]
+
+    def run() -> None:
+        for value in payload:
+            extract_optional(value)
+
+    return run
+
+
+@register("filter_by_lottery", "normalize", events=40_000)
+def _filter_events(stack: ExitStack) -> Operation:
+    chain = SimulatedChain(SimulatorConfig(lottery_count=1_000, draws_per_lottery=10))
+    events: List[Dict[str, Any]] = chain.events(None, 40_000)
+    return lambda: _filter_by_lottery(events, 500)
+
+
+__all__ = ["API_LOTTERY_COUNT", "GATHER_LOTTERY_COUNTS", "PAYLOAD_SIZE", "api_environment"]
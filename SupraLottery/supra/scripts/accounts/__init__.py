@@ -1,7 +1,7 @@
 """Подсистема аккаунтов и профилей пользователей."""
 
 from .config import AccountsConfig, get_config_from_env
-from .db import init_engine, get_session, reset_engine
+from .db import get_async_session, init_engine, get_session, reset_engine
 from .router import router
 
 __all__ = [
@@ -9,6 +9,7 @@ __all__ = [
     "get_config_from_env",
     "init_engine",
     "get_session",
+    "get_async_session",
     "reset_engine",
     "router",
 ]
@@ -0,0 +1,129 @@
+"""LRU-кэш представлений профилей для пакетного запроса ``POST /accounts/batch``.
+
+Хранит и отсутствие профиля: у большинства авторов сообщений чата его нет.
+``upsert_profile`` сбрасывает запись в своём процессе; в остальных воркерах
+запись живёт не дольше ``SUPRA_ACCOUNTS_PROFILE_CACHE_TTL_SECONDS`` секунд
+(по умолчанию 30). Размер задаёт ``SUPRA_ACCOUNTS_PROFILE_CACHE_SIZE``
+(по умолчанию 1024, ``0`` — без кэша).
+
+Чтение, начатое до сброса, не кладёт в кэш устаревший профиль: ``put``
+принимает :meth:`ProfileCache.version`, снятую перед чтением из БД, и
+игнорируется, если с тех пор был ``invalidate``. Клиент, недавно писавший
+(чтения с основной БД, см. :func:`~.db.primary_reads`), кэш не использует.
+"""
+from __future__ import annotations
+
+import os
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from .db import engine_generation
+from .schemas import AccountProfile
+
+SIZE_ENV = "SUPRA_ACCOUNTS_PROFILE_CACHE_SIZE"
+TTL_ENV = "SUPRA_ACCOUNTS_PROFILE_CACHE_TTL_SECONDS"
+DEFAULT_SIZE = 1024
+DEFAULT_TTL_SECONDS = 30.0
+
+
+def _env_number(key: str, default: float) -> float:
+    raw = os.environ.get(key, "").strip()
+    if not raw:
+        return default
+    try:
+        value = float(raw)
+    except ValueError as exc:
+        raise ValueError(f"{key} должен быть числом") from exc
+    if value < 0:
+        raise ValueError(f"{key} не может быть отрицательным")
+    return value
+
+
+class ProfileCache:
+    """Адрес -> ``AccountProfile`` или ``None``, вытеснение по давности чтения."""
+
+    def __init__(
+        self,
+        maxsize: Optional[int] = None,
+        ttl: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._maxsize = maxsize
+        self._ttl = ttl
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self._generation = -1
+        self._version = 0
+        self._entries: "OrderedDict[str, Tuple[float, Optional[AccountProfile]]]" = OrderedDict()
+
+    @property
+    def maxsize(self) -> int:
+        if self._maxsize is None:
+            self._maxsize = int(_env_number(SIZE_ENV, DEFAULT_SIZE))
+        return self._maxsize
+
+    @property
+    def ttl(self) -> float:
+        if self._ttl is None:
+            self._ttl = _env_number(TTL_ENV, DEFAULT_TTL_SECONDS)
+        return self._ttl
+
+    def _check_generation(self) -> None:
+        generation = engine_generation()
+        if generation != self._generation:
+            self._entries.clear()
+            self._generation = generation
+
+    def get_many(self, addresses: Iterable[str]) -> Tuple[Dict[str, Optional[AccountProfile]], List[str]]:
+        """Найденные в кэше записи и адреса, которые нужно прочитать из БД."""
+
+        self._check_generation()
+        now = self.clock()
+        found: Dict[str, Optional[AccountProfile]] = {}
+        missing: List[str] = []
+        for address in addresses:
+            entry = self._entries.get(address)
+            if entry is None or now - entry[0] >= self.ttl:
+                self._entries.pop(address, None)
+                missing.append(address)
+                continue
+            self._entries.move_to_end(address)
+            found[address] = entry[1]
+        self.hits += len(found)
+        self.misses += len(missing)
+        return found, missing
+
+    def version(self) -> int:
+        """Счётчик сбросов; снимается перед чтением из БД и передаётся в :meth:`put`."""
+
+        self._check_generation()
+        return self._version
+
+    def put(self, address: str, profile: Optional[AccountProfile], version: Optional[int] = None) -> None:
+        if self.maxsize <= 0:
+            return
+        self._check_generation()
+        if version is not None and version != self._version:
+            return
+        self._entries[address] = (self.clock(), profile)
+        self._entries.move_to_end(address)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, address: Optional[str] = None) -> None:
+        self._version += 1
+        if address is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(address, None)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+profile_cache = ProfileCache()
+
+
+__all__ = ["ProfileCache", "SIZE_ENV", "TTL_ENV", "profile_cache"]
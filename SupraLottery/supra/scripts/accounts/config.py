@@ -1,8 +1,28 @@
-"""Загрузка конфигурации подсистемы аккаунтов из окружения."""
+"""Загрузка конфигурации подсистемы аккаунтов из окружения.
+
+Помимо ``SUPRA_ACCOUNTS_DB_URL`` поддерживаются настройки пула соединений
+(``SUPRA_ACCOUNTS_DB_POOL_SIZE``, ``_MAX_OVERFLOW``, ``_POOL_TIMEOUT``,
+``_POOL_RECYCLE``, ``_POOL_PRE_PING``; по умолчанию — значения SQLAlchemy)
+и PRAGMA для SQLite, выполняемые на каждом новом соединении:
+``SUPRA_ACCOUNTS_DB_JOURNAL_MODE`` (``wal``), ``_SYNCHRONOUS`` (``normal``),
+``_BUSY_TIMEOUT_MS`` (5000) и ``_MMAP_SIZE`` (256 МиБ, ``0`` — выключить).
+
+``SUPRA_ACCOUNTS_DB_REPLICA_URL`` включает чтение GET-запросов с реплики;
+после записи клиент ``SUPRA_ACCOUNTS_DB_REPLICA_STICKY_SECONDS`` секунд
+(по умолчанию 5) читает с основной БД.
+"""
 from __future__ import annotations
 
 from dataclasses import dataclass
 import os
+from typing import Mapping, Optional
+
+
+_DEFAULT_JOURNAL_MODE = "wal"
+_DEFAULT_SYNCHRONOUS = "normal"
+_DEFAULT_BUSY_TIMEOUT_MS = 5000
+_DEFAULT_MMAP_SIZE = 256 * 1024 * 1024
+_DEFAULT_STICKY_SECONDS = 5
 
 
 @dataclass(frozen=True, slots=True)
@@ -10,10 +30,60 @@ class AccountsConfig:
     """Настройки подключения к базе данных аккаунтов."""
 
     database_url: str
+    pool_size: Optional[int] = None
+    max_overflow: Optional[int] = None
+    pool_timeout: Optional[float] = None
+    pool_recycle: Optional[int] = None
+    pool_pre_ping: bool = False
+    sqlite_journal_mode: str = _DEFAULT_JOURNAL_MODE
+    sqlite_synchronous: str = _DEFAULT_SYNCHRONOUS
+    sqlite_busy_timeout_ms: int = _DEFAULT_BUSY_TIMEOUT_MS
+    sqlite_mmap_size: int = _DEFAULT_MMAP_SIZE
+    replica_url: Optional[str] = None
+    replica_sticky_seconds: float = _DEFAULT_STICKY_SECONDS
 
 
 _DEFAULT_DB_URL = "sqlite:///./supra_accounts.db"
 _ENV_KEY = "SUPRA_ACCOUNTS_DB_URL"
+_ENV_PREFIX = "SUPRA_ACCOUNTS_DB_"
+
+SQLITE_JOURNAL_MODES = ("delete", "truncate", "persist", "memory", "wal", "off")
+SQLITE_SYNCHRONOUS_MODES = ("off", "normal", "full", "extra")
+
+_TRUE_VALUES = {"1", "true", "yes", "on"}
+_FALSE_VALUES = {"0", "false", "no", "off"}
+
+
+def _int_setting(env: Mapping[str, str], name: str, minimum: int) -> Optional[int]:
+    key = _ENV_PREFIX + name
+    raw = env.get(key, "").strip()
+    if not raw:
+        return None
+    try:
+        value = int(raw)
+    except ValueError as exc:
+        raise ValueError(f"{key} должен быть целым числом") from exc
+    if value < minimum:
+        raise ValueError(f"{key} должен быть не меньше {minimum}")
+    return value
+
+
+def _choice_setting(env: Mapping[str, str], name: str, choices: tuple[str, ...], default: str) -> str:
+    key = _ENV_PREFIX + name
+    value = env.get(key, "").strip().lower() or default
+    if value not in choices:
+        raise ValueError(f"{key} должен быть одним из: {', '.join(choices)}")
+    return value
+
+
+def _bool_setting(env: Mapping[str, str], name: str) -> bool:
+    key = _ENV_PREFIX + name
+    raw = env.get(key, "").strip().lower()
+    if not raw or raw in _FALSE_VALUES:
+        return False
+    if raw in _TRUE_VALUES:
+        return True
+    raise ValueError(f"{key} должен быть логическим значением")
 
 
 def get_config_from_env(overrides: dict[str, str] | None = None) -> AccountsConfig:
@@ -27,7 +97,24 @@ def get_config_from_env(overrides: dict[str, str] | None = None) -> AccountsConf
     if not database_url:
         raise ValueError("SUPRA_ACCOUNTS_DB_URL не может быть пустым")
 
-    return AccountsConfig(database_url=database_url)
+    pool_timeout = _int_setting(env, "POOL_TIMEOUT", 1)
+    busy_timeout = _int_setting(env, "BUSY_TIMEOUT_MS", 0)
+    mmap_size = _int_setting(env, "MMAP_SIZE", 0)
+    sticky_seconds = _int_setting(env, "REPLICA_STICKY_SECONDS", 0)
+    return AccountsConfig(
+        database_url=database_url,
+        pool_size=_int_setting(env, "POOL_SIZE", 1),
+        max_overflow=_int_setting(env, "MAX_OVERFLOW", -1),
+        pool_timeout=float(pool_timeout) if pool_timeout is not None else None,
+        pool_recycle=_int_setting(env, "POOL_RECYCLE", -1),
+        pool_pre_ping=_bool_setting(env, "POOL_PRE_PING"),
+        sqlite_journal_mode=_choice_setting(env, "JOURNAL_MODE", SQLITE_JOURNAL_MODES, _DEFAULT_JOURNAL_MODE),
+        sqlite_synchronous=_choice_setting(env, "SYNCHRONOUS", SQLITE_SYNCHRONOUS_MODES, _DEFAULT_SYNCHRONOUS),
+        sqlite_busy_timeout_ms=busy_timeout if busy_timeout is not None else _DEFAULT_BUSY_TIMEOUT_MS,
+        sqlite_mmap_size=mmap_size if mmap_size is not None else _DEFAULT_MMAP_SIZE,
+        replica_url=env.get(_ENV_PREFIX + "REPLICA_URL", "").strip() or None,
+        replica_sticky_seconds=float(sticky_seconds if sticky_seconds is not None else _DEFAULT_STICKY_SECONDS),
+    )
 
 
 __all__ = ["AccountsConfig", "get_config_from_env"]
@@ -1,13 +1,37 @@
-"""Инициализация подключения к базе данных аккаунтов."""
+"""Инициализация подключения к базе данных аккаунтов.
+
+Рядом с синхронным движком создаётся асинхронный (``aiosqlite`` для SQLite,
+``asyncpg`` для PostgreSQL), через который работают сервисные слои
+HTTP-роутеров: запросы к БД не занимают потоки пула Starlette. Если драйвера
+или ``greenlet`` нет, :func:`get_async_session` отдаёт обёртку над
+синхронной сессией, выполняющую запросы в пуле потоков.
+
+Если задан ``SUPRA_ACCOUNTS_DB_REPLICA_URL``, сессии с ``readonly=True``
+читают с реплики. Внутри :func:`primary_reads` (HTTP-запросы клиента,
+недавно выполнившего запись) они тоже идут в основную БД, чтобы клиент
+видел собственные изменения, даже если реплика отстаёт.
+"""
 from __future__ import annotations
 
-from contextlib import contextmanager
-from typing import Iterator
+import asyncio
+import importlib.util
+import logging
+import sqlite3
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Callable, Iterator, Optional, Sequence, TypeVar
 
-from sqlalchemy import create_engine
-from sqlalchemy.engine import Engine
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import Table, create_engine, event
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.engine import URL, CursorResult, Engine, Result, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import NullPool
 
+from ..lib.tracing import instrument_engine
 from .config import AccountsConfig
 from .tables import Base
 
@@ -23,48 +47,414 @@ except ImportError:  # pragma: no cover - модули не обязательн
     _realtime_tables = None  # type: ignore[assignment]
     _support_tables = None  # type: ignore[assignment]
 
-_ENGINE: Engine | None = None
-_SESSION_FACTORY: sessionmaker[Session] | None = None
 
+# Асинхронный драйвер для синхронного диалекта из SUPRA_ACCOUNTS_DB_URL.
+ASYNC_DRIVERS = {"sqlite": "aiosqlite", "postgresql": "asyncpg"}
 
-def init_engine(config: AccountsConfig) -> None:
-    """Создаёт движок и проводит миграции (создание таблиц)."""
+logger = logging.getLogger(__name__)
 
-    global _ENGINE, _SESSION_FACTORY
+T = TypeVar("T")
 
-    if _ENGINE is not None:
-        _ENGINE.dispose()
 
-    connect_args = {"check_same_thread": False} if config.database_url.startswith("sqlite") else {}
-    engine = create_engine(config.database_url, future=True, connect_args=connect_args)
-    Base.metadata.create_all(engine)
+@dataclass
+class _Engines:
+    """Синхронный и асинхронный движки одной БД с фабриками сессий."""
 
-    _ENGINE = engine
-    _SESSION_FACTORY = sessionmaker(engine, expire_on_commit=False, future=True)
+    engine: Engine
+    sessions: sessionmaker[Session]
+    async_engine: AsyncEngine | None = None
+    async_sessions: async_sessionmaker[AsyncSession] | None = None
 
+    def dispose(self) -> None:
+        self.engine.dispose()
+        if self.async_engine is not None:
+            _dispose_async_engine(self.async_engine)
 
-@contextmanager
-def get_session() -> Iterator[Session]:
-    """Возвращает сессию SQLAlchemy для работы с профилями."""
 
-    if _SESSION_FACTORY is None:
+_PRIMARY: _Engines | None = None
+_REPLICA: _Engines | None = None
+_STICKY_SECONDS: float = 0.0
+_GENERATION = 0
+_PRIMARY_READS: ContextVar[bool] = ContextVar("supra_accounts_primary_reads", default=False)
+
+
+def init_engine(config: AccountsConfig, *, pool_async_sqlite: bool = False) -> None:
+    """Создаёт движки (основной и, если задана, реплику) и создаёт таблицы.
+
+    ``pool_async_sqlite=True`` — асинхронные сессии SQLite берут соединения
+    из пула, а не открывают новое (с потоком aiosqlite и PRAGMA) на каждую
+    сессию. Годится, только когда движком пользуется один event loop
+    (HTTP-приложение); пул закрывает :func:`dispose_async_engine`.
+    """
+
+    global _PRIMARY, _REPLICA, _STICKY_SECONDS, _GENERATION
+
+    reset_engine()
+    _GENERATION += 1
+
+    primary = _build_engines(config.database_url, config, pool_async_sqlite)
+    Base.metadata.create_all(primary.engine)
+    _ensure_indexes(primary.engine)
+    _PRIMARY = primary
+    # Схему реплики ведёт репликация, DDL туда не отправляем.
+    _REPLICA = _build_engines(config.replica_url, config, pool_async_sqlite) if config.replica_url else None
+    _STICKY_SECONDS = config.replica_sticky_seconds
+
+
+def _build_engines(database_url: str, config: AccountsConfig, pool_async_sqlite: bool = False) -> _Engines:
+    url = make_url(database_url)
+    connect_args = {"check_same_thread": False} if url.get_backend_name() == "sqlite" else {}
+    engine = create_engine(url, future=True, connect_args=connect_args, **_pool_options(config, url))
+    _install_sqlite_pragmas(engine, config)
+    instrument_engine(engine)
+    engines = _Engines(engine, sessionmaker(engine, expire_on_commit=False, future=True))
+
+    async_engine = _create_async_engine(database_url, config, pool_async_sqlite)
+    if async_engine is not None:
+        _install_sqlite_pragmas(async_engine.sync_engine, config)
+        instrument_engine(async_engine)
+        engines.async_engine = async_engine
+        engines.async_sessions = async_sessionmaker(async_engine, expire_on_commit=False)
+    return engines
+
+
+def _is_memory_sqlite(url: URL) -> bool:
+    return url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:")
+
+
+def _pool_options(config: AccountsConfig, url: URL, *, sized: bool = True) -> dict[str, Any]:
+    """Параметры пула из конфигурации; незаданные остаются по умолчанию SQLAlchemy.
+
+    Размер, переполнение и таймаут есть только у очереди соединений —
+    in-memory SQLite и ``NullPool`` их не принимают.
+    """
+
+    options: dict[str, Any] = {"pool_pre_ping": config.pool_pre_ping}
+    if config.pool_recycle is not None:
+        options["pool_recycle"] = config.pool_recycle
+    if not sized or _is_memory_sqlite(url):
+        return options
+    for key in ("pool_size", "max_overflow", "pool_timeout"):
+        value = getattr(config, key)
+        if value is not None:
+            options[key] = value
+    return options
+
+
+def _sqlite_pragmas(config: AccountsConfig, url: URL) -> list[str]:
+    pragmas = [
+        f"PRAGMA busy_timeout = {int(config.sqlite_busy_timeout_ms)}",
+        f"PRAGMA synchronous = {config.sqlite_synchronous.upper()}",
+    ]
+    if not _is_memory_sqlite(url):
+        # WAL: читатели не ждут писателя, писатель — читателей.
+        pragmas.insert(0, f"PRAGMA journal_mode = {config.sqlite_journal_mode.upper()}")
+        pragmas.append(f"PRAGMA mmap_size = {int(config.sqlite_mmap_size)}")
+    return pragmas
+
+
+def _install_sqlite_pragmas(engine: Engine, config: AccountsConfig) -> None:
+    """Выполняет PRAGMA из конфигурации на каждом новом соединении SQLite."""
+
+    if engine.dialect.name != "sqlite":
+        return
+    pragmas = _sqlite_pragmas(config, engine.url)
+
+    @event.listens_for(engine, "connect")
+    def _apply(dbapi_connection, connection_record):  # type: ignore[no-untyped-def]
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in pragmas:
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
+
+
+def async_database_url(database_url: str) -> Optional[str]:
+    """URL асинхронного драйвера для ``database_url`` или ``None``, если его нет.
+
+    In-memory SQLite пропускается: у второго движка была бы своя пустая база.
+    """
+
+    url = make_url(database_url)
+    backend = url.get_backend_name()
+    driver = ASYNC_DRIVERS.get(backend)
+    if driver is None:
+        return None
+    if _is_memory_sqlite(url):
+        return None
+    return url.set(drivername=f"{backend}+{driver}").render_as_string(hide_password=False)
+
+
+def _create_async_engine(database_url: str, config: AccountsConfig, pooled_sqlite: bool = False) -> AsyncEngine | None:
+    async_url = async_database_url(database_url)
+    if async_url is None:
+        return None
+    driver = make_url(async_url).get_driver_name()
+    missing = [name for name in (driver, "greenlet") if importlib.util.find_spec(name) is None]
+    if missing:
+        logger.warning(
+            "Асинхронный движок БД недоступен (нет %s), запросы пойдут через пул потоков",
+            ", ".join(missing),
+        )
+        return None
+    if async_url.startswith("sqlite") and not pooled_sqlite:
+        # Соединение aiosqlite держит свой поток и не переживает event loop,
+        # в котором создано; CLI и тесты запускают по циклу на asyncio.run.
+        return create_async_engine(
+            async_url, poolclass=NullPool, **_pool_options(config, make_url(async_url), sized=False)
+        )
+    return create_async_engine(async_url, **_pool_options(config, make_url(async_url)))
+
+
+def _ensure_indexes(engine: Engine) -> None:
+    """Создаёт индексы, добавленные в модели после создания таблиц.
+
+    ``create_all`` не трогает существующие таблицы, поэтому новые индексы
+    (например, составные для keyset-пагинации) досоздаются отдельно.
+    """
+
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            try:
+                index.create(engine, checkfirst=True)
+            except IntegrityError:
+                # Уникальный индекс не создаётся поверх дублей: их нужно
+                # разобрать вручную, остальная схема работает и без него.
+                logger.warning("Индекс %s не создан: в %s есть дубликаты", index.name, table.name)
+
+
+def _engines_for(readonly: bool) -> _Engines:
+    if _PRIMARY is None:
         raise RuntimeError("Движок аккаунтов не инициализирован")
+    if readonly and _REPLICA is not None and not _PRIMARY_READS.get():
+        return _REPLICA
+    return _PRIMARY
+
+
+@contextmanager
+def primary_reads() -> Iterator[None]:
+    """Внутри блока ``readonly``-сессии тоже открываются на основной БД."""
+
+    token = _PRIMARY_READS.set(True)
+    try:
+        yield
+    finally:
+        _PRIMARY_READS.reset(token)
+
+
+def primary_reads_active() -> bool:
+    """Открываются ли сейчас ``readonly``-сессии на основной БД (внутри :func:`primary_reads`)."""
+
+    return _PRIMARY_READS.get()
+
+
+def engine_generation() -> int:
+    """Номер текущей инициализации движков: кэши данных БД сверяются с ним."""
+
+    return _GENERATION
+
+
+def read_your_writes_window() -> Optional[float]:
+    """Сколько секунд после записи клиент читает с основной БД; ``None`` без реплики."""
+
+    return _STICKY_SECONDS if _REPLICA is not None else None
+
+
+@contextmanager
+def get_session(readonly: bool = False) -> Iterator[Session]:
+    """Возвращает сессию SQLAlchemy; ``readonly=True`` допускает чтение с реплики."""
 
-    session = _SESSION_FACTORY()
+    session = _engines_for(readonly).sessions()
     try:
         yield session
     finally:
         session.close()
 
 
+class _ThreadpoolStreamResult:
+    """Аналог :class:`AsyncResult`: строки читаются порциями в пуле потоков."""
+
+    def __init__(self, result: Result[Any]) -> None:
+        self._result = result
+
+    async def partitions(self, size: Optional[int] = None) -> AsyncIterator[Sequence[Any]]:
+        while True:
+            rows = await run_in_threadpool(self._result.fetchmany, size)
+            if not rows:
+                return
+            yield rows
+
+    async def close(self) -> None:
+        await run_in_threadpool(self._result.close)
+
+
+class _ThreadpoolSession:
+    """Подмножество API :class:`AsyncSession` поверх синхронной сессии.
+
+    Используется, когда асинхронный драйвер не установлен: каждый запрос
+    выполняется в пуле потоков, результаты буферизуются там же.
+    """
+
+    def __init__(self, session: Session) -> None:
+        self.sync_session = session
+
+    async def _run(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        return await run_in_threadpool(func, *args, **kwargs)
+
+    def add(self, instance: object) -> None:
+        self.sync_session.add(instance)
+
+    def get_bind(self) -> Any:
+        return self.sync_session.get_bind()
+
+    def add_all(self, instances: Sequence[object]) -> None:
+        self.sync_session.add_all(instances)
+
+    def _execute(self, statement: Any, params: Any = None, **kwargs: Any) -> Result[Any]:
+        result = self.sync_session.execute(statement, params, **kwargs)
+        if isinstance(result, CursorResult) and not result.returns_rows:
+            return result
+        return result.freeze()()
+
+    async def execute(self, statement: Any, params: Any = None, **kwargs: Any) -> Result[Any]:
+        return await self._run(self._execute, statement, params, **kwargs)
+
+    async def scalars(self, statement: Any, params: Any = None, **kwargs: Any) -> Any:
+        return (await self.execute(statement, params, **kwargs)).scalars()
+
+    async def stream(self, statement: Any, params: Any = None, **kwargs: Any) -> _ThreadpoolStreamResult:
+        statement = statement.execution_options(stream_results=True)
+        return _ThreadpoolStreamResult(await self._run(self.sync_session.execute, statement, params, **kwargs))
+
+    async def scalar(self, statement: Any, params: Any = None, **kwargs: Any) -> Any:
+        return (await self.execute(statement, params, **kwargs)).scalar()
+
+    async def get(self, entity: Any, ident: Any, **kwargs: Any) -> Any:
+        return await self._run(self.sync_session.get, entity, ident, **kwargs)
+
+    async def flush(self) -> None:
+        await self._run(self.sync_session.flush)
+
+    async def commit(self) -> None:
+        await self._run(self.sync_session.commit)
+
+    async def rollback(self) -> None:
+        await self._run(self.sync_session.rollback)
+
+    async def refresh(self, instance: object, attribute_names: Optional[Sequence[str]] = None) -> None:
+        await self._run(self.sync_session.refresh, instance, attribute_names)
+
+    async def close(self) -> None:
+        await self._run(self.sync_session.close)
+
+    @asynccontextmanager
+    async def begin(self) -> AsyncIterator["_ThreadpoolSession"]:
+        await self._run(self.sync_session.begin)
+        try:
+            yield self
+        except BaseException:
+            await self.rollback()
+            raise
+        await self.commit()
+
+
+@asynccontextmanager
+async def get_async_session(readonly: bool = False) -> AsyncIterator[AsyncSession]:
+    """Асинхронная сессия SQLAlchemy (или её аналог поверх пула потоков)."""
+
+    engines = _engines_for(readonly)
+    if engines.async_sessions is not None:
+        async with engines.async_sessions() as session:
+            yield session
+        return
+
+    fallback = _ThreadpoolSession(engines.sessions())
+    try:
+        yield fallback  # type: ignore[misc]
+    finally:
+        await fallback.close()
+
+
+def has_async_engine() -> bool:
+    """Работают ли асинхронные сессии без пула потоков."""
+
+    return _PRIMARY is not None and _PRIMARY.async_engine is not None
+
+
+async def dispose_async_engine() -> None:
+    """Закрывает соединения асинхронных пулов в текущем цикле (остановка приложения)."""
+
+    for engines in (_PRIMARY, _REPLICA):
+        if engines is not None and engines.async_engine is not None:
+            await engines.async_engine.dispose()
+
+
+def _dispose_async_engine(engine: AsyncEngine) -> None:
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        asyncio.run(engine.dispose())
+        return
+    # Внутри работающего цикла дождаться закрытия нельзя: просто отпускаем пул.
+    engine.sync_engine.dispose(close=False)
+
+
+_DIALECT_INSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+
+def dialect_insert(session: AsyncSession, table: Table) -> Any:
+    """``INSERT`` диалекта сессии с поддержкой ``ON CONFLICT`` (SQLite, PostgreSQL)."""
+
+    dialect = session.get_bind().dialect.name
+    try:
+        return _DIALECT_INSERTS[dialect](table)
+    except KeyError:
+        raise RuntimeError(f"Массовые операции не поддерживают диалект {dialect}") from None
+
+
+def max_bind_params(session: AsyncSession) -> int:
+    """Сколько параметров допускает один запрос в диалекте сессии.
+
+    SQLite до 3.32 принимает 999 параметров, начиная с 3.32 — 32766;
+    asyncpg ограничен 32767.
+    """
+
+    if session.get_bind().dialect.name == "sqlite":
+        return 32766 if sqlite3.sqlite_version_info >= (3, 32, 0) else 999
+    return 32767
+
+
+def rows_per_statement(session: AsyncSession, columns: int) -> int:
+    """Строк в одном ``INSERT ... VALUES`` из ``columns`` колонок в пределах лимита параметров."""
+
+    return max(1, max_bind_params(session) // max(columns, 1))
+
+
 def reset_engine() -> None:
     """Сбрасывает движок (используется в тестах)."""
 
-    global _ENGINE, _SESSION_FACTORY
-    if _ENGINE is not None:
-        _ENGINE.dispose()
-    _ENGINE = None
-    _SESSION_FACTORY = None
+    global _PRIMARY, _REPLICA
+    for engines in (_PRIMARY, _REPLICA):
+        if engines is not None:
+            engines.dispose()
+    _PRIMARY = None
+    _REPLICA = None
 
 
-__all__ = ["init_engine", "get_session", "reset_engine"]
+__all__ = [
+    "async_database_url",
+    "dialect_insert",
+    "dispose_async_engine",
+    "engine_generation",
+    "get_async_session",
+    "get_session",
+    "max_bind_params",
+    "rows_per_statement",
+    "has_async_engine",
+    "init_engine",
+    "primary_reads",
+    "primary_reads_active",
+    "read_your_writes_window",
+    "reset_engine",
+]
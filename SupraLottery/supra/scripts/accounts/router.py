@@ -1,15 +1,16 @@
 """FastAPI-маршруты для работы с аккаунтами."""
 from __future__ import annotations
 
-from typing import Iterator
+from typing import AsyncIterator
 
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from .cache import profile_cache
 from .config import get_config_from_env
-from .db import get_session, init_engine
-from .schemas import AccountProfile, AccountProfileUpdate, AvatarPayload
-from .service import AccountsService, AvatarUpdate, ProfileUpdate
+from .db import get_async_session, get_session, init_engine, primary_reads_active
+from .schemas import AccountBatchRequest, AccountBatchResponse, AccountProfile, AccountProfileUpdate, AvatarPayload
+from .service import AccountsService, AvatarUpdate, ProfileUpdate, _normalize_address
 
 router = APIRouter(prefix="/accounts", tags=["accounts"])
 
@@ -23,21 +24,60 @@ def _ensure_engine() -> None:
         init_engine(config)
 
 
-def _session_dependency() -> Iterator[Session]:
+async def _session_dependency() -> AsyncIterator[AsyncSession]:
     _ensure_engine()
-    with get_session() as session:
+    async with get_async_session() as session:
+        yield session
+
+
+async def _readonly_session_dependency() -> AsyncIterator[AsyncSession]:
+    _ensure_engine()
+    async with get_async_session(readonly=True) as session:
         yield session
 
 
 @router.get("/{address}", response_model=AccountProfile)
-def get_profile(address: str, session: Session = Depends(_session_dependency)) -> AccountProfile:
+async def get_profile(
+    address: str, session: AsyncSession = Depends(_readonly_session_dependency)
+) -> AccountProfile:
     service = AccountsService(session)
-    account = service.get_account(address)
+    account = await service.get_account(address)
     if account is None:
         raise HTTPException(status.HTTP_404_NOT_FOUND, detail="Профиль не найден")
     return AccountProfile.model_validate(account)
 
 
+@router.post("/batch", response_model=AccountBatchResponse)
+async def get_profiles_batch(
+    payload: AccountBatchRequest, session: AsyncSession = Depends(_readonly_session_dependency)
+) -> AccountBatchResponse:
+    """Профили авторов чата или победителей одним запросом вместо N ``GET``."""
+
+    try:
+        addresses = list(dict.fromkeys(_normalize_address(address) for address in payload.addresses))
+    except ValueError as exc:
+        raise HTTPException(status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(exc)) from exc
+
+    # После своей записи клиент читает с основной БД мимо кэша.
+    cached = not primary_reads_active()
+    views, missing = profile_cache.get_many(addresses) if cached else ({}, addresses)
+    if missing:
+        version = profile_cache.version()
+        loaded = {
+            account.address: AccountProfile.model_validate(account)
+            for account in await AccountsService(session).get_accounts(missing)
+        }
+        for address in missing:
+            views[address] = loaded.get(address)
+            if cached:
+                profile_cache.put(address, views[address], version)
+
+    return AccountBatchResponse(
+        profiles=[views[address] for address in addresses if views[address] is not None],
+        missing=[address for address in addresses if views[address] is None],
+    )
+
+
 def _build_avatar(update: AvatarPayload | None) -> AvatarUpdate | None:
     if update is None:
         return None
@@ -45,13 +85,13 @@ def _build_avatar(update: AvatarPayload | None) -> AvatarUpdate | None:
 
 
 @router.put("/{address}", response_model=AccountProfile)
-def upsert_profile(
+async def upsert_profile(
     address: str,
     payload: AccountProfileUpdate,
-    session: Session = Depends(_session_dependency),
+    session: AsyncSession = Depends(_session_dependency),
 ) -> AccountProfile:
     service = AccountsService(session)
-    account = service.upsert_account(
+    account = await service.upsert_account(
         address,
         ProfileUpdate(
             nickname=payload.nickname,
@@ -61,7 +101,8 @@ def upsert_profile(
             settings=payload.settings,
         ),
     )
-    session.commit()
+    await session.commit()
+    profile_cache.invalidate(account.address)
     return AccountProfile.model_validate(account)
 
 
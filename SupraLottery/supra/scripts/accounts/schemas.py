@@ -2,7 +2,7 @@
 from __future__ import annotations
 
 from datetime import datetime
-from typing import Any, Optional
+from typing import Annotated, Any, Optional
 
 from pydantic import BaseModel, ConfigDict, Field
 
@@ -44,4 +44,28 @@ class AccountProfile(BaseModel):
     updated_at: datetime = Field(description="Метка обновления")
 
 
-__all__ = ["AvatarPayload", "AccountProfileUpdate", "AccountProfile"]
+MAX_BATCH_ADDRESSES = 500
+
+
+class AccountBatchRequest(BaseModel):
+    """Адреса для пакетного получения профилей."""
+
+    addresses: list[Annotated[str, Field(min_length=1, max_length=80)]] = Field(
+        min_length=1, max_length=MAX_BATCH_ADDRESSES, description="Адреса в любом регистре"
+    )
+
+
+class AccountBatchResponse(BaseModel):
+    """Профили в порядке запроса (без повторов) и адреса без профиля."""
+
+    profiles: list[AccountProfile]
+    missing: list[str] = Field(default_factory=list)
+
+
+__all__ = [
+    "AvatarPayload",
+    "AccountProfileUpdate",
+    "AccountProfile",
+    "AccountBatchRequest",
+    "AccountBatchResponse",
+]
@@ -2,11 +2,12 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Any, Optional
+from typing import Any, Iterable, Optional
 
 from sqlalchemy import select
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from ..lib.tracing import traced
 from .tables import Account
 
 
@@ -35,17 +36,29 @@ class ProfileUpdate:
 class AccountsService:
     """Инкапсулирует операции над профилями."""
 
-    def __init__(self, session: Session) -> None:
+    def __init__(self, session: AsyncSession) -> None:
         self._session = session
 
-    def get_account(self, address: str) -> Account | None:
+    @traced("accounts.get_account")
+    async def get_account(self, address: str) -> Account | None:
         stmt = select(Account).where(Account.address == _normalize_address(address))
-        return self._session.execute(stmt).scalar_one_or_none()
+        return (await self._session.execute(stmt)).scalar_one_or_none()
 
-    def upsert_account(self, address: str, update: ProfileUpdate) -> Account:
+    @traced("accounts.get_accounts")
+    async def get_accounts(self, addresses: Iterable[str]) -> list[Account]:
+        """Профили по списку адресов одним ``IN (...)``; отсутствующие пропускаются."""
+
+        normalized = list(dict.fromkeys(_normalize_address(address) for address in addresses))
+        if not normalized:
+            return []
+        stmt = select(Account).where(Account.address.in_(normalized))
+        return list((await self._session.execute(stmt)).scalars())
+
+    @traced("accounts.upsert_account")
+    async def upsert_account(self, address: str, update: ProfileUpdate) -> Account:
         normalized = _normalize_address(address)
         stmt = select(Account).where(Account.address == normalized)
-        account = self._session.execute(stmt).scalar_one_or_none()
+        account = (await self._session.execute(stmt)).scalar_one_or_none()
 
         if account is None:
             account = Account(address=normalized)
@@ -65,7 +78,7 @@ class AccountsService:
         if update.settings is not None:
             account.settings = dict(update.settings)
 
-        self._session.flush()
+        await self._session.flush()
         return account
 
 
@@ -8,9 +8,14 @@ import sys
 import time
 from typing import Any, Dict, List, Mapping, MutableMapping, Optional
 
-from fastapi import Depends, FastAPI, HTTPException, Query, Request, status
+from fastapi import Depends, FastAPI, HTTPException, Query, Request, WebSocket, WebSocketDisconnect, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
+from starlette.datastructures import MutableHeaders
 from starlette.middleware import Middleware
+from starlette.requests import HTTPConnection
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 from pydantic import BaseModel, Field
 import uvicorn
 
@@ -18,16 +23,35 @@ from . import cli
 from .accounts import get_config_from_env as get_accounts_config
 from .accounts import init_engine as init_accounts_engine
 from .accounts import router as accounts_router
+from .accounts.db import dispose_async_engine, primary_reads, read_your_writes_window
 from .progress import router as progress_router
+from .realtime import connection_manager
 from .realtime import router as realtime_router
+from .realtime.backplane import backplane_from_env
+from .realtime.status_stream import StatusStream, interval_from_env
+from .realtime.topics import lottery_topic
+from .realtime.rate_limit import configure_rate_limiter_from_env, get_rate_limiter
+from .realtime.write_behind import configure_chat_writer_from_env, set_chat_writer
 from .support import router as support_router
 from .lib.monitoring import (
     CliError,
     ConfigError,
     MonitorConfig,
+    configure_cli_backend_from_env,
     gather_data,
     monitor_config_from_env,
 )
+from .lib.instrumentation import (
+    CLI_METRICS,
+    RequestTimings,
+    activate_timings,
+    current_timings,
+    deactivate_timings,
+    record_timing,
+    timed,
+)
+from .lib.report_metrics import DEFAULT_METRIC_PREFIX, ReportMetricsRenderer, render_report_age
+from .lib.tracing import configure_tracing_from_env, span
 from .lib.vrf_audit import gather_vrf_log
 
 app = FastAPI(title="Supra Lottery API", version="0.1.0")
@@ -37,6 +61,80 @@ app.include_router(support_router)
 app.include_router(progress_router)
 
 
+class ServerTimingMiddleware:
+    """Добавляет к HTTP-ответам заголовок ``Server-Timing`` с фазами запроса."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings = RequestTimings()
+        token = activate_timings(timings)
+        request_span = span(
+            "http.request",
+            **{"http.method": scope.get("method", ""), "http.target": scope.get("path", "")},
+        )
+
+        async def send_with_timing(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers.append("Server-Timing", timings.header())
+                request_span.set_attribute("http.status_code", message.get("status"))
+            await send(message)
+
+        try:
+            with request_span:
+                await self.app(scope, receive, send_with_timing)
+        finally:
+            deactivate_timings(token)
+
+
+class ReadYourWritesMiddleware:
+    """Прилипание к основной БД после записи, когда чтения идут с реплики.
+
+    Успешный не-GET запрос ставит cookie на ``SUPRA_ACCOUNTS_DB_REPLICA_STICKY_SECONDS``;
+    пока она жива, чтения клиента идут с основной БД. POST из ``READ_PATHS``
+    только читают и считаются чтениями.
+    """
+
+    COOKIE = "supra_read_primary"
+    SAFE_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+    READ_PATHS = frozenset({"/accounts/batch"})
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        window = read_your_writes_window() if scope["type"] == "http" else None
+        if window is None:
+            await self.app(scope, receive, send)
+            return
+
+        writes = scope.get("method", "GET") not in self.SAFE_METHODS and scope["path"] not in self.READ_PATHS
+        if not writes and self.COOKIE not in HTTPConnection(scope).cookies:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_cookie(message: Message) -> None:
+            if writes and window > 0 and message["type"] == "http.response.start" and message["status"] < 400:
+                headers = MutableHeaders(scope=message)
+                headers.append(
+                    "Set-Cookie", f"{self.COOKIE}=1; Max-Age={int(window)}; Path=/; HttpOnly; SameSite=Lax"
+                )
+            await send(message)
+
+        with primary_reads():
+            await self.app(scope, receive, send_with_cookie)
+
+
+app.add_middleware(ServerTimingMiddleware)
+app.add_middleware(ReadYourWritesMiddleware)
+
+
 def _parse_cors_origins(raw: Optional[str]) -> List[str]:
     if not raw:
         return []
@@ -101,6 +199,7 @@ def _collect_overrides(params: Mapping[str, str]) -> Dict[str, str]:
 @app.on_event("startup")
 def _load_base_config() -> None:
     try:
+        configure_cli_backend_from_env()
         app.state.monitor_config = monitor_config_from_env()
         app.state.config_error = None
     except ConfigError as exc:  # pragma: no cover - configuration provided at runtime
@@ -116,12 +215,68 @@ def _load_base_config() -> None:
 
     app.state.cache_ttl_seconds = max(0.0, cache_ttl)
     app.state.status_cache = None
+    app.state.last_report = None
+    app.state.last_report_at = None
+    app.state.metrics_renderer = ReportMetricsRenderer(
+        os.environ.get("SUPRA_API_METRIC_PREFIX") or DEFAULT_METRIC_PREFIX
+    )
+
+
+@app.on_event("startup")
+def _init_tracing() -> None:
+    try:
+        configure_tracing_from_env()
+    except ValueError as exc:  # pragma: no cover - configuration error reported via health
+        configure_tracing_from_env({})
+        app.state.config_error = ConfigError(str(exc))
 
 
 @app.on_event("startup")
 def _init_accounts() -> None:
     config = get_accounts_config()
-    init_accounts_engine(config)
+    # Асинхронный пул живёт в цикле приложения и закрывается в _stop_accounts.
+    init_accounts_engine(config, pool_async_sqlite=True)
+
+
+@app.on_event("startup")
+async def _init_realtime() -> None:
+    # История комнат относится к текущей БД и прогревается из неё заново.
+    connection_manager.history.clear()
+    try:
+        backplane = backplane_from_env()
+        configure_chat_writer_from_env(multi_worker=backplane is not None)
+        configure_rate_limiter_from_env()
+    except ValueError as exc:  # pragma: no cover - configuration error reported via health
+        app.state.config_error = ConfigError(str(exc))
+        return
+    await connection_manager.start_backplane(backplane)
+
+
+@app.on_event("startup")
+def _init_status_stream() -> None:
+    try:
+        interval = interval_from_env()
+    except ValueError as exc:  # pragma: no cover - configuration error reported via health
+        interval = None
+        app.state.config_error = ConfigError(str(exc))
+    app.state.status_stream = StatusStream(connection_manager, _refresh_status_report, interval)
+
+
+@app.on_event("shutdown")
+async def _stop_realtime() -> None:
+    stream: StatusStream | None = getattr(app.state, "status_stream", None)
+    if stream is not None:
+        await stream.close()
+    writer = set_chat_writer(None)
+    if writer is not None:
+        await writer.close()
+    await connection_manager.stop_backplane()
+
+
+@app.on_event("shutdown")
+async def _stop_accounts() -> None:
+    # После _stop_realtime: write-behind дописывает пакет через тот же пул.
+    await dispose_async_engine()
 
 
 def _resolve_config(overrides: Mapping[str, str] | None = None) -> MonitorConfig:
@@ -231,44 +386,142 @@ def _store_cached_status(config: MonitorConfig, data: Dict[str, object]) -> None
     }
 
 
+def _json_response(data: Any) -> JSONResponse:
+    with timed("serialize"):
+        return JSONResponse(content=data)
+
+
+def _gather_timed(config: MonitorConfig) -> Dict[str, Any]:
+    """Вызывает ``gather_data`` и делит время на CLI и нормализацию."""
+
+    timings = current_timings()
+    cli_before = timings.get("cli") if timings is not None else 0.0
+    started = time.perf_counter()
+    try:
+        return gather_data(config)
+    finally:
+        if timings is not None:
+            cli_spent = timings.get("cli") - cli_before
+            timings.add("normalize", max(0.0, time.perf_counter() - started - cli_spent))
+
+
+def _publish_lottery_updates(previous: Mapping[str, Any] | None, data: Mapping[str, Any]) -> None:
+    """Рассылает в топики ``lottery:<id>`` лотереи, изменившиеся с прошлого отчёта."""
+
+    previous_by_id = {
+        entry.get("lottery_id"): entry
+        for entry in (previous or {}).get("lotteries") or []
+        if isinstance(entry, dict)
+    }
+    for entry in data.get("lotteries") or []:
+        if not isinstance(entry, dict):
+            continue
+        lottery_id = entry.get("lottery_id")
+        if lottery_id is None or previous_by_id.get(lottery_id) == entry:
+            continue
+        connection_manager.broadcast(lottery_topic(lottery_id), {"event": "status", "lottery": entry})
+
+
 @app.get("/status", tags=["monitoring"])
 async def read_status(
     request: Request,
     config: MonitorConfig = Depends(get_monitor_config),
-) -> Dict[str, object]:
+) -> JSONResponse:
     """Return aggregated Supra lottery status via CLI view calls."""
 
     use_cache = _cache_available(request) and not _should_refresh(request.query_params)
     if use_cache:
         cached = _get_cached_status(config)
         if cached is not None:
-            return cached
+            record_timing("cache_hit", 0.0)
+            return _json_response(cached)
 
     try:
-        data = gather_data(config)
+        data = _gather_timed(config)
     except CliError as exc:
         raise HTTPException(status.HTTP_502_BAD_GATEWAY, detail=str(exc)) from exc
 
     if use_cache or _cache_available(request):
         _store_cached_status(config, data)
+    if not getattr(request.state, "monitor_overrides", None):
+        _remember_report(data)
+        stream: StatusStream | None = getattr(app.state, "status_stream", None)
+        if stream is not None and stream.running:
+            stream.publish(data)
 
+    return _json_response(data)
+
+
+def _remember_report(data: Dict[str, Any]) -> None:
+    """Сохраняет отчёт базовой конфигурации для ``/metrics`` и топиков лотерей."""
+
+    _publish_lottery_updates(getattr(app.state, "last_report", None), data)
+    app.state.last_report = data
+    app.state.last_report_at = time.monotonic()
+
+
+async def _refresh_status_report() -> Dict[str, Any]:
+    """Фоновое обновление отчёта для :class:`StatusStream` (базовая конфигурация)."""
+
+    try:
+        config = _resolve_config()
+    except HTTPException as exc:
+        raise ConfigError(str(exc.detail)) from exc
+    data = await run_in_threadpool(gather_data, config)
+    _store_cached_status(config, data)
+    _remember_report(data)
     return data
 
 
+@app.websocket("/status/ws")
+async def status_stream_endpoint(websocket: WebSocket) -> None:
+    """Снимок отчёта ``/status`` при подключении и далее только JSON Patch изменений."""
+
+    stream: StatusStream = app.state.status_stream
+    await stream.subscribe(websocket)
+    try:
+        while True:
+            await websocket.receive_text()
+    except WebSocketDisconnect:
+        await stream.unsubscribe(websocket)
+
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+@app.get("/metrics", response_class=PlainTextResponse, tags=["monitoring"])
+async def read_metrics() -> PlainTextResponse:
+    """Метрики Prometheus из последнего отчёта ``/status`` без вызовов Supra CLI."""
+
+    renderer: ReportMetricsRenderer | None = getattr(app.state, "metrics_renderer", None)
+    if renderer is None:
+        renderer = app.state.metrics_renderer = ReportMetricsRenderer()
+    report = getattr(app.state, "last_report", None)
+    body = render_report_age(renderer.prefix, getattr(app.state, "last_report_at", None))
+    if report is not None:
+        body = renderer.render(report) + body
+    body += CLI_METRICS.render(renderer.prefix)
+    limiter = get_rate_limiter()
+    if limiter is not None:
+        body += limiter.render(renderer.prefix)
+    return PlainTextResponse(body, media_type=PROMETHEUS_CONTENT_TYPE)
+
+
 @app.get("/lotteries/{lottery_id}/vrf-log", tags=["fairness"])
 async def read_vrf_log(
     lottery_id: int,
     limit: int = Query(50, ge=1, le=500),
     config: MonitorConfig = Depends(get_monitor_config),
-) -> Dict[str, Any]:
+) -> JSONResponse:
     """Возвращает события VRF и состояние раунда для панели честности."""
 
     try:
-        return gather_vrf_log(config, lottery_id=lottery_id, limit=limit)
+        data = gather_vrf_log(config, lottery_id=lottery_id, limit=limit)
     except ValueError as exc:
         raise HTTPException(status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
     except CliError as exc:
         raise HTTPException(status.HTTP_502_BAD_GATEWAY, detail=str(exc)) from exc
+    return _json_response(data)
 
 
 @app.get("/commands", response_model=List[CommandInfo], tags=["commands"])
@@ -355,4 +608,12 @@ def main(argv: Optional[List[str]] | None = None) -> None:
     )
 
 
-__all__ = ["app", "run_command", "list_commands", "read_status", "health", "main"]
+__all__ = [
+    "app",
+    "run_command",
+    "list_commands",
+    "read_status",
+    "read_metrics",
+    "health",
+    "main",
+]
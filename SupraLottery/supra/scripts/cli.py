@@ -6,7 +6,7 @@ import importlib
 import sys
 from typing import Dict, Iterable, List, Tuple
 
-# Имя команды -> (python модуль, описание)
+# Имя команды -> (python модуль, описание); доступны и через POST /commands/{command}.
 COMMAND_MAP: Dict[str, Tuple[str, str]] = {
     "calc-min-balance": (
         "supra.scripts.calc_min_balance",
@@ -60,17 +60,43 @@ COMMAND_MAP: Dict[str, Tuple[str, str]] = {
         "supra.scripts.move_tests",
         "Запустить Move-тесты supra/move_workspace через Supra/Aptos/Move CLI",
     ),
+    "progress-leaderboard": (
+        "supra.scripts.progress.leaderboard",
+        "Пересобрать лидерборд очков достижений (после бэкфилла прогресса)",
+    ),
     "vrf-audit": (
         "supra.scripts.testnet_vrf_audit",
         "Выгрузить события VRF и состояние раунда для панели честности",
     ),
 }
 
+# Команды только для локального запуска: долгие или бесконечные процессы,
+# которые API-сервер не должен запускать по запросу.
+LOCAL_COMMAND_MAP: Dict[str, Tuple[str, str]] = {
+    "benchmark": (
+        "supra.benchmarks.runner",
+        "Запустить бенчмарки мониторинга и API, сравнить с базовой линией",
+    ),
+    "loadtest": (
+        "supra.benchmarks.loadtest",
+        "Нагрузочный тест HTTP/WebSocket API в одном процессе",
+    ),
+    "realtime-broker": (
+        "supra.scripts.realtime.backplane",
+        "Запустить брокер backplane для real-time событий нескольких воркеров",
+    ),
+}
+
+
+def _commands(include_local: bool) -> Dict[str, Tuple[str, str]]:
+    return {**COMMAND_MAP, **LOCAL_COMMAND_MAP} if include_local else COMMAND_MAP
+
 
-def iter_commands() -> Iterable[Tuple[str, str, str]]:
-    """Итерирует команды в алфавитном порядке."""
-    for name in sorted(COMMAND_MAP):
-        module, description = COMMAND_MAP[name]
+def iter_commands(include_local: bool = False) -> Iterable[Tuple[str, str, str]]:
+    """Итерирует команды в алфавитном порядке; локальные — только с ``include_local``."""
+    commands = _commands(include_local)
+    for name in sorted(commands):
+        module, description = commands[name]
         yield name, module, description
 
 
@@ -86,7 +112,7 @@ def build_parser() -> argparse.ArgumentParser:
     parser.add_argument(
         "command",
         nargs="?",
-        choices=sorted(COMMAND_MAP.keys()),
+        choices=sorted(_commands(include_local=True)),
         help="имя подкоманды (используйте --list для вывода полного перечня)",
     )
     parser.add_argument(
@@ -117,7 +143,7 @@ def main(argv: List[str] | None = None) -> None:
     args = parser.parse_args(argv)
 
     if args.list:
-        for name, module, description in iter_commands():
+        for name, module, description in iter_commands(include_local=True):
             print(f"{name:<18} -> {module}\n    {description}")
         return
 
@@ -128,7 +154,7 @@ def main(argv: List[str] | None = None) -> None:
     if command_args and command_args[0] == "--":
         command_args = command_args[1:]
 
-    module_name = COMMAND_MAP[args.command][0]
+    module_name = _commands(include_local=True)[args.command][0]
     run_module(module_name, command_args)
 
 
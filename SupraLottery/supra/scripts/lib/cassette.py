@@ -0,0 +1,191 @@
+"""Record/replay of Supra CLI responses for offline benchmarks and tests."""
+from __future__ import annotations
+
+import gzip
+import json
+import threading
+from collections import defaultdict
+from typing import IO, Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+try:  # pragma: no cover - import shim for both package and script usage
+    from .monitoring import CliBackend, CliError, MonitorConfig  # type: ignore[import]
+except ImportError:  # pragma: no cover - fallback when executed as a script
+    from lib.monitoring import CliBackend, CliError, MonitorConfig  # type: ignore[import,no-redef]
+
+CASSETTE_FORMAT_VERSION = 1
+
+CassetteKey = Tuple[str, ...]
+
+
+def cassette_key(args: Sequence[str]) -> CassetteKey:
+    """Ключ записи: аргументы CLI без значения ``--profile``.
+
+    Профиль определяет лишь учётные данные, поэтому кассету, записанную
+    под одним профилем, можно воспроизвести под другим.
+    """
+
+    key: List[str] = []
+    skip_next = False
+    for item in args:
+        if skip_next:
+            skip_next = False
+            continue
+        if item == "--profile":
+            skip_next = True
+            continue
+        key.append(str(item))
+    return tuple(key)
+
+
+class Cassette:
+    """Набор пар «аргументы CLI → ответ» в сжатом JSON Lines файле.
+
+    При записи файл открывается на дозапись одним gzip-сегментом до
+    :meth:`close`; несколько сегментов (повторные сессии записи) читаются как
+    единый файл. Для одного ключа может быть несколько ответов — при
+    воспроизведении они выдаются по очереди, последний повторяется. Ответы
+    хранятся в виде JSON-строк и декодируются при каждой выдаче, как и вывод
+    реального CLI.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._entries: Dict[CassetteKey, List[Tuple[Optional[str], Optional[str]]]] = defaultdict(list)
+        self._cursors: Dict[CassetteKey, int] = {}
+        self._lock = threading.Lock()
+        self._writer: Optional[IO[str]] = None
+
+    def __len__(self) -> int:
+        return sum(len(items) for items in self._entries.values())
+
+    def __contains__(self, args: Sequence[str]) -> bool:
+        return cassette_key(args) in self._entries
+
+    def keys(self) -> Iterator[CassetteKey]:
+        return iter(self._entries)
+
+    def load(self) -> "Cassette":
+        """Читает кассету с диска (дополняя уже загруженные записи)."""
+
+        with gzip.open(self.path, "rt", encoding="utf-8") as handle:
+            for line_number, line in enumerate(handle, start=1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError as exc:
+                    raise ValueError(f"{self.path}:{line_number}: повреждённая запись кассеты") from exc
+                if entry.get("version", CASSETTE_FORMAT_VERSION) != CASSETTE_FORMAT_VERSION:
+                    raise ValueError(f"{self.path}: неподдерживаемая версия кассеты {entry.get('version')}")
+                self._entries[tuple(entry["args"])].append(_stored(entry))
+        return self
+
+    def record(
+        self,
+        args: Sequence[str],
+        response: Optional[Dict[str, Any]] = None,
+        *,
+        error: Optional[str] = None,
+    ) -> None:
+        """Добавляет ответ (или текст ошибки) и дописывает его в файл кассеты."""
+
+        key = cassette_key(args)
+        entry: Dict[str, Any] = {"version": CASSETTE_FORMAT_VERSION, "args": list(key)}
+        if error is not None:
+            entry["error"] = error
+        else:
+            entry["response"] = response
+        line = json.dumps(entry, ensure_ascii=False, separators=(",", ":"))
+        with self._lock:
+            self._entries[key].append(_stored(entry))
+            if self._writer is None:
+                self._writer = gzip.open(self.path, "at", encoding="utf-8")
+            self._writer.write(line + "\n")
+
+    def close(self) -> None:
+        """Завершает gzip-сегмент записи (без этого хвост файла будет потерян)."""
+
+        with self._lock:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+
+    def __enter__(self) -> "Cassette":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:  # type: ignore[no-untyped-def]
+        self.close()
+
+    def next_entry(self, args: Sequence[str]) -> Optional[Dict[str, Any]]:
+        """Следующая запись для аргументов: ``{"response": ...}`` или ``{"error": ...}``."""
+
+        key = cassette_key(args)
+        with self._lock:
+            entries = self._entries.get(key)
+            if not entries:
+                return None
+            index = self._cursors.get(key, 0)
+            self._cursors[key] = index + 1
+        response, error = entries[min(index, len(entries) - 1)]
+        if error is not None:
+            return {"error": error}
+        return {"response": json.loads(response) if response is not None else None}
+
+    def rewind(self) -> None:
+        with self._lock:
+            self._cursors.clear()
+
+
+def _stored(entry: Dict[str, Any]) -> Tuple[Optional[str], Optional[str]]:
+    if "error" in entry:
+        return None, str(entry["error"])
+    return json.dumps(entry.get("response"), ensure_ascii=False), None
+
+
+class RecordingBackend:
+    """Исполнитель CLI, сохраняющий каждый ответ ``inner`` в кассету."""
+
+    def __init__(self, cassette: Cassette, inner: Optional[CliBackend] = None) -> None:
+        self.cassette = cassette
+        self._inner = inner
+
+    def __call__(self, config: MonitorConfig, extra: Sequence[str]) -> Dict[str, Any]:
+        inner = self._inner
+        if inner is None:
+            try:  # pragma: no cover - import shim for both package and script usage
+                from .monitoring import _run_cli_subprocess  # type: ignore[import]
+            except ImportError:  # pragma: no cover - fallback when executed as a script
+                from lib.monitoring import _run_cli_subprocess  # type: ignore[import,no-redef]
+            inner = _run_cli_subprocess
+        try:
+            response = inner(config, extra)
+        except CliError as exc:
+            self.cassette.record(extra, error=str(exc))
+            raise
+        self.cassette.record(extra, response)
+        return response
+
+
+class ReplayBackend:
+    """Исполнитель CLI, отдающий ответы из кассеты без запуска подпроцессов."""
+
+    def __init__(self, cassette: Cassette) -> None:
+        self.cassette = cassette
+
+    def __call__(self, config: MonitorConfig, extra: Sequence[str]) -> Dict[str, Any]:
+        entry = self.cassette.next_entry(extra)
+        if entry is None:
+            raise CliError(f"В кассете {self.cassette.path} нет ответа для: {' '.join(extra)}")
+        if "error" in entry:
+            raise CliError(entry["error"])
+        return entry["response"]
+
+
+__all__ = [
+    "CASSETTE_FORMAT_VERSION",
+    "Cassette",
+    "RecordingBackend",
+    "ReplayBackend",
+    "cassette_key",
+]
@@ -0,0 +1,215 @@
+"""Lightweight latency/counter instrumentation for Supra CLI hot paths."""
+from __future__ import annotations
+
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+# Границы корзин гистограммы в секундах (как у prometheus_client по умолчанию).
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class _HistogramSeries:
+    __slots__ = ("buckets", "total", "count")
+
+    def __init__(self, size: int) -> None:
+        self.buckets = [0] * size
+        self.total = 0.0
+        self.count = 0
+
+
+class CliMetrics:
+    """Счётчики и гистограммы вызовов Supra CLI в разрезе ``function_id``."""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        self._bounds = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self._latency: Dict[str, _HistogramSeries] = {}
+        self._errors: Dict[str, int] = {}
+        self._spawns = 0
+
+    def record_spawn(self) -> None:
+        with self._lock:
+            self._spawns += 1
+
+    def observe(self, function_id: str, seconds: float, *, error: bool = False) -> None:
+        """Фиксирует завершённый вызов (успешный или с ошибкой)."""
+
+        index = bisect_left(self._bounds, seconds)
+        with self._lock:
+            series = self._latency.get(function_id)
+            if series is None:
+                series = self._latency[function_id] = _HistogramSeries(len(self._bounds))
+            if index < len(self._bounds):
+                series.buckets[index] += 1
+            series.total += seconds
+            series.count += 1
+            if error:
+                self._errors[function_id] = self._errors.get(function_id, 0) + 1
+
+    def reset(self) -> None:
+        with self._lock:
+            self._latency.clear()
+            self._errors.clear()
+            self._spawns = 0
+
+    def snapshot(self) -> Dict[str, object]:
+        """Возвращает копию накопленных значений (для тестов и отладки)."""
+
+        with self._lock:
+            return {
+                "spawns": self._spawns,
+                "calls": {key: series.count for key, series in self._latency.items()},
+                "errors": dict(self._errors),
+                "seconds": {key: series.total for key, series in self._latency.items()},
+            }
+
+    def render(self, prefix: str) -> str:
+        """Рендерит метрики в текстовом формате Prometheus."""
+
+        with self._lock:
+            latency = {
+                key: (list(series.buckets), series.total, series.count)
+                for key, series in self._latency.items()
+            }
+            errors = dict(self._errors)
+            spawns = self._spawns
+
+        duration = f"{prefix}_cli_call_duration_seconds"
+        calls = f"{prefix}_cli_calls_total"
+        failures = f"{prefix}_cli_errors_total"
+        spawned = f"{prefix}_cli_subprocess_spawns_total"
+
+        lines: List[str] = [
+            f"# HELP {spawned} Количество запущенных процессов Supra CLI",
+            f"# TYPE {spawned} counter",
+            f"{spawned} {spawns}",
+        ]
+        if latency:
+            lines.append(f"# HELP {duration} Длительность вызовов Supra CLI")
+            lines.append(f"# TYPE {duration} histogram")
+            for function_id in sorted(latency):
+                buckets, total, count = latency[function_id]
+                label = f'function_id="{_escape(function_id)}"'
+                cumulative = 0
+                for bound, hits in zip(self._bounds, buckets):
+                    cumulative += hits
+                    lines.append(f'{duration}_bucket{{{label},le="{bound:g}"}} {cumulative}')
+                lines.append(f'{duration}_bucket{{{label},le="+Inf"}} {count}')
+                lines.append(f"{duration}_sum{{{label}}} {total:.6f}")
+                lines.append(f"{duration}_count{{{label}}} {count}")
+            lines.append(f"# HELP {calls} Количество вызовов Supra CLI")
+            lines.append(f"# TYPE {calls} counter")
+            for function_id in sorted(latency):
+                lines.append(f'{calls}{{function_id="{_escape(function_id)}"}} {latency[function_id][2]}')
+            lines.append(f"# HELP {failures} Количество ошибок Supra CLI")
+            lines.append(f"# TYPE {failures} counter")
+            for function_id in sorted(latency):
+                lines.append(
+                    f'{failures}{{function_id="{_escape(function_id)}"}} {errors.get(function_id, 0)}'
+                )
+        return "\n".join(lines) + "\n"
+
+
+CLI_METRICS = CliMetrics()
+
+
+class RequestTimings:
+    """Накопитель длительностей фаз одного HTTP-запроса (для ``Server-Timing``)."""
+
+    __slots__ = ("started", "phases")
+
+    def __init__(self) -> None:
+        self.started = time.perf_counter()
+        self.phases: Dict[str, float] = {}
+
+    def add(self, name: str, seconds: float) -> None:
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    def get(self, name: str) -> float:
+        return self.phases.get(name, 0.0)
+
+    def header(self) -> str:
+        parts = [f"{name};dur={seconds * 1000:.2f}" for name, seconds in self.phases.items()]
+        parts.append(f"total;dur={(time.perf_counter() - self.started) * 1000:.2f}")
+        return ", ".join(parts)
+
+
+_CURRENT_TIMINGS: ContextVar[Optional[RequestTimings]] = ContextVar(
+    "supra_request_timings", default=None
+)
+
+
+def activate_timings(timings: RequestTimings) -> Token:
+    return _CURRENT_TIMINGS.set(timings)
+
+
+def deactivate_timings(token: Token) -> None:
+    _CURRENT_TIMINGS.reset(token)
+
+
+def current_timings() -> Optional[RequestTimings]:
+    return _CURRENT_TIMINGS.get()
+
+
+def record_timing(name: str, seconds: float) -> None:
+    """Добавляет длительность к фазе текущего запроса (если он отслеживается)."""
+
+    timings = _CURRENT_TIMINGS.get()
+    if timings is not None:
+        timings.add(name, seconds)
+
+
+@contextmanager
+def timed(name: str) -> Iterator[None]:
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_timing(name, time.perf_counter() - started)
+
+
+def cli_call_label(args: Sequence[str]) -> str:
+    """Имя серии для вызова CLI: ``function_id`` для view, тип события для events list."""
+
+    for flag in ("--function-id", "--event-type"):
+        try:
+            index = list(args).index(flag)
+        except ValueError:
+            continue
+        if index + 1 < len(args):
+            return str(args[index + 1])
+    return " ".join(str(item) for item in args[:4]) or "<empty>"
+
+
+__all__ = [
+    "CLI_METRICS",
+    "CliMetrics",
+    "DEFAULT_BUCKETS",
+    "RequestTimings",
+    "activate_timings",
+    "cli_call_label",
+    "current_timings",
+    "deactivate_timings",
+    "record_timing",
+    "timed",
+]
@@ -0,0 +1,94 @@
+"""Structural diffs between JSON documents in RFC 6902 (JSON Patch) form.
+
+Only ``add``, ``remove`` and ``replace`` operations are produced: objects are
+compared key by key, arrays index by index (with trailing additions and
+removals), anything else is replaced wholesale. The output is applied with
+:func:`apply_patch`, which mirrors what a browser-side JSON Patch library does.
+"""
+from __future__ import annotations
+
+import copy
+from typing import Any, Dict, List
+
+Operation = Dict[str, Any]
+
+
+def _escape(token: str) -> str:
+    return token.replace("~", "~0").replace("/", "~1")
+
+
+def _unescape(token: str) -> str:
+    return token.replace("~1", "/").replace("~0", "~")
+
+
+def _same(old: Any, new: Any) -> bool:
+    # ``1 == True`` и ``1 == 1.0`` в Python, но не в JSON.
+    return type(old) is type(new) and old == new
+
+
+def _diff(old: Any, new: Any, path: str, ops: List[Operation]) -> None:
+    if _same(old, new):
+        return
+    if isinstance(old, dict) and isinstance(new, dict):
+        for key in old:
+            if key not in new:
+                ops.append({"op": "remove", "path": f"{path}/{_escape(str(key))}"})
+        for key, value in new.items():
+            child = f"{path}/{_escape(str(key))}"
+            if key in old:
+                _diff(old[key], value, child, ops)
+            else:
+                ops.append({"op": "add", "path": child, "value": value})
+        return
+    if isinstance(old, list) and isinstance(new, list):
+        common = min(len(old), len(new))
+        for index in range(common):
+            _diff(old[index], new[index], f"{path}/{index}", ops)
+        for index in range(common, len(new)):
+            ops.append({"op": "add", "path": f"{path}/{index}", "value": new[index]})
+        # Удаляем с конца, чтобы индексы оставались корректными.
+        for index in range(len(old) - 1, common - 1, -1):
+            ops.append({"op": "remove", "path": f"{path}/{index}"})
+        return
+    ops.append({"op": "replace", "path": path, "value": new})
+
+
+def diff(old: Any, new: Any) -> List[Operation]:
+    """Return the JSON Patch that turns ``old`` into ``new`` (empty when equal)."""
+
+    ops: List[Operation] = []
+    _diff(old, new, "", ops)
+    return ops
+
+
+def apply_patch(document: Any, ops: List[Operation]) -> Any:
+    """Apply ``add``/``remove``/``replace`` operations to a copy of ``document``."""
+
+    result = copy.deepcopy(document)
+    for op in ops:
+        path = op["path"]
+        if path == "":
+            if op["op"] == "remove":
+                raise ValueError("Cannot remove the document root")
+            result = copy.deepcopy(op["value"])
+            continue
+        *parents, last = [_unescape(token) for token in path.split("/")[1:]]
+        target = result
+        for token in parents:
+            target = target[int(token)] if isinstance(target, list) else target[token]
+        if isinstance(target, list):
+            index = len(target) if last == "-" else int(last)
+            if op["op"] == "add":
+                target.insert(index, copy.deepcopy(op["value"]))
+            elif op["op"] == "remove":
+                del target[index]
+            else:
+                target[index] = copy.deepcopy(op["value"])
+        elif op["op"] == "remove":
+            del target[last]
+        else:
+            target[last] = copy.deepcopy(op["value"])
+    return result
+
+
+__all__ = ["apply_patch", "diff"]
@@ -1,22 +1,34 @@
 """Reusable Supra CLI helpers for monitoring and HTTP services."""
 from __future__ import annotations
 
+import atexit
 import json
 import os
 import subprocess
+import time
 from dataclasses import dataclass
 from datetime import datetime, timezone
-from typing import Any, Dict, List, Mapping, Optional, Sequence
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence
 
 try:  # pragma: no cover - import shim for both package and script usage
     from ..calc_min_balance import calculate  # type: ignore[import]
     from ..monitor_common import MonitorError, env_default  # type: ignore[import]
+    from .instrumentation import CLI_METRICS, cli_call_label, record_timing  # type: ignore[import]
+    from .tracing import span, traced  # type: ignore[import]
 except ImportError:  # pragma: no cover - fallback when executed as a script
     from calc_min_balance import calculate  # type: ignore[import,no-redef]
     from monitor_common import MonitorError, env_default  # type: ignore[import,no-redef]
+    from lib.instrumentation import (  # type: ignore[import,no-redef]
+        CLI_METRICS,
+        cli_call_label,
+        record_timing,
+    )
+    from lib.tracing import span, traced  # type: ignore[import,no-redef]
 
 DEFAULT_MARGIN = 0.15
 DEFAULT_WINDOW = 30
+CLI_BACKEND_ENV = "SUPRA_CLI_BACKEND"
+CLI_CASSETTE_ENV = "SUPRA_CLI_CASSETTE"
 
 
 class CliError(MonitorError):
@@ -273,11 +285,28 @@ def monitor_config_from_env(
 def run_cli(config: MonitorConfig, extra: Sequence[str]) -> Dict[str, Any]:
     """Execute Supra CLI command and decode JSON response."""
 
+    label = cli_call_label(extra)
+    started = time.perf_counter()
+    failed = True
+    backend = _CLI_BACKEND or _run_cli_subprocess
+    try:
+        with span("supra_cli.call", function_id=label):
+            result = backend(config, extra)
+        failed = False
+        return result
+    finally:
+        elapsed = time.perf_counter() - started
+        CLI_METRICS.observe(label, elapsed, error=failed)
+        record_timing("cli", elapsed)
+
+
+def _run_cli_subprocess(config: MonitorConfig, extra: Sequence[str]) -> Dict[str, Any]:
     env = os.environ.copy()
     if config.supra_config:
         env["SUPRA_CONFIG"] = config.supra_config
 
     cmd = [config.supra_cli_bin] + list(extra)
+    CLI_METRICS.record_spawn()
     try:
         completed = subprocess.run(
             cmd,
@@ -300,6 +329,71 @@ def run_cli(config: MonitorConfig, extra: Sequence[str]) -> Dict[str, Any]:
         raise CliError(f"Неверный JSON от Supra CLI: {output}") from exc
 
 
+CliBackend = Callable[[MonitorConfig, Sequence[str]], Dict[str, Any]]
+
+# ``None`` означает запуск реального бинаря ``supra`` в подпроцессе.
+_CLI_BACKEND: Optional[CliBackend] = None
+
+
+def set_cli_backend(backend: Optional[CliBackend]) -> Optional[CliBackend]:
+    """Подменяет исполнителя команд Supra CLI и возвращает предыдущего."""
+
+    global _CLI_BACKEND
+    previous = _CLI_BACKEND
+    _CLI_BACKEND = backend
+    return previous
+
+
+def get_cli_backend() -> Optional[CliBackend]:
+    return _CLI_BACKEND
+
+
+def configure_cli_backend_from_env(env: Mapping[str, str] | None = None) -> Optional[CliBackend]:
+    """Выбирает исполнителя по ``SUPRA_CLI_BACKEND`` (subprocess/simulator/record/replay)."""
+
+    env = dict(os.environ if env is None else env)
+    mode = (env.get(CLI_BACKEND_ENV) or "subprocess").strip().lower()
+    if mode == "subprocess":
+        set_cli_backend(None)
+    elif mode == "simulator":
+        try:  # pragma: no cover - import shim for both package and script usage
+            from .simulator import SimulatedChain, simulator_config_from_env  # type: ignore[import]
+        except ImportError:  # pragma: no cover - fallback when executed as a script
+            from lib.simulator import (  # type: ignore[import,no-redef]
+                SimulatedChain,
+                simulator_config_from_env,
+            )
+        try:
+            set_cli_backend(SimulatedChain(simulator_config_from_env(env)))
+        except ValueError as exc:
+            raise ConfigError(str(exc)) from exc
+    elif mode in {"record", "replay"}:
+        path = env.get(CLI_CASSETTE_ENV)
+        if not path:
+            raise ConfigError(f"{CLI_CASSETTE_ENV} is required for {CLI_BACKEND_ENV}={mode}")
+        try:  # pragma: no cover - import shim for both package and script usage
+            from .cassette import Cassette, RecordingBackend, ReplayBackend  # type: ignore[import]
+        except ImportError:  # pragma: no cover - fallback when executed as a script
+            from lib.cassette import (  # type: ignore[import,no-redef]
+                Cassette,
+                RecordingBackend,
+                ReplayBackend,
+            )
+        cassette = Cassette(path)
+        if mode == "record":
+            atexit.register(cassette.close)
+            set_cli_backend(RecordingBackend(cassette))
+        else:
+            try:
+                cassette.load()
+            except (OSError, ValueError) as exc:
+                raise ConfigError(f"Failed to load cassette {path}: {exc}") from exc
+            set_cli_backend(ReplayBackend(cassette))
+    else:
+        raise ConfigError(f"Unknown {CLI_BACKEND_ENV} value: {mode}")
+    return _CLI_BACKEND
+
+
 def move_view(
     config: MonitorConfig,
     function_id: str,
@@ -400,6 +494,7 @@ def normalize_address_list(value: Any) -> List[str]:
     return [] if collapsed is None else [str(collapsed)]
 
 
+@traced("gather_data")
 def gather_data(config: MonitorConfig) -> Dict[str, Any]:
     """Собирает агрегированный отчёт по VRF-хабу и мульти-лотереям."""
 
@@ -411,307 +506,318 @@ def gather_data(config: MonitorConfig) -> Dict[str, Any]:
         config.window,
     )
 
-    hub_lottery_count = move_view(config, f"{config.hub_prefix}::lottery_count")
-    hub_next_lottery_id = move_view(config, f"{config.hub_prefix}::peek_next_lottery_id")
-    hub_callback_sender = move_view(config, f"{config.hub_prefix}::callback_sender")
-
-    inferred_next_id = normalize_int(hub_next_lottery_id)
-    configured_ids = list(config.lottery_ids or [])
-    if not configured_ids and inferred_next_id is not None and inferred_next_id >= 0:
-        configured_ids = list(range(inferred_next_id))
-
-    instances_ready = normalize_bool(move_view(config, f"{config.instances_prefix}::is_initialized"))
-    rounds_ready = normalize_bool(move_view(config, f"{config.rounds_prefix}::is_initialized"))
-    treasury_ready = normalize_bool(move_view(config, f"{config.treasury_prefix}::is_initialized"))
-    autopurchase_ready = normalize_bool(
-        move_view(config, f"{config.autopurchase_prefix}::is_initialized")
-    )
-    referrals_ready = normalize_bool(
-        move_view(config, f"{config.referrals_prefix}::is_initialized")
-    )
-    vip_ready = normalize_bool(move_view(config, f"{config.vip_prefix}::is_initialized"))
-    metadata_ready = normalize_bool(
-        move_view(config, f"{config.metadata_prefix}::is_initialized")
-    )
-    operators_ready = normalize_bool(
-        move_view(config, f"{config.operators_prefix}::is_initialized")
-    )
-    history_ready = normalize_bool(
-        move_view(config, f"{config.history_prefix}::is_initialized")
-    )
-
-    lotteries: List[Dict[str, Any]] = []
-    for lottery_id in configured_ids:
-        registration = extract_optional(
-            move_view(config, f"{config.hub_prefix}::get_registration", [f"u64:{lottery_id}"])
+    with span("gather_data.hub"):
+        hub_lottery_count = move_view(config, f"{config.hub_prefix}::lottery_count")
+        hub_next_lottery_id = move_view(config, f"{config.hub_prefix}::peek_next_lottery_id")
+        hub_callback_sender = move_view(config, f"{config.hub_prefix}::callback_sender")
+
+        inferred_next_id = normalize_int(hub_next_lottery_id)
+        configured_ids = list(config.lottery_ids or [])
+        if not configured_ids and inferred_next_id is not None and inferred_next_id >= 0:
+            configured_ids = list(range(inferred_next_id))
+
+        instances_ready = normalize_bool(move_view(config, f"{config.instances_prefix}::is_initialized"))
+        rounds_ready = normalize_bool(move_view(config, f"{config.rounds_prefix}::is_initialized"))
+        treasury_ready = normalize_bool(move_view(config, f"{config.treasury_prefix}::is_initialized"))
+        autopurchase_ready = normalize_bool(
+            move_view(config, f"{config.autopurchase_prefix}::is_initialized")
         )
-        if registration is None:
-            continue
-
-        factory_info = extract_optional(
-            move_view(config, f"{config.factory_prefix}::get_lottery", [f"u64:{lottery_id}"])
+        referrals_ready = normalize_bool(
+            move_view(config, f"{config.referrals_prefix}::is_initialized")
+        )
+        vip_ready = normalize_bool(move_view(config, f"{config.vip_prefix}::is_initialized"))
+        metadata_ready = normalize_bool(
+            move_view(config, f"{config.metadata_prefix}::is_initialized")
+        )
+        operators_ready = normalize_bool(
+            move_view(config, f"{config.operators_prefix}::is_initialized")
+        )
+        history_ready = normalize_bool(
+            move_view(config, f"{config.history_prefix}::is_initialized")
         )
 
-        instance_info = None
-        instance_stats = None
-        if instances_ready:
-            instance_info = extract_optional(
-                move_view(config, f"{config.instances_prefix}::get_lottery_info", [f"u64:{lottery_id}"])
-            )
-            instance_stats = extract_optional(
-                move_view(config, f"{config.instances_prefix}::get_instance_stats", [f"u64:{lottery_id}"])
-            )
-
-        round_snapshot = None
-        pending_request = None
-        if rounds_ready:
-            round_snapshot = extract_optional(
-                move_view(config, f"{config.rounds_prefix}::get_round_snapshot", [f"u64:{lottery_id}"])
-            )
-            pending_request = extract_optional(
-                move_view(config, f"{config.rounds_prefix}::pending_request_id", [f"u64:{lottery_id}"])
+    with span("gather_data.lotteries", lottery_count=len(configured_ids)):
+        lotteries: List[Dict[str, Any]] = []
+        for lottery_id in configured_ids:
+            registration = extract_optional(
+                move_view(config, f"{config.hub_prefix}::get_registration", [f"u64:{lottery_id}"])
             )
+            if registration is None:
+                continue
 
-        treasury_config = None
-        treasury_pool = None
-        if treasury_ready:
-            treasury_config = extract_optional(
-                move_view(config, f"{config.treasury_prefix}::get_config", [f"u64:{lottery_id}"])
-            )
-            treasury_pool = extract_optional(
-                move_view(config, f"{config.treasury_prefix}::get_pool", [f"u64:{lottery_id}"])
+            factory_info = extract_optional(
+                move_view(config, f"{config.factory_prefix}::get_lottery", [f"u64:{lottery_id}"])
             )
 
-        metadata_payload = None
-        if metadata_ready:
-            metadata_payload = extract_optional(
-                move_view(
-                    config,
-                    f"{config.metadata_prefix}::get_metadata",
-                    [f"u64:{lottery_id}"],
+            instance_info = None
+            instance_stats = None
+            if instances_ready:
+                instance_info = extract_optional(
+                    move_view(config, f"{config.instances_prefix}::get_lottery_info", [f"u64:{lottery_id}"])
                 )
-            )
-
-        latest_history = None
-        if history_ready:
-            latest_history = extract_optional(
-                move_view(
-                    config,
-                    f"{config.history_prefix}::latest_record",
-                    [f"u64:{lottery_id}"],
+                instance_stats = extract_optional(
+                    move_view(config, f"{config.instances_prefix}::get_instance_stats", [f"u64:{lottery_id}"])
                 )
-            )
 
-        lotteries.append(
-            {
-                "lottery_id": lottery_id,
-                "registration": registration,
-                "factory": factory_info,
-                "instance": instance_info,
-                "stats": instance_stats,
-                "round": {
-                    "snapshot": round_snapshot,
-                    "pending_request_id": pending_request,
-                },
-                "treasury": {
-                    "config": treasury_config,
-                    "pool": treasury_pool,
-                },
-                "metadata": metadata_payload,
-                "latest_history": latest_history,
-            }
-        )
+            round_snapshot = None
+            pending_request = None
+            if rounds_ready:
+                round_snapshot = extract_optional(
+                    move_view(config, f"{config.rounds_prefix}::get_round_snapshot", [f"u64:{lottery_id}"])
+                )
+                pending_request = extract_optional(
+                    move_view(config, f"{config.rounds_prefix}::pending_request_id", [f"u64:{lottery_id}"])
+                )
 
-    jackpot_balance = None
-    if treasury_ready:
-        jackpot_balance = flatten_single_value(
-            move_view(config, f"{config.treasury_prefix}::jackpot_balance")
-        )
+            treasury_config = None
+            treasury_pool = None
+            if treasury_ready:
+                treasury_config = extract_optional(
+                    move_view(config, f"{config.treasury_prefix}::get_config", [f"u64:{lottery_id}"])
+                )
+                treasury_pool = extract_optional(
+                    move_view(config, f"{config.treasury_prefix}::get_pool", [f"u64:{lottery_id}"])
+                )
 
-    autopurchase_overview: Dict[str, Any] = {"initialized": autopurchase_ready, "lotteries": []}
-    if autopurchase_ready:
-        autopurchase_ids_raw = move_view(config, f"{config.autopurchase_prefix}::list_lottery_ids")
-        autopurchase_ids = normalize_int_list(autopurchase_ids_raw)
-        for lottery_id in autopurchase_ids:
-            summary = extract_optional(
-                move_view(
-                    config,
-                    f"{config.autopurchase_prefix}::get_lottery_summary",
-                    [f"u64:{lottery_id}"],
+            metadata_payload = None
+            if metadata_ready:
+                metadata_payload = extract_optional(
+                    move_view(
+                        config,
+                        f"{config.metadata_prefix}::get_metadata",
+                        [f"u64:{lottery_id}"],
+                    )
                 )
-            )
-            players_raw = extract_optional(
-                move_view(
-                    config,
-                    f"{config.autopurchase_prefix}::list_players",
-                    [f"u64:{lottery_id}"],
+
+            latest_history = None
+            if history_ready:
+                latest_history = extract_optional(
+                    move_view(
+                        config,
+                        f"{config.history_prefix}::latest_record",
+                        [f"u64:{lottery_id}"],
+                    )
                 )
-            )
-            autopurchase_overview["lotteries"].append(
+
+            lotteries.append(
                 {
                     "lottery_id": lottery_id,
-                    "summary": summary,
-                    "players": normalize_address_list(players_raw),
+                    "registration": registration,
+                    "factory": factory_info,
+                    "instance": instance_info,
+                    "stats": instance_stats,
+                    "round": {
+                        "snapshot": round_snapshot,
+                        "pending_request_id": pending_request,
+                    },
+                    "treasury": {
+                        "config": treasury_config,
+                        "pool": treasury_pool,
+                    },
+                    "metadata": metadata_payload,
+                    "latest_history": latest_history,
                 }
             )
 
-    metadata_overview: Dict[str, Any] = {"initialized": metadata_ready, "lotteries": []}
-    if metadata_ready:
-        metadata_ids_raw = move_view(config, f"{config.metadata_prefix}::list_lottery_ids")
-        metadata_ids = normalize_int_list(metadata_ids_raw)
-        for lottery_id in metadata_ids:
-            payload = extract_optional(
-                move_view(
-                    config,
-                    f"{config.metadata_prefix}::get_metadata",
-                    [f"u64:{lottery_id}"],
-                )
-            )
-            metadata_overview["lotteries"].append(
-                {"lottery_id": lottery_id, "metadata": payload}
+    with span("gather_data.jackpot"):
+        jackpot_balance = None
+        if treasury_ready:
+            jackpot_balance = flatten_single_value(
+                move_view(config, f"{config.treasury_prefix}::jackpot_balance")
             )
 
-    operators_overview: Dict[str, Any] = {"initialized": operators_ready, "lotteries": []}
-    if operators_ready:
-        operator_ids_raw = move_view(config, f"{config.operators_prefix}::list_lottery_ids")
-        operator_ids = normalize_int_list(operator_ids_raw)
-        for lottery_id in operator_ids:
-            owner_payload = extract_optional(
-                move_view(
-                    config,
-                    f"{config.operators_prefix}::get_owner",
-                    [f"u64:{lottery_id}"],
+    with span("gather_data.autopurchase"):
+        autopurchase_overview: Dict[str, Any] = {"initialized": autopurchase_ready, "lotteries": []}
+        if autopurchase_ready:
+            autopurchase_ids_raw = move_view(config, f"{config.autopurchase_prefix}::list_lottery_ids")
+            autopurchase_ids = normalize_int_list(autopurchase_ids_raw)
+            for lottery_id in autopurchase_ids:
+                summary = extract_optional(
+                    move_view(
+                        config,
+                        f"{config.autopurchase_prefix}::get_lottery_summary",
+                        [f"u64:{lottery_id}"],
+                    )
                 )
-            )
-            operators_payload = extract_optional(
-                move_view(
-                    config,
-                    f"{config.operators_prefix}::list_operators",
-                    [f"u64:{lottery_id}"],
+                players_raw = extract_optional(
+                    move_view(
+                        config,
+                        f"{config.autopurchase_prefix}::list_players",
+                        [f"u64:{lottery_id}"],
+                    )
+                )
+                autopurchase_overview["lotteries"].append(
+                    {
+                        "lottery_id": lottery_id,
+                        "summary": summary,
+                        "players": normalize_address_list(players_raw),
+                    }
                 )
-            )
-            operators_overview["lotteries"].append(
-                {
-                    "lottery_id": lottery_id,
-                    "owner": owner_payload,
-                    "operators": normalize_address_list(operators_payload),
-                }
-            )
 
-    history_overview: Dict[str, Any] = {"initialized": history_ready, "lotteries": []}
-    if history_ready:
-        history_ids_raw = move_view(config, f"{config.history_prefix}::list_lottery_ids")
-        history_ids = normalize_int_list(history_ids_raw)
-        for lottery_id in history_ids:
-            records_payload = extract_optional(
-                move_view(
-                    config,
-                    f"{config.history_prefix}::get_history",
-                    [f"u64:{lottery_id}"],
+    with span("gather_data.metadata"):
+        metadata_overview: Dict[str, Any] = {"initialized": metadata_ready, "lotteries": []}
+        if metadata_ready:
+            metadata_ids_raw = move_view(config, f"{config.metadata_prefix}::list_lottery_ids")
+            metadata_ids = normalize_int_list(metadata_ids_raw)
+            for lottery_id in metadata_ids:
+                payload = extract_optional(
+                    move_view(
+                        config,
+                        f"{config.metadata_prefix}::get_metadata",
+                        [f"u64:{lottery_id}"],
+                    )
+                )
+                metadata_overview["lotteries"].append(
+                    {"lottery_id": lottery_id, "metadata": payload}
                 )
-            )
-            history_overview["lotteries"].append(
-                {"lottery_id": lottery_id, "records": records_payload}
-            )
 
-    referrals_overview: Dict[str, Any] = {"initialized": referrals_ready, "lotteries": []}
-    if referrals_ready:
-        referral_ids_raw = move_view(config, f"{config.referrals_prefix}::list_lottery_ids")
-        referral_ids = normalize_int_list(referral_ids_raw)
-        for lottery_id in referral_ids:
-            config_payload = extract_optional(
-                move_view(
-                    config,
-                    f"{config.referrals_prefix}::get_lottery_config",
-                    [f"u64:{lottery_id}"],
+    with span("gather_data.operators"):
+        operators_overview: Dict[str, Any] = {"initialized": operators_ready, "lotteries": []}
+        if operators_ready:
+            operator_ids_raw = move_view(config, f"{config.operators_prefix}::list_lottery_ids")
+            operator_ids = normalize_int_list(operator_ids_raw)
+            for lottery_id in operator_ids:
+                owner_payload = extract_optional(
+                    move_view(
+                        config,
+                        f"{config.operators_prefix}::get_owner",
+                        [f"u64:{lottery_id}"],
+                    )
                 )
-            )
-            stats_payload = extract_optional(
-                move_view(
-                    config,
-                    f"{config.referrals_prefix}::get_lottery_stats",
-                    [f"u64:{lottery_id}"],
+                operators_payload = extract_optional(
+                    move_view(
+                        config,
+                        f"{config.operators_prefix}::list_operators",
+                        [f"u64:{lottery_id}"],
+                    )
+                )
+                operators_overview["lotteries"].append(
+                    {
+                        "lottery_id": lottery_id,
+                        "owner": owner_payload,
+                        "operators": normalize_address_list(operators_payload),
+                    }
                 )
-            )
-            referrals_overview["lotteries"].append(
-                {
-                    "lottery_id": lottery_id,
-                    "config": config_payload,
-                    "stats": stats_payload,
-                }
-            )
 
-    vip_overview: Dict[str, Any] = {"initialized": vip_ready, "lotteries": []}
-    if vip_ready:
-        vip_ids_raw = move_view(config, f"{config.vip_prefix}::list_lottery_ids")
-        vip_ids = normalize_int_list(vip_ids_raw)
-        for lottery_id in vip_ids:
-            summary_payload = extract_optional(
-                move_view(
-                    config,
-                    f"{config.vip_prefix}::get_lottery_summary",
-                    [f"u64:{lottery_id}"],
+    with span("gather_data.history"):
+        history_overview: Dict[str, Any] = {"initialized": history_ready, "lotteries": []}
+        if history_ready:
+            history_ids_raw = move_view(config, f"{config.history_prefix}::list_lottery_ids")
+            history_ids = normalize_int_list(history_ids_raw)
+            for lottery_id in history_ids:
+                records_payload = extract_optional(
+                    move_view(
+                        config,
+                        f"{config.history_prefix}::get_history",
+                        [f"u64:{lottery_id}"],
+                    )
                 )
-            )
-            players_payload = extract_optional(
-                move_view(
-                    config,
-                    f"{config.vip_prefix}::list_players",
-                    [f"u64:{lottery_id}"],
+                history_overview["lotteries"].append(
+                    {"lottery_id": lottery_id, "records": records_payload}
                 )
-            )
-            vip_overview["lotteries"].append(
-                {
-                    "lottery_id": lottery_id,
-                    "summary": summary_payload,
-                    "players": normalize_address_list(players_payload),
-                }
-            )
 
-    deposit_balance = move_view(
-        config,
-        f"{config.deposit_prefix}::checkClientFund",
-        [f"address:{config.client_addr}"],
-    )
-    min_balance_on_chain = move_view(
-        config,
-        f"{config.deposit_prefix}::checkMinBalanceClient",
-        [f"address:{config.client_addr}"],
-    )
-    min_balance_reached = move_view(
-        config,
-        f"{config.deposit_prefix}::isMinimumBalanceReached",
-        [f"address:{config.client_addr}"],
-    )
-    contract_details = move_view(
-        config,
-        f"{config.deposit_prefix}::getContractDetails",
-        [f"address:{config.lottery_addr}"],
-    )
-    subscription_info = move_view(
-        config,
-        f"{config.deposit_prefix}::getSubscriptionInfoByClient",
-        [f"address:{config.client_addr}"],
-    )
-    whitelisted_contracts = move_view(
-        config,
-        f"{config.deposit_prefix}::listAllWhitelistedContractByClient",
-        [f"address:{config.client_addr}"],
-    )
-    max_gas_price_on_chain = move_view(
-        config,
-        f"{config.deposit_prefix}::checkMaxGasPriceClient",
-        [f"address:{config.client_addr}"],
-    )
-    max_gas_limit_on_chain = move_view(
-        config,
-        f"{config.deposit_prefix}::checkMaxGasLimitClient",
-        [f"address:{config.client_addr}"],
-    )
+    with span("gather_data.referrals"):
+        referrals_overview: Dict[str, Any] = {"initialized": referrals_ready, "lotteries": []}
+        if referrals_ready:
+            referral_ids_raw = move_view(config, f"{config.referrals_prefix}::list_lottery_ids")
+            referral_ids = normalize_int_list(referral_ids_raw)
+            for lottery_id in referral_ids:
+                config_payload = extract_optional(
+                    move_view(
+                        config,
+                        f"{config.referrals_prefix}::get_lottery_config",
+                        [f"u64:{lottery_id}"],
+                    )
+                )
+                stats_payload = extract_optional(
+                    move_view(
+                        config,
+                        f"{config.referrals_prefix}::get_lottery_stats",
+                        [f"u64:{lottery_id}"],
+                    )
+                )
+                referrals_overview["lotteries"].append(
+                    {
+                        "lottery_id": lottery_id,
+                        "config": config_payload,
+                        "stats": stats_payload,
+                    }
+                )
+
+    with span("gather_data.vip"):
+        vip_overview: Dict[str, Any] = {"initialized": vip_ready, "lotteries": []}
+        if vip_ready:
+            vip_ids_raw = move_view(config, f"{config.vip_prefix}::list_lottery_ids")
+            vip_ids = normalize_int_list(vip_ids_raw)
+            for lottery_id in vip_ids:
+                summary_payload = extract_optional(
+                    move_view(
+                        config,
+                        f"{config.vip_prefix}::get_lottery_summary",
+                        [f"u64:{lottery_id}"],
+                    )
+                )
+                players_payload = extract_optional(
+                    move_view(
+                        config,
+                        f"{config.vip_prefix}::list_players",
+                        [f"u64:{lottery_id}"],
+                    )
+                )
+                vip_overview["lotteries"].append(
+                    {
+                        "lottery_id": lottery_id,
+                        "summary": summary_payload,
+                        "players": normalize_address_list(players_payload),
+                    }
+                )
+
+    with span("gather_data.deposit"):
+        deposit_balance = move_view(
+            config,
+            f"{config.deposit_prefix}::checkClientFund",
+            [f"address:{config.client_addr}"],
+        )
+        min_balance_on_chain = move_view(
+            config,
+            f"{config.deposit_prefix}::checkMinBalanceClient",
+            [f"address:{config.client_addr}"],
+        )
+        min_balance_reached = move_view(
+            config,
+            f"{config.deposit_prefix}::isMinimumBalanceReached",
+            [f"address:{config.client_addr}"],
+        )
+        contract_details = move_view(
+            config,
+            f"{config.deposit_prefix}::getContractDetails",
+            [f"address:{config.lottery_addr}"],
+        )
+        subscription_info = move_view(
+            config,
+            f"{config.deposit_prefix}::getSubscriptionInfoByClient",
+            [f"address:{config.client_addr}"],
+        )
+        whitelisted_contracts = move_view(
+            config,
+            f"{config.deposit_prefix}::listAllWhitelistedContractByClient",
+            [f"address:{config.client_addr}"],
+        )
+        max_gas_price_on_chain = move_view(
+            config,
+            f"{config.deposit_prefix}::checkMaxGasPriceClient",
+            [f"address:{config.client_addr}"],
+        )
+        max_gas_limit_on_chain = move_view(
+            config,
+            f"{config.deposit_prefix}::checkMaxGasLimitClient",
+            [f"address:{config.client_addr}"],
+        )
 
-    treasury_balance = move_view(config, f"{config.treasury_fa_prefix}::treasury_balance")
-    treasury_total_supply = move_view(config, f"{config.treasury_fa_prefix}::total_supply")
-    treasury_metadata = move_view(config, f"{config.treasury_fa_prefix}::metadata_summary")
+    with span("gather_data.treasury"):
+        treasury_balance = move_view(config, f"{config.treasury_fa_prefix}::treasury_balance")
+        treasury_total_supply = move_view(config, f"{config.treasury_fa_prefix}::total_supply")
+        treasury_metadata = move_view(config, f"{config.treasury_fa_prefix}::metadata_summary")
 
     return {
         "timestamp": datetime.now(timezone.utc).isoformat(),
@@ -757,12 +863,18 @@ def gather_data(config: MonitorConfig) -> Dict[str, Any]:
 
 
 __all__ = [
+    "CLI_BACKEND_ENV",
+    "CLI_CASSETTE_ENV",
+    "CliBackend",
     "CliError",
     "ConfigError",
     "MonitorConfig",
     "DEFAULT_MARGIN",
     "DEFAULT_WINDOW",
+    "configure_cli_backend_from_env",
+    "get_cli_backend",
     "monitor_config_from_env",
     "monitor_config_from_namespace",
     "gather_data",
+    "set_cli_backend",
 ]
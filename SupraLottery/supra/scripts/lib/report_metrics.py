@@ -0,0 +1,283 @@
+"""Prometheus rendering for aggregated monitoring reports."""
+from __future__ import annotations
+
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+# Экранирование меток и разбор флагов — общие с CLI-экспортёром.
+from ..testnet_monitor_prometheus import _truthy, escape_label_value, format_labels
+
+DEFAULT_METRIC_PREFIX = "supra_dvrf"
+
+# (имя метрики, описание). Порядок кортежа определяет порядок вывода.
+_LOTTERY_GAUGES: Tuple[Tuple[str, str], ...] = (
+    ("lottery_ticket_count", "Количество билетов в текущем раунде лотереи"),
+    ("lottery_draw_scheduled", "Флаг запланированного розыгрыша (1/0)"),
+    ("lottery_pending_request", "Наличие активного VRF-запроса (1/0)"),
+    ("lottery_pool_prize_quants", "Призовой пул лотереи в treasury_multi"),
+    ("lottery_pool_operations_quants", "Операционный пул лотереи в treasury_multi"),
+)
+
+_GLOBAL_GAUGES: Tuple[Tuple[str, str], ...] = (
+    ("deposit_balance_quants", "Баланс депозита dVRF клиента"),
+    ("min_balance_quants", "Расчётный минимальный баланс депозита"),
+    ("recommended_deposit_quants", "Рекомендуемый размер депозита"),
+    ("per_request_fee_quants", "Комиссия за один VRF-запрос"),
+    ("request_window_requests", "Окно запросов для расчёта min_balance"),
+    ("balance_ratio", "Отношение баланса депозита к min_balance"),
+    ("min_balance_reached", "Флаг достижения минимального баланса (1/0)"),
+    ("max_gas_price", "max_gas_price подписки dVRF on-chain"),
+    ("max_gas_limit", "max_gas_limit подписки dVRF on-chain"),
+    ("subscription_active", "Флаг активной подписки dVRF (1/0)"),
+    ("jackpot_balance_quants", "Глобальный баланс джекпота treasury_multi"),
+    ("lotteries_total", "Количество лотерей в отчёте"),
+    ("report_timestamp_seconds", "Unix-время формирования отчёта"),
+)
+
+
+def _as_number(value: Any) -> Optional[int]:
+    """Приводит значение отчёта к int; ``None`` означает «метрика недоступна»."""
+
+    if value is None:
+        return None
+    if isinstance(value, bool):
+        return int(value)
+    if isinstance(value, int):
+        return value
+    if isinstance(value, float):
+        return int(value)
+    if isinstance(value, list) and len(value) == 1:
+        return _as_number(value[0])
+    if isinstance(value, str):
+        text = value.strip()
+        if not text:
+            return None
+        try:
+            return int(text, 16 if text.startswith("0x") else 10)
+        except ValueError:
+            return None
+    return None
+
+
+def _format_value(value: float | int) -> str:
+    if isinstance(value, float):
+        return f"{value:.6f}"
+    return str(value)
+
+
+def lottery_gauge_values(entry: Mapping[str, Any]) -> Tuple[Optional[int], ...]:
+    """Извлекает значения per-lottery метрик из записи ``report["lotteries"]``."""
+
+    round_section = entry.get("round")
+    if not isinstance(round_section, Mapping):
+        round_section = {}
+    snapshot = round_section.get("snapshot")
+    if not isinstance(snapshot, Mapping):
+        snapshot = {}
+    pending_id = round_section.get("pending_request_id")
+
+    treasury = entry.get("treasury")
+    pool = treasury.get("pool") if isinstance(treasury, Mapping) else None
+    if not isinstance(pool, Mapping):
+        pool = {}
+
+    has_pending = _truthy(snapshot.get("has_pending_request")) or pending_id not in (None, [])
+    return (
+        _as_number(snapshot.get("ticket_count")) or 0,
+        1 if _truthy(snapshot.get("draw_scheduled")) else 0,
+        1 if has_pending else 0,
+        _as_number(pool.get("prize_balance")),
+        _as_number(pool.get("operations_balance")),
+    )
+
+
+def _report_timestamp(report: Mapping[str, Any]) -> Optional[float]:
+    raw = report.get("timestamp")
+    if not isinstance(raw, str):
+        return None
+    try:
+        return datetime.fromisoformat(raw).timestamp()
+    except ValueError:
+        return None
+
+
+def global_gauge_values(report: Mapping[str, Any]) -> Dict[str, float | int]:
+    """Значения метрик депозита и treasury уровня всего отчёта."""
+
+    deposit = report.get("deposit")
+    if not isinstance(deposit, Mapping):
+        deposit = {}
+    calculation = report.get("calculation")
+    if not isinstance(calculation, Mapping):
+        calculation = {}
+    treasury = report.get("treasury")
+    if not isinstance(treasury, Mapping):
+        treasury = {}
+
+    values: Dict[str, float | int] = {}
+    balance = _as_number(deposit.get("balance"))
+    min_balance = _as_number(calculation.get("min_balance"))
+    if balance is not None:
+        values["deposit_balance_quants"] = balance
+    if min_balance is not None:
+        values["min_balance_quants"] = min_balance
+    recommended = _as_number(calculation.get("recommended_deposit"))
+    if recommended is not None:
+        values["recommended_deposit_quants"] = recommended
+    fee = _as_number(calculation.get("per_request_fee"))
+    if fee is not None:
+        values["per_request_fee_quants"] = fee
+    window = _as_number(calculation.get("request_window"))
+    if window is not None:
+        values["request_window_requests"] = window
+    if balance is not None and min_balance:
+        values["balance_ratio"] = balance / min_balance
+    if "min_balance_reached" in deposit:
+        values["min_balance_reached"] = 1 if _truthy(deposit.get("min_balance_reached")) else 0
+    for key in ("max_gas_price", "max_gas_limit"):
+        number = _as_number(deposit.get(key))
+        if number is not None:
+            values[key] = number
+    subscription = deposit.get("subscription_info")
+    if isinstance(subscription, Mapping) and subscription.get("active") is not None:
+        values["subscription_active"] = 1 if _truthy(subscription.get("active")) else 0
+    jackpot = _as_number(treasury.get("jackpot_balance"))
+    if jackpot is not None:
+        values["jackpot_balance_quants"] = jackpot
+    lotteries = report.get("lotteries")
+    values["lotteries_total"] = len(lotteries) if isinstance(lotteries, list) else 0
+    timestamp = _report_timestamp(report)
+    if timestamp is not None:
+        values["report_timestamp_seconds"] = int(timestamp)
+    return values
+
+
+class ReportMetricsRenderer:
+    """Инкрементально рендерит отчёт ``gather_data`` в текстовый формат Prometheus.
+
+    Повторный вызов с тем же объектом отчёта возвращает готовый текст, а при
+    смене отчёта пересобираются только строки лотерей, чьи значения изменились.
+    """
+
+    def __init__(
+        self,
+        prefix: str = DEFAULT_METRIC_PREFIX,
+        labels: Optional[Mapping[str, str]] = None,
+    ) -> None:
+        if not prefix:
+            raise ValueError("Префикс метрик не может быть пустым")
+        self.prefix = prefix
+        self._static_labels = dict(labels or {})
+        self._base_labels: Dict[str, str] = {}
+        self._base_key: Tuple[Tuple[str, str], ...] = ()
+        self._lottery_lines: Dict[int, Tuple[Tuple[Optional[int], ...], Tuple[Optional[str], ...]]] = {}
+        self._header_cache: Dict[str, str] = {}
+        self._last_report: Optional[Mapping[str, Any]] = None
+        self._last_text = ""
+
+    def _header(self, name: str, description: str) -> str:
+        header = self._header_cache.get(name)
+        if header is None:
+            full = f"{self.prefix}_{name}"
+            header = f"# HELP {full} {description}\n# TYPE {full} gauge\n"
+            self._header_cache[name] = header
+        return header
+
+    def _update_base_labels(self, report: Mapping[str, Any]) -> None:
+        addresses = report.get("addresses")
+        if not isinstance(addresses, Mapping):
+            addresses = {}
+        labels: Dict[str, str] = {"profile": str(report.get("profile") or "<unknown>")}
+        for label, key in (("lottery_addr", "lottery"), ("client_addr", "client"), ("hub_addr", "hub")):
+            value = addresses.get(key)
+            if value:
+                labels[label] = str(value)
+        labels.update(self._static_labels)
+        key = tuple(sorted(labels.items()))
+        if key != self._base_key:
+            # Метки изменились — все закэшированные строки лотерей недействительны.
+            self._base_key = key
+            self._base_labels = labels
+            self._lottery_lines.clear()
+
+    def _lottery_lines_for(
+        self, lottery_id: int, values: Tuple[Optional[int], ...]
+    ) -> Tuple[Optional[str], ...]:
+        cached = self._lottery_lines.get(lottery_id)
+        if cached is not None and cached[0] == values:
+            return cached[1]
+        label_string = format_labels({**self._base_labels, "lottery_id": lottery_id})
+        lines = tuple(
+            None if value is None else f"{self.prefix}_{name}{{{label_string}}} {value}\n"
+            for (name, _), value in zip(_LOTTERY_GAUGES, values)
+        )
+        self._lottery_lines[lottery_id] = (values, lines)
+        return lines
+
+    def render(self, report: Mapping[str, Any]) -> str:
+        """Возвращает метрики отчёта, переиспользуя неизменившиеся строки."""
+
+        if report is self._last_report:
+            return self._last_text
+
+        self._update_base_labels(report)
+
+        lottery_rows: List[Tuple[Optional[str], ...]] = []
+        seen: set[int] = set()
+        lotteries = report.get("lotteries")
+        for entry in lotteries if isinstance(lotteries, list) else ():
+            if not isinstance(entry, Mapping):
+                continue
+            lottery_id = _as_number(entry.get("lottery_id"))
+            if lottery_id is None or lottery_id in seen:
+                continue
+            seen.add(lottery_id)
+            lottery_rows.append(self._lottery_lines_for(lottery_id, lottery_gauge_values(entry)))
+        for stale in set(self._lottery_lines) - seen:
+            del self._lottery_lines[stale]
+
+        parts: List[str] = []
+        for index, (name, description) in enumerate(_LOTTERY_GAUGES):
+            samples = [row[index] for row in lottery_rows if row[index] is not None]
+            if samples:
+                parts.append(self._header(name, description))
+                parts.extend(samples)  # type: ignore[arg-type]
+
+        global_values = global_gauge_values(report)
+        label_string = format_labels(self._base_labels)
+        for name, description in _GLOBAL_GAUGES:
+            value = global_values.get(name)
+            if value is None:
+                continue
+            parts.append(self._header(name, description))
+            parts.append(f"{self.prefix}_{name}{{{label_string}}} {_format_value(value)}\n")
+
+        self._last_report = report
+        self._last_text = "".join(parts)
+        return self._last_text
+
+
+def render_report_age(prefix: str, generated_at: Optional[float], now: Optional[float] = None) -> str:
+    """Строка с возрастом закэшированного отчёта (или -1, если отчёта ещё нет)."""
+
+    name = f"{prefix}_report_age_seconds"
+    if generated_at is None:
+        age = -1.0
+    else:
+        age = max(0.0, (now if now is not None else time.monotonic()) - generated_at)
+    return (
+        f"# HELP {name} Возраст отчёта, из которого построены метрики\n"
+        f"# TYPE {name} gauge\n{name} {age:.3f}\n"
+    )
+
+
+__all__ = [
+    "DEFAULT_METRIC_PREFIX",
+    "ReportMetricsRenderer",
+    "escape_label_value",
+    "format_labels",
+    "global_gauge_values",
+    "lottery_gauge_values",
+    "render_report_age",
+]
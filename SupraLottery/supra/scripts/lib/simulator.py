@@ -0,0 +1,437 @@
+"""Deterministic in-process stand-in for the Supra CLI used in load tests."""
+from __future__ import annotations
+
+import hashlib
+import os
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence
+
+try:  # pragma: no cover - import shim for both package and script usage
+    from .monitoring import CliError, MonitorConfig  # type: ignore[import]
+except ImportError:  # pragma: no cover - fallback when executed as a script
+    from lib.monitoring import CliError, MonitorConfig  # type: ignore[import,no-redef]
+
+_ENV_PREFIX = "SUPRA_SIM_"
+_MAX_SAMPLE_PLAYERS = 5
+_EVENT_TYPES = (
+    "DrawRequestIssuedEvent",
+    "DrawFulfilledEvent",
+    "RandomnessRequestedEvent",
+    "RandomnessFulfilledEvent",
+)
+
+
+@dataclass(slots=True)
+class SimulatorConfig:
+    """Параметры синтетического состояния сети."""
+
+    lottery_count: int = 10
+    tickets_per_lottery: int = 100
+    draws_per_lottery: int = 3
+    seed: int = 0
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    error_rate: float = 0.0
+    uninitialized_modules: frozenset[str] = field(default_factory=frozenset)
+
+    def __post_init__(self) -> None:
+        if self.lottery_count < 0:
+            raise ValueError("lottery_count не может быть отрицательным")
+        if self.tickets_per_lottery < 0:
+            raise ValueError("tickets_per_lottery не может быть отрицательным")
+        if not 0.0 <= self.error_rate <= 1.0:
+            raise ValueError("error_rate должен быть в диапазоне [0, 1]")
+
+
+def simulator_config_from_env(env: Mapping[str, str] | None = None) -> SimulatorConfig:
+    """Читает ``SUPRA_SIM_*`` переменные окружения."""
+
+    env = dict(os.environ if env is None else env)
+
+    def read(name: str, cast: Callable[[str], Any], default: Any) -> Any:
+        raw = env.get(f"{_ENV_PREFIX}{name}")
+        if raw is None or raw == "":
+            return default
+        try:
+            return cast(raw)
+        except ValueError as exc:
+            raise ValueError(f"{_ENV_PREFIX}{name} имеет неверный формат: {raw}") from exc
+
+    modules = env.get(f"{_ENV_PREFIX}UNINITIALIZED") or ""
+    return SimulatorConfig(
+        lottery_count=read("LOTTERIES", int, 10),
+        tickets_per_lottery=read("TICKETS", int, 100),
+        draws_per_lottery=read("DRAWS", int, 3),
+        seed=read("SEED", int, 0),
+        latency_ms=read("LATENCY_MS", float, 0.0),
+        jitter_ms=read("JITTER_MS", float, 0.0),
+        error_rate=read("ERROR_RATE", float, 0.0),
+        uninitialized_modules=frozenset(item.strip() for item in modules.split(",") if item.strip()),
+    )
+
+
+@dataclass(slots=True)
+class SimulatedLottery:
+    """Синтетическое состояние одной лотереи."""
+
+    lottery_id: int
+    owner: str
+    ticket_price: int
+    ticket_count: int
+    draw_scheduled: bool
+    pending_request_id: Optional[int]
+    prize_balance: int
+    operations_balance: int
+    players: List[str]
+
+
+def _address(rng: random.Random) -> str:
+    return f"0x{rng.getrandbits(256):064x}"
+
+
+def _parse_u64(call_args: Sequence[str]) -> Optional[int]:
+    for item in call_args:
+        if item.startswith("u64:"):
+            try:
+                return int(item[4:])
+            except ValueError:
+                return None
+    return None
+
+
+def _option(value: Any) -> List[Any]:
+    """Формат Option<T> Supra CLI: пустой список или список из одного значения."""
+
+    return [] if value is None else [value]
+
+
+class SimulatedChain:
+    """Отвечает на ``move tool view`` и ``move tool events list`` из синтетического состояния.
+
+    Экземпляр можно передать в :func:`lib.monitoring.set_cli_backend` — он
+    вызывается с теми же аргументами, что и реальный бинарь ``supra``.
+    Состояние лотереи вычисляется лениво и детерминированно из ``seed`` и
+    идентификатора, поэтому 10 000 лотерей не требуют предварительной генерации.
+    """
+
+    def __init__(self, config: Optional[SimulatorConfig] = None) -> None:
+        self.config = config or SimulatorConfig()
+        self._lotteries: Dict[int, SimulatedLottery] = {}
+        self._lock = threading.Lock()
+        self._calls = 0
+        seed_rng = random.Random(f"{self.config.seed}:global")
+        self.callback_sender = _address(seed_rng)
+        self.treasury_supply = seed_rng.randint(10**9, 10**12)
+        self._views: Dict[str, Callable[[Sequence[str]], Any]] = {
+            "hub::lottery_count": lambda _: [str(self.config.lottery_count)],
+            "hub::peek_next_lottery_id": lambda _: [str(self.config.lottery_count)],
+            "hub::callback_sender": lambda _: [self.callback_sender],
+            "hub::get_registration": self._registration,
+            "registry::get_lottery": self._factory_lottery,
+            "instances::get_lottery_info": self._instance_info,
+            "instances::get_instance_stats": self._instance_stats,
+            "rounds::get_round_snapshot": self._round_snapshot,
+            "rounds::pending_request_id": self._pending_request,
+            "treasury_multi::get_config": self._treasury_config,
+            "treasury_multi::get_pool": self._treasury_pool,
+            "treasury_multi::jackpot_balance": lambda _: [str(self._jackpot_balance())],
+            "autopurchase::get_lottery_summary": self._autopurchase_summary,
+            "autopurchase::list_players": self._players,
+            "metadata::get_metadata": self._metadata,
+            "operators::get_owner": lambda args: self._with_lottery(args, lambda item: item.owner),
+            "operators::list_operators": self._operators,
+            "history::latest_record": self._latest_record,
+            "history::get_history": self._history,
+            "referrals::get_lottery_config": self._referral_config,
+            "referrals::get_lottery_stats": self._referral_stats,
+            "vip::get_lottery_summary": self._vip_summary,
+            "vip::list_players": self._players,
+            "deposit::checkClientFund": lambda _: [str(self._deposit_balance())],
+            "deposit::checkMinBalanceClient": lambda _: [str(self._deposit_balance() // 2)],
+            "deposit::isMinimumBalanceReached": lambda _: [True],
+            "deposit::getContractDetails": lambda _: [{"active": True, "callback_gas": "5000"}],
+            "deposit::getSubscriptionInfoByClient": lambda _: [
+                {"active": True, "lotteries": str(self.config.lottery_count)}
+            ],
+            "deposit::listAllWhitelistedContractByClient": lambda _: [[self.callback_sender]],
+            "deposit::checkMaxGasPriceClient": lambda _: ["1000"],
+            "deposit::checkMaxGasLimitClient": lambda _: ["500000"],
+            "treasury_v1::treasury_balance": lambda _: [str(self._jackpot_balance())],
+            "treasury_v1::total_supply": lambda _: [str(self.treasury_supply)],
+            "treasury_v1::metadata_summary": lambda _: [
+                {"name": "Lottery Ticket", "symbol": "LOT", "decimals": 9}
+            ],
+        }
+
+    # --- синтетическое состояние -------------------------------------------------
+
+    def lottery(self, lottery_id: int) -> Optional[SimulatedLottery]:
+        if lottery_id < 0 or lottery_id >= self.config.lottery_count:
+            return None
+        cached = self._lotteries.get(lottery_id)
+        if cached is not None:
+            return cached
+        rng = random.Random(f"{self.config.seed}:lottery:{lottery_id}")
+        ticket_price = rng.choice((10, 25, 50, 100))
+        ticket_count = rng.randint(0, 2 * self.config.tickets_per_lottery)
+        draw_scheduled = ticket_count > 0 and rng.random() < 0.3
+        pending: Optional[int] = None
+        if draw_scheduled and rng.random() < 0.5:
+            pending = lottery_id * 1_000 + self.config.draws_per_lottery
+        players = [_address(rng) for _ in range(min(ticket_count, _MAX_SAMPLE_PLAYERS))]
+        state = SimulatedLottery(
+            lottery_id=lottery_id,
+            owner=_address(rng),
+            ticket_price=ticket_price,
+            ticket_count=ticket_count,
+            draw_scheduled=draw_scheduled,
+            pending_request_id=pending,
+            prize_balance=ticket_count * ticket_price * 7 // 10,
+            operations_balance=ticket_count * ticket_price // 10,
+            players=players,
+        )
+        with self._lock:
+            self._lotteries.setdefault(lottery_id, state)
+        return state
+
+    def _jackpot_balance(self) -> int:
+        return self.config.lottery_count * self.config.tickets_per_lottery * 5
+
+    def _deposit_balance(self) -> int:
+        return 10**9 + self.config.lottery_count * 1_000
+
+    def _with_lottery(self, args: Sequence[str], build: Callable[[SimulatedLottery], Any]) -> List[Any]:
+        lottery_id = _parse_u64(args)
+        item = self.lottery(lottery_id) if lottery_id is not None else None
+        return _option(None if item is None else build(item))
+
+    def _registration(self, args: Sequence[str]) -> List[Any]:
+        return self._with_lottery(
+            args,
+            lambda item: {"owner": item.owner, "lottery": item.owner, "active": True},
+        )
+
+    def _factory_lottery(self, args: Sequence[str]) -> List[Any]:
+        return self._with_lottery(
+            args,
+            lambda item: {"owner": item.owner, "ticket_price": str(item.ticket_price)},
+        )
+
+    def _instance_info(self, args: Sequence[str]) -> List[Any]:
+        return self._with_lottery(
+            args,
+            lambda item: {
+                "owner": item.owner,
+                "ticket_price": str(item.ticket_price),
+                "jackpot_share_bps": "1000",
+            },
+        )
+
+    def _instance_stats(self, args: Sequence[str]) -> List[Any]:
+        return self._with_lottery(
+            args,
+            lambda item: {
+                "tickets_sold": str(item.ticket_count),
+                "jackpot_accumulated": str(item.prize_balance // 10),
+                "active": True,
+            },
+        )
+
+    def _round_snapshot(self, args: Sequence[str]) -> List[Any]:
+        return self._with_lottery(
+            args,
+            lambda item: {
+                "ticket_count": str(item.ticket_count),
+                "draw_scheduled": item.draw_scheduled,
+                "has_pending_request": item.pending_request_id is not None,
+                "next_ticket_id": str(item.ticket_count),
+            },
+        )
+
+    def _pending_request(self, args: Sequence[str]) -> List[Any]:
+        lottery_id = _parse_u64(args)
+        item = self.lottery(lottery_id) if lottery_id is not None else None
+        if item is None or item.pending_request_id is None:
+            return []
+        return [str(item.pending_request_id)]
+
+    def _treasury_config(self, args: Sequence[str]) -> List[Any]:
+        return self._with_lottery(
+            args,
+            lambda _: {"prize_bps": "7000", "jackpot_bps": "2000", "operations_bps": "1000"},
+        )
+
+    def _treasury_pool(self, args: Sequence[str]) -> List[Any]:
+        return self._with_lottery(
+            args,
+            lambda item: {
+                "prize_balance": str(item.prize_balance),
+                "operations_balance": str(item.operations_balance),
+            },
+        )
+
+    def _autopurchase_summary(self, args: Sequence[str]) -> List[Any]:
+        return self._with_lottery(
+            args,
+            lambda item: {
+                "total_balance": str(item.ticket_price * 10),
+                "total_players": str(len(item.players)),
+            },
+        )
+
+    def _players(self, args: Sequence[str]) -> List[Any]:
+        lottery_id = _parse_u64(args)
+        item = self.lottery(lottery_id) if lottery_id is not None else None
+        return [[] if item is None else list(item.players)]
+
+    def _metadata(self, args: Sequence[str]) -> List[Any]:
+        return self._with_lottery(
+            args,
+            lambda item: {"title": f"Lottery #{item.lottery_id}", "description": "", "image_uri": ""},
+        )
+
+    def _operators(self, args: Sequence[str]) -> List[Any]:
+        return self._with_lottery(args, lambda item: [item.owner])
+
+    def _history_records(self, item: SimulatedLottery) -> List[Dict[str, Any]]:
+        return [
+            {
+                "request_id": str(item.lottery_id * 1_000 + draw),
+                "winner": item.players[draw % len(item.players)] if item.players else item.owner,
+                "prize_amount": str(item.ticket_price * 10 * (draw + 1)),
+            }
+            for draw in range(self.config.draws_per_lottery)
+        ]
+
+    def _latest_record(self, args: Sequence[str]) -> List[Any]:
+        def build(item: SimulatedLottery) -> Any:
+            records = self._history_records(item)
+            return records[-1] if records else None
+
+        return self._with_lottery(args, build)
+
+    def _history(self, args: Sequence[str]) -> List[Any]:
+        return self._with_lottery(args, self._history_records)
+
+    def _referral_config(self, args: Sequence[str]) -> List[Any]:
+        return self._with_lottery(args, lambda _: {"referrer_bps": "200", "referee_bps": "100"})
+
+    def _referral_stats(self, args: Sequence[str]) -> List[Any]:
+        return self._with_lottery(
+            args,
+            lambda item: {"rewarded_purchases": str(item.ticket_count // 4), "total_referrer_rewards": "0"},
+        )
+
+    def _vip_summary(self, args: Sequence[str]) -> List[Any]:
+        return self._with_lottery(
+            args,
+            lambda item: {"members": str(len(item.players)), "total_revenue": str(item.ticket_price * 50)},
+        )
+
+    def _list_lottery_ids(self, _: Sequence[str]) -> List[Any]:
+        return [str(lottery_id) for lottery_id in range(self.config.lottery_count)]
+
+    # --- разбор аргументов CLI ---------------------------------------------------
+
+    def view(self, function_id: str, call_args: Sequence[str] = ()) -> Any:
+        """Возвращает поле ``result`` view-функции ``<addr>::<module>::<function>``."""
+
+        parts = function_id.split("::")
+        if len(parts) < 2:
+            raise CliError(f"Некорректный function-id: {function_id}")
+        module, function = parts[-2], parts[-1]
+        if function == "is_initialized":
+            return [module not in self.config.uninitialized_modules]
+        if function == "list_lottery_ids":
+            return self._list_lottery_ids(call_args)
+        handler = self._views.get(f"{module}::{function}")
+        if handler is None:
+            raise CliError(f"Симулятор не поддерживает view {module}::{function}")
+        return handler(call_args)
+
+    def events(self, event_type: Optional[str], limit: int) -> List[Dict[str, Any]]:
+        """Последние ``limit`` событий (новые первыми) для типа ``<addr>::<module>::<Event>``."""
+
+        name = event_type.split("::")[-1] if event_type else None
+        if name is not None and name not in _EVENT_TYPES:
+            return []
+        names = [name] if name is not None else list(_EVENT_TYPES)
+        total = self.config.lottery_count * self.config.draws_per_lottery
+        events: List[Dict[str, Any]] = []
+        for sequence in range(total - 1, -1, -1):
+            lottery_id = sequence % self.config.lottery_count
+            draw = sequence // self.config.lottery_count
+            request_id = lottery_id * 1_000 + draw
+            for event_name in names:
+                if len(events) >= limit:
+                    return events
+                data: Dict[str, Any] = {"lottery_id": str(lottery_id), "request_id": str(request_id)}
+                if event_name.endswith("FulfilledEvent"):
+                    value = random.Random(f"{self.config.seed}:rng:{request_id}").getrandbits(64)
+                    data["randomness"] = [str(value)]
+                events.append(
+                    {
+                        "type": event_name,
+                        "sequence_number": str(sequence),
+                        "data": data,
+                    }
+                )
+        return events
+
+    def _maybe_fail(self, args: Sequence[str]) -> None:
+        with self._lock:
+            self._calls += 1
+            call_index = self._calls
+        config = self.config
+        if not config.latency_ms and not config.jitter_ms and not config.error_rate:
+            return
+        digest = hashlib.blake2b(
+            f"{config.seed}:{call_index}:{' '.join(args)}".encode(), digest_size=8
+        ).digest()
+        rng = random.Random(int.from_bytes(digest, "big"))
+        delay = config.latency_ms + rng.uniform(0.0, config.jitter_ms)
+        if delay > 0:
+            time.sleep(delay / 1000)
+        if config.error_rate and rng.random() < config.error_rate:
+            raise CliError(f"Симулированная ошибка Supra CLI ({' '.join(args)})")
+
+    def handle(self, args: Sequence[str]) -> Dict[str, Any]:
+        """Обрабатывает аргументы командной строки ``supra`` и возвращает JSON-ответ."""
+
+        args = [str(item) for item in args]
+        self._maybe_fail(args)
+        if args[:3] == ["move", "tool", "view"]:
+            function_id = _flag_value(args, "--function-id")
+            if function_id is None:
+                raise CliError("Не указан --function-id")
+            call_args: List[str] = []
+            if "--args" in args:
+                call_args = args[args.index("--args") + 1 :]
+            return {"result": self.view(function_id, call_args)}
+        if args[:4] == ["move", "tool", "events", "list"]:
+            raw_limit = _flag_value(args, "--limit")
+            limit = int(raw_limit) if raw_limit else 25
+            return {"result": self.events(_flag_value(args, "--event-type"), limit)}
+        raise CliError(f"Симулятор не поддерживает команду: {' '.join(args)}")
+
+    def __call__(self, config: MonitorConfig, extra: Sequence[str]) -> Dict[str, Any]:
+        return self.handle(extra)
+
+
+def _flag_value(args: Sequence[str], flag: str) -> Optional[str]:
+    try:
+        index = list(args).index(flag)
+    except ValueError:
+        return None
+    return args[index + 1] if index + 1 < len(args) else None
+
+
+__all__ = [
+    "SimulatedChain",
+    "SimulatedLottery",
+    "SimulatorConfig",
+    "simulator_config_from_env",
+]
@@ -0,0 +1,345 @@
+"""Optional in-process tracing with local exporters (no external collector)."""
+from __future__ import annotations
+
+import functools
+import inspect
+import json
+import os
+import random
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from typing import Any, Callable, Deque, Dict, List, Optional, Protocol, TypeVar
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+_ENV_EXPORTER = "SUPRA_TRACING"
+_ENV_FILE = "SUPRA_TRACING_FILE"
+_ENV_SAMPLE_RATE = "SUPRA_TRACING_SAMPLE_RATE"
+_DEFAULT_FILE = "supra_traces.jsonl"
+_MAX_STATEMENT_LENGTH = 300
+
+
+class Span:
+    """Завершаемый участок работы с атрибутами и ссылкой на родителя."""
+
+    __slots__ = (
+        "name",
+        "trace_id",
+        "span_id",
+        "parent_id",
+        "start_ns",
+        "end_ns",
+        "attributes",
+        "status",
+        "_tracer",
+        "_token",
+    )
+
+    def __init__(
+        self,
+        tracer: "Tracer",
+        name: str,
+        trace_id: str,
+        parent_id: Optional[str],
+        attributes: Dict[str, Any],
+    ) -> None:
+        self._tracer = tracer
+        self._token = None
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent_id
+        self.attributes = attributes
+        self.status = "ok"
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    @property
+    def duration_ms(self) -> float:
+        end = self.end_ns if self.end_ns is not None else time.time_ns()
+        return (end - self.start_ns) / 1_000_000
+
+    def end(self) -> None:
+        if self.end_ns is None:
+            self.end_ns = time.time_ns()
+            self._tracer.exporter.export(self)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start_ns": self.start_ns,
+            "end_ns": self.end_ns,
+            "duration_ms": round(self.duration_ms, 3),
+            "status": self.status,
+            "attributes": self.attributes,
+        }
+
+    def __enter__(self) -> "Span":
+        self._token = _CURRENT_SPAN.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:  # type: ignore[no-untyped-def]
+        if exc is not None:
+            self.status = "error"
+            self.attributes["error"] = f"{exc_type.__name__}: {exc}"
+        if self._token is not None:
+            _CURRENT_SPAN.reset(self._token)
+            self._token = None
+        self.end()
+
+
+class _NoopSpan:
+    """Заглушка, возвращаемая при выключенной трассировке или вне выборки."""
+
+    __slots__ = ("_token",)
+
+    def __init__(self) -> None:
+        self._token = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        return None
+
+    def end(self) -> None:
+        return None
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:  # type: ignore[no-untyped-def]
+        return None
+
+
+class _UnsampledSpan(_NoopSpan):
+    """Корень трассы вне выборки: подавляет спаны потомков до выхода."""
+
+    def __enter__(self) -> "_UnsampledSpan":
+        self._token = _CURRENT_SPAN.set(_UNSAMPLED)
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:  # type: ignore[no-untyped-def]
+        if self._token is not None:
+            _CURRENT_SPAN.reset(self._token)
+            self._token = None
+
+
+NOOP_SPAN = _NoopSpan()
+_UNSAMPLED = object()
+_CURRENT_SPAN: ContextVar[Any] = ContextVar("supra_current_span", default=None)
+
+
+class SpanExporter(Protocol):
+    def export(self, span: Span) -> None:  # pragma: no cover - протокол
+        ...
+
+
+class InMemorySpanExporter:
+    """Хранит последние завершённые спаны в памяти процесса."""
+
+    def __init__(self, max_spans: int = 10_000) -> None:
+        self._spans: Deque[Span] = deque(maxlen=max_spans)
+        self._lock = threading.Lock()
+
+    def export(self, span: Span) -> None:
+        with self._lock:
+            self._spans.append(span)
+
+    def spans(self, name: Optional[str] = None) -> List[Span]:
+        with self._lock:
+            items = list(self._spans)
+        if name is None:
+            return items
+        return [item for item in items if item.name == name]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._spans.clear()
+
+
+class FileSpanExporter:
+    """Дописывает завершённые спаны в JSON Lines файл."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+
+    def export(self, span: Span) -> None:
+        line = json.dumps(span.to_dict(), ensure_ascii=False, default=str)
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as handle:
+                handle.write(line + "\n")
+
+
+class Tracer:
+    """Создаёт спаны и принимает решение о выборке на корне трассы."""
+
+    def __init__(self, exporter: SpanExporter, sample_rate: float = 1.0) -> None:
+        if not 0.0 <= sample_rate <= 1.0:
+            raise ValueError("sample_rate должен быть в диапазоне [0, 1]")
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+
+    def start_span(self, name: str, attributes: Dict[str, Any]) -> Span | _NoopSpan:
+        parent = _CURRENT_SPAN.get()
+        if parent is _UNSAMPLED:
+            return NOOP_SPAN
+        if parent is None:
+            if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+                return _UnsampledSpan()
+            return Span(self, name, f"{random.getrandbits(128):032x}", None, attributes)
+        return Span(self, name, parent.trace_id, parent.span_id, attributes)
+
+
+_TRACER: Optional[Tracer] = None
+
+
+def configure_tracing(
+    exporter: Optional[SpanExporter] = None, sample_rate: float = 1.0
+) -> Optional[Tracer]:
+    """Включает трассировку с заданным экспортёром (``None`` — выключает)."""
+
+    global _TRACER
+    _TRACER = Tracer(exporter, sample_rate) if exporter is not None else None
+    return _TRACER
+
+
+def configure_tracing_from_env(env: Optional[Dict[str, str]] = None) -> Optional[Tracer]:
+    """Настраивает трассировку по ``SUPRA_TRACING`` (off/memory/file)."""
+
+    env = dict(os.environ if env is None else env)
+    mode = (env.get(_ENV_EXPORTER) or "off").strip().lower()
+    try:
+        sample_rate = float(env.get(_ENV_SAMPLE_RATE) or 1.0)
+    except ValueError as exc:
+        raise ValueError(f"{_ENV_SAMPLE_RATE} должен быть числом") from exc
+
+    if mode in {"", "0", "off", "none", "false"}:
+        return configure_tracing(None)
+    if mode == "memory":
+        return configure_tracing(InMemorySpanExporter(), sample_rate)
+    if mode == "file":
+        return configure_tracing(FileSpanExporter(env.get(_ENV_FILE) or _DEFAULT_FILE), sample_rate)
+    raise ValueError(f"Неизвестный режим трассировки {_ENV_EXPORTER}={mode}")
+
+
+def get_tracer() -> Optional[Tracer]:
+    return _TRACER
+
+
+def tracing_enabled() -> bool:
+    return _TRACER is not None
+
+
+def span(name: str, **attributes: Any) -> Span | _NoopSpan:
+    """Контекстный менеджер спана; при выключенной трассировке — общий no-op."""
+
+    tracer = _TRACER
+    if tracer is None:
+        return NOOP_SPAN
+    return tracer.start_span(name, attributes)
+
+
+def current_span() -> Optional[Span]:
+    value = _CURRENT_SPAN.get()
+    return value if isinstance(value, Span) else None
+
+
+def traced(name: str) -> Callable[[F], F]:
+    """Декоратор: оборачивает вызов функции (sync или async) в спан ``name``."""
+
+    def decorator(func: F) -> F:
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+                if _TRACER is None:
+                    return await func(*args, **kwargs)
+                with span(name):
+                    return await func(*args, **kwargs)
+
+            return async_wrapper  # type: ignore[return-value]
+
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if _TRACER is None:
+                return func(*args, **kwargs)
+            with span(name):
+                return func(*args, **kwargs)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorator
+
+
+def instrument_engine(engine: Any) -> None:
+    """Подключает к SQLAlchemy ``Engine`` спаны ``db.query`` для каждого запроса."""
+
+    from sqlalchemy import event
+
+    target = getattr(engine, "sync_engine", engine)
+    if getattr(target, "_supra_tracing_instrumented", False):
+        return
+
+    dialect = target.dialect.name
+
+    def _before(conn, cursor, statement, parameters, context, executemany):  # type: ignore[no-untyped-def]
+        if _TRACER is None or context is None:
+            return
+        query_span = span(
+            "db.query",
+            **{
+                "db.system": dialect,
+                "db.statement": statement[:_MAX_STATEMENT_LENGTH],
+                "db.executemany": bool(executemany),
+            },
+        )
+        if isinstance(query_span, Span):
+            context._supra_span = query_span
+
+    def _after(conn, cursor, statement, parameters, context, executemany):  # type: ignore[no-untyped-def]
+        query_span = getattr(context, "_supra_span", None)
+        if query_span is not None:
+            rowcount = getattr(cursor, "rowcount", -1)
+            if rowcount is not None and rowcount >= 0:
+                query_span.set_attribute("db.rowcount", rowcount)
+            query_span.end()
+            context._supra_span = None
+
+    def _error(exception_context):  # type: ignore[no-untyped-def]
+        context = exception_context.execution_context
+        query_span = getattr(context, "_supra_span", None) if context is not None else None
+        if query_span is not None:
+            query_span.status = "error"
+            query_span.set_attribute("error", str(exception_context.original_exception))
+            query_span.end()
+            context._supra_span = None
+
+    event.listen(target, "before_cursor_execute", _before)
+    event.listen(target, "after_cursor_execute", _after)
+    event.listen(target, "handle_error", _error)
+    target._supra_tracing_instrumented = True
+
+
+__all__ = [
+    "FileSpanExporter",
+    "InMemorySpanExporter",
+    "NOOP_SPAN",
+    "Span",
+    "SpanExporter",
+    "Tracer",
+    "configure_tracing",
+    "configure_tracing_from_env",
+    "current_span",
+    "get_tracer",
+    "instrument_engine",
+    "span",
+    "traced",
+    "tracing_enabled",
+]
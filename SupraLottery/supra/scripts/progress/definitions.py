@@ -0,0 +1,132 @@
+"""Кэш активных определений чек-листа и достижений в памяти процесса.
+
+Определения меняются только через ``upsert_*``, поэтому персональные
+запросы берут их из кэша и читают из БД лишь прогресс пользователя.
+Каждый ``upsert_*`` в той же транзакции увеличивает версию набора в таблице
+``definition_versions``; другие воркеры сверяют версию не чаще раза в
+``SUPRA_PROGRESS_DEFINITIONS_RECHECK_SECONDS`` секунд (по умолчанию 1,
+``0`` — на каждом запросе) и перечитывают набор, если она изменилась.
+"""
+from __future__ import annotations
+
+import os
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Optional, Sequence
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..accounts.db import engine_generation
+from ..lib.tracing import span
+from .tables import DefinitionVersion
+
+CHECKLIST_DEFINITIONS = "checklist"
+ACHIEVEMENT_DEFINITIONS = "achievements"
+RECHECK_ENV = "SUPRA_PROGRESS_DEFINITIONS_RECHECK_SECONDS"
+DEFAULT_RECHECK_SECONDS = 1.0
+
+Loader = Callable[[AsyncSession], Awaitable[Sequence[Any]]]
+
+
+def recheck_interval_from_env() -> float:
+    raw = os.environ.get(RECHECK_ENV)
+    if not raw:
+        return DEFAULT_RECHECK_SECONDS
+    try:
+        value = float(raw)
+    except ValueError as exc:
+        raise ValueError(f"{RECHECK_ENV} должен быть числом") from exc
+    if value < 0:
+        raise ValueError(f"{RECHECK_ENV} не может быть отрицательным")
+    return value
+
+
+@dataclass
+class _Entry:
+    generation: int
+    version: int
+    items: tuple[Any, ...]
+    checked_at: float
+
+
+class DefinitionCache:
+    """Наборы определений по имени с проверкой версии в БД."""
+
+    def __init__(
+        self,
+        recheck_interval: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._recheck_interval = recheck_interval
+        self.clock = clock
+        self.hits = 0
+        self.loads = 0
+        self._entries: Dict[str, _Entry] = {}
+
+    @property
+    def recheck_interval(self) -> float:
+        if self._recheck_interval is None:
+            self._recheck_interval = recheck_interval_from_env()
+        return self._recheck_interval
+
+    async def get(self, name: str, session: AsyncSession, loader: Loader) -> tuple[Any, ...]:
+        """Набор ``name``: из памяти или через ``loader`` в той же сессии."""
+
+        now = self.clock()
+        generation = engine_generation()
+        entry = self._entries.get(name)
+        if entry is not None and entry.generation != generation:
+            entry = None
+        if entry is not None and now - entry.checked_at < self.recheck_interval:
+            self.hits += 1
+            return entry.items
+
+        version = await self._version(session, name)
+        if entry is not None and entry.version == version:
+            entry.checked_at = now
+            self.hits += 1
+            return entry.items
+
+        # Версия читается до набора: если его успеют изменить, следующая
+        # проверка увидит новую версию и перечитает набор ещё раз.
+        with span("progress.definitions.load", definitions=name, version=version):
+            items = tuple(await loader(session))
+        self._entries[name] = _Entry(generation, version, items, now)
+        self.loads += 1
+        return items
+
+    @staticmethod
+    async def _version(session: AsyncSession, name: str) -> int:
+        statement = select(DefinitionVersion.version).where(DefinitionVersion.name == name)
+        return (await session.scalar(statement)) or 0
+
+    @staticmethod
+    async def bump(session: AsyncSession, name: str) -> None:
+        """Увеличивает версию набора в текущей транзакции (до ``commit``)."""
+
+        result = await session.execute(
+            update(DefinitionVersion)
+            .where(DefinitionVersion.name == name)
+            .values(version=DefinitionVersion.version + 1)
+        )
+        if not result.rowcount:
+            session.add(DefinitionVersion(name=name, version=1))
+
+    def invalidate(self, name: Optional[str] = None) -> None:
+        if name is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(name, None)
+
+
+definition_cache = DefinitionCache()
+
+
+__all__ = [
+    "ACHIEVEMENT_DEFINITIONS",
+    "CHECKLIST_DEFINITIONS",
+    "DefinitionCache",
+    "RECHECK_ENV",
+    "definition_cache",
+]
@@ -0,0 +1,281 @@
+"""Материализованный лидерборд по сумме очков достижений.
+
+``achievement_leaderboard`` хранит сумму ``Achievement.points`` открытых
+активных достижений каждого адреса, ``achievement_leaderboard_tree`` —
+дерево Фенвика над этими суммами: узел ``i`` считает адреса с очками в
+``(i - lowbit(i), i]``, корневой узел :data:`TREE_SIZE` — все адреса. Обе
+таблицы обновляются в транзакции, которая открывает достижения или меняет
+их очки (:func:`refresh_addresses`): пересчитываются только затронутые
+адреса, на каждое изменение суммы — не больше ``log2(TREE_SIZE)`` узлов.
+
+Топ-N читается по индексу ``(points, address)``, место адреса — поиском его
+строки по ключу и чтением не больше ``log2(TREE_SIZE) + 1`` узлов по ключу
+(префиксная сумма и корень). Места выдаются по «спортивному» правилу:
+равные суммы делят место (1, 1, 3). Суммы больше :data:`TREE_SIZE` делят
+в дереве один узел.
+
+Транзакции над одним адресом выстраиваются в очередь на его строке: перед
+чтением старой суммы :func:`refresh_addresses` вставляет строку-заглушку
+(``ON CONFLICT DO NOTHING``) и блокирует её, так что и у новых адресов есть
+что блокировать (на SQLite ту же роль играет блокировка записи БД).
+:func:`rebuild_leaderboard` (``python -m supra.scripts progress-leaderboard``)
+пересобирает обе таблицы из прогресса, например после бэкфилла.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+from collections import Counter
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Iterable, List, Mapping, Optional
+
+from sqlalchemy import Select, delete, func, insert, literal, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..accounts.config import get_config_from_env
+from ..accounts.db import dialect_insert, get_async_session, init_engine, rows_per_statement
+from ..lib.tracing import traced
+from .tables import Achievement, AchievementProgress, LeaderboardEntry, LeaderboardTreeNode
+
+logger = logging.getLogger(__name__)
+
+# Адресов в одном IN (...) при пересчёте; в пределах 999 параметров старых SQLite.
+REFRESH_CHUNK = 500
+# Диапазон очков дерева Фенвика: 1..TREE_SIZE, корень — узел TREE_SIZE.
+TREE_SIZE = 1 << 40
+
+
+@dataclass(frozen=True, slots=True)
+class LeaderboardPosition:
+    address: str
+    points: int
+    rank: int
+
+
+def _points_query(addresses: Optional[List[str]] = None) -> Select:
+    statement = (
+        select(AchievementProgress.address, func.sum(Achievement.points).label("points"))
+        .join(Achievement, Achievement.id == AchievementProgress.achievement_id)
+        .where(AchievementProgress.unlocked_at.is_not(None), Achievement.is_active.is_(True))
+        .group_by(AchievementProgress.address)
+        .having(func.sum(Achievement.points) > 0)
+    )
+    if addresses is not None:
+        statement = statement.where(AchievementProgress.address.in_(addresses))
+    return statement
+
+
+def _tree_index(points: int) -> int:
+    return min(max(int(points), 1), TREE_SIZE)
+
+
+def _node_deltas(deltas: Mapping[int, int]) -> Counter:
+    """Изменения узлов дерева по изменениям числа адресов с данной суммой очков."""
+
+    nodes: Counter = Counter()
+    for points, delta in deltas.items():
+        if not delta:
+            continue
+        node = _tree_index(points)
+        while node <= TREE_SIZE:
+            nodes[node] += delta
+            node += node & -node
+    return nodes
+
+
+def _prefix_nodes(points: int) -> List[int]:
+    """Узлы, сумма которых — число адресов с очками не больше ``points``."""
+
+    nodes = []
+    node = _tree_index(points)
+    while node > 0:
+        nodes.append(node)
+        node -= node & -node
+    return nodes
+
+
+async def _apply_tree_deltas(session: AsyncSession, deltas: Counter) -> None:
+    table = LeaderboardTreeNode.__table__
+    rows = [{"node": node, "addresses": delta} for node, delta in _node_deltas(deltas).items() if delta]
+    per_statement = rows_per_statement(session, len(table.columns))
+    for start in range(0, len(rows), per_statement):
+        chunk = rows[start : start + per_statement]
+        statement = dialect_insert(session, table).values(chunk)
+        await session.execute(
+            statement.on_conflict_do_update(
+                index_elements=[table.c.node],
+                set_={"addresses": table.c.addresses + statement.excluded.addresses},
+            )
+        )
+        await session.execute(
+            delete(LeaderboardTreeNode).where(
+                LeaderboardTreeNode.node.in_([row["node"] for row in chunk]), LeaderboardTreeNode.addresses <= 0
+            )
+        )
+
+
+async def refresh_addresses(session: AsyncSession, addresses: Iterable[str]) -> None:
+    """Пересчитывает строки лидерборда ``addresses`` в текущей транзакции (до ``commit``)."""
+
+    # Сортировка — единый порядок блокировок, без взаимных deadlock.
+    unique = sorted(set(addresses))
+    table = LeaderboardEntry.__table__
+    now = datetime.now(timezone.utc)
+    per_statement = rows_per_statement(session, len(table.columns))
+    for start in range(0, len(unique), REFRESH_CHUNK):
+        chunk = unique[start : start + REFRESH_CHUNK]
+        # Заглушка с нулём очков: конкурент ждёт на её вставке до нашего commit,
+        # а сумму читаем уже под блокировкой. Наружу нули не попадают —
+        # ниже строки без очков удаляются в этой же транзакции.
+        placeholders = [{"address": address, "points": 0, "updated_at": now} for address in chunk]
+        for offset in range(0, len(placeholders), per_statement):
+            await session.execute(
+                dialect_insert(session, table)
+                .values(placeholders[offset : offset + per_statement])
+                .on_conflict_do_nothing(index_elements=[table.c.address])
+            )
+        old = {
+            address: points
+            for address, points in (await session.execute(
+                select(LeaderboardEntry.address, LeaderboardEntry.points)
+                .where(LeaderboardEntry.address.in_(chunk))
+                .with_for_update()
+            )).all()
+            if points
+        }
+        new = dict((await session.execute(_points_query(chunk))).all())
+
+        deltas: Counter = Counter()
+        changed = []
+        removed = []
+        for address in chunk:
+            before, after = old.get(address), new.get(address)
+            if after is None:
+                removed.append(address)
+            if before == after:
+                continue
+            if before is not None:
+                deltas[before] -= 1
+            if after is not None:
+                deltas[after] += 1
+                changed.append({"address": address, "points": int(after), "updated_at": now})
+
+        for offset in range(0, len(changed), per_statement):
+            statement = dialect_insert(session, table).values(changed[offset : offset + per_statement])
+            await session.execute(
+                statement.on_conflict_do_update(
+                    index_elements=[table.c.address],
+                    set_={"points": statement.excluded.points, "updated_at": statement.excluded.updated_at},
+                )
+            )
+        if removed:
+            await session.execute(delete(LeaderboardEntry).where(LeaderboardEntry.address.in_(removed)))
+        await _apply_tree_deltas(session, deltas)
+
+
+async def refresh_achievement_holders(session: AsyncSession, achievement_id: int) -> None:
+    """Пересчёт всех, кто открыл достижение, — после смены его очков или активности."""
+
+    holders = await session.scalars(
+        select(AchievementProgress.address).where(
+            AchievementProgress.achievement_id == achievement_id,
+            AchievementProgress.unlocked_at.is_not(None),
+        )
+    )
+    await refresh_addresses(session, list(holders))
+
+
+@traced("progress.leaderboard.top")
+async def top(limit: int) -> List[LeaderboardPosition]:
+    """Первые ``limit`` адресов лидерборда с местами."""
+
+    async with get_async_session(readonly=True) as session:
+        rows = (await session.execute(
+            select(LeaderboardEntry.address, LeaderboardEntry.points)
+            .order_by(LeaderboardEntry.points.desc(), LeaderboardEntry.address.asc())
+            .limit(limit)
+        )).all()
+    positions: List[LeaderboardPosition] = []
+    for index, (address, points) in enumerate(rows):
+        # Все адреса с большим счётом уже в списке выше.
+        rank = positions[-1].rank if positions and positions[-1].points == points else index + 1
+        positions.append(LeaderboardPosition(address, int(points), rank))
+    return positions
+
+
+@traced("progress.leaderboard.rank")
+async def rank_of(address: str) -> tuple[Optional[LeaderboardPosition], int]:
+    """Место адреса (``None``, если очков нет) и число адресов в лидерборде."""
+
+    normalized = address.lower().strip()
+    async with get_async_session(readonly=True) as session:
+        points = await session.scalar(
+            select(LeaderboardEntry.points).where(LeaderboardEntry.address == normalized)
+        )
+        prefix = _prefix_nodes(points) if points is not None else []
+        counts = dict(
+            (await session.execute(
+                select(LeaderboardTreeNode.node, LeaderboardTreeNode.addresses).where(
+                    LeaderboardTreeNode.node.in_([TREE_SIZE, *prefix])
+                )
+            )).all()
+        )
+    total = int(counts.get(TREE_SIZE, 0))
+    if points is None:
+        return None, total
+    # Впереди все, у кого очков больше: всего минус префикс до своей суммы.
+    ahead = total - sum(int(counts.get(node, 0)) for node in prefix)
+    return LeaderboardPosition(normalized, int(points), ahead + 1), total
+
+
+@traced("progress.leaderboard.rebuild")
+async def rebuild_leaderboard() -> int:
+    """Пересобирает лидерборд и дерево из прогресса; возвращает число адресов."""
+
+    now = datetime.now(timezone.utc)
+    async with get_async_session() as session:
+        await session.execute(delete(LeaderboardTreeNode))
+        await session.execute(delete(LeaderboardEntry))
+        source = _points_query().subquery()
+        await session.execute(
+            insert(LeaderboardEntry).from_select(
+                ["address", "points", "updated_at"],
+                select(source.c.address, source.c.points, literal(now, LeaderboardEntry.updated_at.type)),
+            )
+        )
+        histogram = dict(
+            (await session.execute(
+                select(LeaderboardEntry.points, func.count()).group_by(LeaderboardEntry.points)
+            )).all()
+        )
+        await _apply_tree_deltas(session, Counter(histogram))
+        total = sum(histogram.values())
+        await session.commit()
+    return int(total or 0)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Пересобрать лидерборд достижений из прогресса")
+    parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+    init_engine(get_config_from_env())
+    total = asyncio.run(rebuild_leaderboard())
+    logger.info("Лидерборд пересобран: %s адресов", total)
+
+
+__all__ = [
+    "TREE_SIZE",
+    "LeaderboardPosition",
+    "main",
+    "rank_of",
+    "rebuild_leaderboard",
+    "refresh_achievement_holders",
+    "refresh_addresses",
+    "top",
+]
+
+
+if __name__ == "__main__":
+    main()
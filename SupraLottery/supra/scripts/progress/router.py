@@ -1,7 +1,7 @@
 """FastAPI-роутер подсистемы прогресса."""
 from __future__ import annotations
 
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, HTTPException, Query, status
 
 from .schemas import (
     AchievementPayload,
@@ -9,15 +9,26 @@ from .schemas import (
     AchievementResponse,
     AchievementStatusResponse,
     AchievementUnlockRequest,
+    ActivityEventsRequest,
+    ActivityEventsResponse,
+    BulkAchievementUnlockRequest,
+    BulkChecklistCompleteRequest,
+    BulkProgressResponse,
     ChecklistCompleteRequest,
     ChecklistProgressResponse,
     ChecklistStatusResponse,
     ChecklistTaskPayload,
     ChecklistTaskResponse,
+    LeaderboardEntryResponse,
+    LeaderboardRankResponse,
+    LeaderboardResponse,
 )
 from .service import (
     AchievementNotFoundError,
+    BulkResult,
     TaskNotFoundError,
+    bulk_complete_checklist_tasks,
+    bulk_unlock_achievements,
     complete_checklist_task,
     get_checklist_for_address,
     list_achievements_for_address,
@@ -25,6 +36,8 @@ from .service import (
     upsert_achievement,
     upsert_checklist_task,
 )
+from .leaderboard import rank_of, top
+from .rules import process_activity_events
 from .tables import Achievement, AchievementProgress, ChecklistProgress, ChecklistTask
 
 router = APIRouter(prefix="/progress", tags=["progress"])
@@ -80,19 +93,23 @@ def _achievement_progress_to_response(
     )
 
 
+def _bulk_to_response(result: BulkResult) -> BulkProgressResponse:
+    return BulkProgressResponse(requested=result.requested, affected=result.affected, batches=result.batches)
+
+
 @router.put("/checklist/{code}", response_model=ChecklistTaskResponse)
-def put_checklist_task(code: str, payload: ChecklistTaskPayload) -> ChecklistTaskResponse:
+async def put_checklist_task(code: str, payload: ChecklistTaskPayload) -> ChecklistTaskResponse:
     data = payload.dict()
     data["code"] = code
-    task = upsert_checklist_task(data)
+    task = await upsert_checklist_task(data)
     return _task_to_response(task)
 
 
 @router.get("/{address}/checklist", response_model=ChecklistStatusResponse)
-def get_checklist(address: str) -> ChecklistStatusResponse:
+async def get_checklist(address: str) -> ChecklistStatusResponse:
     entries = [
         _progress_to_response(task, progress)
-        for task, progress in get_checklist_for_address(address)
+        for task, progress in await get_checklist_for_address(address)
     ]
     return ChecklistStatusResponse(address=address.lower().strip(), tasks=entries)
 
@@ -102,11 +119,11 @@ def get_checklist(address: str) -> ChecklistStatusResponse:
     response_model=ChecklistProgressResponse,
     status_code=status.HTTP_201_CREATED,
 )
-def complete_checklist(
+async def complete_checklist(
     address: str, code: str, payload: ChecklistCompleteRequest
 ) -> ChecklistProgressResponse:
     try:
-        progress = complete_checklist_task(
+        progress = await complete_checklist_task(
             address,
             code,
             metadata=payload.metadata,
@@ -117,19 +134,33 @@ def complete_checklist(
     return _progress_to_response(progress.task, progress)
 
 
+@router.post("/checklist/bulk-complete", response_model=BulkProgressResponse)
+async def post_bulk_complete_checklist(payload: BulkChecklistCompleteRequest) -> BulkProgressResponse:
+    try:
+        result = await bulk_complete_checklist_tasks(
+            payload.addresses,
+            payload.codes,
+            metadata=payload.metadata,
+            reward_claimed=payload.reward_claimed,
+        )
+    except TaskNotFoundError as exc:
+        raise HTTPException(status.HTTP_404_NOT_FOUND, detail=f"Задания не найдены: {exc}") from exc
+    return _bulk_to_response(result)
+
+
 @router.put("/achievements/{code}", response_model=AchievementResponse)
-def put_achievement(code: str, payload: AchievementPayload) -> AchievementResponse:
+async def put_achievement(code: str, payload: AchievementPayload) -> AchievementResponse:
     data = payload.dict()
     data["code"] = code
-    achievement = upsert_achievement(data)
+    achievement = await upsert_achievement(data)
     return _achievement_to_response(achievement)
 
 
 @router.get("/{address}/achievements", response_model=AchievementStatusResponse)
-def get_achievements(address: str) -> AchievementStatusResponse:
+async def get_achievements(address: str) -> AchievementStatusResponse:
     entries = [
         _achievement_progress_to_response(achievement, progress)
-        for achievement, progress in list_achievements_for_address(address)
+        for achievement, progress in await list_achievements_for_address(address)
     ]
     return AchievementStatusResponse(address=address.lower().strip(), achievements=entries)
 
@@ -139,11 +170,11 @@ def get_achievements(address: str) -> AchievementStatusResponse:
     response_model=AchievementProgressResponse,
     status_code=status.HTTP_201_CREATED,
 )
-def post_unlock_achievement(
+async def post_unlock_achievement(
     address: str, code: str, payload: AchievementUnlockRequest
 ) -> AchievementProgressResponse:
     try:
-        progress = unlock_achievement(
+        progress = await unlock_achievement(
             address,
             code,
             progress_value=payload.progress_value,
@@ -154,4 +185,47 @@ def post_unlock_achievement(
     return _achievement_progress_to_response(progress.achievement, progress)
 
 
+@router.post("/achievements/bulk-unlock", response_model=BulkProgressResponse)
+async def post_bulk_unlock_achievements(payload: BulkAchievementUnlockRequest) -> BulkProgressResponse:
+    try:
+        result = await bulk_unlock_achievements(
+            payload.addresses,
+            payload.codes,
+            progress_value=payload.progress_value,
+            metadata=payload.metadata,
+        )
+    except AchievementNotFoundError as exc:
+        raise HTTPException(status.HTTP_404_NOT_FOUND, detail=f"Достижения не найдены: {exc}") from exc
+    return _bulk_to_response(result)
+
+
+@router.post("/events", response_model=ActivityEventsResponse)
+async def post_activity_events(payload: ActivityEventsRequest) -> ActivityEventsResponse:
+    result = await process_activity_events([event.model_dump() for event in payload.events])
+    return ActivityEventsResponse(
+        events=result.events, skipped=result.skipped, counters=result.counters, batches=result.batches
+    )
+
+
+@router.get("/leaderboard", response_model=LeaderboardResponse)
+async def get_leaderboard(
+    limit: int = Query(10, ge=1, le=100, description="Количество мест"),
+) -> LeaderboardResponse:
+    entries = [
+        LeaderboardEntryResponse(rank=position.rank, address=position.address, points=position.points)
+        for position in await top(limit)
+    ]
+    return LeaderboardResponse(entries=entries)
+
+
+@router.get("/leaderboard/{address}", response_model=LeaderboardRankResponse)
+async def get_leaderboard_rank(address: str) -> LeaderboardRankResponse:
+    position, total = await rank_of(address)
+    if position is None:
+        raise HTTPException(status.HTTP_404_NOT_FOUND, detail="Адрес не в лидерборде")
+    return LeaderboardRankResponse(
+        rank=position.rank, address=position.address, points=position.points, total=total
+    )
+
+
 __all__ = ["router"]
@@ -0,0 +1,242 @@
+"""Движок правил достижений по on-chain активности.
+
+Правило хранится в ``Achievement.metadata["rule"]``::
+
+    {"metric": "tickets", "threshold": 10, "lottery_id": 3}
+
+``metric`` — одна из :data:`METRICS`, ``lottery_id`` необязателен. Счётчик
+адреса копится в ``AchievementProgress.progress_value``; достижение
+открывается, когда счётчик впервые достигает ``threshold``.
+
+События принимаются в формате REST/CLI Supra (``type``, ``sequence_number``,
+``data``). Учтённые события хранятся по ключу ``(тип события, sequence_number)``
+в ``achievement_processed_events``, поэтому повторная доставка не удваивает
+счётчики, а страницы можно присылать в любом порядке и с пропусками.
+События обрабатываются пачками: ключи пачки записываются ``INSERT ... ON
+CONFLICT DO NOTHING RETURNING`` (учитываются только вставленные), дельты
+суммируются в памяти и пишутся одним ``INSERT ... ON CONFLICT`` на
+достижение в той же транзакции.
+
+``WinnersComputedEvent`` не содержит адресов победителей: индексатор
+добавляет их в ``data["winners"]``, иначе событие только помечается учтённым.
+"""
+from __future__ import annotations
+
+import logging
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Iterable, Mapping, Optional, Sequence
+
+from sqlalchemy import case
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..accounts.db import dialect_insert, get_async_session, rows_per_statement
+from ..lib.tracing import span, traced
+from .definitions import ACHIEVEMENT_DEFINITIONS, definition_cache
+from .leaderboard import refresh_addresses
+from .service import BULK_BATCH_SIZE, _load_active_achievements, _normalize_address
+from .tables import Achievement, AchievementProcessedEvent, AchievementProgress
+
+logger = logging.getLogger(__name__)
+
+METRICS = ("tickets", "spend", "wins", "referrals", "referral_rewards")
+
+
+@dataclass(frozen=True, slots=True)
+class Activity:
+    """Вклад события в метрику адреса."""
+
+    address: str
+    metric: str
+    amount: int
+    lottery_id: Optional[int] = None
+
+
+@dataclass(frozen=True, slots=True)
+class Rule:
+    achievement_id: int
+    metric: str
+    threshold: int
+    lottery_id: Optional[int] = None
+
+    def matches(self, activity: Activity) -> bool:
+        return activity.metric == self.metric and self.lottery_id in (None, activity.lottery_id)
+
+
+@dataclass(frozen=True, slots=True)
+class RulesResult:
+    """Итог обработки событий."""
+
+    events: int
+    skipped: int
+    counters: int
+    batches: int
+
+
+def _optional_int(value: Any) -> Optional[int]:
+    return None if value is None else int(value)
+
+
+def activities_from_event(event_type: str, data: Mapping[str, Any]) -> list[Activity]:
+    """Переводит событие в вклады по метрикам; неизвестные типы игнорируются."""
+
+    name = event_type.split("::")[-1].split("<")[0]
+    lottery_id = _optional_int(data.get("lottery_id"))
+    if name == "TicketPurchaseEvent":
+        buyer = _normalize_address(str(data["buyer"]))
+        return [
+            Activity(buyer, "tickets", int(data.get("quantity", 0)), lottery_id),
+            Activity(buyer, "spend", int(data.get("sale_amount", 0)), lottery_id),
+        ]
+    if name == "WinnersComputedEvent":
+        winners = data.get("winners") or ()
+        return [Activity(_normalize_address(str(winner)), "wins", 1, lottery_id) for winner in winners]
+    if name == "ReferralRegisteredEvent":
+        return [Activity(_normalize_address(str(data["referrer"])), "referrals", 1, lottery_id)]
+    if name == "ReferralRewardPaidEvent":
+        referrer = _normalize_address(str(data["referrer"]))
+        return [Activity(referrer, "referral_rewards", int(data.get("referrer_amount", 0)), lottery_id)]
+    return []
+
+
+def rule_from_achievement(achievement: Achievement) -> Optional[Rule]:
+    """Правило из метаданных достижения или ``None``, если его нет или оно некорректно."""
+
+    raw = (achievement.metadata or {}).get("rule")
+    if raw is None:
+        return None
+    try:
+        metric = str(raw["metric"])
+        threshold = int(raw["threshold"])
+        lottery_id = _optional_int(raw.get("lottery_id"))
+    except (KeyError, TypeError, ValueError):
+        logger.warning("Некорректное правило достижения %s: %r", achievement.code, raw)
+        return None
+    if metric not in METRICS or threshold < 1:
+        logger.warning("Некорректное правило достижения %s: %r", achievement.code, raw)
+        return None
+    return Rule(achievement.id, metric, threshold, lottery_id)
+
+
+def _stream(event: Mapping[str, Any]) -> str:
+    return str(event["type"]).split("<")[0]
+
+
+def _event_key(event: Mapping[str, Any]) -> tuple[str, int]:
+    return _stream(event), int(event["sequence_number"])
+
+
+async def _claim_events(session: AsyncSession, keys: Iterable[tuple[str, int]]) -> set[tuple[str, int]]:
+    """Помечает события учтёнными; возвращает ключи, которых ещё не было."""
+
+    table = AchievementProcessedEvent.__table__
+    rows = [{"stream": stream, "sequence_number": number} for stream, number in keys]
+    claimed: set[tuple[str, int]] = set()
+    per_statement = rows_per_statement(session, len(table.columns))
+    for start in range(0, len(rows), per_statement):
+        statement = (
+            dialect_insert(session, table)
+            .values(rows[start : start + per_statement])
+            .on_conflict_do_nothing(index_elements=[table.c.stream, table.c.sequence_number])
+            .returning(table.c.stream, table.c.sequence_number)
+        )
+        claimed.update((stream, int(number)) for stream, number in (await session.execute(statement)).all())
+    return claimed
+
+
+async def _apply_deltas(session: AsyncSession, rule: Rule, deltas: Mapping[str, int], now: datetime) -> None:
+    table = AchievementProgress.__table__
+    rows = [
+        {
+            "address": address,
+            "achievement_id": rule.achievement_id,
+            "progress_value": delta,
+            "unlocked_at": now if delta >= rule.threshold else None,
+            "metadata": {},
+        }
+        for address, delta in deltas.items()
+    ]
+    per_statement = rows_per_statement(session, len(table.columns))
+    for start in range(0, len(rows), per_statement):
+        statement = dialect_insert(session, table).values(rows[start : start + per_statement])
+        total = table.c.progress_value + statement.excluded.progress_value
+        statement = statement.on_conflict_do_update(
+            index_elements=[table.c.address, table.c.achievement_id],
+            set_={
+                "progress_value": total,
+                "unlocked_at": case(
+                    (table.c.unlocked_at.is_not(None), table.c.unlocked_at),
+                    (total >= rule.threshold, now),
+                    else_=None,
+                ),
+            },
+        )
+        await session.execute(statement)
+
+
+@traced("progress.process_activity_events")
+async def process_activity_events(
+    events: Sequence[Mapping[str, Any]],
+    *,
+    batch_size: int = BULK_BATCH_SIZE,
+) -> RulesResult:
+    """Учитывает события в счётчиках достижений с правилами.
+
+    Уже учтённые события (по ``(тип, sequence_number)``) пропускаются.
+    Каждая пачка из ``batch_size`` событий — одна транзакция. Порядок на
+    входе не важен: REST отдаёт страницы от новых к старым.
+    """
+
+    if batch_size < 1:
+        raise ValueError("batch_size должен быть положительным")
+    ordered = sorted(events, key=lambda event: int(event["sequence_number"]))
+    skipped = counters = batches = 0
+    async with get_async_session() as session:
+        achievements = await definition_cache.get(ACHIEVEMENT_DEFINITIONS, session, _load_active_achievements)
+        rules = [rule for rule in map(rule_from_achievement, achievements) if rule is not None]
+
+        for start in range(0, len(ordered), batch_size):
+            batch = ordered[start : start + batch_size]
+            claimed = await _claim_events(session, dict.fromkeys(map(_event_key, batch)))
+            accepted = len(claimed)
+            deltas: dict[Rule, dict[str, int]] = defaultdict(lambda: defaultdict(int))
+            for event in batch:
+                key = _event_key(event)
+                if key not in claimed:
+                    skipped += 1
+                    continue
+                # Дубль внутри пачки учитывается один раз.
+                claimed.discard(key)
+                for activity in activities_from_event(key[0], event.get("data") or {}):
+                    if activity.amount <= 0:
+                        continue
+                    for rule in rules:
+                        if rule.matches(activity):
+                            deltas[rule][activity.address] += activity.amount
+            if not accepted:
+                continue
+
+            now = datetime.now(timezone.utc)
+            with span("progress.rules.batch", events=accepted, rules=len(deltas)):
+                for rule, per_address in deltas.items():
+                    await _apply_deltas(session, rule, per_address, now)
+                    counters += len(per_address)
+                # Порог мог быть пройден у любого из адресов пачки.
+                touched = {address for per_address in deltas.values() for address in per_address}
+                await refresh_addresses(session, touched)
+                await session.commit()
+            batches += 1
+
+    return RulesResult(events=len(events), skipped=skipped, counters=counters, batches=batches)
+
+
+__all__ = [
+    "METRICS",
+    "Activity",
+    "Rule",
+    "RulesResult",
+    "activities_from_event",
+    "process_activity_events",
+    "rule_from_achievement",
+]
@@ -80,7 +80,63 @@ class AchievementUnlockRequest(BaseModel):
     metadata: dict[str, Any] | None = Field(default=None)
 
 
+MAX_BULK_ADDRESSES = 10_000
+
+
+class BulkChecklistCompleteRequest(ChecklistCompleteRequest):
+    addresses: list[str] = Field(..., min_length=1, max_length=MAX_BULK_ADDRESSES)
+    codes: list[str] = Field(..., min_length=1, max_length=100, description="Задания для каждого адреса")
+
+
+class BulkAchievementUnlockRequest(AchievementUnlockRequest):
+    addresses: list[str] = Field(..., min_length=1, max_length=MAX_BULK_ADDRESSES)
+    codes: list[str] = Field(..., min_length=1, max_length=100, description="Достижения для каждого адреса")
+
+
+class BulkProgressResponse(BaseModel):
+    requested: int = Field(..., description="Пар адрес/код после удаления дублей")
+    affected: int = Field(..., description="Вставлено или обновлено строк")
+    batches: int = Field(..., description="Число транзакций")
+
+
+class ActivityEvent(BaseModel):
+    type: str = Field(..., description="Тип события Move, например <addr>::sales::TicketPurchaseEvent")
+    sequence_number: int = Field(..., ge=0)
+    data: dict[str, Any] = Field(default_factory=dict)
+
+
+class ActivityEventsRequest(BaseModel):
+    events: list[ActivityEvent] = Field(..., max_length=MAX_BULK_ADDRESSES)
+
+
+class ActivityEventsResponse(BaseModel):
+    events: int
+    skipped: int = Field(..., description="Уже учтённые события")
+    counters: int = Field(..., description="Обновлено счётчиков адрес/достижение")
+    batches: int
+
+
+class LeaderboardEntryResponse(BaseModel):
+    rank: int = Field(..., description="Место; равные суммы делят место")
+    address: str
+    points: int
+
+
+class LeaderboardResponse(BaseModel):
+    entries: list[LeaderboardEntryResponse]
+
+
+class LeaderboardRankResponse(LeaderboardEntryResponse):
+    total: int = Field(..., description="Адресов в лидерборде")
+
+
 __all__ = [
+    "ActivityEvent",
+    "ActivityEventsRequest",
+    "ActivityEventsResponse",
+    "BulkAchievementUnlockRequest",
+    "BulkChecklistCompleteRequest",
+    "BulkProgressResponse",
     "ChecklistTaskPayload",
     "ChecklistTaskResponse",
     "ChecklistProgressResponse",
@@ -91,4 +147,7 @@ __all__ = [
     "AchievementProgressResponse",
     "AchievementStatusResponse",
     "AchievementUnlockRequest",
+    "LeaderboardEntryResponse",
+    "LeaderboardRankResponse",
+    "LeaderboardResponse",
 ]
@@ -1,13 +1,18 @@
 """Прикладная логика чек-листов и достижений."""
 from __future__ import annotations
 
+from dataclasses import dataclass
 from datetime import datetime, timezone
-from typing import Any
+from typing import Any, Awaitable, Callable, Iterable, Sequence
 
-from sqlalchemy import select
-from sqlalchemy.orm import Session
+from sqlalchemy import Table, func, inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.attributes import set_committed_value
 
-from ..accounts.db import get_session
+from ..accounts.db import dialect_insert, get_async_session, rows_per_statement
+from ..lib.tracing import traced
+from .definitions import ACHIEVEMENT_DEFINITIONS, CHECKLIST_DEFINITIONS, definition_cache
+from .leaderboard import refresh_achievement_holders, refresh_addresses
 from .tables import (
     Achievement,
     AchievementProgress,
@@ -24,6 +29,20 @@ class AchievementNotFoundError(LookupError):
     """Достижение не найдено или отключено."""
 
 
+# Строк в одной транзакции массовой операции. Внутри транзакции строки
+# делятся на INSERT ... VALUES по лимиту параметров диалекта (rows_per_statement).
+BULK_BATCH_SIZE = 1000
+
+
+@dataclass(frozen=True, slots=True)
+class BulkResult:
+    """Итог массовой операции."""
+
+    requested: int
+    affected: int
+    batches: int
+
+
 def _utcnow() -> datetime:
     return datetime.now(timezone.utc)
 
@@ -32,25 +51,27 @@ def _normalize_address(address: str) -> str:
     return address.lower().strip()
 
 
-def _select_task_by_code(session: Session, code: str) -> ChecklistTask | None:
+async def _select_task_by_code(session: AsyncSession, code: str) -> ChecklistTask | None:
     statement = select(ChecklistTask).where(ChecklistTask.code == code)
-    return session.scalars(statement).first()
+    return (await session.scalars(statement)).first()
 
 
-def upsert_checklist_task(payload: dict[str, Any]) -> ChecklistTask:
+@traced("progress.upsert_checklist_task")
+async def upsert_checklist_task(payload: dict[str, Any]) -> ChecklistTask:
     """Создаёт или обновляет запись чек-листа."""
 
-    with get_session() as session:
-        task = _upsert_task(session, payload)
-        session.commit()
-        session.refresh(task)
+    async with get_async_session() as session:
+        task = await _upsert_task(session, payload)
+        await definition_cache.bump(session, CHECKLIST_DEFINITIONS)
+        await session.commit()
+        definition_cache.invalidate(CHECKLIST_DEFINITIONS)
+        await session.refresh(task)
         return task
 
 
-def _upsert_task(session: Session, payload: dict[str, Any]) -> ChecklistTask:
+async def _upsert_task(session: AsyncSession, payload: dict[str, Any]) -> ChecklistTask:
     code = str(payload["code"]).strip().lower()
-    statement = select(ChecklistTask).where(ChecklistTask.code == code)
-    instance = session.scalars(statement).first()
+    instance = await _select_task_by_code(session, code)
     if instance is None:
         instance = ChecklistTask(code=code)
         session.add(instance)
@@ -68,28 +89,34 @@ def _upsert_task(session: Session, payload: dict[str, Any]) -> ChecklistTask:
     return instance
 
 
-def get_checklist_for_address(address: str) -> list[tuple[ChecklistTask, ChecklistProgress | None]]:
+async def _load_active_tasks(session: AsyncSession) -> list[ChecklistTask]:
+    return list(
+        await session.scalars(
+            select(ChecklistTask)
+            .where(ChecklistTask.is_active.is_(True))
+            .order_by(ChecklistTask.day_index.asc(), ChecklistTask.id.asc())
+        )
+    )
+
+
+@traced("progress.get_checklist")
+async def get_checklist_for_address(address: str) -> list[tuple[ChecklistTask, ChecklistProgress | None]]:
     """Возвращает активные задания чек-листа и их статус для пользователя."""
 
     normalized = _normalize_address(address)
-    with get_session() as session:
-        tasks = list(
-            session.scalars(
-                select(ChecklistTask)
-                .where(ChecklistTask.is_active.is_(True))
-                .order_by(ChecklistTask.day_index.asc(), ChecklistTask.id.asc())
-            )
-        )
+    async with get_async_session(readonly=True) as session:
+        tasks = await definition_cache.get(CHECKLIST_DEFINITIONS, session, _load_active_tasks)
         progress_map = {
             row.task_id: row
-            for row in session.scalars(
+            for row in await session.scalars(
                 select(ChecklistProgress).where(ChecklistProgress.address == normalized)
             )
         }
         return [(task, progress_map.get(task.id)) for task in tasks]
 
 
-def complete_checklist_task(
+@traced("progress.complete_checklist_task")
+async def complete_checklist_task(
     address: str,
     code: str,
     metadata: dict[str, Any] | None = None,
@@ -98,8 +125,8 @@ def complete_checklist_task(
     """Отмечает выполнение задания пользователем."""
 
     normalized = _normalize_address(address)
-    with get_session() as session:
-        task = _select_task_by_code(session, code.strip().lower())
+    async with get_async_session() as session:
+        task = await _select_task_by_code(session, code.strip().lower())
         if task is None or not task.is_active:
             raise TaskNotFoundError(code)
 
@@ -107,7 +134,7 @@ def complete_checklist_task(
             ChecklistProgress.address == normalized,
             ChecklistProgress.task_id == task.id,
         )
-        progress = session.scalars(statement).first()
+        progress = (await session.scalars(statement)).first()
         if progress is None:
             progress = ChecklistProgress(address=normalized, task=task)
             session.add(progress)
@@ -118,25 +145,36 @@ def complete_checklist_task(
         if not progress.completed_at:
             progress.completed_at = _utcnow()
 
-        session.commit()
-        session.refresh(progress)
+        await session.commit()
+        await session.refresh(progress)
+        # Связь нужна роутеру после закрытия сессии, ленивая загрузка там невозможна.
+        set_committed_value(progress, "task", task)
         return progress
 
 
-def upsert_achievement(payload: dict[str, Any]) -> Achievement:
+@traced("progress.upsert_achievement")
+async def upsert_achievement(payload: dict[str, Any]) -> Achievement:
     """Создаёт или обновляет определение достижения."""
 
-    with get_session() as session:
-        achievement = _upsert_achievement(session, payload)
-        session.commit()
-        session.refresh(achievement)
+    async with get_async_session() as session:
+        achievement = await _upsert_achievement(session, payload)
+        state = inspect(achievement)
+        rescore = achievement.id is not None and (
+            state.attrs.points.history.has_changes() or state.attrs.is_active.history.has_changes()
+        )
+        await definition_cache.bump(session, ACHIEVEMENT_DEFINITIONS)
+        if rescore:
+            await refresh_achievement_holders(session, achievement.id)
+        await session.commit()
+        definition_cache.invalidate(ACHIEVEMENT_DEFINITIONS)
+        await session.refresh(achievement)
         return achievement
 
 
-def _upsert_achievement(session: Session, payload: dict[str, Any]) -> Achievement:
+async def _upsert_achievement(session: AsyncSession, payload: dict[str, Any]) -> Achievement:
     code = str(payload["code"]).strip().lower()
     statement = select(Achievement).where(Achievement.code == code)
-    instance = session.scalars(statement).first()
+    instance = (await session.scalars(statement)).first()
     if instance is None:
         instance = Achievement(code=code)
         session.add(instance)
@@ -152,30 +190,36 @@ def _upsert_achievement(session: Session, payload: dict[str, Any]) -> Achievemen
     return instance
 
 
-def list_achievements_for_address(
+async def _load_active_achievements(session: AsyncSession) -> list[Achievement]:
+    return list(
+        await session.scalars(
+            select(Achievement)
+            .where(Achievement.is_active.is_(True))
+            .order_by(Achievement.points.desc(), Achievement.id.asc())
+        )
+    )
+
+
+@traced("progress.list_achievements")
+async def list_achievements_for_address(
     address: str,
 ) -> list[tuple[Achievement, AchievementProgress | None]]:
     """Возвращает достижения и прогресс пользователя."""
 
     normalized = _normalize_address(address)
-    with get_session() as session:
-        achievements = list(
-            session.scalars(
-                select(Achievement)
-                .where(Achievement.is_active.is_(True))
-                .order_by(Achievement.points.desc(), Achievement.id.asc())
-            )
-        )
+    async with get_async_session(readonly=True) as session:
+        achievements = await definition_cache.get(ACHIEVEMENT_DEFINITIONS, session, _load_active_achievements)
         progress_map = {
             row.achievement_id: row
-            for row in session.scalars(
+            for row in await session.scalars(
                 select(AchievementProgress).where(AchievementProgress.address == normalized)
             )
         }
         return [(achievement, progress_map.get(achievement.id)) for achievement in achievements]
 
 
-def unlock_achievement(
+@traced("progress.unlock_achievement")
+async def unlock_achievement(
     address: str,
     code: str,
     progress_value: int | None = None,
@@ -184,9 +228,9 @@ def unlock_achievement(
     """Отмечает достижение выполненным."""
 
     normalized = _normalize_address(address)
-    with get_session() as session:
+    async with get_async_session() as session:
         statement = select(Achievement).where(Achievement.code == code.strip().lower())
-        achievement = session.scalars(statement).first()
+        achievement = (await session.scalars(statement)).first()
         if achievement is None or not achievement.is_active:
             raise AchievementNotFoundError(code)
 
@@ -194,25 +238,175 @@ def unlock_achievement(
             AchievementProgress.address == normalized,
             AchievementProgress.achievement_id == achievement.id,
         )
-        progress = session.scalars(progress_stmt).first()
+        progress = (await session.scalars(progress_stmt)).first()
         if progress is None:
             progress = AchievementProgress(address=normalized, achievement=achievement)
             session.add(progress)
-        if progress.unlocked_at is None:
+        newly_unlocked = progress.unlocked_at is None
+        if newly_unlocked:
             progress.unlocked_at = _utcnow()
         if progress_value is not None:
             progress.progress_value = int(progress_value)
         if metadata is not None:
             progress.metadata = dict(metadata)
+        if newly_unlocked:
+            await session.flush()
+            await refresh_addresses(session, [normalized])
 
-        session.commit()
-        session.refresh(progress)
+        await session.commit()
+        await session.refresh(progress)
+        set_committed_value(progress, "achievement", achievement)
         return progress
 
 
+def _unique_addresses(addresses: Iterable[str]) -> list[str]:
+    return list(dict.fromkeys(_normalize_address(address) for address in addresses))
+
+
+def _resolve_codes(known: dict[str, int], codes: Iterable[str], error: type[LookupError]) -> list[int]:
+    normalized = list(dict.fromkeys(code.strip().lower() for code in codes))
+    missing = [code for code in normalized if code not in known]
+    if missing:
+        raise error(", ".join(missing))
+    return [known[code] for code in normalized]
+
+
+async def _bulk_upsert(
+    session: AsyncSession,
+    table: Table,
+    rows: Sequence[dict[str, Any]],
+    build: Any,
+    batch_size: int,
+    after_batch: Callable[[AsyncSession, Sequence[dict[str, Any]]], Awaitable[None]] | None = None,
+) -> BulkResult:
+    """Пишет ``rows`` пачками по ``batch_size``, каждая — своя транзакция.
+
+    ``build`` получает ``INSERT ... VALUES`` пачки и добавляет к нему
+    ``ON CONFLICT`` по уникальному индексу (address, *_id); ``after_batch``
+    выполняется в той же транзакции перед ``commit``.
+    """
+
+    if batch_size < 1:
+        raise ValueError("batch_size должен быть положительным")
+    affected = 0
+    batches = 0
+    per_statement = rows_per_statement(session, len(table.columns))
+    for start in range(0, len(rows), batch_size):
+        batch = rows[start : start + batch_size]
+        for offset in range(0, len(batch), per_statement):
+            values = list(batch[offset : offset + per_statement])
+            result = await session.execute(build(dialect_insert(session, table).values(values)))
+            affected += max(result.rowcount or 0, 0)
+        if after_batch is not None:
+            await after_batch(session, batch)
+        await session.commit()
+        batches += 1
+    return BulkResult(requested=len(rows), affected=affected, batches=batches)
+
+
+@traced("progress.bulk_complete_checklist_tasks")
+async def bulk_complete_checklist_tasks(
+    addresses: Iterable[str],
+    codes: Iterable[str],
+    *,
+    metadata: dict[str, Any] | None = None,
+    reward_claimed: bool | None = None,
+    batch_size: int = BULK_BATCH_SIZE,
+) -> BulkResult:
+    """Отмечает задания ``codes`` выполненными для всех ``addresses``.
+
+    Повторное выполнение не меняет ``completed_at``; ``metadata`` и
+    ``reward_claimed`` перезаписываются, только если переданы.
+    """
+
+    table = ChecklistProgress.__table__
+    async with get_async_session() as session:
+        tasks = await definition_cache.get(CHECKLIST_DEFINITIONS, session, _load_active_tasks)
+        task_ids = _resolve_codes({task.code: task.id for task in tasks}, codes, TaskNotFoundError)
+        now = _utcnow()
+        rows = [
+            {
+                "address": address,
+                "task_id": task_id,
+                "completed_at": now,
+                "reward_claimed": bool(reward_claimed),
+                "metadata": dict(metadata or {}),
+            }
+            for address in _unique_addresses(addresses)
+            for task_id in task_ids
+        ]
+
+        def build(statement: Any) -> Any:
+            updates = {}
+            if metadata is not None:
+                updates["metadata"] = statement.excluded.metadata
+            if reward_claimed is not None:
+                updates["reward_claimed"] = statement.excluded.reward_claimed
+            target = [table.c.address, table.c.task_id]
+            if not updates:
+                return statement.on_conflict_do_nothing(index_elements=target)
+            return statement.on_conflict_do_update(index_elements=target, set_=updates)
+
+        return await _bulk_upsert(session, table, rows, build, batch_size)
+
+
+@traced("progress.bulk_unlock_achievements")
+async def bulk_unlock_achievements(
+    addresses: Iterable[str],
+    codes: Iterable[str],
+    *,
+    progress_value: int | None = None,
+    metadata: dict[str, Any] | None = None,
+    batch_size: int = BULK_BATCH_SIZE,
+) -> BulkResult:
+    """Открывает достижения ``codes`` для всех ``addresses``.
+
+    Семантика как у :func:`unlock_achievement`: ``unlocked_at`` ставится
+    один раз, ``progress_value`` и ``metadata`` — только если переданы.
+    """
+
+    table = AchievementProgress.__table__
+    async with get_async_session() as session:
+        achievements = await definition_cache.get(ACHIEVEMENT_DEFINITIONS, session, _load_active_achievements)
+        achievement_ids = _resolve_codes(
+            {achievement.code: achievement.id for achievement in achievements}, codes, AchievementNotFoundError
+        )
+        now = _utcnow()
+        rows = [
+            {
+                "address": address,
+                "achievement_id": achievement_id,
+                "progress_value": int(progress_value or 0),
+                "unlocked_at": now,
+                "metadata": dict(metadata or {}),
+            }
+            for address in _unique_addresses(addresses)
+            for achievement_id in achievement_ids
+        ]
+
+        def build(statement: Any) -> Any:
+            updates = {"unlocked_at": func.coalesce(table.c.unlocked_at, statement.excluded.unlocked_at)}
+            if progress_value is not None:
+                updates["progress_value"] = statement.excluded.progress_value
+            if metadata is not None:
+                updates["metadata"] = statement.excluded.metadata
+            return statement.on_conflict_do_update(
+                index_elements=[table.c.address, table.c.achievement_id], set_=updates
+            )
+
+        async def rescore(batch_session: AsyncSession, batch: Sequence[dict[str, Any]]) -> None:
+            await refresh_addresses(batch_session, (row["address"] for row in batch))
+
+        return await _bulk_upsert(session, table, rows, build, batch_size, after_batch=rescore)
+
+
 __all__ = [
+    "BULK_BATCH_SIZE",
+    "BulkResult",
     "TaskNotFoundError",
     "AchievementNotFoundError",
+    "bulk_complete_checklist_tasks",
+    "bulk_unlock_achievements",
     "upsert_checklist_task",
     "get_checklist_for_address",
     "complete_checklist_task",
@@ -4,7 +4,7 @@ from __future__ import annotations
 from datetime import datetime, timezone
 from typing import Any
 
-from sqlalchemy import Boolean, ForeignKey, Integer, JSON, String
+from sqlalchemy import BigInteger, Boolean, ForeignKey, Index, Integer, JSON, String
 from sqlalchemy.ext.mutable import MutableDict
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -45,9 +45,11 @@ class ChecklistProgress(Base):
     """Статус выполнения задания чек-листа пользователем."""
 
     __tablename__ = "checklist_progress"
+    # Уникальный индекс — цель ON CONFLICT массовых операций; заменяет индекс по address.
+    __table_args__ = (Index("uq_checklist_progress_address_task", "address", "task_id", unique=True),)
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
-    address: Mapped[str] = mapped_column(String(80), index=True)
+    address: Mapped[str] = mapped_column(String(80))
     task_id: Mapped[int] = mapped_column(ForeignKey("checklist_tasks.id"), index=True)
     completed_at: Mapped[datetime] = mapped_column(default=_utcnow)
     reward_claimed: Mapped[bool] = mapped_column(Boolean, default=False)
@@ -84,9 +86,12 @@ class AchievementProgress(Base):
     """Статус выполнения достижения пользователем."""
 
     __tablename__ = "achievement_progress"
+    __table_args__ = (
+        Index("uq_achievement_progress_address_achievement", "address", "achievement_id", unique=True),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
-    address: Mapped[str] = mapped_column(String(80), index=True)
+    address: Mapped[str] = mapped_column(String(80))
     achievement_id: Mapped[int] = mapped_column(ForeignKey("achievements.id"), index=True)
     progress_value: Mapped[int] = mapped_column(Integer, default=0)
     unlocked_at: Mapped[datetime | None] = mapped_column(default=None)
@@ -97,7 +102,50 @@ class AchievementProgress(Base):
     achievement: Mapped[Achievement] = relationship(back_populates="progress_entries")
 
 
+class DefinitionVersion(Base):
+    """Версия набора определений (чек-лист, достижения) для сброса кэшей воркеров."""
+
+    __tablename__ = "definition_versions"
+
+    name: Mapped[str] = mapped_column(String(64), primary_key=True)
+    version: Mapped[int] = mapped_column(Integer, default=0)
+
+
+class AchievementProcessedEvent(Base):
+    """Событие, уже учтённое движком правил: поток и его ``sequence_number``."""
+
+    __tablename__ = "achievement_processed_events"
+
+    stream: Mapped[str] = mapped_column(String(128), primary_key=True)
+    sequence_number: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+
+
+class LeaderboardEntry(Base):
+    """Сумма очков открытых активных достижений адреса (только ненулевые)."""
+
+    __tablename__ = "achievement_leaderboard"
+    # Топ-N читается по индексу: ORDER BY points DESC, address LIMIT n.
+    __table_args__ = (Index("ix_achievement_leaderboard_points_address", "points", "address"),)
+
+    address: Mapped[str] = mapped_column(String(80), primary_key=True)
+    points: Mapped[int] = mapped_column(BigInteger)
+    updated_at: Mapped[datetime] = mapped_column(default=_utcnow, onupdate=_utcnow)
+
+
+class LeaderboardTreeNode(Base):
+    """Узел дерева Фенвика над очками лидерборда (нулевые узлы не хранятся)."""
+
+    __tablename__ = "achievement_leaderboard_tree"
+
+    node: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    addresses: Mapped[int] = mapped_column(Integer, default=0)
+
+
 __all__ = [
+    "AchievementProcessedEvent",
+    "LeaderboardEntry",
+    "LeaderboardTreeNode",
+    "DefinitionVersion",
     "ChecklistTask",
     "ChecklistProgress",
     "Achievement",
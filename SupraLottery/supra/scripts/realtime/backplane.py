@@ -0,0 +1,316 @@
+"""Pub/sub backplane для рассылки real-time событий между воркерами.
+
+Каждый воркер доставляет событие своим подключениям сам, а в backplane
+публикует уже сериализованный payload, чтобы его получили остальные воркеры.
+
+* :class:`InMemoryBackplane` — узлы внутри одного процесса (тесты, локальный стенд);
+* :class:`BrokerBackplane` — клиент NDJSON-брокера по TCP или Unix-сокету;
+* :class:`BrokerServer` — сам брокер, запускается отдельно::
+
+      python -m supra.scripts.realtime.backplane --listen tcp://127.0.0.1:7400
+
+Воркер выбирает реализацию через ``SUPRA_REALTIME_BACKPLANE``: ``memory``,
+``tcp://host:port`` или ``unix:///path/to.sock`` (пусто — без backplane).
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import uuid
+from typing import Callable, List, Optional, Protocol, Set, Tuple
+
+BACKPLANE_ENV = "SUPRA_REALTIME_BACKPLANE"
+DEFAULT_RECONNECT_DELAY = 0.5
+DEFAULT_MAX_BUFFER = 4 * 1024 * 1024
+_STREAM_LIMIT = 16 * 1024 * 1024
+
+logger = logging.getLogger(__name__)
+
+Deliver = Callable[[str, str, Optional[int]], None]
+
+
+class Backplane(Protocol):
+    node_id: str
+
+    async def start(self, deliver: Deliver) -> None:  # pragma: no cover - протокол
+        ...
+
+    def publish(self, room: str, text: str, message_id: Optional[int] = None) -> None:  # pragma: no cover
+        ...
+
+    async def close(self) -> None:  # pragma: no cover - протокол
+        ...
+
+
+def _new_node_id() -> str:
+    return uuid.uuid4().hex
+
+
+def parse_address(address: str) -> Tuple[str, str, int]:
+    """Разбирает ``tcp://host:port`` или ``unix:///path`` в (схема, хост/путь, порт)."""
+
+    if address.startswith("unix://"):
+        path = address[len("unix://") :]
+        if not path:
+            raise ValueError("Не указан путь Unix-сокета backplane")
+        return "unix", path, 0
+    if address.startswith("tcp://"):
+        host, _, port = address[len("tcp://") :].rpartition(":")
+        if not host or not port.isdigit():
+            raise ValueError(f"Некорректный адрес backplane: {address}")
+        return "tcp", host, int(port)
+    raise ValueError(f"Неподдерживаемая схема backplane: {address}")
+
+
+async def _open_connection(address: str) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+    scheme, host, port = parse_address(address)
+    if scheme == "unix":
+        return await asyncio.open_unix_connection(host, limit=_STREAM_LIMIT)
+    return await asyncio.open_connection(host, port, limit=_STREAM_LIMIT)
+
+
+def _encode_envelope(node_id: str, room: str, text: str, message_id: Optional[int]) -> bytes:
+    envelope = {"node": node_id, "room": room, "data": text, "id": message_id}
+    return (json.dumps(envelope, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
+
+
+class InMemoryHub:
+    """Общая шина для нескольких :class:`InMemoryBackplane` одного процесса."""
+
+    def __init__(self) -> None:
+        self.members: List["InMemoryBackplane"] = []
+
+
+class InMemoryBackplane:
+    """Backplane внутри процесса: доставка другим узлам того же хаба на следующей итерации цикла."""
+
+    def __init__(self, hub: Optional[InMemoryHub] = None, node_id: Optional[str] = None) -> None:
+        self.hub = hub or InMemoryHub()
+        self.node_id = node_id or _new_node_id()
+        self._deliver: Optional[Deliver] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def start(self, deliver: Deliver) -> None:
+        self._deliver = deliver
+        self._loop = asyncio.get_running_loop()
+        if self not in self.hub.members:
+            self.hub.members.append(self)
+
+    def publish(self, room: str, text: str, message_id: Optional[int] = None) -> None:
+        for member in list(self.hub.members):
+            if member is self or member._deliver is None or member._loop is None:
+                continue
+            member._loop.call_soon_threadsafe(member._deliver, room, text, message_id)
+
+    async def close(self) -> None:
+        if self in self.hub.members:
+            self.hub.members.remove(self)
+        self._deliver = None
+
+
+class BrokerBackplane:
+    """Клиент NDJSON-брокера с автоматическим переподключением.
+
+    Публикация не ждёт сети: при отсутствии соединения или переполненном
+    буфере отправки сообщение отбрасывается (учитывается в ``dropped``),
+    поэтому добавочная задержка рассылки ограничена.
+    """
+
+    def __init__(
+        self,
+        address: str,
+        *,
+        node_id: Optional[str] = None,
+        reconnect_delay: float = DEFAULT_RECONNECT_DELAY,
+        max_buffer: int = DEFAULT_MAX_BUFFER,
+    ) -> None:
+        parse_address(address)
+        self.address = address
+        self.node_id = node_id or _new_node_id()
+        self.reconnect_delay = reconnect_delay
+        self.max_buffer = max_buffer
+        self.dropped = 0
+        self._deliver: Optional[Deliver] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._connected = asyncio.Event()
+        self._task: Optional[asyncio.Task[None]] = None
+
+    @property
+    def connected(self) -> bool:
+        return self._writer is not None and not self._writer.is_closing()
+
+    async def start(self, deliver: Deliver, connect_timeout: float = 1.0) -> None:
+        self._deliver = deliver
+        self._connected = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+        try:
+            await asyncio.wait_for(self._connected.wait(), connect_timeout)
+        except asyncio.TimeoutError:
+            logger.warning("Backplane %s недоступен, события будут доставляться только локально", self.address)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                reader, writer = await _open_connection(self.address)
+            except OSError:
+                await asyncio.sleep(self.reconnect_delay)
+                continue
+            self._writer = writer
+            self._connected.set()
+            try:
+                while True:
+                    line = await reader.readline()
+                    if not line:
+                        break
+                    self._handle_line(line)
+            except (OSError, asyncio.IncompleteReadError, ValueError):
+                pass
+            finally:
+                self._writer = None
+                self._connected.clear()
+                writer.close()
+            await asyncio.sleep(self.reconnect_delay)
+
+    def _handle_line(self, line: bytes) -> None:
+        try:
+            envelope = json.loads(line)
+        except json.JSONDecodeError:
+            return
+        if envelope.get("node") == self.node_id or self._deliver is None:
+            return
+        room, data, message_id = envelope.get("room"), envelope.get("data"), envelope.get("id")
+        if isinstance(room, str) and isinstance(data, str):
+            self._deliver(room, data, message_id if isinstance(message_id, int) else None)
+
+    def publish(self, room: str, text: str, message_id: Optional[int] = None) -> None:
+        writer = self._writer
+        if writer is None or writer.is_closing():
+            self.dropped += 1
+            return
+        if writer.transport.get_write_buffer_size() > self.max_buffer:
+            self.dropped += 1
+            return
+        writer.write(_encode_envelope(self.node_id, room, text, message_id))
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._deliver = None
+
+
+class BrokerServer:
+    """Минимальный брокер: пересылает каждую строку всем остальным клиентам."""
+
+    def __init__(self, max_buffer: int = DEFAULT_MAX_BUFFER) -> None:
+        self.max_buffer = max_buffer
+        self._clients: Set[asyncio.StreamWriter] = set()
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    @property
+    def client_count(self) -> int:
+        return len(self._clients)
+
+    async def start(self, address: str) -> asyncio.AbstractServer:
+        scheme, host, port = parse_address(address)
+        if scheme == "unix":
+            if os.path.exists(host):
+                os.unlink(host)
+            self._server = await asyncio.start_unix_server(self._handle, host, limit=_STREAM_LIMIT)
+        else:
+            self._server = await asyncio.start_server(self._handle, host, port, limit=_STREAM_LIMIT)
+        return self._server
+
+    @property
+    def sockets(self) -> List[object]:
+        return list(self._server.sockets) if self._server is not None else []
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self._clients.add(writer)
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                for client in list(self._clients):
+                    if client is writer or client.is_closing():
+                        continue
+                    if client.transport.get_write_buffer_size() > self.max_buffer:
+                        continue
+                    client.write(line)
+        except (OSError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            self._clients.discard(writer)
+            writer.close()
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        for client in list(self._clients):
+            client.close()
+        self._clients.clear()
+
+
+_SHARED_HUB = InMemoryHub()
+
+
+def backplane_from_env(env: Optional[dict] = None) -> Optional[Backplane]:
+    """Создаёт backplane по ``SUPRA_REALTIME_BACKPLANE`` (``None`` — не использовать)."""
+
+    value = ((os.environ if env is None else env).get(BACKPLANE_ENV) or "").strip()
+    if not value:
+        return None
+    if value == "memory":
+        return InMemoryBackplane(_SHARED_HUB)
+    return BrokerBackplane(value)
+
+
+async def _serve(address: str) -> None:
+    server = BrokerServer()
+    await server.start(address)
+    logger.info("Backplane-брокер слушает %s", address)
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.close()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="NDJSON-брокер real-time событий SupraLottery")
+    parser.add_argument(
+        "--listen",
+        default=os.environ.get(BACKPLANE_ENV) or "tcp://127.0.0.1:7400",
+        help="адрес tcp://host:port или unix:///path (по умолчанию SUPRA_REALTIME_BACKPLANE)",
+    )
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+    try:
+        asyncio.run(_serve(args.listen))
+    except KeyboardInterrupt:  # pragma: no cover - ручная остановка
+        pass
+
+
+__all__ = [
+    "BACKPLANE_ENV",
+    "Backplane",
+    "BrokerBackplane",
+    "BrokerServer",
+    "InMemoryBackplane",
+    "InMemoryHub",
+    "backplane_from_env",
+    "parse_address",
+]
+
+
+if __name__ == "__main__":
+    main()
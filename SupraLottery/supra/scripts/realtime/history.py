@@ -0,0 +1,145 @@
+"""Кольцевые буферы последних сообщений комнат для возобновления после переподключения.
+
+Клиент сообщает ``last_id`` последнего увиденного сообщения и получает только
+пропущенные сообщения из памяти. Буфер комнаты «прогревается» из БД один раз
+(одним запросом на комнату, даже при массовом переподключении); если разрыв
+больше буфера, вызывающий код читает недостающее из БД.
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, Iterable, List, Optional, Tuple
+
+DEFAULT_HISTORY_SIZE = 200
+HISTORY_SIZE_ENV = "SUPRA_REALTIME_HISTORY_SIZE"
+
+Entry = Tuple[int, str]
+Loader = Callable[[], Awaitable[Tuple[List[Entry], bool]]]
+
+
+def _history_size_from_env() -> int:
+    raw = os.environ.get(HISTORY_SIZE_ENV)
+    if not raw:
+        return DEFAULT_HISTORY_SIZE
+    try:
+        value = int(raw)
+    except ValueError as exc:
+        raise ValueError(f"{HISTORY_SIZE_ENV} должен быть целым числом") from exc
+    if value <= 0:
+        raise ValueError(f"{HISTORY_SIZE_ENV} должен быть положительным")
+    return value
+
+
+class _RoomBuffer:
+    """Сообщения комнаты по возрастанию id.
+
+    ``complete_after`` — id, начиная с которого (не включая) буфер содержит все
+    сообщения комнаты; ``None`` — буфер ещё не прогрет из БД.
+    """
+
+    __slots__ = ("entries", "complete_after")
+
+    def __init__(self) -> None:
+        self.entries: Deque[Entry] = deque()
+        self.complete_after: Optional[int] = None
+
+
+class MessageHistory:
+    """Хранит до ``size`` последних сериализованных сообщений каждой комнаты."""
+
+    def __init__(self, size: Optional[int] = None) -> None:
+        self.size = size or _history_size_from_env()
+        self._rooms: Dict[str, _RoomBuffer] = {}
+        self._warming: Dict[str, asyncio.Future[None]] = {}
+
+    def _buffer(self, room: str) -> _RoomBuffer:
+        buffer = self._rooms.get(room)
+        if buffer is None:
+            buffer = self._rooms[room] = _RoomBuffer()
+        return buffer
+
+    def record(self, room: str, message_id: int, text: str) -> None:
+        self._insert(self._buffer(room), [(message_id, text)])
+
+    def _insert(self, buffer: _RoomBuffer, items: Iterable[Entry]) -> None:
+        entries = buffer.entries
+        for message_id, text in items:
+            if not entries or entries[-1][0] < message_id:
+                entries.append((message_id, text))
+                continue
+            # Редкий случай: коммиты параллельных запросов пришли не по порядку id.
+            index = len(entries)
+            while index > 0 and entries[index - 1][0] > message_id:
+                index -= 1
+            if index > 0 and entries[index - 1][0] == message_id:
+                continue
+            entries.insert(index, (message_id, text))
+        while len(entries) > self.size:
+            evicted_id, _ = entries.popleft()
+            if buffer.complete_after is not None:
+                buffer.complete_after = max(buffer.complete_after, evicted_id)
+
+    def is_warm(self, room: str) -> bool:
+        buffer = self._rooms.get(room)
+        return buffer is not None and buffer.complete_after is not None
+
+    def warm(self, room: str, entries: List[Entry], complete: bool) -> None:
+        """Дополняет буфер сообщениями из БД.
+
+        ``complete`` означает, что ``entries`` — вся история комнаты, иначе
+        гарантированно полны только сообщения новее самого старого из них.
+        """
+
+        buffer = self._buffer(room)
+        if buffer.complete_after is not None:
+            return
+        ordered = sorted(entries)
+        buffer.complete_after = 0 if complete or not ordered else ordered[0][0] - 1
+        self._insert(buffer, ordered)
+
+    async def ensure_warm(self, room: str, loader: Loader) -> None:
+        """Прогревает буфер комнаты; параллельные вызовы ждут один запрос к БД."""
+
+        if self.is_warm(room):
+            return
+        pending = self._warming.get(room)
+        if pending is not None:
+            await asyncio.shield(pending)
+            return
+        future: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        self._warming[room] = future
+        try:
+            entries, complete = await loader()
+            self.warm(room, entries, complete)
+            future.set_result(None)
+        except BaseException as exc:
+            future.set_exception(exc)
+            # Ожидающие получат ошибку; сами по себе неполученные исключения не логируем.
+            future.exception()
+            raise
+        finally:
+            self._warming.pop(room, None)
+
+    def since(self, room: str, last_id: int) -> Optional[List[str]]:
+        """Сообщения новее ``last_id`` или ``None``, если буфер не покрывает разрыв."""
+
+        buffer = self._rooms.get(room)
+        if buffer is None or buffer.complete_after is None or buffer.complete_after > last_id:
+            return None
+        return self.tail(room, last_id)
+
+    def tail(self, room: str, last_id: int) -> List[str]:
+        """Всё, что есть в буфере новее ``last_id``, без гарантии полноты."""
+
+        buffer = self._rooms.get(room)
+        if buffer is None:
+            return []
+        return [text for message_id, text in buffer.entries if message_id > last_id]
+
+    def clear(self) -> None:
+        self._rooms.clear()
+
+
+__all__ = ["DEFAULT_HISTORY_SIZE", "HISTORY_SIZE_ENV", "MessageHistory"]
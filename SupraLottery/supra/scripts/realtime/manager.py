@@ -2,54 +2,268 @@
 from __future__ import annotations
 
 import asyncio
-from typing import Any, Dict, Set
+import json
+import os
+from typing import Any, Dict, List, Optional, Set
 
 from fastapi import WebSocket, WebSocketDisconnect
 
+from ..lib.tracing import span
+from .backplane import Backplane
+from .history import MessageHistory
+
+DEFAULT_QUEUE_SIZE = 256
+QUEUE_SIZE_ENV = "SUPRA_REALTIME_QUEUE_SIZE"
+# 1013 Try Again Later: клиент не успевает читать и должен переподключиться.
+SLOW_CONSUMER_CLOSE_CODE = 1013
+MAX_TOPICS_PER_CONNECTION = 64
+
+
+def _queue_size_from_env() -> int:
+    raw = os.environ.get(QUEUE_SIZE_ENV)
+    if not raw:
+        return DEFAULT_QUEUE_SIZE
+    try:
+        value = int(raw)
+    except ValueError as exc:
+        raise ValueError(f"{QUEUE_SIZE_ENV} должен быть целым числом") from exc
+    if value <= 0:
+        raise ValueError(f"{QUEUE_SIZE_ENV} должен быть положительным")
+    return value
+
+
+def encode_payload(payload: Dict[str, Any]) -> str:
+    """Сериализует событие один раз для всех подписчиков (как ``send_json``)."""
+
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":"))
+
+
+def encode_envelope(topic: str, text: str) -> str:
+    """Оборачивает уже сериализованное событие в ``{"topic": ..., "data": ...}``."""
+
+    return '{"topic":' + json.dumps(topic, ensure_ascii=False) + ',"data":' + text + "}"
+
+
+class _Subscriber:
+    """Подключение с собственной ограниченной очередью исходящих сообщений.
+
+    ``multiplexed`` подключения подписываются на несколько топиков и получают
+    события в конверте ``{"topic": ..., "data": ...}``.
+    """
+
+    __slots__ = ("websocket", "topics", "queue", "task", "multiplexed")
+
+    def __init__(self, websocket: WebSocket, queue_size: int, multiplexed: bool) -> None:
+        self.websocket = websocket
+        self.topics: Set[str] = set()
+        self.queue: asyncio.Queue[str] = asyncio.Queue(maxsize=queue_size)
+        self.task: Optional[asyncio.Task[None]] = None
+        self.multiplexed = multiplexed
+
 
 class ConnectionManager:
-    """Отвечает за хранение и рассылку сообщений по комнатам."""
+    """Отвечает за хранение и рассылку сообщений по топикам (комнатам).
+
+    Каждое подключение получает ограниченную очередь и отдельную задачу
+    отправки, поэтому медленный клиент не задерживает остальных. Клиент,
+    чья очередь переполнена, отключается с кодом 1013.
+
+    Если подключён backplane, события публикуются и для других воркеров,
+    а полученные от них доставляются только локальным подписчикам.
+    """
+
+    def __init__(
+        self,
+        queue_size: Optional[int] = None,
+        max_topics: int = MAX_TOPICS_PER_CONNECTION,
+        history: Optional[MessageHistory] = None,
+    ) -> None:
+        self.queue_size = queue_size or _queue_size_from_env()
+        self.max_topics = max_topics
+        self.history = history if history is not None else MessageHistory()
+        self._rooms: Dict[str, Dict[WebSocket, _Subscriber]] = {}
+        self._connections: Dict[WebSocket, _Subscriber] = {}
+        self.evicted = 0
+        self.backplane: Optional[Backplane] = None
+
+    async def start_backplane(self, backplane: Optional[Backplane]) -> None:
+        await self.stop_backplane()
+        if backplane is None:
+            return
+        await backplane.start(self._deliver_remote)
+        self.backplane = backplane
+
+    async def stop_backplane(self) -> None:
+        backplane, self.backplane = self.backplane, None
+        if backplane is not None:
+            await backplane.close()
+
+    def room_size(self, room: str) -> int:
+        return len(self._rooms.get(room, ()))
 
-    def __init__(self) -> None:
-        self._rooms: Dict[str, Set[WebSocket]] = {}
-        self._lock = asyncio.Lock()
+    @property
+    def connection_count(self) -> int:
+        return len(self._connections)
+
+    async def connect(self, websocket: WebSocket, room: Optional[str] = None, *, multiplexed: bool = False) -> None:
+        """Принимает подключение; без ``room`` оно ждёт явных подписок."""
 
-    async def connect(self, websocket: WebSocket, room: str) -> None:
         await websocket.accept()
-        async with self._lock:
-            connections = self._rooms.setdefault(room, set())
-            connections.add(websocket)
-
-    async def disconnect(self, websocket: WebSocket, room: str) -> None:
-        async with self._lock:
-            connections = self._rooms.get(room)
-            if connections and websocket in connections:
-                connections.remove(websocket)
-                if not connections:
-                    self._rooms.pop(room, None)
-
-    async def _broadcast(self, room: str, payload: Dict[str, Any]) -> None:
-        async with self._lock:
-            connections = list(self._rooms.get(room, set()))
-        for websocket in connections:
-            try:
-                await websocket.send_json(payload)
-            except WebSocketDisconnect:
-                await self.disconnect(websocket, room)
-            except RuntimeError:
-                # Соединение уже закрыто
-                await self.disconnect(websocket, room)
-
-    def broadcast(self, room: str, payload: Dict[str, Any]) -> None:
-        """Запускает асинхронную рассылку в фоновом таске."""
+        subscriber = _Subscriber(websocket, self.queue_size, multiplexed)
+        subscriber.task = asyncio.create_task(self._drain(subscriber))
+        self._connections[websocket] = subscriber
+        if room is not None:
+            self.subscribe(websocket, room)
+
+    def subscribe(self, websocket: WebSocket, topic: str) -> None:
+        subscriber = self._connections.get(websocket)
+        if subscriber is None or topic in subscriber.topics:
+            return
+        if len(subscriber.topics) >= self.max_topics:
+            raise ValueError(f"Не более {self.max_topics} подписок на подключение")
+        subscriber.topics.add(topic)
+        self._rooms.setdefault(topic, {})[websocket] = subscriber
 
+    def unsubscribe(self, websocket: WebSocket, topic: str) -> None:
+        subscriber = self._connections.get(websocket)
+        if subscriber is None or topic not in subscriber.topics:
+            return
+        subscriber.topics.discard(topic)
+        self._detach(websocket, topic)
+
+    def topics(self, websocket: WebSocket) -> List[str]:
+        subscriber = self._connections.get(websocket)
+        return sorted(subscriber.topics) if subscriber is not None else []
+
+    async def disconnect(self, websocket: WebSocket, room: Optional[str] = None) -> None:
+        subscriber = self._remove(websocket)
+        if subscriber is not None and subscriber.task is not None:
+            subscriber.task.cancel()
+
+    def _detach(self, websocket: WebSocket, topic: str) -> None:
+        connections = self._rooms.get(topic)
+        if not connections:
+            return
+        connections.pop(websocket, None)
+        if not connections:
+            self._rooms.pop(topic, None)
+
+    def _remove(self, websocket: WebSocket) -> Optional[_Subscriber]:
+        subscriber = self._connections.pop(websocket, None)
+        if subscriber is None:
+            return None
+        for topic in subscriber.topics:
+            self._detach(websocket, topic)
+        subscriber.topics.clear()
+        return subscriber
+
+    def send(self, websocket: WebSocket, payload: Dict[str, Any]) -> bool:
+        """Ставит служебный ответ в очередь подключения (в обход топиков)."""
+
+        subscriber = self._connections.get(websocket)
+        return subscriber is not None and self._enqueue(subscriber, encode_payload(payload))
+
+    def replay(self, websocket: WebSocket, topic: str, texts: List[str]) -> int:
+        """Досылает подключению пропущенные события топика в том же формате, что и рассылка."""
+
+        subscriber = self._connections.get(websocket)
+        sent = 0
+        for text in texts:
+            if subscriber is None or not self._enqueue(subscriber, self._frame(subscriber, topic, text)):
+                break
+            sent += 1
+        return sent
+
+    @staticmethod
+    def _frame(subscriber: _Subscriber, topic: str, text: str) -> str:
+        return encode_envelope(topic, text) if subscriber.multiplexed else text
+
+    def _enqueue(self, subscriber: _Subscriber, frame: str) -> bool:
         try:
-            loop = asyncio.get_running_loop()
+            subscriber.queue.put_nowait(frame)
+        except asyncio.QueueFull:
+            self._evict(subscriber)
+            return False
+        return True
+
+    async def _drain(self, subscriber: _Subscriber) -> None:
+        websocket = subscriber.websocket
+        try:
+            while True:
+                text = await subscriber.queue.get()
+                await websocket.send_text(text)
+        except (WebSocketDisconnect, RuntimeError, OSError):
+            # Соединение уже закрыто
+            self._remove(websocket)
+
+    def _evict(self, subscriber: _Subscriber) -> None:
+        self._remove(subscriber.websocket)
+        self.evicted += 1
+        if subscriber.task is not None:
+            subscriber.task.cancel()
+        asyncio.get_running_loop().create_task(self._close(subscriber.websocket))
+
+    @staticmethod
+    async def _close(websocket: WebSocket) -> None:
+        try:
+            await websocket.close(code=SLOW_CONSUMER_CLOSE_CODE)
+        except (RuntimeError, OSError):  # pragma: no cover - клиент уже отключился
+            pass
+
+    def broadcast(
+        self,
+        room: str,
+        payload: Dict[str, Any],
+        *,
+        message_id: Optional[int] = None,
+        local: bool = False,
+    ) -> int:
+        """Рассылает событие подписчикам комнаты и публикует его в backplane.
+
+        События с ``message_id`` сохраняются в истории комнаты для
+        возобновления после переподключения; ``local`` — не публиковать в
+        backplane. Возвращает число локальных получателей.
+        """
+
+        try:
+            asyncio.get_running_loop()
         except RuntimeError:  # pragma: no cover - нет активного цикла событий
-            return
-        loop.create_task(self._broadcast(room, payload))
+            return 0
+        backplane = None if local else self.backplane
+        if not self._rooms.get(room) and backplane is None and message_id is None:
+            return 0
+        text = encode_payload(payload)
+        if message_id is not None:
+            self.history.record(room, message_id, text)
+        delivered = self._deliver_local(room, text)
+        if backplane is not None:
+            backplane.publish(room, text, message_id)
+        return delivered
+
+    def _deliver_remote(self, room: str, text: str, message_id: Optional[int] = None) -> None:
+        if message_id is not None:
+            self.history.record(room, message_id, text)
+        self._deliver_local(room, text)
+
+    def _deliver_local(self, room: str, text: str) -> int:
+        connections = self._rooms.get(room)
+        if not connections:
+            return 0
+        subscribers = list(connections.values())
+        envelope: Optional[str] = None
+        delivered = 0
+        with span("realtime.broadcast", room=room, recipients=len(subscribers)):
+            for subscriber in subscribers:
+                frame = text
+                if subscriber.multiplexed:
+                    if envelope is None:
+                        envelope = encode_envelope(room, text)
+                    frame = envelope
+                if self._enqueue(subscriber, frame):
+                    delivered += 1
+        return delivered
 
 
 connection_manager = ConnectionManager()
 
-__all__ = ["connection_manager", "ConnectionManager"]
+__all__ = ["connection_manager", "ConnectionManager", "encode_envelope", "encode_payload"]
@@ -0,0 +1,228 @@
+"""Token bucket-ограничение частоты сообщений чата по адресу и комнате.
+
+Каждое сообщение расходует по токену из двух корзин: отправителя и комнаты.
+Если хотя бы в одной токенов нет, не расходуется ни один, а клиент получает
+429 с ``Retry-After``. Настройки:
+
+* ``SUPRA_CHAT_RATE_LIMIT`` — ``memory`` (по умолчанию, на воркер), ``db``
+  (общая таблица ``rate_limit_buckets`` для всех воркеров) или ``off``;
+* ``SUPRA_CHAT_ADDRESS_RATE``/``SUPRA_CHAT_ADDRESS_BURST`` — сообщений в секунду
+  и запас для одного адреса (по умолчанию 1 и 5);
+* ``SUPRA_CHAT_ROOM_RATE``/``SUPRA_CHAT_ROOM_BURST`` — то же для комнаты (20 и 50).
+"""
+from __future__ import annotations
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, List, Mapping, Optional, Protocol, Sequence, Tuple, Union
+
+from ..accounts.db import dialect_insert, get_async_session
+from .tables import RateLimitBucket
+
+RATE_LIMIT_ENV = "SUPRA_CHAT_RATE_LIMIT"
+RATE_LIMIT_BACKENDS = ("memory", "db", "off")
+DEFAULT_MAX_KEYS = 100_000
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    rate: float
+    burst: float
+
+
+class RateLimited(Exception):
+    """Лимит исчерпан; ``retry_after`` — через сколько секунд появится токен."""
+
+    def __init__(self, scope: str, retry_after: float) -> None:
+        super().__init__(f"Слишком много сообщений ({scope}), повторите через {retry_after:.1f} с")
+        self.scope = scope
+        self.retry_after = retry_after
+
+
+Request = Tuple[str, RateLimit]
+
+
+def _refill(tokens: float, updated: float, now: float, limit: RateLimit) -> float:
+    return min(limit.burst, tokens + max(0.0, now - updated) * limit.rate)
+
+
+def _deficits(states: Sequence[float], requests: Sequence[Request]) -> List[float]:
+    return [
+        (1.0 - tokens) / limit.rate if tokens < 1.0 else 0.0
+        for tokens, (_, limit) in zip(states, requests)
+    ]
+
+
+class RateLimitBackend(Protocol):
+    # ``True`` — ``acquire`` является корутиной (поход в БД).
+    is_async: bool
+
+    def acquire(
+        self, requests: Sequence[Request]
+    ) -> Union[List[float], Awaitable[List[float]]]:  # pragma: no cover - протокол
+        """Списывает по токену со всех ключей или ни с одного; возвращает ожидание по ключам."""
+        ...
+
+
+class InMemoryRateLimitBackend:
+    """Корзины в памяти воркера; при переполнении вытесняются давно не использованные."""
+
+    is_async = False
+
+    def __init__(self, max_keys: int = DEFAULT_MAX_KEYS, clock: Callable[[], float] = time.monotonic) -> None:
+        self.max_keys = max_keys
+        self.clock = clock
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def acquire(self, requests: Sequence[Request]) -> List[float]:
+        with self._lock:
+            now = self.clock()
+            states = [
+                _refill(*self._buckets.get(key, (limit.burst, now)), now, limit) for key, limit in requests
+            ]
+            waits = _deficits(states, requests)
+            if any(waits):
+                return waits
+            for (key, _), tokens in zip(requests, states):
+                self._buckets[key] = (tokens - 1.0, now)
+                self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+            return waits
+
+
+class DatabaseRateLimitBackend:
+    """Общие для всех воркеров корзины в таблице ``rate_limit_buckets``."""
+
+    is_async = True
+
+    def __init__(self, clock: Callable[[], float] = time.time) -> None:
+        self.clock = clock
+
+    async def acquire(self, requests: Sequence[Request]) -> List[float]:
+        async with get_async_session() as session, session.begin():
+            now = self.clock()
+            # Новая корзина создаётся полной до чтения: два воркера с одним
+            # новым ключом не падают на первичном ключе, а ждут блокировку строки.
+            table = RateLimitBucket.__table__
+            await session.execute(
+                dialect_insert(session, table)
+                .values([{"key": key, "tokens": limit.burst, "updated_at": now} for key, limit in requests])
+                .on_conflict_do_nothing(index_elements=[table.c.key])
+            )
+            rows: Dict[str, RateLimitBucket] = {
+                key: await session.get(RateLimitBucket, key, with_for_update=True, populate_existing=True)
+                for key, _ in requests
+            }
+            states = [_refill(rows[key].tokens, rows[key].updated_at, now, limit) for key, limit in requests]
+            waits = _deficits(states, requests)
+            if any(waits):
+                return waits
+            for (key, _), tokens in zip(requests, states):
+                rows[key].tokens, rows[key].updated_at = tokens - 1.0, now
+            return waits
+
+
+class ChatRateLimiter:
+    """Проверка лимитов сообщения чата и счётчики отклонённых запросов."""
+
+    def __init__(self, backend: RateLimitBackend, per_address: RateLimit, per_room: RateLimit) -> None:
+        self.backend = backend
+        self.per_address = per_address
+        self.per_room = per_room
+        self.throttled: Dict[str, int] = {"address": 0, "room": 0}
+
+    async def check(self, address: str, room: str) -> None:
+        """Расходует токены для сообщения или бросает :class:`RateLimited`."""
+
+        requests = [(f"address:{address}", self.per_address), (f"room:{room}", self.per_room)]
+        if self.backend.is_async:
+            waits = await self.backend.acquire(requests)  # type: ignore[misc]
+        else:
+            waits = self.backend.acquire(requests)  # type: ignore[assignment]
+        if not any(waits):
+            return
+        scope = "address" if waits[0] >= waits[1] else "room"
+        self.throttled[scope] += 1
+        raise RateLimited(scope, max(waits))
+
+    def render(self, prefix: str) -> str:
+        """Счётчик отклонённых сообщений в формате Prometheus."""
+
+        name = f"{prefix}_chat_throttled_total"
+        lines = [
+            f"# HELP {name} Сообщения чата, отклонённые ограничением частоты",
+            f"# TYPE {name} counter",
+        ]
+        lines.extend(f'{name}{{scope="{scope}"}} {count}' for scope, count in sorted(self.throttled.items()))
+        return "\n".join(lines) + "\n"
+
+
+def _positive_float(env: Mapping[str, str], key: str, default: float) -> float:
+    raw = env.get(key)
+    if not raw:
+        return default
+    try:
+        value = float(raw)
+    except ValueError as exc:
+        raise ValueError(f"{key} должен быть числом") from exc
+    if value <= 0:
+        raise ValueError(f"{key} должен быть положительным")
+    return value
+
+
+def rate_limiter_from_env(env: Optional[Mapping[str, str]] = None) -> Optional[ChatRateLimiter]:
+    env = os.environ if env is None else env
+    backend_name = (env.get(RATE_LIMIT_ENV) or "memory").strip().lower()
+    if backend_name not in RATE_LIMIT_BACKENDS:
+        raise ValueError(f"{RATE_LIMIT_ENV} должен быть одним из: {', '.join(RATE_LIMIT_BACKENDS)}")
+    if backend_name == "off":
+        return None
+    per_address = RateLimit(
+        _positive_float(env, "SUPRA_CHAT_ADDRESS_RATE", 1.0),
+        max(1.0, _positive_float(env, "SUPRA_CHAT_ADDRESS_BURST", 5.0)),
+    )
+    per_room = RateLimit(
+        _positive_float(env, "SUPRA_CHAT_ROOM_RATE", 20.0),
+        max(1.0, _positive_float(env, "SUPRA_CHAT_ROOM_BURST", 50.0)),
+    )
+    backend: RateLimitBackend
+    backend = DatabaseRateLimitBackend() if backend_name == "db" else InMemoryRateLimitBackend()
+    return ChatRateLimiter(backend, per_address, per_room)
+
+
+_RATE_LIMITER: Optional[ChatRateLimiter] = None
+
+
+def get_rate_limiter() -> Optional[ChatRateLimiter]:
+    return _RATE_LIMITER
+
+
+def set_rate_limiter(limiter: Optional[ChatRateLimiter]) -> Optional[ChatRateLimiter]:
+    global _RATE_LIMITER
+    previous, _RATE_LIMITER = _RATE_LIMITER, limiter
+    return previous
+
+
+def configure_rate_limiter_from_env(env: Optional[Mapping[str, str]] = None) -> Optional[ChatRateLimiter]:
+    limiter = rate_limiter_from_env(env)
+    set_rate_limiter(limiter)
+    return limiter
+
+
+__all__ = [
+    "ChatRateLimiter",
+    "DatabaseRateLimitBackend",
+    "InMemoryRateLimitBackend",
+    "RATE_LIMIT_ENV",
+    "RateLimit",
+    "RateLimited",
+    "configure_rate_limiter_from_env",
+    "get_rate_limiter",
+    "rate_limiter_from_env",
+    "set_rate_limiter",
+]
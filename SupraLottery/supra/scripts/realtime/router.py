@@ -1,16 +1,16 @@
 """FastAPI-маршруты real-time сервиса (чат и объявления)."""
 from __future__ import annotations
 
-from typing import Iterator, List
+import math
+from typing import AsyncIterator, Iterable, List, Optional, Tuple
 
-from fastapi import APIRouter, Depends, Query, WebSocket
+from fastapi import APIRouter, Depends, HTTPException, Query, WebSocket, status
 from starlette.websockets import WebSocketDisconnect
-from fastapi.concurrency import run_in_threadpool
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..accounts.config import get_config_from_env
-from ..accounts.db import get_session, init_engine
-from .manager import connection_manager
+from ..accounts.db import get_async_session, get_session, init_engine
+from .manager import connection_manager, encode_payload
 from .schemas import (
     AnnouncementPayload,
     AnnouncementView,
@@ -18,9 +18,17 @@ from .schemas import (
     ChatMessageView,
 )
 from .service import AnnouncementInput, MessageInput, RealtimeService
+from .rate_limit import RateLimited, get_rate_limiter
+from .tables import ChatMessage
+from .topics import ANNOUNCEMENTS_TOPIC, handle_control, is_reserved_topic, lottery_topic, parse_topics
+from .write_behind import get_chat_writer
 
 router = APIRouter(prefix="/chat", tags=["chat"])
 
+# Сколько сообщений досылать из БД, если разрыв больше буфера в памяти;
+# остальное клиент догружает через ``GET /chat/messages``.
+RESUME_DB_LIMIT = 200
+
 
 def _ensure_engine() -> None:
     try:
@@ -31,9 +39,15 @@ def _ensure_engine() -> None:
         init_engine(config)
 
 
-def _session_dependency() -> Iterator[Session]:
+async def _session_dependency() -> AsyncIterator[AsyncSession]:
+    _ensure_engine()
+    async with get_async_session() as session:
+        yield session
+
+
+async def _readonly_session_dependency() -> AsyncIterator[AsyncSession]:
     _ensure_engine()
-    with get_session() as session:
+    async with get_async_session(readonly=True) as session:
         yield session
 
 
@@ -41,31 +55,65 @@ def _session_dependency() -> Iterator[Session]:
 async def list_messages(
     room: str = Query("global", description="Комната чата"),
     limit: int = Query(50, ge=1, le=200, description="Количество сообщений"),
-    session: Session = Depends(_session_dependency),
+    before_id: int | None = Query(None, ge=1, description="Сообщения старше указанного id"),
+    after_id: int | None = Query(None, ge=0, description="Сообщения новее указанного id"),
+    session: AsyncSession = Depends(_readonly_session_dependency),
 ) -> List[ChatMessageView]:
     service = RealtimeService(session)
-    messages = await run_in_threadpool(service.list_messages, room, limit)
+    try:
+        messages = await service.list_messages(room, limit, before_id=before_id, after_id=after_id)
+    except ValueError as exc:
+        raise HTTPException(status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(exc)) from exc
     return [ChatMessageView.model_validate(message) for message in messages]
 
 
+async def _check_rate_limit(address: str, room: str) -> None:
+    """Ограничение частоты для любых сообщений чата (HTTP и будущих WebSocket)."""
+
+    limiter = get_rate_limiter()
+    if limiter is None:
+        return
+    try:
+        await limiter.check(address, room)
+    except RateLimited as exc:
+        retry_after = max(1, math.ceil(exc.retry_after))
+        raise HTTPException(
+            status.HTTP_429_TOO_MANY_REQUESTS,
+            detail={"message": str(exc), "scope": exc.scope, "retry_after": round(exc.retry_after, 3)},
+            headers={"Retry-After": str(retry_after)},
+        ) from exc
+
+
 @router.post("/messages", response_model=ChatMessageView, status_code=201)
 async def post_message(
     payload: ChatMessagePayload,
-    session: Session = Depends(_session_dependency),
+    session: AsyncSession = Depends(_session_dependency),
 ) -> ChatMessageView:
-    service = RealtimeService(session)
-    message = await run_in_threadpool(
-        service.create_message,
-        MessageInput(
-            address=payload.address,
-            body=payload.body,
-            room=payload.room,
-            metadata=payload.metadata,
-        ),
+    data = MessageInput(
+        address=payload.address,
+        body=payload.body,
+        room=payload.room,
+        metadata=payload.metadata,
     )
-    await run_in_threadpool(session.commit)
+    try:
+        message = RealtimeService.build_message(data)
+    except ValueError as exc:
+        raise HTTPException(status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(exc)) from exc
+    await _check_rate_limit(message.sender_address, message.room)
+    writer = get_chat_writer()
+    if writer is not None:
+        # Write-behind: рассылаем сразу, запись идёт общим пакетом (см. write_behind).
+        message = await writer.assign(message)
+        view = ChatMessageView.model_validate(message)
+        connection_manager.broadcast(view.room, view.model_dump(mode="json"), message_id=view.id)
+        await writer.persist(message)
+        return view
+
+    service = RealtimeService(session)
+    message = await service.create_message(data)
+    await session.commit()
     view = ChatMessageView.model_validate(message)
-    connection_manager.broadcast(view.room, view.model_dump(mode="json"))
+    connection_manager.broadcast(view.room, view.model_dump(mode="json"), message_id=view.id)
     return view
 
 
@@ -73,21 +121,22 @@ async def post_message(
 async def list_announcements(
     limit: int = Query(20, ge=1, le=100, description="Количество объявлений"),
     lottery_id: str | None = Query(None, description="Фильтр по лотерее"),
-    session: Session = Depends(_session_dependency),
+    before_id: int | None = Query(None, ge=1, description="Объявления старше указанного id"),
+    after_id: int | None = Query(None, ge=0, description="Объявления новее указанного id"),
+    session: AsyncSession = Depends(_readonly_session_dependency),
 ) -> List[AnnouncementView]:
     service = RealtimeService(session)
-    announcements = await run_in_threadpool(service.list_announcements, limit, lottery_id)
+    announcements = await service.list_announcements(limit, lottery_id, before_id=before_id, after_id=after_id)
     return [AnnouncementView.model_validate(item) for item in announcements]
 
 
 @router.post("/announcements", response_model=AnnouncementView, status_code=201)
 async def post_announcement(
     payload: AnnouncementPayload,
-    session: Session = Depends(_session_dependency),
+    session: AsyncSession = Depends(_session_dependency),
 ) -> AnnouncementView:
     service = RealtimeService(session)
-    announcement = await run_in_threadpool(
-        service.create_announcement,
+    announcement = await service.create_announcement(
         AnnouncementInput(
             title=payload.title,
             body=payload.body,
@@ -95,16 +144,72 @@ async def post_announcement(
             metadata=payload.metadata,
         ),
     )
-    await run_in_threadpool(session.commit)
+    await session.commit()
     view = AnnouncementView.model_validate(announcement)
-    connection_manager.broadcast("announcements", view.model_dump(mode="json"))
+    data = view.model_dump(mode="json")
+    connection_manager.broadcast(ANNOUNCEMENTS_TOPIC, data)
+    if view.lottery_id:
+        connection_manager.broadcast(lottery_topic(view.lottery_id), {"event": "announcement", "announcement": data})
     return view
 
 
+def _encode_messages(messages: Iterable[ChatMessage]) -> List[Tuple[int, str]]:
+    return [
+        (message.id, encode_payload(ChatMessageView.model_validate(message).model_dump(mode="json")))
+        for message in messages
+    ]
+
+
+# Буфер истории прогревается с основной БД: отставание реплики оставило бы
+# в нём дыру между её состоянием и живыми сообщениями.
+async def _load_recent(room: str, limit: int) -> Tuple[List[Tuple[int, str]], bool]:
+    async with get_async_session() as session:
+        messages = await RealtimeService(session).list_messages(room, limit)
+        return _encode_messages(messages), len(messages) < limit
+
+
+async def _load_after(room: str, after_id: int, limit: int) -> List[Tuple[int, str]]:
+    async with get_async_session() as session:
+        return _encode_messages(await RealtimeService(session).list_messages(room, limit, after_id=after_id))
+
+
+async def _subscribe_with_resume(websocket: WebSocket, room: str, last_id: Optional[int]) -> int:
+    """Подписывает на комнату и досылает сообщения новее ``last_id``.
+
+    Пропущенное берётся из кольцевого буфера; в БД идём, только если буфер
+    ещё не прогрет (один запрос на комнату) или разрыв больше буфера.
+    Подписка и досылка из памяти выполняются без ``await`` между ними,
+    поэтому сообщения не теряются и не дублируются.
+    """
+
+    if last_id is None:
+        connection_manager.subscribe(websocket, room)
+        return 0
+    history = connection_manager.history
+    warm_limit = min(history.size, 200)
+    await history.ensure_warm(room, lambda: _load_recent(room, warm_limit))
+    missed = history.since(room, last_id)
+    if missed is None:
+        entries = await _load_after(room, last_id, RESUME_DB_LIMIT)
+        newest = entries[-1][0] if entries else last_id
+        missed = [text for _, text in entries] + history.tail(room, newest)
+    connection_manager.subscribe(websocket, room)
+    return connection_manager.replay(websocket, room, missed)
+
+
 @router.websocket("/ws/{room}")
-async def websocket_endpoint(websocket: WebSocket, room: str) -> None:
+async def websocket_endpoint(
+    websocket: WebSocket,
+    room: str,
+    last_id: int | None = Query(None, ge=0, description="Последнее полученное сообщение"),
+) -> None:
     _ensure_engine()
-    await connection_manager.connect(websocket, room)
+    if is_reserved_topic(room):
+        # Серверные топики читаются через /chat/ws и /status/ws.
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    await connection_manager.connect(websocket)
+    await _subscribe_with_resume(websocket, room, last_id)
     try:
         while True:
             await websocket.receive_text()
@@ -112,4 +217,36 @@ async def websocket_endpoint(websocket: WebSocket, room: str) -> None:
         await connection_manager.disconnect(websocket, room)
 
 
+@router.websocket("/ws")
+async def multiplexed_endpoint(
+    websocket: WebSocket,
+    topics: str | None = Query(None, description="Начальные топики через запятую"),
+) -> None:
+    """Одно подключение для нескольких топиков, см. :mod:`.topics`."""
+
+    _ensure_engine()
+    try:
+        initial = parse_topics(topics or [])
+    except ValueError:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    await connection_manager.connect(websocket, multiplexed=True)
+    try:
+        for topic in initial:
+            connection_manager.subscribe(websocket, topic)
+    except ValueError:
+        await connection_manager.disconnect(websocket)
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    if initial:
+        connection_manager.send(websocket, {"type": "subscribed", "topics": connection_manager.topics(websocket)})
+    try:
+        while True:
+            raw = await websocket.receive_text()
+            reply = await handle_control(connection_manager, websocket, raw, _subscribe_with_resume)
+            connection_manager.send(websocket, reply)
+    except WebSocketDisconnect:
+        await connection_manager.disconnect(websocket)
+
+
 __all__ = ["router"]
@@ -2,18 +2,26 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Iterable, List, Optional
+from typing import Iterable, List, Optional, TypeVar
 
 from sqlalchemy import Select, desc, select
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import InstrumentedAttribute
 
+from ..lib.tracing import traced
 from .tables import Announcement, ChatMessage
+from .topics import is_reserved_topic
+
+Row = TypeVar("Row", ChatMessage, Announcement)
 
 
 def _normalize_room(room: str | None) -> str:
     value = (room or "global").strip()
     if not value:
         return "global"
+    if is_reserved_topic(value):
+        # Иначе сообщение чата ушло бы подписчикам объявлений или статуса.
+        raise ValueError(f"Имя комнаты {value} зарезервировано")
     return value.lower()
 
 
@@ -24,6 +32,27 @@ def _normalize_address(address: str) -> str:
     return normalized.lower()
 
 
+async def _keyset_page(
+    session: AsyncSession,
+    stmt: Select[tuple[Row]],
+    id_column: InstrumentedAttribute[int],
+    limit: int,
+    before_id: Optional[int],
+    after_id: Optional[int],
+) -> List[Row]:
+    """Keyset-страница: ``after_id`` читает вперёд, иначе — назад от ``before_id``/конца."""
+
+    if before_id is not None:
+        stmt = stmt.where(id_column < before_id)
+    if after_id is not None:
+        stmt = stmt.where(id_column > after_id)
+        return list((await session.execute(stmt.order_by(id_column).limit(limit))).scalars())
+    rows: Iterable[Row] = (await session.execute(stmt.order_by(desc(id_column)).limit(limit))).scalars()
+    items = list(rows)
+    items.reverse()
+    return items
+
+
 @dataclass(slots=True)
 class MessageInput:
     address: str
@@ -43,33 +72,48 @@ class AnnouncementInput:
 class RealtimeService:
     """Работа с чат-сообщениями и объявлениями."""
 
-    def __init__(self, session: Session) -> None:
+    def __init__(self, session: AsyncSession) -> None:
         self._session = session
 
-    def create_message(self, payload: MessageInput) -> ChatMessage:
-        message = ChatMessage(
+    @staticmethod
+    def build_message(payload: MessageInput) -> ChatMessage:
+        """Нормализованное сообщение без добавления в сессию (для write-behind)."""
+
+        return ChatMessage(
             room=_normalize_room(payload.room),
             sender_address=_normalize_address(payload.address),
             body=payload.body.strip(),
             metadata=dict(payload.metadata or {}),
         )
+
+    @traced("realtime.create_message")
+    async def create_message(self, payload: MessageInput) -> ChatMessage:
+        message = self.build_message(payload)
         self._session.add(message)
-        self._session.flush()
+        await self._session.flush()
         return message
 
-    def list_messages(self, room: str, limit: int = 50) -> List[ChatMessage]:
-        stmt: Select[tuple[ChatMessage]] = (
-            select(ChatMessage)
-            .where(ChatMessage.room == _normalize_room(room))
-            .order_by(desc(ChatMessage.id))
-            .limit(max(1, min(limit, 200)))
-        )
-        rows: Iterable[ChatMessage] = self._session.execute(stmt).scalars()
-        items = list(rows)
-        items.reverse()
-        return items
-
-    def create_announcement(self, payload: AnnouncementInput) -> Announcement:
+    @traced("realtime.list_messages")
+    async def list_messages(
+        self,
+        room: str,
+        limit: int = 50,
+        *,
+        before_id: Optional[int] = None,
+        after_id: Optional[int] = None,
+    ) -> List[ChatMessage]:
+        """Страница сообщений комнаты по возрастанию id.
+
+        Без курсоров — последние ``limit`` сообщений; ``before_id`` — последние
+        перед ним (прокрутка вверх), ``after_id`` — первые после него.
+        Запрос идёт по индексу ``(room, id)`` и стоит O(limit) на любой глубине.
+        """
+
+        stmt: Select[tuple[ChatMessage]] = select(ChatMessage).where(ChatMessage.room == _normalize_room(room))
+        return await _keyset_page(self._session, stmt, ChatMessage.id, max(1, min(limit, 200)), before_id, after_id)
+
+    @traced("realtime.create_announcement")
+    async def create_announcement(self, payload: AnnouncementInput) -> Announcement:
         announcement = Announcement(
             title=payload.title.strip(),
             body=payload.body.strip(),
@@ -77,18 +121,24 @@ class RealtimeService:
             metadata=dict(payload.metadata or {}),
         )
         self._session.add(announcement)
-        self._session.flush()
+        await self._session.flush()
         return announcement
 
-    def list_announcements(self, limit: int = 20, lottery_id: Optional[str] = None) -> List[Announcement]:
+    @traced("realtime.list_announcements")
+    async def list_announcements(
+        self,
+        limit: int = 20,
+        lottery_id: Optional[str] = None,
+        *,
+        before_id: Optional[int] = None,
+        after_id: Optional[int] = None,
+    ) -> List[Announcement]:
+        """Страница объявлений по возрастанию id, курсоры как в :meth:`list_messages`."""
+
         stmt: Select[tuple[Announcement]] = select(Announcement)
         if lottery_id:
             stmt = stmt.where(Announcement.lottery_id == lottery_id.strip())
-        stmt = stmt.order_by(desc(Announcement.id)).limit(max(1, min(limit, 100)))
-        rows: Iterable[Announcement] = self._session.execute(stmt).scalars()
-        items = list(rows)
-        items.reverse()
-        return items
+        return await _keyset_page(self._session, stmt, Announcement.id, max(1, min(limit, 100)), before_id, after_id)
 
 
 __all__ = [
@@ -0,0 +1,152 @@
+"""Поток изменений отчёта ``/status`` для WebSocket-подписчиков.
+
+Один фоновый цикл на процесс обновляет отчёт, пока есть подписчики, и
+рассылает только JSON Patch между последовательными версиями. Новый
+подписчик сначала получает полный снимок::
+
+    {"type": "snapshot", "version": 3, "data": {...}}
+    {"type": "patch", "version": 4, "ops": [{"op": "replace", "path": "/...", "value": ...}]}
+    {"type": "error", "version": 4, "detail": "..."}
+
+Патч версии ``n`` применяется к снимку версии ``n - 1``. Версии локальны для
+воркера, поэтому патчи не публикуются в backplane.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from fastapi import WebSocket
+
+from ..lib.json_patch import diff
+from ..lib.tracing import span
+from .manager import ConnectionManager, encode_payload
+from .topics import STATUS_TOPIC_PREFIX
+
+STATUS_TOPIC = f"{STATUS_TOPIC_PREFIX}report"
+DEFAULT_INTERVAL = 5.0
+INTERVAL_ENV = "SUPRA_STATUS_STREAM_INTERVAL"
+
+logger = logging.getLogger(__name__)
+
+Refresh = Callable[[], Awaitable[Dict[str, Any]]]
+
+
+def interval_from_env() -> float:
+    raw = os.environ.get(INTERVAL_ENV)
+    if not raw:
+        return DEFAULT_INTERVAL
+    try:
+        value = float(raw)
+    except ValueError as exc:
+        raise ValueError(f"{INTERVAL_ENV} должен быть числом") from exc
+    if value <= 0:
+        raise ValueError(f"{INTERVAL_ENV} должен быть положительным")
+    return value
+
+
+class StatusStream:
+    """Общий фоновый refresh отчёта и рассылка диффов через :class:`ConnectionManager`."""
+
+    def __init__(
+        self,
+        manager: ConnectionManager,
+        refresh: Refresh,
+        interval: Optional[float] = None,
+        topic: str = STATUS_TOPIC,
+    ) -> None:
+        self.manager = manager
+        self.refresh = refresh
+        self.interval = interval or interval_from_env()
+        self.topic = topic
+        self.version = 0
+        self.report: Optional[Dict[str, Any]] = None
+        self._snapshot: Optional[str] = None
+        self._task: Optional[asyncio.Task[None]] = None
+        self._first_report: Optional[asyncio.Future[None]] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def subscribe(self, websocket: WebSocket) -> None:
+        """Принимает подключение и отправляет снимок до первого патча."""
+
+        await self.manager.connect(websocket)
+        self._ensure_running()
+        if self.report is None and self._first_report is not None:
+            await asyncio.shield(self._first_report)
+        # Снимок и подписка в одном шаге цикла: патч следующей версии не потеряется.
+        self.manager.subscribe(websocket, self.topic)
+        if self._snapshot is not None:
+            self.manager.replay(websocket, self.topic, [self._snapshot])
+
+    async def unsubscribe(self, websocket: WebSocket) -> None:
+        await self.manager.disconnect(websocket)
+
+    def _ensure_running(self) -> None:
+        if self.running:
+            return
+        if self.report is None:
+            self._first_report = asyncio.get_running_loop().create_future()
+        self._task = asyncio.create_task(self._run())
+
+    async def _run(self) -> None:
+        try:
+            while True:
+                await self.refresh_once()
+                await asyncio.sleep(self.interval)
+                if self.manager.room_size(self.topic) == 0:
+                    return
+        finally:
+            self._resolve_first_report()
+
+    def _resolve_first_report(self) -> None:
+        future, self._first_report = self._first_report, None
+        if future is not None and not future.done():
+            future.set_result(None)
+
+    async def refresh_once(self) -> None:
+        try:
+            report = await self.refresh()
+        except Exception as exc:  # noqa: BLE001 - ошибка CLI не должна останавливать поток
+            logger.warning("Не удалось обновить отчёт для потока /status: %s", exc)
+            self.manager.broadcast(
+                self.topic, {"type": "error", "version": self.version, "detail": str(exc)}, local=True
+            )
+            self._resolve_first_report()
+            return
+        self.publish(report)
+
+    def publish(self, report: Dict[str, Any]) -> int:
+        """Сохраняет новую версию отчёта и рассылает патч; возвращает число операций."""
+
+        with span("status_stream.publish", version=self.version + 1):
+            ops = diff(self.report, report) if self.report is not None else None
+            if ops == []:
+                return 0
+            self.version += 1
+            self.report = report
+            snapshot = {"type": "snapshot", "version": self.version, "data": report}
+            self._snapshot = encode_payload(snapshot)
+            if ops is None:
+                # Подписчики, пришедшие до первого успешного отчёта, ещё без снимка.
+                self.manager.broadcast(self.topic, snapshot, local=True)
+            else:
+                self.manager.broadcast(self.topic, {"type": "patch", "version": self.version, "ops": ops}, local=True)
+        self._resolve_first_report()
+        return len(ops or ())
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+__all__ = ["INTERVAL_ENV", "STATUS_TOPIC", "StatusStream"]
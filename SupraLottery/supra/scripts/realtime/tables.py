@@ -4,7 +4,7 @@ from __future__ import annotations
 from datetime import datetime, timezone
 from typing import Any
 
-from sqlalchemy import JSON, Integer, String, Text
+from sqlalchemy import JSON, BigInteger, Float, Index, Integer, String, Text
 from sqlalchemy.ext.mutable import MutableDict
 from sqlalchemy.orm import Mapped, mapped_column
 
@@ -19,9 +19,11 @@ class ChatMessage(Base):
     """Сообщение в глобальном или лотерейном чате."""
 
     __tablename__ = "chat_messages"
+    # Keyset-пагинация: WHERE room = ? AND id < ? ORDER BY id DESC LIMIT n.
+    __table_args__ = (Index("ix_chat_messages_room_id", "room", "id"),)
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
-    room: Mapped[str] = mapped_column(String(64), index=True)
+    room: Mapped[str] = mapped_column(String(64))
     sender_address: Mapped[str] = mapped_column(String(80), index=True)
     body: Mapped[str] = mapped_column(Text)
     metadata: Mapped[dict[str, Any]] = mapped_column(MutableDict.as_mutable(JSON), default=dict)
@@ -32,13 +34,33 @@ class Announcement(Base):
     """Объявление о новой лотерее или результате."""
 
     __tablename__ = "lottery_announcements"
+    __table_args__ = (Index("ix_lottery_announcements_lottery_id_id", "lottery_id", "id"),)
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     title: Mapped[str] = mapped_column(String(160))
     body: Mapped[str] = mapped_column(Text)
-    lottery_id: Mapped[str | None] = mapped_column(String(64), nullable=True, index=True)
+    lottery_id: Mapped[str | None] = mapped_column(String(64), nullable=True)
     metadata: Mapped[dict[str, Any]] = mapped_column(MutableDict.as_mutable(JSON), default=dict)
     created_at: Mapped[datetime] = mapped_column(default=_utcnow, index=True)
 
 
-__all__ = ["ChatMessage", "Announcement"]
+class IdBlock(Base):
+    """Счётчик hi/lo-аллокатора id: воркеры резервируют блоки id одним UPDATE."""
+
+    __tablename__ = "id_blocks"
+
+    name: Mapped[str] = mapped_column(String(64), primary_key=True)
+    next_value: Mapped[int] = mapped_column(BigInteger)
+
+
+class RateLimitBucket(Base):
+    """Общая корзина token bucket для ограничения частоты (бэкенд ``db``)."""
+
+    __tablename__ = "rate_limit_buckets"
+
+    key: Mapped[str] = mapped_column(String(160), primary_key=True)
+    tokens: Mapped[float] = mapped_column(Float)
+    updated_at: Mapped[float] = mapped_column(Float)
+
+
+__all__ = ["ChatMessage", "Announcement", "IdBlock", "RateLimitBucket"]
@@ -0,0 +1,155 @@
+"""Топики мультиплексированного WebSocket и управляющий протокол.
+
+Одно подключение ``/chat/ws`` подписывается на несколько топиков:
+
+* имя комнаты чата (``global``, ``lottery-5`` и т.п.);
+* ``announcements`` — объявления;
+* ``lottery:<id>`` — обновления статуса (``{"event": "status", "lottery": ...}``)
+  и объявления (``{"event": "announcement", "announcement": ...}``) лотереи.
+
+``announcements`` и префиксы ``lottery:``/``status:`` зарезервированы за
+серверными событиями: комнаты чата с такими именами не создаются, а
+``status:*`` (поток ``/status/ws``) недоступен для подписки здесь.
+
+Клиент отправляет JSON-команды::
+
+    {"action": "subscribe", "topics": ["global", "lottery:5"]}
+    {"action": "subscribe", "topics": ["global"], "last_ids": {"global": 1024}}
+    {"action": "unsubscribe", "topics": ["global"]}
+    {"action": "ping"}
+
+Сервер отвечает ``{"type": "subscribed" | "unsubscribed", "topics": [...]}``
+(полный список текущих подписок), ``{"type": "pong"}`` или
+``{"type": "error", "detail": ...}``, а события присылает в конверте
+``{"topic": ..., "data": ...}``.
+
+``last_ids`` для комнат чата досылает сообщения, пропущенные после
+переподключения (из памяти или БД), до подтверждения подписки; в ответе
+``resumed`` — число досланных сообщений по комнатам.
+"""
+from __future__ import annotations
+
+import json
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from fastapi import WebSocket
+
+from .manager import ConnectionManager
+
+ANNOUNCEMENTS_TOPIC = "announcements"
+LOTTERY_TOPIC_PREFIX = "lottery:"
+STATUS_TOPIC_PREFIX = "status:"
+RESERVED_TOPIC_PREFIXES = (LOTTERY_TOPIC_PREFIX, STATUS_TOPIC_PREFIX)
+MAX_TOPIC_LENGTH = 128
+
+Subscribe = Callable[[WebSocket, str, Optional[int]], Awaitable[int]]
+
+
+def lottery_topic(lottery_id: Any) -> str:
+    return f"{LOTTERY_TOPIC_PREFIX}{lottery_id}"
+
+
+def validate_topic(topic: Any) -> str:
+    if not isinstance(topic, str):
+        raise ValueError("Топик должен быть строкой")
+    topic = topic.strip()
+    if not topic or len(topic) > MAX_TOPIC_LENGTH:
+        raise ValueError(f"Длина топика должна быть от 1 до {MAX_TOPIC_LENGTH} символов")
+    if topic.startswith(LOTTERY_TOPIC_PREFIX) and not topic[len(LOTTERY_TOPIC_PREFIX) :].isdigit():
+        raise ValueError(f"Некорректный топик лотереи: {topic}")
+    if topic.lower().startswith(STATUS_TOPIC_PREFIX):
+        raise ValueError(f"Топик {topic} зарезервирован")
+    return topic
+
+
+def parse_topics(raw: Any) -> List[str]:
+    """Принимает список топиков или строку через запятую."""
+
+    if isinstance(raw, str):
+        raw = [item for item in raw.split(",") if item.strip()]
+    if not isinstance(raw, list):
+        raise ValueError("Поле topics должно быть списком")
+    return [validate_topic(item) for item in raw]
+
+
+def is_reserved_topic(topic: str) -> bool:
+    """Топик серверных событий, который не может быть комнатой чата."""
+
+    normalized = topic.strip().lower()
+    return normalized == ANNOUNCEMENTS_TOPIC or normalized.startswith(RESERVED_TOPIC_PREFIXES)
+
+
+def is_chat_topic(topic: str) -> bool:
+    return not is_reserved_topic(topic)
+
+
+def parse_last_ids(raw: Any) -> Dict[str, int]:
+    if raw is None:
+        return {}
+    if not isinstance(raw, dict):
+        raise ValueError("Поле last_ids должно быть объектом")
+    result: Dict[str, int] = {}
+    for topic, value in raw.items():
+        if isinstance(value, bool) or not isinstance(value, int) or value < 0:
+            raise ValueError(f"Некорректный last_id для {topic}")
+        result[validate_topic(topic)] = value
+    return result
+
+
+async def handle_control(
+    manager: ConnectionManager,
+    websocket: WebSocket,
+    raw: str,
+    subscribe: Optional[Subscribe] = None,
+) -> Dict[str, Any]:
+    """Применяет управляющую команду клиента и возвращает ответ для отправки.
+
+    ``subscribe`` подписывает с досылкой пропущенного по ``last_id`` и
+    возвращает число досланных сообщений.
+    """
+
+    try:
+        command = json.loads(raw)
+    except json.JSONDecodeError:
+        return {"type": "error", "detail": "Ожидается JSON-команда"}
+    if not isinstance(command, dict):
+        return {"type": "error", "detail": "Ожидается JSON-объект"}
+
+    action = command.get("action")
+    if action == "ping":
+        return {"type": "pong"}
+    if action not in {"subscribe", "unsubscribe"}:
+        return {"type": "error", "detail": f"Неизвестное действие: {action}"}
+    resumed: Dict[str, int] = {}
+    try:
+        topics = parse_topics(command.get("topics"))
+        last_ids = parse_last_ids(command.get("last_ids"))
+        for topic in topics:
+            if action == "unsubscribe":
+                manager.unsubscribe(websocket, topic)
+                continue
+            last_id = last_ids.get(topic) if is_chat_topic(topic) else None
+            if subscribe is None or last_id is None:
+                manager.subscribe(websocket, topic)
+            else:
+                resumed[topic] = await subscribe(websocket, topic, last_id)
+    except ValueError as exc:
+        return {"type": "error", "detail": str(exc)}
+    reply: Dict[str, Any] = {"type": f"{action}d", "topics": manager.topics(websocket)}
+    if resumed:
+        reply["resumed"] = resumed
+    return reply
+
+
+__all__ = [
+    "ANNOUNCEMENTS_TOPIC",
+    "LOTTERY_TOPIC_PREFIX",
+    "RESERVED_TOPIC_PREFIXES",
+    "STATUS_TOPIC_PREFIX",
+    "handle_control",
+    "is_chat_topic",
+    "is_reserved_topic",
+    "lottery_topic",
+    "parse_topics",
+    "validate_topic",
+]
@@ -0,0 +1,355 @@
+"""Пакетная (write-behind) запись сообщений чата.
+
+Режим задаётся ``SUPRA_CHAT_DURABILITY``:
+
+* ``sync`` (по умолчанию) — каждое сообщение сохраняется своим коммитом до рассылки;
+* ``batch`` — id выдаёт hi/lo-аллокатор, сообщение сразу рассылается, а ответ
+  ``POST`` ждёт коммита общего пакета (group commit: после 201 сообщение в БД);
+* ``async`` — ответ сразу после рассылки; при падении процесса теряются
+  сообщения последнего неполного пакета (до ``SUPRA_CHAT_FLUSH_MS``).
+
+Пакет записывается одним многострочным ``INSERT`` каждые
+``SUPRA_CHAT_FLUSH_MS`` миллисекунд или при накоплении ``SUPRA_CHAT_BATCH_SIZE``
+сообщений. Если пакет упёрся в занятый id, строки пишутся по одной, а
+конфликтная получает новый id: сообщение не теряется, но его id в рассылке
+и в БД расходятся.
+
+Режим должен быть одинаковым на всех воркерах. Аллокатор при каждом
+резервировании начинает блок не ниже ``max(id) + 1`` (в PostgreSQL ещё и
+сдвигает последовательность ``SERIAL`` за конец блока), но ``sync``-запись,
+сделанная в SQLite уже после резервирования, может занять id из блока —
+это и разбирает запись по одной строке.
+
+``batch`` и ``async`` рассчитаны на один воркер. Внутри процесса id
+коммитятся по возрастанию, но у нескольких воркеров блоки id разные, и
+сообщение с меньшим id может попасть в БД позже большего — курсоры
+``after_id``/``last_id`` его пропустят. Поэтому вместе с backplane (он нужен
+только нескольким воркерам) write-behind не включается: допустим лишь ``sync``.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+from sqlalchemy import func, select, text
+from sqlalchemy.exc import IntegrityError
+
+from ..accounts.db import get_async_session
+from ..lib.tracing import span
+from .tables import ChatMessage, IdBlock
+
+DURABILITY_ENV = "SUPRA_CHAT_DURABILITY"
+BATCH_SIZE_ENV = "SUPRA_CHAT_BATCH_SIZE"
+FLUSH_MS_ENV = "SUPRA_CHAT_FLUSH_MS"
+ID_BLOCK_ENV = "SUPRA_CHAT_ID_BLOCK"
+DURABILITY_MODES = ("sync", "batch", "async")
+MAX_FLUSH_ATTEMPTS = 3
+
+logger = logging.getLogger(__name__)
+
+
+class IdBlockAllocator:
+    """Выдаёт id из зарезервированных в БД блоков (hi/lo), без запроса на каждое сообщение.
+
+    Id монотонны только в пределах одного аллокатора (воркера).
+    """
+
+    def __init__(self, name: str = ChatMessage.__tablename__, block_size: int = 1000) -> None:
+        self.name = name
+        self.block_size = block_size
+        self._next = 0
+        self._limit = 0
+        self._lock = asyncio.Lock()
+
+    async def next_id(self) -> int:
+        if self._next >= self._limit:
+            async with self._lock:
+                if self._next >= self._limit:
+                    start = await self._reserve()
+                    self._next, self._limit = start, start + self.block_size
+        value = self._next
+        self._next += 1
+        return value
+
+    def discard(self) -> None:
+        """Бросает остаток блока: следующий id возьмётся из нового резервирования."""
+
+        self._next = self._limit
+
+    async def _reserve(self) -> int:
+        for _ in range(2):
+            try:
+                async with get_async_session() as session, session.begin():
+                    block = await session.get(IdBlock, self.name, with_for_update=True)
+                    # Строки sync-режима идут мимо счётчика: сверяемся с таблицей каждый раз.
+                    current = await session.scalar(select(func.max(ChatMessage.id))) or 0
+                    if block is None:
+                        block = IdBlock(name=self.name, next_value=current + 1)
+                        session.add(block)
+                        await session.flush()
+                    start = max(block.next_value, current + 1)
+                    if session.get_bind().dialect.name == "postgresql":
+                        start = await self._advance_serial(session, start)
+                    block.next_value = start + self.block_size
+                    return start
+            except IntegrityError:
+                # Другой воркер одновременно создал счётчик — повторяем с ним.
+                continue
+        raise RuntimeError(f"Не удалось зарезервировать блок id для {self.name}")
+
+    async def _advance_serial(self, session: Any, start: int) -> int:
+        """Сдвигает последовательность ``SERIAL`` за конец блока, чтобы ``sync``-вставки его не заняли."""
+
+        sequence = await session.scalar(
+            text("SELECT pg_get_serial_sequence(:table, 'id')"), {"table": ChatMessage.__tablename__}
+        )
+        if sequence is None:
+            return start
+        # Имя последовательности приходит из каталога PostgreSQL уже экранированным.
+        last = await session.scalar(text(f"SELECT last_value FROM {sequence}"))
+        start = max(start, int(last or 0) + 1)
+        await session.execute(
+            text("SELECT setval(CAST(:sequence AS regclass), :value)"),
+            {"sequence": sequence, "value": start + self.block_size - 1},
+        )
+        return start
+
+
+@dataclass(frozen=True)
+class WriteBehindConfig:
+    durability: str = "sync"
+    batch_size: int = 100
+    flush_interval: float = 0.005
+    id_block_size: int = 1000
+
+    @property
+    def enabled(self) -> bool:
+        return self.durability != "sync"
+
+
+def _positive_int(env: Mapping[str, str], key: str, default: int) -> int:
+    raw = env.get(key)
+    if not raw:
+        return default
+    try:
+        value = int(raw)
+    except ValueError as exc:
+        raise ValueError(f"{key} должен быть целым числом") from exc
+    if value <= 0:
+        raise ValueError(f"{key} должен быть положительным")
+    return value
+
+
+def write_behind_config_from_env(env: Optional[Mapping[str, str]] = None) -> WriteBehindConfig:
+    env = os.environ if env is None else env
+    durability = (env.get(DURABILITY_ENV) or "sync").strip().lower()
+    if durability not in DURABILITY_MODES:
+        raise ValueError(f"{DURABILITY_ENV} должен быть одним из: {', '.join(DURABILITY_MODES)}")
+    return WriteBehindConfig(
+        durability=durability,
+        batch_size=_positive_int(env, BATCH_SIZE_ENV, WriteBehindConfig.batch_size),
+        flush_interval=_positive_int(env, FLUSH_MS_ENV, 5) / 1000,
+        id_block_size=_positive_int(env, ID_BLOCK_ENV, WriteBehindConfig.id_block_size),
+    )
+
+
+_Pending = Tuple[Dict[str, Any], Optional["asyncio.Future[None]"]]
+
+
+class ChatWriteBehind:
+    """Очередь сообщений чата с пакетной записью в фоне."""
+
+    def __init__(self, config: WriteBehindConfig, allocator: Optional[IdBlockAllocator] = None) -> None:
+        self.config = config
+        self.allocator = allocator or IdBlockAllocator(block_size=config.id_block_size)
+        self.flushes = 0
+        self.persisted = 0
+        self.lost = 0
+        self._pending: List[_Pending] = []
+        self._wakeup = asyncio.Event()
+        self._full = asyncio.Event()
+        self._task: Optional[asyncio.Task[None]] = None
+        self._closing = False
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def assign(self, message: ChatMessage) -> ChatMessage:
+        """Выдаёт сообщению id и время создания до записи в БД."""
+
+        message.id = await self.allocator.next_id()
+        message.created_at = datetime.now(timezone.utc)
+        return message
+
+    async def persist(self, message: ChatMessage) -> None:
+        """Ставит сообщение в пакет; в режиме ``batch`` ждёт коммита пакета."""
+
+        self.start()
+        waiter: Optional[asyncio.Future[None]] = None
+        if self.config.durability == "batch":
+            waiter = asyncio.get_running_loop().create_future()
+        row = {
+            "id": message.id,
+            "room": message.room,
+            "sender_address": message.sender_address,
+            "body": message.body,
+            "metadata": dict(message.metadata or {}),
+            "created_at": message.created_at,
+        }
+        self._pending.append((row, waiter))
+        self._wakeup.set()
+        if len(self._pending) >= self.config.batch_size:
+            self._full.set()
+        if waiter is not None:
+            await waiter
+
+    async def _run(self) -> None:
+        while True:
+            await self._wakeup.wait()
+            if not self._closing and len(self._pending) < self.config.batch_size:
+                try:
+                    await asyncio.wait_for(self._full.wait(), self.config.flush_interval)
+                except asyncio.TimeoutError:
+                    pass
+            await self._flush_pending()
+            if self._closing:
+                return
+
+    async def _flush_pending(self) -> None:
+        while self._pending:
+            batch = self._pending[: self.config.batch_size]
+            del self._pending[: len(batch)]
+            await self._flush(batch)
+        self._wakeup.clear()
+        self._full.clear()
+
+    async def _flush(self, batch: List[_Pending]) -> None:
+        rows = [row for row, _ in batch]
+        error: Optional[BaseException] = None
+        errors: List[Optional[BaseException]] = [None] * len(rows)
+        for attempt in range(MAX_FLUSH_ATTEMPTS):
+            try:
+                with span("realtime.write_behind.flush", rows=len(rows)):
+                    await self._insert(rows)
+            except IntegrityError:
+                # Повтор пакета упрётся в тот же id: пишем по одной строке.
+                errors = await self._insert_each(rows)
+                error = None
+                break
+            except Exception as exc:  # noqa: BLE001 - повторяем, затем сообщаем ожидающим
+                error = exc
+                await asyncio.sleep(self.config.flush_interval * (attempt + 1))
+                continue
+            error = None
+            break
+        if error is not None:
+            errors = [error] * len(rows)
+        failed = sum(item is not None for item in errors)
+        if error is None:
+            self.flushes += 1
+        self.persisted += len(rows) - failed
+        self.lost += failed
+        if failed:
+            logger.error(
+                "Не удалось записать %d из %d сообщений чата: %s",
+                failed, len(rows), next(item for item in errors if item is not None),
+            )
+        for (_, waiter), item in zip(batch, errors):
+            if waiter is None or waiter.done():
+                continue
+            if item is None:
+                waiter.set_result(None)
+            else:
+                waiter.set_exception(item)
+
+    async def _insert_each(self, rows: List[Dict[str, Any]]) -> List[Optional[BaseException]]:
+        """Пишет строки по одной; строка с занятым id получает новый id."""
+
+        # Остаток блока мог пересечься с чужими строками — резервируем заново.
+        self.allocator.discard()
+        errors: List[Optional[BaseException]] = []
+        for row in rows:
+            try:
+                try:
+                    await self._insert([row])
+                except IntegrityError:
+                    taken = row["id"]
+                    row["id"] = await self.allocator.next_id()
+                    await self._insert([row])
+                    logger.warning("id %s сообщения чата занят, сообщение записано с id %s", taken, row["id"])
+            except Exception as exc:  # noqa: BLE001 - сообщаем ожидающему этой строки
+                errors.append(exc)
+            else:
+                errors.append(None)
+        return errors
+
+    @staticmethod
+    async def _insert(rows: List[Dict[str, Any]]) -> None:
+        async with get_async_session() as session:
+            # executemany → многострочный INSERT ... VALUES (...), (...) в SQLAlchemy 2.
+            await session.execute(ChatMessage.__table__.insert(), rows)
+            await session.commit()
+
+    async def close(self) -> None:
+        """Записывает накопленное и останавливает фоновую задачу."""
+
+        self._closing = True
+        if self._task is not None:
+            self._wakeup.set()
+            self._full.set()
+            await self._task
+            self._task = None
+        await self._flush_pending()
+
+
+_CHAT_WRITER: Optional[ChatWriteBehind] = None
+
+
+def get_chat_writer() -> Optional[ChatWriteBehind]:
+    return _CHAT_WRITER
+
+
+def set_chat_writer(writer: Optional[ChatWriteBehind]) -> Optional[ChatWriteBehind]:
+    global _CHAT_WRITER
+    previous, _CHAT_WRITER = _CHAT_WRITER, writer
+    return previous
+
+
+def configure_chat_writer_from_env(
+    env: Optional[Mapping[str, str]] = None, *, multi_worker: bool = False
+) -> Optional[ChatWriteBehind]:
+    """Включает write-behind по ``SUPRA_CHAT_DURABILITY`` (``sync`` — выключает).
+
+    ``multi_worker=True`` (задан backplane) допускает только ``sync``.
+    """
+
+    config = write_behind_config_from_env(env)
+    if config.enabled and multi_worker:
+        set_chat_writer(None)
+        raise ValueError(
+            f"{DURABILITY_ENV}={config.durability} работает только в одном воркере; с backplane используйте sync"
+        )
+    writer = ChatWriteBehind(config) if config.enabled else None
+    set_chat_writer(writer)
+    return writer
+
+
+__all__ = [
+    "ChatWriteBehind",
+    "DURABILITY_ENV",
+    "IdBlockAllocator",
+    "WriteBehindConfig",
+    "configure_chat_writer_from_env",
+    "get_chat_writer",
+    "set_chat_writer",
+    "write_behind_config_from_env",
+]
@@ -1,42 +1,95 @@
 """FastAPI-роутер центра поддержки."""
 from __future__ import annotations
 
-from fastapi import APIRouter, HTTPException, status
+import csv
+import hmac
+import io
+import json
+import os
+from datetime import datetime
+from typing import Any, AsyncIterator, Literal, Sequence
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
 
 from .schemas import (
     SupportArticleCreate,
     SupportArticleListResponse,
     SupportArticleResponse,
+    SupportArticleSummary,
+    SupportSearchHit,
+    SupportSearchResponse,
+    SupportTicketBulkCreate,
+    SupportTicketBulkResponse,
     SupportTicketCreate,
     SupportTicketResponse,
 )
-from .service import create_or_update_article, create_ticket, get_article_by_slug, list_articles
+from .search import search_articles
+from .service import (
+    TICKET_EXPORT_COLUMNS,
+    TicketFilter,
+    create_or_update_article,
+    create_ticket,
+    create_tickets,
+    get_article_by_slug,
+    iter_tickets,
+    list_articles,
+)
 
 router = APIRouter(prefix="/support", tags=["support"])
 
+# Токен сотрудников для выгрузки тикетов; без него выгрузка выключена.
+EXPORT_TOKEN_ENV = "SUPRA_SUPPORT_EXPORT_TOKEN"
+# Ячейки, которые табличные редакторы читают как формулу.
+_FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
 
 @router.get("/articles", response_model=SupportArticleListResponse)
-def get_articles(locale: str | None = None) -> SupportArticleListResponse:
-    """Возвращает список статей базы знаний."""
+async def get_articles(locale: str | None = None) -> SupportArticleListResponse:
+    """Возвращает список статей базы знаний (без текста)."""
 
     articles = [
-        SupportArticleResponse(
+        SupportArticleSummary(
             slug=item.slug,
             title=item.title,
-            body=item.body,
             locale=item.locale,
             tags=item.tags,
             created_at=item.created_at,
             updated_at=item.updated_at,
         )
-        for item in list_articles(locale=locale)
+        for item in await list_articles(locale=locale)
     ]
     return SupportArticleListResponse(articles=articles)
 
 
+@router.get("/search", response_model=SupportSearchResponse)
+async def get_search(
+    q: str = Query(..., min_length=1, max_length=200, description="Поисковый запрос"),
+    locale: str | None = None,
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+) -> SupportSearchResponse:
+    """Полнотекстовый поиск по заголовкам, текстам и тегам статей."""
+
+    hits, total = await search_articles(q, locale=locale, limit=limit, offset=offset)
+    results = [
+        SupportSearchHit(
+            slug=hit.slug,
+            title=hit.title,
+            locale=hit.locale,
+            tags=hit.tags,
+            snippet=hit.snippet,
+            score=hit.score,
+            updated_at=hit.updated_at,
+        )
+        for hit in hits
+    ]
+    return SupportSearchResponse(query=q, total=total, results=results)
+
+
 @router.get("/articles/{slug}", response_model=SupportArticleResponse)
-def get_article(slug: str) -> SupportArticleResponse:
-    article = get_article_by_slug(slug)
+async def get_article(slug: str) -> SupportArticleResponse:
+    article = await get_article_by_slug(slug)
     if article is None:
         raise HTTPException(status.HTTP_404_NOT_FOUND, detail="Статья не найдена")
     return SupportArticleResponse(
@@ -51,10 +104,10 @@ def get_article(slug: str) -> SupportArticleResponse:
 
 
 @router.put("/articles/{slug}", response_model=SupportArticleResponse)
-def put_article(slug: str, payload: SupportArticleCreate) -> SupportArticleResponse:
+async def put_article(slug: str, payload: SupportArticleCreate) -> SupportArticleResponse:
     data = payload.dict()
     data["slug"] = slug
-    article = create_or_update_article(data)
+    article = await create_or_update_article(data)
     return SupportArticleResponse(
         slug=article.slug,
         title=article.title,
@@ -67,6 +120,87 @@ def put_article(slug: str, payload: SupportArticleCreate) -> SupportArticleRespo
 
 
 @router.post("/tickets", response_model=SupportTicketResponse, status_code=status.HTTP_201_CREATED)
-def post_ticket(payload: SupportTicketCreate) -> SupportTicketResponse:
-    ticket = create_ticket(payload.dict())
+async def post_ticket(payload: SupportTicketCreate) -> SupportTicketResponse:
+    ticket = await create_ticket(payload.dict())
     return SupportTicketResponse(id=ticket.id, status=ticket.status, created_at=ticket.created_at)
+
+
+@router.post("/tickets/bulk", response_model=SupportTicketBulkResponse, status_code=status.HTTP_201_CREATED)
+async def post_tickets_bulk(payload: SupportTicketBulkCreate) -> SupportTicketBulkResponse:
+    """Пачка тикетов от интеграций: один ``INSERT`` в одной транзакции."""
+
+    ids = await create_tickets([ticket.model_dump() for ticket in payload.tickets])
+    return SupportTicketBulkResponse(created=len(ids), ids=ids)
+
+
+def _export_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, dict):
+        return json.dumps(value, ensure_ascii=False)
+    return value
+
+
+def _csv_value(value: Any) -> Any:
+    value = _export_value(value)
+    if isinstance(value, str) and value.startswith(_FORMULA_PREFIXES):
+        # Апостроф выключает формулу (CSV injection), текст остаётся читаемым.
+        return "'" + value
+    return value
+
+
+def _csv_chunk(rows: Sequence[Sequence[Any]]) -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows([_csv_value(value) for value in row] for row in rows)
+    return buffer.getvalue()
+
+
+async def _csv_lines(batches: AsyncIterator[Sequence[Any]]) -> AsyncIterator[str]:
+    yield _csv_chunk([TICKET_EXPORT_COLUMNS])
+    async for rows in batches:
+        yield _csv_chunk(rows)
+
+
+async def _ndjson_lines(batches: AsyncIterator[Sequence[Any]]) -> AsyncIterator[str]:
+    async for rows in batches:
+        yield "".join(
+            json.dumps(dict(zip(TICKET_EXPORT_COLUMNS, row)), ensure_ascii=False, default=_export_value) + "\n"
+            for row in rows
+        )
+
+
+def _require_export_token(authorization: str | None = Header(None)) -> None:
+    """Выгрузка отдаёт e-mail, адреса и тексты тикетов — только по ``Bearer``-токену."""
+
+    expected = os.environ.get(EXPORT_TOKEN_ENV, "").strip()
+    if not expected:
+        raise HTTPException(status.HTTP_404_NOT_FOUND, detail="Выгрузка тикетов выключена")
+    scheme, _, supplied = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not hmac.compare_digest(supplied.strip().encode(), expected.encode()):
+        raise HTTPException(
+            status.HTTP_401_UNAUTHORIZED,
+            detail="Нужен токен выгрузки тикетов",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+
+@router.get("/tickets/export", dependencies=[Depends(_require_export_token)])
+async def export_tickets(
+    export_format: Literal["csv", "ndjson"] = Query("csv", alias="format"),
+    ticket_status: str | None = Query(None, alias="status", description="Фильтр по статусу"),
+    created_from: datetime | None = Query(None, description="Не раньше (включительно)"),
+    created_to: datetime | None = Query(None, description="Раньше (не включительно)"),
+) -> StreamingResponse:
+    """Потоковая выгрузка тикетов для таблиц: память не растёт с объёмом.
+
+    Доступна, только если задан ``SUPRA_SUPPORT_EXPORT_TOKEN``, и только с ним.
+    """
+
+    batches = iter_tickets(TicketFilter(status=ticket_status, created_from=created_from, created_to=created_to))
+    if export_format == "ndjson":
+        return StreamingResponse(_ndjson_lines(batches), media_type="application/x-ndjson")
+    return StreamingResponse(
+        _csv_lines(batches),
+        media_type="text/csv; charset=utf-8",
+        headers={"Content-Disposition": 'attachment; filename="support_tickets.csv"'},
+    )
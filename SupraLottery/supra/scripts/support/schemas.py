@@ -25,8 +25,33 @@ class SupportArticleResponse(BaseModel):
     updated_at: datetime
 
 
+class SupportArticleSummary(BaseModel):
+    slug: str
+    title: str
+    locale: str
+    tags: dict[str, Any]
+    created_at: datetime
+    updated_at: datetime
+
+
 class SupportArticleListResponse(BaseModel):
-    articles: list[SupportArticleResponse]
+    articles: list[SupportArticleSummary]
+
+
+class SupportSearchHit(BaseModel):
+    slug: str
+    title: str
+    locale: str
+    tags: dict[str, Any]
+    snippet: str = Field(description="Фрагмент, экранированный для HTML, с совпадениями в <mark>…</mark>")
+    score: float = Field(description="Релевантность: больше — выше в выдаче")
+    updated_at: datetime
+
+
+class SupportSearchResponse(BaseModel):
+    query: str
+    total: int = Field(description="Совпадений всего, без учёта страницы")
+    results: list[SupportSearchHit]
 
 
 class SupportTicketCreate(BaseModel):
@@ -43,10 +68,27 @@ class SupportTicketResponse(BaseModel):
     created_at: datetime
 
 
+MAX_BULK_TICKETS = 1000
+
+
+class SupportTicketBulkCreate(BaseModel):
+    tickets: list[SupportTicketCreate] = Field(min_length=1, max_length=MAX_BULK_TICKETS)
+
+
+class SupportTicketBulkResponse(BaseModel):
+    created: int
+    ids: list[int] = Field(description="Идентификаторы в порядке запроса")
+
+
 __all__ = [
     "SupportArticleCreate",
     "SupportArticleResponse",
     "SupportArticleListResponse",
+    "SupportArticleSummary",
+    "SupportSearchHit",
+    "SupportSearchResponse",
     "SupportTicketCreate",
     "SupportTicketResponse",
+    "SupportTicketBulkCreate",
+    "SupportTicketBulkResponse",
 ]
@@ -0,0 +1,257 @@
+"""Полнотекстовый поиск по базе знаний.
+
+SQLite: виртуальная таблица FTS5 ``support_articles_fts`` (``rowid`` = id
+статьи), которую ``create_or_update_article`` обновляет в своей транзакции.
+PostgreSQL: GIN-индекс по выражению ``tsvector`` (заголовок — вес A, теги —
+B, текст — C), его поддерживает сама БД. Таблица и индекс создаются при
+первом обращении; существующие статьи переносятся в FTS5 тогда же. Если FTS5
+недоступен или диалект другой, поиск деградирует до ``LIKE`` по заголовку,
+тексту и тегам без ранжирования.
+
+Результаты ранжируются (BM25 / ``ts_rank``), разбиты на страницы и содержат
+фрагмент текста, экранированный для HTML: разметкой в нём бывают только
+``<mark>…</mark>`` вокруг совпадений.
+"""
+from __future__ import annotations
+
+import html
+import json
+import logging
+import re
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Mapping, Optional
+
+from sqlalchemy import String, cast, func, or_, select, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..accounts.db import engine_generation, get_async_session
+from ..lib.tracing import traced
+from .tables import SupportArticle
+
+logger = logging.getLogger(__name__)
+
+FTS_TABLE = "support_articles_fts"
+SNIPPET_WORDS = 12
+_MARK_OPEN, _MARK_CLOSE, _ELLIPSIS = "<mark>", "</mark>", "…"
+# Границы совпадений в ответе БД: управляющие символы переживают html.escape
+# и уже после экранирования заменяются на <mark>.
+_HIT_OPEN, _HIT_CLOSE = "\x02", "\x03"
+
+_SQLITE_CREATE = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} "
+    "USING fts5(title, body, tags, tokenize='unicode61 remove_diacritics 2')"
+)
+_PG_VECTOR = (
+    "(setweight(to_tsvector('simple', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(tags::jsonb::text, '')), 'B') || "
+    "setweight(to_tsvector('simple', coalesce(body, '')), 'C'))"
+)
+_PG_CREATE = f"CREATE INDEX IF NOT EXISTS ix_support_articles_fts ON support_articles USING gin ({_PG_VECTOR})"
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+_COLUMNS = SupportArticle.__table__.c
+
+# Поколение движка, для которого индекс создан и закоммичен, и способ поиска.
+_READY: dict[str, Any] = {"generation": -1, "mode": "like"}
+
+
+@dataclass(frozen=True, slots=True)
+class SearchHit:
+    slug: str
+    title: str
+    locale: str
+    tags: dict[str, Any]
+    snippet: str
+    score: float
+    updated_at: datetime
+
+
+def _tags_text(tags: Optional[Mapping[str, Any]]) -> str:
+    return " ".join(f"{key} {value}" for key, value in (tags or {}).items())
+
+
+def _fts5_query(query: str) -> Optional[str]:
+    """Слова запроса как фразы FTS5 (без операторов); последнее — префиксом."""
+
+    tokens = _TOKEN_RE.findall(query)
+    if not tokens:
+        return None
+    return " ".join(f'"{token}"' for token in tokens[:-1]) + f' "{tokens[-1]}"*'
+
+
+def _index_ready() -> bool:
+    return _READY["generation"] == engine_generation()
+
+
+def mark_index_ready(mode: str) -> None:
+    """Запоминает режим поиска; вызывается только после ``commit`` транзакции с :func:`ensure_index`."""
+
+    _READY.update(generation=engine_generation(), mode=mode)
+
+
+async def ensure_index(session: AsyncSession) -> str:
+    """Создаёт индекс в текущей транзакции (до ``commit``); возвращает режим поиска.
+
+    После отката индекса может не быть, поэтому режим запоминает вызывающий
+    через :func:`mark_index_ready`, когда транзакция закоммичена.
+    """
+
+    if _index_ready():
+        return _READY["mode"]
+    dialect = session.get_bind().dialect.name
+    mode = "like"
+    if dialect == "sqlite":
+        exists = await session.scalar(
+            text("SELECT count(*) FROM sqlite_master WHERE name = :name"), {"name": FTS_TABLE}
+        )
+        try:
+            await session.execute(text(_SQLITE_CREATE))
+        except OperationalError:
+            logger.warning("FTS5 недоступен в SQLite, поиск статей работает через LIKE")
+        else:
+            mode = "fts5"
+            if not exists:
+                rows = (await session.execute(
+                    select(SupportArticle.id, SupportArticle.title, SupportArticle.body, SupportArticle.tags)
+                )).all()
+                for row in rows:
+                    await _write_row(session, row.id, row.title, row.body, row.tags)
+    elif dialect == "postgresql":
+        await session.execute(text(_PG_CREATE))
+        mode = "tsvector"
+    return mode
+
+
+async def _write_row(session: AsyncSession, article_id: int, title: str, body: str, tags: Any) -> None:
+    await session.execute(text(f"DELETE FROM {FTS_TABLE} WHERE rowid = :id"), {"id": article_id})
+    await session.execute(
+        text(f"INSERT INTO {FTS_TABLE} (rowid, title, body, tags) VALUES (:id, :title, :body, :tags)"),
+        {"id": article_id, "title": title, "body": body, "tags": _tags_text(tags)},
+    )
+
+
+async def index_article(session: AsyncSession, article: SupportArticle) -> str:
+    """Обновляет строку FTS5 статьи в текущей транзакции (до ``commit``); возвращает режим поиска."""
+
+    mode = await ensure_index(session)
+    if mode == "fts5":
+        await _write_row(session, article.id, article.title, article.body, article.tags)
+    return mode
+
+
+def _highlight(fragment: str) -> str:
+    """Экранирует фрагмент для HTML и превращает границы совпадений в ``<mark>``."""
+
+    return html.escape(fragment).replace(_HIT_OPEN, _MARK_OPEN).replace(_HIT_CLOSE, _MARK_CLOSE)
+
+
+def _hit(row: Any, snippet: str, score: float) -> SearchHit:
+    return SearchHit(
+        slug=row.slug,
+        title=row.title,
+        locale=row.locale,
+        tags=dict(row.tags or {}),
+        snippet=snippet,
+        score=float(score),
+        updated_at=row.updated_at,
+    )
+
+
+async def _search_fts5(
+    session: AsyncSession, match: str, locale: Optional[str], limit: int, offset: int
+) -> tuple[list[SearchHit], int]:
+    where = f"{FTS_TABLE} MATCH :match" + (" AND a.locale = :locale" if locale else "")
+    params = {
+        "match": match, "locale": locale, "limit": limit, "offset": offset,
+        "hit_open": _HIT_OPEN, "hit_close": _HIT_CLOSE, "ellipsis": _ELLIPSIS,
+    }
+    joined = f"FROM {FTS_TABLE} JOIN support_articles AS a ON a.id = {FTS_TABLE}.rowid WHERE {where}"
+    total = await session.scalar(text(f"SELECT count(*) {joined}"), params)
+    # bm25: меньше — лучше; заголовок весит больше тегов, теги — больше текста.
+    rows = (await session.execute(
+        text(
+            f"SELECT a.slug, a.title, a.locale, a.tags, a.updated_at, "
+            f"snippet({FTS_TABLE}, -1, :hit_open, :hit_close, :ellipsis, {SNIPPET_WORDS}) AS snippet, "
+            f"bm25({FTS_TABLE}, 10.0, 1.0, 3.0) AS score "
+            f"{joined} ORDER BY score, a.id LIMIT :limit OFFSET :offset"
+        ).columns(tags=_COLUMNS.tags.type, updated_at=_COLUMNS.updated_at.type),
+        params,
+    )).all()
+    return [_hit(row, _highlight(row.snippet), -row.score) for row in rows], int(total or 0)
+
+
+async def _search_tsvector(
+    session: AsyncSession, query: str, locale: Optional[str], limit: int, offset: int
+) -> tuple[list[SearchHit], int]:
+    where = f"{_PG_VECTOR} @@ q" + (" AND locale = :locale" if locale else "")
+    options = f"StartSel={_HIT_OPEN}, StopSel={_HIT_CLOSE}, FragmentDelimiter={_ELLIPSIS}, MaxWords={SNIPPET_WORDS}"
+    params = {"query": query, "locale": locale, "limit": limit, "offset": offset, "options": options}
+    source = f"FROM support_articles, websearch_to_tsquery('simple', :query) AS q WHERE {where}"
+    total = await session.scalar(text(f"SELECT count(*) {source}"), params)
+    rows = (await session.execute(
+        text(
+            f"SELECT slug, title, locale, tags, updated_at, "
+            f"ts_headline('simple', body, q, :options) AS snippet, ts_rank({_PG_VECTOR}, q) AS score "
+            f"{source} ORDER BY score DESC, id LIMIT :limit OFFSET :offset"
+        ).columns(tags=_COLUMNS.tags.type, updated_at=_COLUMNS.updated_at.type),
+        params,
+    )).all()
+    return [_hit(row, _highlight(row.snippet), row.score) for row in rows], int(total or 0)
+
+
+def _like_condition(token: str) -> Any:
+    pattern = f"%{token}%"
+    tags = cast(SupportArticle.tags, String)
+    # JSON хранит не-ASCII символы тегов как \uXXXX.
+    escaped = json.dumps(token)[1:-1]
+    return or_(
+        SupportArticle.title.ilike(pattern),
+        SupportArticle.body.ilike(pattern),
+        tags.ilike(pattern),
+        tags.ilike(f"%{escaped}%", escape="/"),
+    )
+
+
+async def _search_like(
+    session: AsyncSession, tokens: list[str], locale: Optional[str], limit: int, offset: int
+) -> tuple[list[SearchHit], int]:
+    conditions = [_like_condition(token) for token in tokens]
+    if locale:
+        conditions.append(SupportArticle.locale == locale)
+    total = await session.scalar(select(func.count()).select_from(SupportArticle).where(*conditions))
+    rows = await session.scalars(
+        select(SupportArticle).where(*conditions).order_by(SupportArticle.id).limit(limit).offset(offset)
+    )
+    width = SNIPPET_WORDS * 8
+    hits = [
+        _hit(row, html.escape(row.body[:width]) + (_ELLIPSIS if len(row.body) > width else ""), 0.0) for row in rows
+    ]
+    return hits, int(total or 0)
+
+
+@traced("support.search_articles")
+async def search_articles(
+    query: str, locale: Optional[str] = None, limit: int = 20, offset: int = 0
+) -> tuple[list[SearchHit], int]:
+    """Страница результатов поиска и общее число совпадений."""
+
+    tokens = _TOKEN_RE.findall(query)
+    if not tokens:
+        return [], 0
+    if not _index_ready():
+        async with get_async_session() as session:
+            mode = await ensure_index(session)
+            await session.commit()
+        mark_index_ready(mode)
+    mode = _READY["mode"]
+    async with get_async_session(readonly=True) as session:
+        if mode == "fts5":
+            return await _search_fts5(session, _fts5_query(query) or "", locale, limit, offset)
+        if mode == "tsvector":
+            return await _search_tsvector(session, query, locale, limit, offset)
+        return await _search_like(session, tokens, locale, limit, offset)
+
+
+__all__ = ["SearchHit", "ensure_index", "index_article", "mark_index_ready", "search_articles"]
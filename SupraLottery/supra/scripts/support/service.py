@@ -1,10 +1,17 @@
 """Прикладная логика центра поддержки."""
 from __future__ import annotations
 
-from sqlalchemy import select
-from sqlalchemy.orm import Session
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, AsyncIterator, Sequence
 
-from ..accounts.db import get_session
+from sqlalchemy import insert, select
+from sqlalchemy.orm import defer
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..accounts.db import get_async_session
+from ..lib.tracing import traced
+from .search import index_article, mark_index_ready
 from .tables import SupportArticle, SupportTicket
 
 
@@ -12,32 +19,44 @@ def _normalize_address(address: str) -> str:
     return address.lower().strip()
 
 
-def list_articles(locale: str | None = None) -> list[SupportArticle]:
-    with get_session() as session:
-        statement = select(SupportArticle).order_by(SupportArticle.created_at.asc())
+@traced("support.list_articles")
+async def list_articles(locale: str | None = None) -> list[SupportArticle]:
+    """Статьи без ``body``: текст отдаёт только ``get_article_by_slug``."""
+
+    async with get_async_session(readonly=True) as session:
+        statement = (
+            select(SupportArticle)
+            .options(defer(SupportArticle.body, raiseload=True))
+            .order_by(SupportArticle.created_at.asc())
+        )
         if locale:
             statement = statement.filter(SupportArticle.locale == locale)
-        return list(session.scalars(statement))
+        return list(await session.scalars(statement))
 
 
-def get_article_by_slug(slug: str) -> SupportArticle | None:
-    with get_session() as session:
+@traced("support.get_article")
+async def get_article_by_slug(slug: str) -> SupportArticle | None:
+    async with get_async_session(readonly=True) as session:
         statement = select(SupportArticle).where(SupportArticle.slug == slug)
-        return session.scalars(statement).first()
-
-
-def create_or_update_article(payload: dict[str, str | dict[str, object]]) -> SupportArticle:
-    with get_session() as session:
-        article = _upsert_article(session, payload)
-        session.commit()
-        session.refresh(article)
+        return (await session.scalars(statement)).first()
+
+
+@traced("support.upsert_article")
+async def create_or_update_article(payload: dict[str, str | dict[str, object]]) -> SupportArticle:
+    async with get_async_session() as session:
+        article = await _upsert_article(session, payload)
+        await session.flush()
+        mode = await index_article(session, article)
+        await session.commit()
+        mark_index_ready(mode)
+        await session.refresh(article)
         return article
 
 
-def _upsert_article(session: Session, payload: dict[str, str | dict[str, object]]) -> SupportArticle:
+async def _upsert_article(session: AsyncSession, payload: dict[str, str | dict[str, object]]) -> SupportArticle:
     slug = str(payload["slug"])
     statement = select(SupportArticle).where(SupportArticle.slug == slug)
-    instance = session.scalars(statement).first()
+    instance = (await session.scalars(statement)).first()
     if instance is None:
         instance = SupportArticle(slug=slug)
         session.add(instance)
@@ -48,22 +67,87 @@ def _upsert_article(session: Session, payload: dict[str, str | dict[str, object]
     return instance
 
 
-def create_ticket(payload: dict[str, object]) -> SupportTicket:
-    with get_session() as session:
-        ticket = SupportTicket(
-            address=_normalize_address(str(payload.get("address", ""))),
-            email=str(payload.get("email")) if payload.get("email") else None,
-            subject=str(payload.get("subject", "")),
-            body=str(payload.get("body", "")),
-            metadata=dict(payload.get("metadata", {})),
-        )
+# Строк на порцию при выгрузке тикетов.
+EXPORT_BATCH_SIZE = 500
+
+TICKET_EXPORT_COLUMNS = ("id", "address", "email", "subject", "body", "status", "metadata", "created_at", "updated_at")
+
+
+@dataclass(frozen=True, slots=True)
+class TicketFilter:
+    status: str | None = None
+    created_from: datetime | None = None
+    created_to: datetime | None = None
+
+
+def _ticket_values(payload: dict[str, object]) -> dict[str, Any]:
+    return {
+        "address": _normalize_address(str(payload.get("address", ""))),
+        "email": str(payload.get("email")) if payload.get("email") else None,
+        "subject": str(payload.get("subject", "")),
+        "body": str(payload.get("body", "")),
+        "metadata": dict(payload.get("metadata", {})),
+    }
+
+
+@traced("support.create_ticket")
+async def create_ticket(payload: dict[str, object]) -> SupportTicket:
+    async with get_async_session() as session:
+        ticket = SupportTicket(**_ticket_values(payload))
         session.add(ticket)
-        session.commit()
-        session.refresh(ticket)
+        await session.commit()
+        await session.refresh(ticket)
         return ticket
 
 
+@traced("support.create_tickets")
+async def create_tickets(payloads: Sequence[dict[str, object]]) -> list[int]:
+    """Создаёт тикеты одним ``INSERT`` в одной транзакции; id в порядке входа."""
+
+    if not payloads:
+        return []
+    async with get_async_session() as session:
+        statement = insert(SupportTicket).returning(SupportTicket.id, sort_by_parameter_order=True)
+        ids = list(await session.scalars(statement, [_ticket_values(payload) for payload in payloads]))
+        await session.commit()
+        return ids
+
+
+async def iter_tickets(
+    filters: TicketFilter, batch_size: int = EXPORT_BATCH_SIZE
+) -> AsyncIterator[Sequence[Any]]:
+    """Порции строк тикетов (колонки :data:`TICKET_EXPORT_COLUMNS`) по возрастанию ``created_at``.
+
+    Строки читаются курсором на стороне сервера (``yield_per``), поэтому
+    память не зависит от объёма выгрузки; соединение занято до её конца.
+    """
+
+    table = SupportTicket.__table__
+    statement = select(*(table.c[name] for name in TICKET_EXPORT_COLUMNS)).order_by(
+        table.c.created_at.asc(), table.c.id.asc()
+    )
+    if filters.status:
+        statement = statement.where(table.c.status == filters.status)
+    if filters.created_from is not None:
+        statement = statement.where(table.c.created_at >= filters.created_from)
+    if filters.created_to is not None:
+        statement = statement.where(table.c.created_at < filters.created_to)
+
+    async with get_async_session(readonly=True) as session:
+        result = await session.stream(statement.execution_options(yield_per=batch_size))
+        try:
+            async for rows in result.partitions():
+                yield rows
+        finally:
+            await result.close()
+
+
 __all__ = [
+    "EXPORT_BATCH_SIZE",
+    "TICKET_EXPORT_COLUMNS",
+    "TicketFilter",
+    "create_tickets",
+    "iter_tickets",
     "list_articles",
     "get_article_by_slug",
     "create_or_update_article",
@@ -25,6 +25,7 @@ from lib.monitoring import (  # type: ignore  # pylint: disable=wrong-import-pos
     DEFAULT_WINDOW,
     CliError,
     ConfigError,
+    configure_cli_backend_from_env,
     gather_data,
     monitor_config_from_namespace,
 )
@@ -152,6 +153,7 @@ def main() -> None:
     args = parse_args()
     try:
         config = monitor_config_from_namespace(args)
+        configure_cli_backend_from_env()
     except ConfigError as exc:
         print(f"[error] {exc}", file=sys.stderr)
         sys.exit(2)
@@ -8,7 +8,7 @@ import os
 import sys
 import urllib.error
 import urllib.request
-from typing import Dict, List, Optional
+from typing import Dict, List, Mapping, Optional
 
 from . import monitor_common as common
 
@@ -79,10 +79,10 @@ def parse_labels(items: Optional[List[str]]) -> Dict[str, str]:
 
 
 def escape_label_value(value: str) -> str:
-    return value.replace("\\", "\\\\").replace("\"", "\\\"")
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace("\"", "\\\"")
 
 
-def format_labels(base: Dict[str, str]) -> str:
+def format_labels(base: Mapping[str, object]) -> str:
     return ",".join(f'{key}="{escape_label_value(str(val))}"' for key, val in sorted(base.items()))
 
 
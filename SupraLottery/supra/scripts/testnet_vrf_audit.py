@@ -7,7 +7,13 @@ import sys
 from typing import Any, Dict
 
 from .monitor_common import add_monitor_arguments
-from .lib.monitoring import CliError, ConfigError, MonitorConfig, monitor_config_from_namespace
+from .lib.monitoring import (
+    CliError,
+    ConfigError,
+    MonitorConfig,
+    configure_cli_backend_from_env,
+    monitor_config_from_namespace,
+)
 from .lib.vrf_audit import gather_vrf_log
 
 
@@ -47,6 +53,7 @@ def _sanitize_limit(raw: int) -> int:
 def gather_from_namespace(ns: argparse.Namespace) -> Dict[str, Any]:
     try:
         config: MonitorConfig = monitor_config_from_namespace(ns)
+        configure_cli_backend_from_env()
     except ConfigError as exc:  # pragma: no cover - обрабатывается в main
         raise SystemExit(f"[error] {exc}") from exc
 
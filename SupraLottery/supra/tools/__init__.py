@@ -1,6 +1,7 @@
 """Утилиты Supra Lottery для вспомогательных CLI и dry-run скриптов."""
 
 __all__ = [
+    "fake_supra_cli",
     "history_backfill_dry_run",
     "incident_log",
 ]
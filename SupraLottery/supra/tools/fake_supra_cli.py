@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""Заглушка бинаря ``supra`` на базе детерминированного симулятора сети.
+
+Используется вместо реального Supra CLI при нагрузочном тестировании
+мониторинга и API: отвечает на ``move tool view`` и ``move tool events list``
+из синтетического состояния, заданного переменными ``SUPRA_SIM_*``
+(``LOTTERIES``, ``TICKETS``, ``DRAWS``, ``SEED``, ``LATENCY_MS``,
+``JITTER_MS``, ``ERROR_RATE``, ``UNINITIALIZED``).
+
+Пример использования::
+
+    SUPRA_CLI_BIN="$PWD/supra/tools/fake_supra_cli.py" SUPRA_SIM_LOTTERIES=10000 \
+        python -m supra.scripts.cli monitor-json --pretty
+
+Для тестов внутри процесса удобнее ``SUPRA_CLI_BACKEND=simulator``: вызовы
+не порождают подпроцессов.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sys
+from typing import List, Optional
+
+if __package__ in (None, ""):  # pragma: no cover - запуск файла напрямую через SUPRA_CLI_BIN
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from supra.scripts.lib.monitoring import CliError  # noqa: E402
+from supra.scripts.lib.simulator import SimulatedChain, simulator_config_from_env  # noqa: E402
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = list(sys.argv[1:] if argv is None else argv)
+    try:
+        chain = SimulatedChain(simulator_config_from_env())
+    except ValueError as exc:
+        print(f"[error] {exc}", file=sys.stderr)
+        return 2
+    try:
+        payload = chain.handle(args)
+    except CliError as exc:
+        print(str(exc), file=sys.stderr)
+        return 1
+    print(json.dumps(payload, ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,6 +1,9 @@
+import asyncio
 import os
 import tempfile
 import unittest
+from typing import Any
+from unittest import mock
 
 try:  # pragma: no cover - отсутствия SQLAlchemy не мешает сборке
     import sqlalchemy  # type: ignore[unused-ignore]
@@ -9,11 +12,16 @@ except ImportError:  # pragma: no cover - используем skipIf
 
 if sqlalchemy is not None:  # pragma: no branch - упрощённое ветвление импортов
     from supra.scripts.accounts import get_config_from_env, init_engine, reset_engine
-    from supra.scripts.accounts.db import get_session
+    from sqlalchemy import text
+
+    from supra.scripts.accounts import db
+    from supra.scripts.accounts.cache import ProfileCache
+    from supra.scripts.accounts.config import AccountsConfig
+    from supra.scripts.accounts.db import async_database_url, get_async_session
     from supra.scripts.accounts.service import AccountsService, ProfileUpdate
 else:  # pragma: no cover - сценарий без SQLAlchemy
     get_config_from_env = init_engine = reset_engine = None  # type: ignore[assignment]
-    get_session = None  # type: ignore[assignment]
+    get_async_session = None  # type: ignore[assignment]
     AccountsService = ProfileUpdate = None  # type: ignore[assignment]
 
 
@@ -23,7 +31,7 @@ class AccountsServiceTests(unittest.TestCase):
         assert get_config_from_env is not None
         assert init_engine is not None
         assert reset_engine is not None
-        assert get_session is not None
+        assert get_async_session is not None
         assert AccountsService is not None
         assert ProfileUpdate is not None
         self.tmp = tempfile.NamedTemporaryFile(suffix=".db")
@@ -35,18 +43,24 @@ class AccountsServiceTests(unittest.TestCase):
         reset_engine()
         self.tmp.close()
 
+    def _upsert_and_fetch(self) -> Any:
+        async def scenario() -> Any:
+            async with get_async_session() as session:
+                service = AccountsService(session)
+                await service.upsert_account(
+                    "0xABCDEF",
+                    ProfileUpdate(nickname="Player", telegram="user", settings={"auto": True}),
+                )
+                await session.commit()
+
+            async with get_async_session() as session:
+                return await AccountsService(session).get_account("0xabcdef")
+
+        return asyncio.run(scenario())
+
     def test_upsert_and_fetch_profile(self) -> None:
-        with get_session() as session:
-            service = AccountsService(session)
-            account = service.upsert_account(
-                "0xABCDEF",
-                ProfileUpdate(nickname="Player", telegram="user", settings={"auto": True}),
-            )
-            session.commit()
-
-        with get_session() as session:
-            service = AccountsService(session)
-            loaded = service.get_account("0xabcdef")
+        self.assertTrue(db.has_async_engine())
+        loaded = self._upsert_and_fetch()
 
         self.assertIsNotNone(loaded)
         assert loaded is not None
@@ -55,6 +69,155 @@ class AccountsServiceTests(unittest.TestCase):
         self.assertEqual(loaded.address, "0xabcdef")
         self.assertEqual(loaded.settings.get("auto"), True)
 
+    def test_threadpool_fallback_without_async_driver(self) -> None:
+        real_find_spec = db.importlib.util.find_spec
+        with mock.patch.object(
+            db.importlib.util, "find_spec", side_effect=lambda name: None if name == "aiosqlite" else real_find_spec(name)
+        ):
+            init_engine(get_config_from_env())
+        self.assertFalse(db.has_async_engine())
+
+        loaded = self._upsert_and_fetch()
+        self.assertIsNotNone(loaded)
+        assert loaded is not None
+        self.assertEqual(loaded.nickname, "Player")
+
+        async def streamed() -> list:
+            async with get_async_session() as session:
+                result = await session.stream(sqlalchemy.select(text("1")).execution_options(yield_per=1))
+                return [list(rows) async for rows in result.partitions()]
+
+        self.assertEqual(len(asyncio.run(streamed())), 1)
+
+    def test_sqlite_pragmas_applied_to_both_engines(self) -> None:
+        pragmas = ("journal_mode", "synchronous", "busy_timeout")
+        expected = ["wal", 1, 5000]
+        with db.get_session() as session:
+            self.assertEqual([session.execute(text(f"PRAGMA {name}")).scalar() for name in pragmas], expected)
+
+        async def read_async() -> list:
+            async with get_async_session() as session:
+                return [(await session.execute(text(f"PRAGMA {name}"))).scalar() for name in pragmas]
+
+        self.assertEqual(asyncio.run(read_async()), expected)
+
+    def test_async_sqlite_pool_reuses_connection_in_app_loop(self) -> None:
+        from sqlalchemy import event
+        from sqlalchemy.pool import NullPool
+
+        assert db._PRIMARY is not None and db._PRIMARY.async_engine is not None
+        self.assertIsInstance(db._PRIMARY.async_engine.pool, NullPool)
+
+        init_engine(get_config_from_env(), pool_async_sqlite=True)
+        engine = db._PRIMARY.async_engine
+        self.assertNotIsInstance(engine.pool, NullPool)
+        connects = []
+        event.listen(engine.sync_engine, "connect", lambda *args: connects.append(args))
+
+        async def app_loop() -> list:
+            values = []
+            for _ in range(3):
+                async with get_async_session() as session:
+                    values.append((await session.execute(text("PRAGMA journal_mode"))).scalar())
+            await db.dispose_async_engine()
+            return values
+
+        self.assertEqual(asyncio.run(app_loop()), ["wal"] * 3)
+        self.assertEqual(len(connects), 1)
+
+    def test_pool_and_sqlite_settings_from_env(self) -> None:
+        config = get_config_from_env(
+            {
+                "SUPRA_ACCOUNTS_DB_POOL_SIZE": "20",
+                "SUPRA_ACCOUNTS_DB_MAX_OVERFLOW": "5",
+                "SUPRA_ACCOUNTS_DB_POOL_RECYCLE": "1800",
+                "SUPRA_ACCOUNTS_DB_POOL_PRE_PING": "true",
+                "SUPRA_ACCOUNTS_DB_JOURNAL_MODE": "DELETE",
+                "SUPRA_ACCOUNTS_DB_BUSY_TIMEOUT_MS": "250",
+            }
+        )
+        self.assertEqual((config.pool_size, config.max_overflow, config.pool_recycle), (20, 5, 1800))
+        self.assertTrue(config.pool_pre_ping)
+        self.assertEqual((config.sqlite_journal_mode, config.sqlite_busy_timeout_ms), ("delete", 250))
+        self.assertEqual(get_config_from_env().pool_size, None)
+        with self.assertRaises(ValueError):
+            get_config_from_env({"SUPRA_ACCOUNTS_DB_POOL_SIZE": "0"})
+        with self.assertRaises(ValueError):
+            get_config_from_env({"SUPRA_ACCOUNTS_DB_SYNCHRONOUS": "sometimes"})
+
+        init_engine(AccountsConfig(database_url=f"sqlite:///{self.tmp.name}", pool_size=3, max_overflow=0))
+        assert db._PRIMARY is not None
+        self.assertEqual(db._PRIMARY.engine.pool.size(), 3)
+
+    def test_readonly_sessions_use_replica_outside_primary_reads(self) -> None:
+        from supra.scripts.accounts.tables import Account, Base
+
+        replica = tempfile.NamedTemporaryFile(suffix=".db")
+        self.addCleanup(replica.close)
+        replica_engine = sqlalchemy.create_engine(f"sqlite:///{replica.name}")
+        Base.metadata.create_all(replica_engine)
+        replica_engine.dispose()
+        init_engine(
+            AccountsConfig(database_url=f"sqlite:///{self.tmp.name}", replica_url=f"sqlite:///{replica.name}")
+        )
+        self._upsert_and_fetch()
+        self.assertEqual(db.read_your_writes_window(), 5)
+
+        def nicknames(readonly: bool) -> list:
+            with db.get_session(readonly=readonly) as session:
+                return [account.nickname for account in session.scalars(sqlalchemy.select(Account))]
+
+        async def async_nicknames() -> list:
+            async with get_async_session(readonly=True) as session:
+                return [account.nickname for account in await session.scalars(sqlalchemy.select(Account))]
+
+        self.assertEqual(nicknames(readonly=False), ["Player"])
+        self.assertEqual(nicknames(readonly=True), [])
+        self.assertEqual(asyncio.run(async_nicknames()), [])
+        with db.primary_reads():
+            self.assertEqual(nicknames(readonly=True), ["Player"])
+            self.assertEqual(asyncio.run(async_nicknames()), ["Player"])
+
+    def test_async_database_url(self) -> None:
+        self.assertEqual(async_database_url("sqlite:///./supra.db"), "sqlite+aiosqlite:///./supra.db")
+        self.assertEqual(
+            async_database_url("postgresql://user:secret@db/supra"), "postgresql+asyncpg://user:secret@db/supra"
+        )
+        self.assertEqual(
+            async_database_url("postgresql+psycopg2://db/supra"), "postgresql+asyncpg://db/supra"
+        )
+        self.assertIsNone(async_database_url("sqlite://"))
+        self.assertIsNone(async_database_url("mysql://db/supra"))
+
+    def test_get_accounts_and_profile_cache(self) -> None:
+        self._upsert_and_fetch()
+
+        async def load() -> list:
+            async with get_async_session() as session:
+                return await AccountsService(session).get_accounts([" 0xABCDEF", "0x1", "0xabcdef"])
+
+        self.assertEqual([account.address for account in asyncio.run(load())], ["0xabcdef"])
+
+        now = [0.0]
+        cache = ProfileCache(maxsize=2, ttl=10, clock=lambda: now[0])
+        cache.put("0xa", None)
+        cache.put("0xb", None)
+        cache.get_many(["0xa"])
+        cache.put("0xc", None)
+        self.assertEqual(cache.get_many(["0xa", "0xb", "0xc"]), ({"0xa": None, "0xc": None}, ["0xb"]))
+        now[0] = 10
+        self.assertEqual(cache.get_many(["0xa"]), ({}, ["0xa"]))
+        cache.invalidate()
+        self.assertEqual(len(cache), 0)
+
+        # Чтение началось до сброса: его результат в кэш не попадает.
+        version = cache.version()
+        cache.invalidate("0xa")
+        cache.put("0xa", None, version)
+        self.assertEqual(len(cache), 0)
+        cache.put("0xa", None, cache.version())
+        self.assertEqual(len(cache), 1)
+
 
 if __name__ == "__main__":
     unittest.main()
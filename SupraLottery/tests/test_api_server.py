@@ -1,4 +1,5 @@
 import importlib
+import json
 import os
 import unittest
 from unittest import mock
@@ -43,6 +44,10 @@ class ApiServerStatusTests(unittest.TestCase):
         self.module = importlib.reload(api_server_module)
 
     def tearDown(self) -> None:
+        from supra.scripts.accounts import reset_engine
+
+        # Закрываем соединения до удаления файла, иначе останутся -wal/-shm.
+        reset_engine()
         try:
             os.remove("test_api_accounts.db")
         except FileNotFoundError:
@@ -69,11 +74,31 @@ class ApiServerStatusTests(unittest.TestCase):
                 second = client.get("/status")
                 self.assertEqual(second.json()["counter"], 1)
                 self.assertEqual(counter["value"], 1)
+                self.assertIn("cache_hit", second.headers["server-timing"])
 
                 refreshed = client.get("/status?refresh=true")
                 self.assertEqual(refreshed.json()["counter"], 2)
                 self.assertEqual(counter["value"], 2)
 
+    def test_status_websocket_streams_snapshot_and_patches(self) -> None:
+        counter, gather = self._fake_gather()
+        with mock.patch.object(self.module, "gather_data", side_effect=gather):
+            with TestClient(self.module.app) as client:
+                with client.websocket_connect("/status/ws") as websocket:
+                    snapshot = websocket.receive_json()
+                    self.assertEqual(snapshot["type"], "snapshot")
+                    self.assertEqual(snapshot["data"]["counter"], 1)
+
+                    client.get("/status?refresh=true")
+                    patch = websocket.receive_json()
+                    self.assertEqual(patch["type"], "patch")
+                    self.assertEqual(patch["version"], snapshot["version"] + 1)
+                    self.assertEqual(patch["ops"], [{"op": "replace", "path": "/counter", "value": 2}])
+
+                metrics = client.get("/metrics")
+                self.assertEqual(metrics.status_code, 200)
+                self.assertIsNotNone(self.module.app.state.last_report)
+
     def test_overrides_disable_cache(self) -> None:
         counter, gather = self._fake_gather()
         with mock.patch.object(self.module, "gather_data", side_effect=gather):
@@ -103,6 +128,49 @@ class ApiServerStatusTests(unittest.TestCase):
                     "http://localhost:5173",
                 )
 
+    def test_metrics_rendered_from_last_report(self) -> None:
+        report = {
+            "profile": "test_profile",
+            "addresses": {"lottery": "0x1", "client": "0x3"},
+            "lotteries": [
+                {
+                    "lottery_id": 4,
+                    "round": {"snapshot": {"ticket_count": 3, "draw_scheduled": True}},
+                    "treasury": {"pool": {"prize_balance": 10, "operations_balance": 1}},
+                }
+            ],
+            "deposit": {"balance": 5},
+            "treasury": {"jackpot_balance": 8},
+        }
+        with mock.patch.object(self.module, "gather_data", return_value=report) as gather:
+            with TestClient(self.module.app) as client:
+                empty = client.get("/metrics")
+                self.assertEqual(empty.status_code, 200)
+                self.assertIn("supra_dvrf_report_age_seconds -1", empty.text)
+                self.assertEqual(gather.call_count, 0)
+
+                client.get("/status")
+                scraped = client.get("/metrics")
+
+        self.assertEqual(gather.call_count, 1)
+        self.assertTrue(scraped.headers["content-type"].startswith("text/plain"))
+        self.assertIn('supra_dvrf_lottery_ticket_count{client_addr="0x3"', scraped.text)
+        self.assertIn('lottery_id="4"', scraped.text)
+        self.assertIn("supra_dvrf_jackpot_balance_quants", scraped.text)
+
+    def test_status_server_timing_breakdown(self) -> None:
+        def gather(config):  # type: ignore[no-untyped-def]
+            self.module.record_timing("cli", 0.002)
+            return {"lotteries": []}
+
+        with mock.patch.object(self.module, "gather_data", side_effect=gather):
+            with TestClient(self.module.app) as client:
+                response = client.get("/status", params={"refresh": "1"})
+
+        header = response.headers["server-timing"]
+        for phase in ("cli;dur=2.00", "normalize;dur=", "serialize;dur=", "total;dur="):
+            self.assertIn(phase, header)
+
     def test_vrf_log_endpoint_invokes_gather(self) -> None:
         with mock.patch.object(self.module, "gather_vrf_log", return_value={"lottery_id": 5}) as gather:
             with TestClient(self.module.app) as client:
@@ -159,6 +227,112 @@ class ApiServerStatusTests(unittest.TestCase):
                 payload = websocket.receive_json()
                 self.assertEqual(payload["body"], "Вебсокет")
 
+    def test_chat_rejects_reserved_topic_rooms(self) -> None:
+        from starlette.websockets import WebSocketDisconnect
+
+        with TestClient(self.module.app) as client:
+            for room in ("status:report", "lottery:5", "LOTTERY:5", "announcements"):
+                response = client.post("/chat/messages", json={"address": "0xDEF", "body": "x", "room": room})
+                self.assertEqual(response.status_code, 422, room)
+                self.assertEqual(client.get("/chat/messages", params={"room": room}).status_code, 422)
+                with self.assertRaises(WebSocketDisconnect):
+                    with client.websocket_connect(f"/chat/ws/{room}") as websocket:
+                        websocket.receive_json()
+            with client.websocket_connect("/chat/ws") as websocket:
+                websocket.send_json({"action": "subscribe", "topics": ["status:report"]})
+                self.assertEqual(websocket.receive_json()["type"], "error")
+
+    def test_chat_rate_limit_returns_429(self) -> None:
+        with mock.patch.dict(os.environ, {"SUPRA_CHAT_ADDRESS_BURST": "2", "SUPRA_CHAT_ADDRESS_RATE": "0.1"}):
+            with TestClient(self.module.app) as client:
+                statuses = [
+                    client.post("/chat/messages", json={"address": "0xSPAM", "body": "x"}).status_code
+                    for _ in range(3)
+                ]
+                self.assertEqual(statuses, [201, 201, 429])
+                throttled = client.post("/chat/messages", json={"address": "0xspam", "body": "x"})
+                self.assertEqual(throttled.status_code, 429)
+                self.assertGreaterEqual(int(throttled.headers["retry-after"]), 1)
+                self.assertEqual(throttled.json()["detail"]["scope"], "address")
+                self.assertEqual(
+                    client.post("/chat/messages", json={"address": "0xother", "body": "x"}).status_code, 201
+                )
+                metrics = client.get("/metrics").text
+                self.assertIn('supra_dvrf_chat_throttled_total{scope="address"} 2', metrics)
+
+    def test_chat_write_behind_batch_mode(self) -> None:
+        with mock.patch.dict(os.environ, {"SUPRA_CHAT_DURABILITY": "batch", "SUPRA_CHAT_FLUSH_MS": "1"}):
+            with TestClient(self.module.app) as client:
+                with client.websocket_connect("/chat/ws/global") as websocket:
+                    created = client.post(
+                        "/chat/messages", json={"address": "0xA", "body": "пакет", "room": "global"}
+                    )
+                    self.assertEqual(created.status_code, 201)
+                    self.assertEqual(websocket.receive_json()["id"], created.json()["id"])
+                stored = client.get("/chat/messages").json()
+                self.assertEqual([item["body"] for item in stored], ["пакет"])
+
+    def test_websocket_resume_sends_missed_messages(self) -> None:
+        with TestClient(self.module.app) as client:
+            ids = [
+                client.post(
+                    "/chat/messages", json={"address": "0x1", "body": f"m{index}", "room": "global"}
+                ).json()["id"]
+                for index in range(3)
+            ]
+            with client.websocket_connect(f"/chat/ws/global?last_id={ids[0]}") as websocket:
+                self.assertEqual(websocket.receive_json()["body"], "m1")
+                self.assertEqual(websocket.receive_json()["body"], "m2")
+
+            with client.websocket_connect("/chat/ws") as websocket:
+                websocket.send_json(
+                    {"action": "subscribe", "topics": ["global"], "last_ids": {"global": ids[1]}}
+                )
+                missed = websocket.receive_json()
+                self.assertEqual((missed["topic"], missed["data"]["body"]), ("global", "m2"))
+                reply = websocket.receive_json()
+                self.assertEqual(reply["resumed"], {"global": 1})
+
+    def test_websocket_resume_falls_back_to_database(self) -> None:
+        history = self.module.connection_manager.history
+        with TestClient(self.module.app) as client, mock.patch.object(history, "size", 1):
+            ids = [
+                client.post(
+                    "/chat/messages", json={"address": "0x1", "body": f"m{index}", "room": "global"}
+                ).json()["id"]
+                for index in range(3)
+            ]
+            with client.websocket_connect(f"/chat/ws/global?last_id={ids[0]}") as websocket:
+                self.assertEqual(websocket.receive_json()["body"], "m1")
+                self.assertEqual(websocket.receive_json()["body"], "m2")
+
+    def test_multiplexed_websocket_topics(self) -> None:
+        with TestClient(self.module.app) as client:
+            with client.websocket_connect("/chat/ws?topics=global") as websocket:
+                self.assertEqual(websocket.receive_json(), {"type": "subscribed", "topics": ["global"]})
+                websocket.send_json({"action": "subscribe", "topics": ["announcements", "lottery:2"]})
+                self.assertEqual(
+                    websocket.receive_json()["topics"], ["announcements", "global", "lottery:2"]
+                )
+                websocket.send_json({"action": "subscribe", "topics": ["lottery:abc"]})
+                self.assertEqual(websocket.receive_json()["type"], "error")
+                websocket.send_json({"action": "ping"})
+                self.assertEqual(websocket.receive_json(), {"type": "pong"})
+
+                client.post("/chat/messages", json={"address": "0x1", "body": "чат", "room": "global"})
+                message = websocket.receive_json()
+                self.assertEqual(message["topic"], "global")
+                self.assertEqual(message["data"]["body"], "чат")
+
+                client.post("/chat/announcements", json={"title": "T", "body": "B", "lottery_id": "2"})
+                first, second = websocket.receive_json(), websocket.receive_json()
+                self.assertEqual(first["topic"], "announcements")
+                self.assertEqual(second["topic"], "lottery:2")
+                self.assertEqual(second["data"]["event"], "announcement")
+
+                websocket.send_json({"action": "unsubscribe", "topics": ["global", "announcements"]})
+                self.assertEqual(websocket.receive_json()["topics"], ["lottery:2"])
+
     def test_commands_list_returns_sorted_metadata(self) -> None:
         fake_commands = [
             ("beta", "supra.beta", "Beta command"),
@@ -198,6 +372,68 @@ class ApiServerStatusTests(unittest.TestCase):
             self.assertEqual(body["telegram"], "lotto_player")
             self.assertEqual(body["settings"], {"auto_buy": True})
 
+    def test_accounts_batch_lookup_uses_cache(self) -> None:
+        from supra.scripts.accounts.cache import profile_cache
+
+        with TestClient(self.module.app) as client:
+            client.put("/accounts/0xAAA", json={"nickname": "Первый"})
+            batch = client.post("/accounts/batch", json={"addresses": ["0xBBB", "0xaaa", "0xAAA"]})
+            self.assertEqual(batch.status_code, 200)
+            self.assertEqual([item["nickname"] for item in batch.json()["profiles"]], ["Первый"])
+            self.assertEqual(batch.json()["missing"], ["0xbbb"])
+
+            hits = profile_cache.hits
+            client.put("/accounts/0xbbb", json={"nickname": "Второй"})
+            again = client.post("/accounts/batch", json={"addresses": ["0xaaa", "0xbbb"]})
+            self.assertEqual([item["nickname"] for item in again.json()["profiles"]], ["Первый", "Второй"])
+            self.assertEqual(profile_cache.hits, hits + 1)
+
+            self.assertEqual(client.post("/accounts/batch", json={"addresses": []}).status_code, 422)
+            self.assertEqual(client.post("/accounts/batch", json={"addresses": ["  "]}).status_code, 422)
+
+    def test_reads_go_to_replica_until_client_writes(self) -> None:
+        from sqlalchemy import create_engine
+
+        from supra.scripts.accounts.tables import Base
+
+        replica_path = "test_api_replica.db"
+        replica = create_engine(f"sqlite:///./{replica_path}")
+        Base.metadata.create_all(replica)
+        replica.dispose()
+        self.addCleanup(os.remove, replica_path)
+        os.environ["SUPRA_ACCOUNTS_DB_REPLICA_URL"] = f"sqlite:///./{replica_path}"
+
+        with TestClient(self.module.app) as writer, TestClient(self.module.app) as reader:
+            created = writer.put("/accounts/0xABC", json={"nickname": "Игрок"})
+            self.assertEqual(created.status_code, 200)
+            self.assertIn("supra_read_primary=1", created.headers["set-cookie"])
+            self.assertEqual(writer.get("/accounts/0xabc").json()["nickname"], "Игрок")
+            # Клиент без записи читает с реплики, куда профиль ещё не доехал.
+            self.assertEqual(reader.get("/accounts/0xabc").status_code, 404)
+
+    def test_accounts_batch_skips_cache_after_client_write(self) -> None:
+        from sqlalchemy import create_engine
+
+        from supra.scripts.accounts.tables import Base
+
+        replica_path = "test_api_replica.db"
+        replica = create_engine(f"sqlite:///./{replica_path}")
+        Base.metadata.create_all(replica)
+        replica.dispose()
+        self.addCleanup(os.remove, replica_path)
+        os.environ["SUPRA_ACCOUNTS_DB_REPLICA_URL"] = f"sqlite:///./{replica_path}"
+
+        with TestClient(self.module.app) as writer, TestClient(self.module.app) as reader:
+            self.assertEqual(writer.put("/accounts/0xABC", json={"nickname": "Игрок"}).status_code, 200)
+            # Чтение с реплики без профиля кладёт в кэш его отсутствие и не ставит cookie.
+            stale = reader.post("/accounts/batch", json={"addresses": ["0xabc"]})
+            self.assertEqual(stale.json()["missing"], ["0xabc"])
+            self.assertNotIn("set-cookie", stale.headers)
+            # Писавший клиент читает с основной БД мимо кэша.
+            fresh = writer.post("/accounts/batch", json={"addresses": ["0xabc"]})
+            self.assertEqual([item["nickname"] for item in fresh.json()["profiles"]], ["Игрок"])
+            self.assertEqual(reader.post("/accounts/batch", json={"addresses": ["0xabc"]}).json()["missing"], ["0xabc"])
+
     def test_progress_checklist_and_achievements(self) -> None:
         with TestClient(self.module.app) as client:
             task_payload = {
@@ -245,6 +481,33 @@ class ApiServerStatusTests(unittest.TestCase):
             self.assertEqual(achievements.status_code, 200)
             self.assertTrue(achievements.json()["achievements"][0]["unlocked"])
 
+            bulk = client.post(
+                "/progress/achievements/bulk-unlock",
+                json={"addresses": ["0xabc", "0xdef"], "codes": ["collector"], "progress_value": 1},
+            )
+            self.assertEqual(bulk.status_code, 200)
+            self.assertEqual(bulk.json(), {"requested": 2, "affected": 2, "batches": 1})
+
+            bulk_checklist = client.post(
+                "/progress/checklist/bulk-complete",
+                json={"addresses": ["0xabc", "0xdef"], "codes": ["day1"]},
+            )
+            self.assertEqual(bulk_checklist.status_code, 200)
+            self.assertEqual(bulk_checklist.json()["affected"], 1)
+
+            missing = client.post(
+                "/progress/checklist/bulk-complete",
+                json={"addresses": ["0xabc"], "codes": ["day9"]},
+            )
+            self.assertEqual(missing.status_code, 404)
+
+            board = client.get("/progress/leaderboard", params={"limit": 5})
+            self.assertEqual(board.status_code, 200)
+            self.assertEqual([entry["rank"] for entry in board.json()["entries"]], [1, 1])
+            rank = client.get("/progress/leaderboard/0xDEF")
+            self.assertEqual(rank.json(), {"rank": 1, "address": "0xdef", "points": 10, "total": 2})
+            self.assertEqual(client.get("/progress/leaderboard/0x999").status_code, 404)
+
     def test_support_articles_and_tickets(self) -> None:
         with TestClient(self.module.app) as client:
             upsert = client.put(
@@ -264,8 +527,45 @@ class ApiServerStatusTests(unittest.TestCase):
             self.assertEqual(listing.status_code, 200)
             self.assertEqual(listing.json()["articles"][0]["title"], "Как подключить кошелёк")
 
+            self.assertNotIn("body", listing.json()["articles"][0])
+
             fetched = client.get("/support/articles/faq-wallet")
             self.assertEqual(fetched.status_code, 200)
+            self.assertEqual(fetched.json()["body"], "Инструкция")
+
+            found = client.get("/support/search", params={"q": "кошелёк", "limit": 5})
+            self.assertEqual(found.status_code, 200)
+            self.assertEqual(found.json()["total"], 1)
+            self.assertEqual(found.json()["results"][0]["slug"], "faq-wallet")
+            self.assertEqual(client.get("/support/search").status_code, 422)
+
+            bulk = client.post(
+                "/support/tickets/bulk",
+                json={"tickets": [{"address": "0xB", "subject": "=HYPERLINK(\"x\")", "body": "Пачка, с запятой"}] * 3},
+            )
+            self.assertEqual(bulk.status_code, 201)
+            self.assertEqual(bulk.json()["created"], 3)
+
+            # Выгрузка выключена, пока не задан токен, и требует его.
+            self.assertEqual(client.get("/support/tickets/export").status_code, 404)
+            os.environ["SUPRA_SUPPORT_EXPORT_TOKEN"] = "staff-secret"
+            self.assertEqual(client.get("/support/tickets/export").status_code, 401)
+            denied = client.get("/support/tickets/export", headers={"Authorization": "Bearer wrong"})
+            self.assertEqual(denied.status_code, 401)
+            client.headers["Authorization"] = "Bearer staff-secret"
+
+            exported = client.get("/support/tickets/export", params={"status": "new"})
+            self.assertEqual(exported.status_code, 200)
+            self.assertTrue(exported.headers["content-type"].startswith("text/csv"))
+            lines = exported.text.strip().splitlines()
+            self.assertEqual(lines[0].split(",")[:3], ["id", "address", "email"])
+            self.assertEqual(len(lines), 4)
+            self.assertIn('"Пачка, с запятой"', lines[1])
+            self.assertIn('"\'=HYPERLINK(""x"")"', lines[1])
+
+            ndjson = client.get("/support/tickets/export", params={"format": "ndjson"})
+            self.assertEqual([json.loads(line)["address"] for line in ndjson.text.splitlines()], ["0xb"] * 3)
+            self.assertEqual(client.get("/support/tickets/export", params={"format": "xml"}).status_code, 422)
 
             ticket = client.post(
                 "/support/tickets",
@@ -0,0 +1,93 @@
+"""Тесты раннера бенчмарков: измерение, фильтрация и сравнение с базовой линией."""
+from __future__ import annotations
+
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+
+from supra.benchmarks import runner
+
+
+class BenchmarkRunnerTests(unittest.TestCase):
+    def test_measure_reports_statistics(self) -> None:
+        calls = {"count": 0}
+
+        def operation() -> None:
+            calls["count"] += 1
+
+        stats = runner.measure(operation, rounds=3, min_round_time=0.0)
+        self.assertEqual(stats["rounds"], 3)
+        self.assertGreaterEqual(calls["count"], 4)
+        self.assertLessEqual(stats["min"], stats["median"])
+        self.assertLessEqual(stats["median"], stats["p95"])
+
+    def test_suite_covers_requested_paths(self) -> None:
+        names = {benchmark.name for benchmark in runner.select_benchmarks()}
+        for expected in (
+            "gather_data[1]",
+            "gather_data[1000]",
+            "api_status[cache_hit]",
+            "api_status[cache_miss]",
+            "api_vrf_log",
+            "normalize_int",
+            "filter_by_lottery",
+        ):
+            self.assertIn(expected, names)
+        self.assertEqual(
+            [benchmark.name for benchmark in runner.select_benchmarks(["gather_data[1]"])],
+            ["gather_data[1]"],
+        )
+
+    def test_module_entry_point_sees_registered_suites(self) -> None:
+        process = subprocess.run(
+            [sys.executable, "-m", "supra.benchmarks.runner", "--list", "--filter", "normalize_*"],
+            capture_output=True,
+            text=True,
+            check=False,
+        )
+        self.assertEqual(process.returncode, 0, process.stderr)
+        self.assertIn("normalize_int", process.stdout)
+
+    def test_run_writes_machine_readable_report(self) -> None:
+        report = runner.run_benchmarks(
+            runner.select_benchmarks(["gather_data[10]"]), rounds=1, min_round_time=0.0
+        )
+        result = report["results"]["gather_data[10]"]
+        self.assertEqual(result["group"], "monitoring")
+        self.assertEqual(result["params"], {"lotteries": 10})
+        self.assertGreater(result["median"], 0)
+        json.dumps(report)
+
+    def test_compare_flags_regressions(self) -> None:
+        baseline = {"results": {"a": {"median": 1.0}, "b": {"median": 1.0}, "gone": {"median": 1.0}}}
+        current = {"results": {"a": {"median": 1.5}, "b": {"median": 0.5}, "fresh": {"median": 1.0}}}
+
+        statuses = {row["name"]: row["status"] for row in runner.compare_results(current, baseline, 0.2)}
+        self.assertEqual(
+            statuses, {"a": "regression", "b": "improvement", "gone": "missing", "fresh": "new"}
+        )
+
+    def test_main_exits_with_error_on_regression(self) -> None:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            current_path = os.path.join(tmpdir, "current.json")
+            baseline_path = os.path.join(tmpdir, "baseline.json")
+            with open(current_path, "w", encoding="utf-8") as handle:
+                json.dump({"results": {"a": {"median": 2.0}}}, handle)
+            with open(baseline_path, "w", encoding="utf-8") as handle:
+                json.dump({"results": {"a": {"median": 1.0}}}, handle)
+
+            with redirect_stdout(io.StringIO()) as output:
+                with self.assertRaises(SystemExit) as exit_info:
+                    runner.main(["--input", current_path, "--baseline", baseline_path])
+
+        self.assertEqual(exit_info.exception.code, 1)
+        self.assertIn("[regression", output.getvalue())
+
+
+if __name__ == "__main__":  # pragma: no cover
+    unittest.main()
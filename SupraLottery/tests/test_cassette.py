@@ -0,0 +1,91 @@
+"""Тесты записи и воспроизведения ответов Supra CLI через кассету."""
+from __future__ import annotations
+
+import os
+import tempfile
+import unittest
+
+from supra.scripts.lib import monitoring
+from supra.scripts.lib.cassette import Cassette, RecordingBackend, ReplayBackend, cassette_key
+from supra.scripts.lib.simulator import SimulatedChain, SimulatorConfig
+
+
+def _config(profile: str = "recorder") -> monitoring.MonitorConfig:
+    return monitoring.MonitorConfig(
+        profile=profile,
+        lottery_addr="0x1",
+        deposit_addr="0x2",
+        client_addr="0x3",
+        max_gas_price=1000,
+        max_gas_limit=500000,
+        verification_gas=1,
+    )
+
+
+class CassetteTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "cli.jsonl.gz")
+
+    def tearDown(self) -> None:
+        monitoring.set_cli_backend(None)
+        self.tmpdir.cleanup()
+
+    def test_replay_reproduces_recorded_report(self) -> None:
+        with Cassette(self.path) as cassette:
+            monitoring.set_cli_backend(
+                RecordingBackend(cassette, SimulatedChain(SimulatorConfig(lottery_count=5)))
+            )
+            recorded = monitoring.gather_data(_config())
+
+        monitoring.set_cli_backend(ReplayBackend(Cassette(self.path).load()))
+        replayed = monitoring.gather_data(_config(profile="another"))
+
+        for report in (recorded, replayed):
+            report.pop("timestamp")
+            report.pop("profile")
+        self.assertEqual(replayed, recorded)
+
+    def test_errors_and_repeated_calls_are_replayed_in_order(self) -> None:
+        args = ["move", "tool", "view", "--profile", "p", "--function-id", "0x1::hub::lottery_count"]
+        with Cassette(self.path) as cassette:
+            cassette.record(args, {"result": ["1"]})
+            cassette.record(args, error="timeout")
+
+        backend = ReplayBackend(Cassette(self.path).load())
+        self.assertEqual(backend(_config(), args), {"result": ["1"]})
+        with self.assertRaises(monitoring.CliError):
+            backend(_config(), args)
+        with self.assertRaises(monitoring.CliError):
+            backend(_config(), args)
+
+    def test_missing_entry_raises_cli_error(self) -> None:
+        with Cassette(self.path) as cassette:
+            cassette.record(["move", "tool", "view", "--function-id", "0x1::hub::lottery_count"], {"result": []})
+
+        backend = ReplayBackend(Cassette(self.path).load())
+        with self.assertRaises(monitoring.CliError):
+            backend(_config(), ["move", "tool", "view", "--function-id", "0x1::hub::callback_sender"])
+
+    def test_key_ignores_profile(self) -> None:
+        self.assertEqual(
+            cassette_key(["view", "--profile", "a", "--args", "u64:1"]),
+            cassette_key(["view", "--profile", "b", "--args", "u64:1"]),
+        )
+
+    def test_replay_mode_from_env(self) -> None:
+        with Cassette(self.path) as cassette:
+            cassette.record(["move", "tool", "view", "--function-id", "x"], {"result": ["ok"]})
+
+        backend = monitoring.configure_cli_backend_from_env(
+            {"SUPRA_CLI_BACKEND": "replay", "SUPRA_CLI_CASSETTE": self.path}
+        )
+        self.assertIsInstance(backend, ReplayBackend)
+        self.assertEqual(monitoring.move_view(_config(), "x"), ["ok"])
+
+        with self.assertRaises(monitoring.ConfigError):
+            monitoring.configure_cli_backend_from_env({"SUPRA_CLI_BACKEND": "record"})
+
+
+if __name__ == "__main__":  # pragma: no cover
+    unittest.main()
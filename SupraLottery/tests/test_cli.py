@@ -16,6 +16,15 @@ class CliTestCase(unittest.TestCase):
         self.assertIn("set-minimum-balance", output)
         self.assertIn("configure-treasury-distribution", output)
         self.assertIn("vrf-audit", output)
+        self.assertIn("realtime-broker", output)
+
+    def test_local_commands_are_not_exposed_to_api(self) -> None:
+        api_commands = {name for name, _, _ in cli.iter_commands()}
+        self.assertIn("calc-min-balance", api_commands)
+        self.assertNotIn("realtime-broker", api_commands)
+        self.assertNotIn("realtime-broker", cli.COMMAND_MAP)
+        self.assertNotIn("benchmark", api_commands)
+        self.assertNotIn("loadtest", api_commands)
 
     def test_calc_min_balance_subcommand(self) -> None:
         buf = io.StringIO()
@@ -0,0 +1,73 @@
+"""Тесты инструментирования вызовов Supra CLI."""
+from __future__ import annotations
+
+import subprocess
+import unittest
+from unittest import mock
+
+from supra.scripts.lib import instrumentation, monitoring
+from supra.scripts.lib.monitoring import MonitorConfig
+
+
+class CliInstrumentationTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.config = MonitorConfig(
+            profile="test",
+            lottery_addr="0x1",
+            deposit_addr="0x2",
+            max_gas_price=1,
+            max_gas_limit=1,
+            verification_gas=1,
+        )
+        instrumentation.CLI_METRICS.reset()
+        self.addCleanup(instrumentation.CLI_METRICS.reset)
+
+    def test_move_view_records_latency_per_function_id(self) -> None:
+        completed = subprocess.CompletedProcess(args=[], returncode=0, stdout='{"result": [5]}')
+        with mock.patch.object(monitoring.subprocess, "run", return_value=completed):
+            monitoring.move_view(self.config, "0x1::hub::lottery_count")
+            monitoring.move_view(self.config, "0x1::hub::lottery_count")
+
+        snapshot = instrumentation.CLI_METRICS.snapshot()
+        self.assertEqual(snapshot["spawns"], 2)
+        self.assertEqual(snapshot["calls"], {"0x1::hub::lottery_count": 2})
+        self.assertEqual(snapshot["errors"], {})
+
+        rendered = instrumentation.CLI_METRICS.render("supra_dvrf")
+        self.assertIn(
+            'supra_dvrf_cli_call_duration_seconds_count{function_id="0x1::hub::lottery_count"} 2',
+            rendered,
+        )
+        self.assertIn("supra_dvrf_cli_subprocess_spawns_total 2", rendered)
+
+    def test_errors_are_counted(self) -> None:
+        completed = subprocess.CompletedProcess(args=[], returncode=0, stdout="")
+        with mock.patch.object(monitoring.subprocess, "run", return_value=completed):
+            with self.assertRaises(monitoring.CliError):
+                monitoring.move_view(self.config, "0x1::hub::callback_sender")
+
+        snapshot = instrumentation.CLI_METRICS.snapshot()
+        self.assertEqual(snapshot["errors"], {"0x1::hub::callback_sender": 1})
+
+    def test_request_timings_accumulate_cli_phase(self) -> None:
+        timings = instrumentation.RequestTimings()
+        token = instrumentation.activate_timings(timings)
+        try:
+            completed = subprocess.CompletedProcess(args=[], returncode=0, stdout='{"result": []}')
+            with mock.patch.object(monitoring.subprocess, "run", return_value=completed):
+                monitoring.move_view(self.config, "0x1::hub::lottery_count")
+        finally:
+            instrumentation.deactivate_timings(token)
+
+        self.assertGreater(timings.get("cli"), 0.0)
+        self.assertTrue(timings.header().startswith("cli;dur="))
+
+    def test_cli_call_label_prefers_function_id(self) -> None:
+        label = instrumentation.cli_call_label(
+            ["move", "tool", "events", "list", "--event-type", "0x1::rounds::DrawFulfilledEvent"]
+        )
+        self.assertEqual(label, "0x1::rounds::DrawFulfilledEvent")
+
+
+if __name__ == "__main__":  # pragma: no cover
+    unittest.main()
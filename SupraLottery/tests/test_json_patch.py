@@ -0,0 +1,41 @@
+"""Тесты построения и применения JSON Patch для потока /status."""
+from __future__ import annotations
+
+import unittest
+
+from supra.scripts.lib.json_patch import apply_patch, diff
+
+
+class JsonPatchTests(unittest.TestCase):
+    def test_diff_roundtrip(self) -> None:
+        old = {
+            "lotteries": [{"id": 1, "tickets": 5}, {"id": 2, "tickets": 1}, {"id": 3}],
+            "a/b": {"x~y": 1},
+            "flag": 1,
+            "removed": None,
+        }
+        new = {
+            "lotteries": [{"id": 1, "tickets": 6}, {"id": 2, "tickets": 1}],
+            "a/b": {"x~y": 2},
+            "flag": True,
+            "added": [1, 2],
+        }
+        ops = diff(old, new)
+        self.assertIn({"op": "replace", "path": "/lotteries/0/tickets", "value": 6}, ops)
+        self.assertIn({"op": "remove", "path": "/lotteries/2"}, ops)
+        self.assertIn({"op": "replace", "path": "/a~1b/x~0y", "value": 2}, ops)
+        self.assertIn({"op": "replace", "path": "/flag", "value": True}, ops)
+        self.assertEqual(apply_patch(old, ops), new)
+
+    def test_equal_documents_produce_empty_patch(self) -> None:
+        document = {"a": [1, {"b": "c"}]}
+        self.assertEqual(diff(document, {"a": [1, {"b": "c"}]}), [])
+
+    def test_list_growth_and_root_replace(self) -> None:
+        self.assertEqual(apply_patch([1], diff([1], [1, 2, 3])), [1, 2, 3])
+        self.assertEqual(diff({"a": 1}, [1]), [{"op": "replace", "path": "", "value": [1]}])
+        self.assertEqual(apply_patch({"a": 1}, diff({"a": 1}, [1])), [1])
+
+
+if __name__ == "__main__":  # pragma: no cover
+    unittest.main()
@@ -0,0 +1,54 @@
+"""Тесты нагрузочного генератора на небольших объёмах."""
+from __future__ import annotations
+
+import asyncio
+import unittest
+
+try:
+    import fastapi  # type: ignore[unused-ignore]
+    import httpx  # type: ignore[unused-ignore]
+    import sqlalchemy  # type: ignore[unused-ignore]
+except ImportError:  # pragma: no cover - зависимости API опциональны
+    fastapi = None  # type: ignore[assignment]
+
+from supra.benchmarks import loadtest
+
+
+class LatencyRecorderTests(unittest.TestCase):
+    def test_summary_percentiles(self) -> None:
+        recorder = loadtest.LatencyRecorder(started=0.0, finished=2.0)
+        for value in range(1, 101):
+            recorder.add(value / 1000)
+        recorder.errors = 3
+
+        summary = recorder.summary()
+        self.assertEqual(summary["count"], 100)
+        self.assertEqual(summary["errors"], 3)
+        self.assertEqual(summary["p50_ms"], 50.0)
+        self.assertEqual(summary["p99_ms"], 99.0)
+        self.assertEqual(summary["throughput_per_s"], 50.0)
+
+
+@unittest.skipIf(fastapi is None, "fastapi/httpx/sqlalchemy не установлены")
+class LoadScenarioTests(unittest.TestCase):
+    def test_scenarios_run_in_process(self) -> None:
+        options = loadtest.LoadOptions(requests=5, concurrency=2, subscribers=3, profiles=2, lotteries=2)
+        report = asyncio.run(
+            loadtest.run_scenarios(["chat", "profiles", "status-cached", "status-uncached"], options)
+        )
+
+        chat = report["scenarios"]["chat"]
+        self.assertEqual(chat["post"]["count"], 5)
+        self.assertEqual(chat["delivery"]["count"], 15)
+        self.assertEqual(chat["delivery"]["errors"], 0)
+        self.assertEqual(report["scenarios"]["profiles"]["get"]["errors"], 0)
+        self.assertEqual(report["scenarios"]["status-cached"]["get"]["count"], 5)
+        self.assertIsNotNone(report["scenarios"]["status-uncached"]["get"]["p99_ms"])
+
+    def test_unknown_scenario_rejected(self) -> None:
+        with self.assertRaises(ValueError):
+            asyncio.run(loadtest.run_scenarios(["nope"], loadtest.LoadOptions()))
+
+
+if __name__ == "__main__":  # pragma: no cover
+    unittest.main()
@@ -1,5 +1,7 @@
+import asyncio
 import os
 import unittest
+from unittest import mock
 
 try:  # pragma: no cover - SQLAlchemy может отсутствовать в среде теста
     import sqlalchemy  # type: ignore[unused-ignore]
@@ -33,7 +35,7 @@ class ProgressServiceTests(unittest.TestCase):
             pass
 
     def test_checklist_completion_roundtrip(self) -> None:
-        service.upsert_checklist_task(
+        asyncio.run(service.upsert_checklist_task(
             {
                 "code": "day1",
                 "title": "День 1",
@@ -44,28 +46,28 @@ class ProgressServiceTests(unittest.TestCase):
                 "metadata": {"group": "daily"},
                 "is_active": True,
             }
-        )
+        ))
 
-        initial = service.get_checklist_for_address("0xABC")
+        initial = asyncio.run(service.get_checklist_for_address("0xABC"))
         self.assertEqual(len(initial), 1)
         task, progress = initial[0]
         self.assertEqual(task.code, "day1")
         self.assertIsNone(progress)
 
-        result = service.complete_checklist_task(
-            "0xABC", "day1", metadata={"source": "test"}, reward_claimed=False
+        result = asyncio.run(
+            service.complete_checklist_task("0xABC", "day1", metadata={"source": "test"}, reward_claimed=False)
         )
         self.assertEqual(result.address, "0xabc")
         self.assertEqual(result.task.code, "day1")
         self.assertFalse(result.reward_claimed)
         self.assertEqual(result.metadata.get("source"), "test")
 
-        after = service.get_checklist_for_address("0xabc")
+        after = asyncio.run(service.get_checklist_for_address("0xabc"))
         self.assertTrue(after[0][1].completed_at is not None)
         self.assertEqual(after[0][1].metadata["source"], "test")
 
     def test_achievement_unlock_roundtrip(self) -> None:
-        service.upsert_achievement(
+        asyncio.run(service.upsert_achievement(
             {
                 "code": "collector",
                 "title": "Коллекционер",
@@ -73,26 +75,77 @@ class ProgressServiceTests(unittest.TestCase):
                 "points": 50,
                 "metadata": {"threshold": 10},
             }
-        )
+        ))
 
-        listing = service.list_achievements_for_address("0xABC")
+        listing = asyncio.run(service.list_achievements_for_address("0xABC"))
         self.assertEqual(len(listing), 1)
         achievement, progress = listing[0]
         self.assertEqual(achievement.code, "collector")
         self.assertIsNone(progress)
 
-        unlocked = service.unlock_achievement(
-            "0xabc", "collector", progress_value=10, metadata={"source": "unit"}
+        unlocked = asyncio.run(
+            service.unlock_achievement("0xabc", "collector", progress_value=10, metadata={"source": "unit"})
         )
         self.assertEqual(unlocked.address, "0xabc")
         self.assertEqual(unlocked.progress_value, 10)
         self.assertEqual(unlocked.metadata["source"], "unit")
         self.assertIsNotNone(unlocked.unlocked_at)
 
-        after = service.list_achievements_for_address("0xabc")
+        after = asyncio.run(service.list_achievements_for_address("0xabc"))
         self.assertTrue(after[0][1].unlocked_at is not None)
         self.assertEqual(after[0][1].metadata["source"], "unit")
 
+    def test_bulk_complete_is_idempotent_and_batched(self) -> None:
+        for index, code in enumerate(("day1", "day2")):
+            asyncio.run(service.upsert_checklist_task({"code": code, "title": code, "description": "", "day_index": index}))
+        asyncio.run(service.complete_checklist_task("0xa", "day1", metadata={"source": "single"}))
+
+        result = asyncio.run(
+            service.bulk_complete_checklist_tasks(["0xA", "0xb", "0xa", "0xc"], ["DAY1", "day2"], batch_size=4)
+        )
+        self.assertEqual((result.requested, result.affected, result.batches), (6, 5, 2))
+
+        first = asyncio.run(service.get_checklist_for_address("0xa"))
+        self.assertEqual(first[0][1].metadata, {"source": "single"})
+        self.assertTrue(all(progress is not None for _, progress in first))
+
+        again = asyncio.run(
+            service.bulk_complete_checklist_tasks(["0xa", "0xb"], ["day1"], reward_claimed=True)
+        )
+        self.assertEqual((again.requested, again.affected), (2, 2))
+        claimed = asyncio.run(service.get_checklist_for_address("0xb"))
+        self.assertTrue(claimed[0][1].reward_claimed)
+        self.assertFalse(claimed[1][1].reward_claimed)
+
+        with self.assertRaises(service.TaskNotFoundError) as ctx:
+            asyncio.run(service.bulk_complete_checklist_tasks(["0xd"], ["day1", "missing"]))
+        self.assertIn("missing", str(ctx.exception))
+        self.assertTrue(all(progress is None for _, progress in asyncio.run(service.get_checklist_for_address("0xd"))))
+
+    def test_bulk_statements_respect_old_sqlite_parameter_limit(self) -> None:
+        asyncio.run(service.upsert_checklist_task({"code": "day1", "title": "", "description": "", "day_index": 0}))
+        addresses = [f"0x{index:x}" for index in range(400)]
+        with mock.patch("supra.scripts.accounts.db.sqlite3.sqlite_version_info", (3, 31, 1)):
+            result = asyncio.run(service.bulk_complete_checklist_tasks(addresses, ["day1"]))
+        self.assertEqual((result.requested, result.affected, result.batches), (400, 400, 1))
+        self.assertIsNotNone(asyncio.run(service.get_checklist_for_address("0x18f"))[0][1])
+
+    def test_bulk_unlock_keeps_first_unlock_time(self) -> None:
+        asyncio.run(service.upsert_achievement({"code": "collector", "title": "", "description": "", "points": 5}))
+        first = asyncio.run(service.unlock_achievement("0xa", "collector", progress_value=3))
+
+        result = asyncio.run(service.bulk_unlock_achievements(["0xa", "0xb"], ["collector"], progress_value=10))
+        self.assertEqual((result.requested, result.affected, result.batches), (2, 2, 1))
+
+        listing = asyncio.run(service.list_achievements_for_address("0xa"))
+        progress = listing[0][1]
+        self.assertEqual(progress.progress_value, 10)
+        self.assertEqual(progress.unlocked_at.replace(tzinfo=None), first.unlocked_at.replace(tzinfo=None))
+        self.assertIsNotNone(asyncio.run(service.list_achievements_for_address("0xb"))[0][1].unlocked_at)
+
+        asyncio.run(service.bulk_unlock_achievements(["0xa"], ["collector"]))
+        self.assertEqual(asyncio.run(service.list_achievements_for_address("0xa"))[0][1].progress_value, 10)
+
 
 if __name__ == "__main__":  # pragma: no cover
     unittest.main()
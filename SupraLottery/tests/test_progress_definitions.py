@@ -0,0 +1,90 @@
+import asyncio
+import os
+import unittest
+
+try:  # pragma: no cover - SQLAlchemy может отсутствовать в среде теста
+    import sqlalchemy  # type: ignore[unused-ignore]
+except ImportError:  # pragma: no cover - используем skipIf
+    sqlalchemy = None  # type: ignore[assignment]
+
+if sqlalchemy is not None:  # pragma: no cover - для mypy
+    from supra.scripts.accounts.config import AccountsConfig
+    from supra.scripts.accounts.db import get_async_session, init_engine, reset_engine
+    from supra.scripts.progress import service
+    from supra.scripts.progress.definitions import CHECKLIST_DEFINITIONS, DefinitionCache, definition_cache
+else:  # pragma: no cover - заглушки для статического анализа
+    AccountsConfig = None  # type: ignore[assignment]
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 100.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _task(code: str, day_index: int) -> dict:
+    return {"code": code, "title": code, "description": "", "day_index": day_index}
+
+
+@unittest.skipIf(sqlalchemy is None, "sqlalchemy не установлена")
+class DefinitionCacheTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.db_path = "test_progress_definitions.db"
+        try:
+            os.remove(self.db_path)
+        except FileNotFoundError:
+            pass
+        init_engine(AccountsConfig(database_url=f"sqlite:///./{self.db_path}"))
+
+    def tearDown(self) -> None:
+        reset_engine()
+        try:
+            os.remove(self.db_path)
+        except FileNotFoundError:
+            pass
+
+    def test_personal_requests_reuse_cached_definitions(self) -> None:
+        asyncio.run(service.upsert_checklist_task(_task("day1", 0)))
+        loads = definition_cache.loads
+
+        first = asyncio.run(service.get_checklist_for_address("0xa"))
+        asyncio.run(service.complete_checklist_task("0xb", "day1"))
+        second = asyncio.run(service.get_checklist_for_address("0xb"))
+
+        self.assertEqual(definition_cache.loads, loads + 1)
+        self.assertIs(first[0][0], second[0][0])
+        self.assertIsNone(first[0][1])
+        self.assertIsNotNone(second[0][1])
+
+        asyncio.run(service.upsert_checklist_task(_task("day2", 1)))
+        third = asyncio.run(service.get_checklist_for_address("0xb"))
+        self.assertEqual([task.code for task, _ in third], ["day1", "day2"])
+        self.assertEqual(definition_cache.loads, loads + 2)
+
+    def test_other_worker_sees_new_version_after_recheck_interval(self) -> None:
+        clock = FakeClock()
+        worker = DefinitionCache(recheck_interval=5, clock=clock)
+
+        async def codes() -> list:
+            async with get_async_session(readonly=True) as session:
+                tasks = await worker.get(CHECKLIST_DEFINITIONS, session, service._load_active_tasks)
+                return [task.code for task in tasks]
+
+        asyncio.run(service.upsert_checklist_task(_task("day1", 0)))
+        self.assertEqual(asyncio.run(codes()), ["day1"])
+
+        # Запись через другой «воркер»: локальный кэш worker о ней не знает.
+        asyncio.run(service.upsert_checklist_task(_task("day2", 1)))
+        self.assertEqual(asyncio.run(codes()), ["day1"])
+
+        clock.now += 5
+        self.assertEqual(asyncio.run(codes()), ["day1", "day2"])
+        clock.now += 5
+        self.assertEqual(asyncio.run(codes()), ["day1", "day2"])
+        self.assertEqual((worker.loads, worker.hits), (2, 2))
+
+
+if __name__ == "__main__":  # pragma: no cover
+    unittest.main()
@@ -0,0 +1,135 @@
+import asyncio
+import os
+import unittest
+from collections import Counter
+
+try:  # pragma: no cover - SQLAlchemy может отсутствовать в среде теста
+    import sqlalchemy  # type: ignore[unused-ignore]
+except ImportError:  # pragma: no cover - используем skipIf
+    sqlalchemy = None  # type: ignore[assignment]
+
+if sqlalchemy is not None:  # pragma: no cover - для mypy
+    from supra.scripts.accounts.config import AccountsConfig
+    from supra.scripts.accounts.db import get_async_session, init_engine, reset_engine
+    from supra.scripts.progress import leaderboard, rules, service
+    from supra.scripts.progress.tables import LeaderboardTreeNode
+else:  # pragma: no cover - заглушки для статического анализа
+    AccountsConfig = None  # type: ignore[assignment]
+
+
+def _achievement(code: str, points: int, **extra: object) -> dict:
+    return {"code": code, "title": code, "description": "", "points": points, **extra}
+
+
+@unittest.skipIf(sqlalchemy is None, "sqlalchemy не установлена")
+class LeaderboardTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.db_path = "test_progress_leaderboard.db"
+        try:
+            os.remove(self.db_path)
+        except FileNotFoundError:
+            pass
+        init_engine(AccountsConfig(database_url=f"sqlite:///./{self.db_path}"))
+        for code, points in (("gold", 50), ("silver", 20), ("bronze", 5)):
+            asyncio.run(service.upsert_achievement(_achievement(code, points)))
+
+    def tearDown(self) -> None:
+        reset_engine()
+        try:
+            os.remove(self.db_path)
+        except FileNotFoundError:
+            pass
+
+    def _top(self) -> list:
+        return [(item.rank, item.address, item.points) for item in asyncio.run(leaderboard.top(10))]
+
+    def _tree(self) -> dict:
+        async def load() -> dict:
+            async with get_async_session() as session:
+                return {row.node: row.addresses for row in await session.scalars(sqlalchemy.select(LeaderboardTreeNode))}
+
+        return asyncio.run(load())
+
+    def assertHistogram(self, histogram: dict) -> None:
+        expected = {node: count for node, count in leaderboard._node_deltas(Counter(histogram)).items() if count}
+        self.assertEqual(self._tree(), expected)
+        self.assertEqual(self._tree()[leaderboard.TREE_SIZE], sum(histogram.values()))
+
+    def test_unlocks_maintain_ranks_and_tree(self) -> None:
+        asyncio.run(service.unlock_achievement("0xa", "gold"))
+        asyncio.run(service.unlock_achievement("0xa", "gold"))
+        asyncio.run(service.bulk_unlock_achievements(["0xb", "0xc"], ["silver", "bronze"]))
+        asyncio.run(service.unlock_achievement("0xd", "silver"))
+        asyncio.run(service.unlock_achievement("0xd", "bronze"))
+
+        self.assertEqual(self._top(), [(1, "0xa", 50), (2, "0xb", 25), (2, "0xc", 25), (2, "0xd", 25)])
+        self.assertHistogram({50: 1, 25: 3})
+        position, total = asyncio.run(leaderboard.rank_of("0xD"))
+        self.assertEqual((position.rank, position.points, total), (2, 25, 4))
+        self.assertEqual(asyncio.run(leaderboard.rank_of("0xe")), (None, 4))
+
+        # Смена очков и отключение достижения пересчитывают его обладателей.
+        asyncio.run(service.upsert_achievement(_achievement("bronze", 40)))
+        self.assertEqual(self._top()[0], (1, "0xb", 60))
+        asyncio.run(service.upsert_achievement(_achievement("gold", 50, is_active=False)))
+        self.assertEqual(asyncio.run(leaderboard.rank_of("0xa")), (None, 3))
+        self.assertHistogram({60: 3})
+
+    def test_refresh_leaves_no_placeholder_rows(self) -> None:
+        asyncio.run(service.unlock_achievement("0xa", "gold"))
+
+        async def refresh() -> None:
+            async with get_async_session() as session:
+                await leaderboard.refresh_addresses(session, ["0xa", "0xnobody", "0xa"])
+                await session.commit()
+
+        asyncio.run(refresh())
+        asyncio.run(refresh())
+        self.assertEqual(self._top(), [(1, "0xa", 50)])
+        self.assertEqual(asyncio.run(leaderboard.rank_of("0xnobody")), (None, 1))
+        self.assertHistogram({50: 1})
+
+    def test_rank_matches_full_scan(self) -> None:
+        scores = [3, 9, 9, 1, 27, 9, 3, 81, 1 << 20]
+
+        async def fill() -> None:
+            async with get_async_session() as session:
+                await leaderboard._apply_tree_deltas(session, Counter(scores))
+                await session.commit()
+
+        asyncio.run(fill())
+
+        async def ahead(points: int) -> int:
+            async with get_async_session() as session:
+                rows = await session.scalars(sqlalchemy.select(LeaderboardTreeNode))
+                counts = {row.node: row.addresses for row in rows}
+            return counts[leaderboard.TREE_SIZE] - sum(counts.get(node, 0) for node in leaderboard._prefix_nodes(points))
+
+        for points in set(scores):
+            self.assertEqual(asyncio.run(ahead(points)), sum(score > points for score in scores))
+
+    def test_rules_engine_and_rebuild(self) -> None:
+        asyncio.run(service.upsert_achievement(
+            _achievement("buyer", 7, metadata={"rule": {"metric": "tickets", "threshold": 2}})
+        ))
+        event = {
+            "type": "0x1::sales::TicketPurchaseEvent",
+            "sequence_number": "0",
+            "data": {"lottery_id": "1", "buyer": "0xa", "quantity": "3", "sale_amount": "0"},
+        }
+        asyncio.run(rules.process_activity_events([event]))
+        self.assertEqual(self._top(), [(1, "0xa", 7)])
+
+        async def wipe() -> None:
+            async with get_async_session() as session:
+                await session.execute(sqlalchemy.delete(LeaderboardTreeNode))
+                await session.commit()
+
+        asyncio.run(wipe())
+        self.assertEqual(asyncio.run(leaderboard.rebuild_leaderboard()), 1)
+        self.assertHistogram({7: 1})
+        self.assertEqual(asyncio.run(leaderboard.rank_of("0xa"))[0].rank, 1)
+
+
+if __name__ == "__main__":  # pragma: no cover
+    unittest.main()
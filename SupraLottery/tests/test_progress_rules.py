@@ -0,0 +1,118 @@
+import asyncio
+import os
+import unittest
+
+try:  # pragma: no cover - SQLAlchemy может отсутствовать в среде теста
+    import sqlalchemy  # type: ignore[unused-ignore]
+except ImportError:  # pragma: no cover - используем skipIf
+    sqlalchemy = None  # type: ignore[assignment]
+
+if sqlalchemy is not None:  # pragma: no cover - для mypy
+    from supra.scripts.accounts.config import AccountsConfig
+    from supra.scripts.accounts.db import init_engine, reset_engine
+    from supra.scripts.progress import rules, service
+else:  # pragma: no cover - заглушки для статического анализа
+    AccountsConfig = None  # type: ignore[assignment]
+
+PURCHASE = "0x1::sales::TicketPurchaseEvent"
+
+
+def _purchase(sequence: int, buyer: str, quantity: int, lottery_id: int = 1) -> dict:
+    return {
+        "type": PURCHASE,
+        "sequence_number": str(sequence),
+        "data": {"lottery_id": str(lottery_id), "buyer": buyer, "quantity": str(quantity), "sale_amount": "0"},
+    }
+
+
+def _achievement(code: str, rule: dict) -> dict:
+    return {"code": code, "title": code, "description": "", "metadata": {"rule": rule}}
+
+
+@unittest.skipIf(sqlalchemy is None, "sqlalchemy не установлена")
+class AchievementRulesTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.db_path = "test_progress_rules.db"
+        try:
+            os.remove(self.db_path)
+        except FileNotFoundError:
+            pass
+        init_engine(AccountsConfig(database_url=f"sqlite:///./{self.db_path}"))
+
+    def tearDown(self) -> None:
+        reset_engine()
+        try:
+            os.remove(self.db_path)
+        except FileNotFoundError:
+            pass
+
+    def _progress(self, address: str) -> dict:
+        listing = asyncio.run(service.list_achievements_for_address(address))
+        return {achievement.code: progress for achievement, progress in listing}
+
+    def test_counters_accumulate_and_unlock_at_threshold(self) -> None:
+        asyncio.run(service.upsert_achievement(_achievement("buyer10", {"metric": "tickets", "threshold": 10})))
+        asyncio.run(service.upsert_achievement(
+            _achievement("lottery2", {"metric": "tickets", "threshold": 1, "lottery_id": 2})
+        ))
+        asyncio.run(service.upsert_achievement({"code": "manual", "title": "", "description": ""}))
+
+        # Страница REST: новые события первыми.
+        events = [_purchase(2, "0xB", 3), _purchase(1, "0xa", 4), _purchase(0, "0xA", 4)]
+        result = asyncio.run(rules.process_activity_events(events, batch_size=2))
+        self.assertEqual((result.events, result.skipped, result.counters, result.batches), (3, 0, 2, 2))
+
+        progress = self._progress("0xa")
+        self.assertEqual(progress["buyer10"].progress_value, 8)
+        self.assertIsNone(progress["buyer10"].unlocked_at)
+        self.assertIsNone(progress["lottery2"])
+        self.assertIsNone(progress["manual"])
+
+        # Повторная доставка пропускается, новое событие переходит порог.
+        again = asyncio.run(rules.process_activity_events([_purchase(1, "0xa", 4), _purchase(3, "0xa", 2, 2)]))
+        self.assertEqual((again.skipped, again.counters), (1, 2))
+        progress = self._progress("0xa")
+        self.assertEqual(progress["buyer10"].progress_value, 10)
+        unlocked_at = progress["buyer10"].unlocked_at
+        self.assertIsNotNone(unlocked_at)
+        self.assertIsNotNone(progress["lottery2"].unlocked_at)
+
+        asyncio.run(rules.process_activity_events([_purchase(4, "0xa", 5)]))
+        progress = self._progress("0xa")
+        self.assertEqual(progress["buyer10"].progress_value, 15)
+        self.assertEqual(progress["buyer10"].unlocked_at, unlocked_at)
+        self.assertEqual(self._progress("0xb")["buyer10"].progress_value, 3)
+
+    def test_older_page_after_newer_page_is_counted(self) -> None:
+        asyncio.run(service.upsert_achievement(_achievement("buyer10", {"metric": "tickets", "threshold": 10})))
+
+        # Индексатор идёт от новых страниц к старым.
+        newest = asyncio.run(rules.process_activity_events([_purchase(4, "0xa", 3), _purchase(3, "0xa", 3)]))
+        older = asyncio.run(rules.process_activity_events([_purchase(2, "0xa", 2), _purchase(1, "0xa", 2)]))
+        self.assertEqual((newest.skipped, older.skipped), (0, 0))
+        self.assertEqual(self._progress("0xa")["buyer10"].progress_value, 10)
+        self.assertIsNotNone(self._progress("0xa")["buyer10"].unlocked_at)
+
+        # Повтор и дубль внутри пачки не учитываются.
+        replay = asyncio.run(rules.process_activity_events(
+            [_purchase(3, "0xa", 3), _purchase(0, "0xa", 1), _purchase(0, "0xa", 1)]
+        ))
+        self.assertEqual((replay.skipped, replay.batches), (2, 1))
+        self.assertEqual(self._progress("0xa")["buyer10"].progress_value, 11)
+
+    def test_event_adapters(self) -> None:
+        winners = rules.activities_from_event(
+            "0x1::history::WinnersComputedEvent", {"lottery_id": "7", "winners": ["0xA", "0xb"]}
+        )
+        self.assertEqual([(item.address, item.metric, item.lottery_id) for item in winners],
+                         [("0xa", "wins", 7), ("0xb", "wins", 7)])
+        self.assertEqual(rules.activities_from_event("0x1::history::WinnersComputedEvent", {"lottery_id": "7"}), [])
+        referral = rules.activities_from_event(
+            "0x2::referrals::ReferralRegisteredEvent", {"player": "0xc", "referrer": "0xD", "by_admin": False}
+        )
+        self.assertEqual(referral, [rules.Activity("0xd", "referrals", 1, None)])
+        self.assertEqual(rules.activities_from_event("0x1::sales::Unknown", {}), [])
+
+
+if __name__ == "__main__":  # pragma: no cover
+    unittest.main()
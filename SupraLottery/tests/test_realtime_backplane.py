@@ -0,0 +1,128 @@
+"""Тесты backplane для рассылки real-time событий между воркерами."""
+from __future__ import annotations
+
+import asyncio
+import json
+import unittest
+
+try:
+    from supra.scripts.realtime.backplane import (
+        BrokerBackplane,
+        BrokerServer,
+        InMemoryBackplane,
+        InMemoryHub,
+        backplane_from_env,
+        parse_address,
+    )
+    from supra.scripts.realtime.manager import ConnectionManager
+except ImportError:  # pragma: no cover - FastAPI опционален
+    ConnectionManager = None  # type: ignore[assignment,misc]
+
+
+class FakeWebSocket:
+    def __init__(self) -> None:
+        self.sent: list[str] = []
+        self.received = asyncio.Event()
+
+    async def accept(self) -> None:
+        return None
+
+    async def send_text(self, text: str) -> None:
+        self.sent.append(text)
+        self.received.set()
+
+    async def close(self, code: int = 1000) -> None:
+        return None
+
+
+async def _wait_for(websocket: FakeWebSocket, count: int, timeout: float = 2.0) -> None:
+    async def _poll() -> None:
+        while len(websocket.sent) < count:
+            websocket.received.clear()
+            await websocket.received.wait()
+
+    await asyncio.wait_for(_poll(), timeout)
+
+
+@unittest.skipIf(ConnectionManager is None, "fastapi не установлен")
+class BackplaneTests(unittest.TestCase):
+    def test_parse_address(self) -> None:
+        self.assertEqual(parse_address("tcp://127.0.0.1:7400"), ("tcp", "127.0.0.1", 7400))
+        self.assertEqual(parse_address("unix:///tmp/supra.sock"), ("unix", "/tmp/supra.sock", 0))
+        with self.assertRaises(ValueError):
+            parse_address("redis://localhost")
+        self.assertIsNone(backplane_from_env({}))
+        self.assertIsInstance(backplane_from_env({"SUPRA_REALTIME_BACKPLANE": "memory"}), InMemoryBackplane)
+
+    def test_in_memory_backplane_reaches_other_manager(self) -> None:
+        async def scenario() -> None:
+            hub = InMemoryHub()
+            first, second = ConnectionManager(), ConnectionManager()
+            await first.start_backplane(InMemoryBackplane(hub))
+            await second.start_backplane(InMemoryBackplane(hub))
+            local, remote = FakeWebSocket(), FakeWebSocket()
+            await first.connect(local, "global")
+            await second.connect(remote, "global")
+
+            self.assertEqual(first.broadcast("global", {"body": "привет"}), 1)
+            await _wait_for(remote, 1)
+            await _wait_for(local, 1)
+            await asyncio.sleep(0.01)
+
+            self.assertEqual([json.loads(item)["body"] for item in remote.sent], ["привет"])
+            self.assertEqual(len(local.sent), 1)
+
+            await first.stop_backplane()
+            await second.stop_backplane()
+            self.assertEqual(hub.members, [])
+
+        asyncio.run(scenario())
+
+    def test_broker_relays_between_workers(self) -> None:
+        async def scenario() -> None:
+            broker = BrokerServer()
+            await broker.start("tcp://127.0.0.1:0")
+            port = broker.sockets[0].getsockname()[1]
+            address = f"tcp://127.0.0.1:{port}"
+
+            first, second = ConnectionManager(), ConnectionManager()
+            await first.start_backplane(BrokerBackplane(address))
+            await second.start_backplane(BrokerBackplane(address))
+            local, remote = FakeWebSocket(), FakeWebSocket()
+            await first.connect(local, "announcements")
+            await second.connect(remote, "announcements")
+
+            first.broadcast("announcements", {"title": "draw"})
+            second.broadcast("announcements", {"title": "reply"})
+            await _wait_for(remote, 2)
+            await _wait_for(local, 2)
+            await asyncio.sleep(0.05)
+
+            self.assertEqual(sorted(json.loads(item)["title"] for item in local.sent), ["draw", "reply"])
+            self.assertEqual(sorted(json.loads(item)["title"] for item in remote.sent), ["draw", "reply"])
+
+            await first.stop_backplane()
+            await second.stop_backplane()
+            await broker.close()
+
+        asyncio.run(scenario())
+
+    def test_unavailable_broker_falls_back_to_local_delivery(self) -> None:
+        async def scenario() -> None:
+            manager = ConnectionManager()
+            backplane = BrokerBackplane("tcp://127.0.0.1:9", reconnect_delay=0.01)
+            await backplane.start(lambda room, text, message_id: None, connect_timeout=0.05)
+            manager.backplane = backplane
+            websocket = FakeWebSocket()
+            await manager.connect(websocket, "global")
+
+            self.assertEqual(manager.broadcast("global", {"body": "x"}), 1)
+            await _wait_for(websocket, 1)
+            self.assertEqual(backplane.dropped, 1)
+            await manager.stop_backplane()
+
+        asyncio.run(scenario())
+
+
+if __name__ == "__main__":  # pragma: no cover
+    unittest.main()
@@ -0,0 +1,54 @@
+"""Тесты кольцевых буферов истории комнат."""
+from __future__ import annotations
+
+import asyncio
+import unittest
+
+try:
+    from supra.scripts.realtime.history import MessageHistory
+except ImportError:  # pragma: no cover - FastAPI опционален
+    MessageHistory = None  # type: ignore[assignment,misc]
+
+
+@unittest.skipIf(MessageHistory is None, "fastapi не установлен")
+class MessageHistoryTests(unittest.TestCase):
+    def test_cold_buffer_requires_warmup(self) -> None:
+        history = MessageHistory(size=3)
+        history.record("global", 5, "m5")
+        self.assertIsNone(history.since("global", 4))
+        self.assertEqual(history.tail("global", 4), ["m5"])
+
+        history.warm("global", [(3, "m3"), (4, "m4")], complete=False)
+        self.assertEqual(history.since("global", 3), ["m4", "m5"])
+        self.assertIsNone(history.since("global", 1))
+
+    def test_eviction_moves_coverage_boundary(self) -> None:
+        history = MessageHistory(size=2)
+        history.warm("room", [], complete=True)
+        self.assertEqual(history.since("room", 0), [])
+        for message_id in (1, 3, 2, 3, 4):
+            history.record("room", message_id, f"m{message_id}")
+
+        self.assertEqual(history.tail("room", 0), ["m3", "m4"])
+        self.assertIsNone(history.since("room", 1))
+        self.assertEqual(history.since("room", 2), ["m3", "m4"])
+
+    def test_concurrent_warmups_share_one_load(self) -> None:
+        history = MessageHistory(size=10)
+        calls = []
+
+        async def loader():  # type: ignore[no-untyped-def]
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return [(1, "m1"), (2, "m2")], True
+
+        async def scenario() -> None:
+            await asyncio.gather(*(history.ensure_warm("global", loader) for _ in range(20)))
+
+        asyncio.run(scenario())
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(history.since("global", 1), ["m2"])
+
+
+if __name__ == "__main__":  # pragma: no cover
+    unittest.main()
@@ -0,0 +1,115 @@
+"""Тесты рассылки ConnectionManager через очереди подключений."""
+from __future__ import annotations
+
+import asyncio
+import unittest
+
+try:
+    from supra.scripts.realtime.manager import SLOW_CONSUMER_CLOSE_CODE, ConnectionManager
+except ImportError:  # pragma: no cover - FastAPI опционален
+    ConnectionManager = None  # type: ignore[assignment,misc]
+
+
+class FakeWebSocket:
+    def __init__(self, blocked: bool = False) -> None:
+        self.sent: list[str] = []
+        self.closed_with: int | None = None
+        self.gate = asyncio.Event()
+        if not blocked:
+            self.gate.set()
+
+    async def accept(self) -> None:
+        return None
+
+    async def send_text(self, text: str) -> None:
+        await self.gate.wait()
+        self.sent.append(text)
+
+    async def close(self, code: int = 1000) -> None:
+        self.closed_with = code
+
+
+@unittest.skipIf(ConnectionManager is None, "fastapi не установлен")
+class ConnectionManagerTests(unittest.TestCase):
+    def test_slow_subscriber_does_not_delay_others(self) -> None:
+        async def scenario() -> None:
+            manager = ConnectionManager(queue_size=10)
+            fast, slow = FakeWebSocket(), FakeWebSocket(blocked=True)
+            await manager.connect(fast, "global")
+            await manager.connect(slow, "global")
+
+            self.assertEqual(manager.broadcast("global", {"body": "привет"}), 2)
+            await asyncio.sleep(0)
+            await asyncio.sleep(0)
+
+            self.assertEqual(fast.sent, ['{"body":"привет"}'])
+            self.assertEqual(slow.sent, [])
+            slow.gate.set()
+            await asyncio.sleep(0)
+            await asyncio.sleep(0)
+            self.assertIs(slow.sent[0], fast.sent[0])
+            await manager.disconnect(fast, "global")
+            await manager.disconnect(slow, "global")
+            self.assertEqual(manager.room_size("global"), 0)
+
+        asyncio.run(scenario())
+
+    def test_overflowing_subscriber_is_evicted(self) -> None:
+        async def scenario() -> None:
+            manager = ConnectionManager(queue_size=2)
+            fast, slow = FakeWebSocket(), FakeWebSocket(blocked=True)
+            await manager.connect(fast, "room")
+            await manager.connect(slow, "room")
+            await asyncio.sleep(0)
+
+            for index in range(4):
+                manager.broadcast("room", {"index": index})
+                await asyncio.sleep(0)
+            await asyncio.sleep(0)
+
+            self.assertEqual(manager.evicted, 1)
+            self.assertEqual(slow.closed_with, SLOW_CONSUMER_CLOSE_CODE)
+            self.assertEqual(manager.room_size("room"), 1)
+            self.assertEqual(len(fast.sent), 4)
+            await manager.disconnect(fast, "room")
+
+        asyncio.run(scenario())
+
+    def test_multiplexed_subscriber_receives_envelopes(self) -> None:
+        async def scenario() -> None:
+            manager = ConnectionManager(queue_size=10, max_topics=2)
+            plain, multi = FakeWebSocket(), FakeWebSocket()
+            await manager.connect(plain, "global")
+            await manager.connect(multi, multiplexed=True)
+            manager.subscribe(multi, "global")
+            manager.subscribe(multi, "announcements")
+            with self.assertRaises(ValueError):
+                manager.subscribe(multi, "lottery:1")
+
+            self.assertEqual(manager.broadcast("global", {"n": 1}), 2)
+            self.assertEqual(manager.broadcast("announcements", {"n": 2}), 1)
+            await asyncio.sleep(0)
+
+            self.assertEqual(plain.sent, ['{"n":1}'])
+            self.assertEqual(
+                multi.sent,
+                ['{"topic":"global","data":{"n":1}}', '{"topic":"announcements","data":{"n":2}}'],
+            )
+            manager.unsubscribe(multi, "global")
+            self.assertEqual(manager.topics(multi), ["announcements"])
+            await manager.disconnect(multi)
+            self.assertEqual(manager.room_size("announcements"), 0)
+            self.assertEqual(manager.connection_count, 1)
+            await manager.disconnect(plain, "global")
+
+        asyncio.run(scenario())
+
+    def test_broadcast_to_empty_room(self) -> None:
+        async def scenario() -> int:
+            return ConnectionManager(queue_size=1).broadcast("nobody", {"x": 1})
+
+        self.assertEqual(asyncio.run(scenario()), 0)
+
+
+if __name__ == "__main__":  # pragma: no cover
+    unittest.main()
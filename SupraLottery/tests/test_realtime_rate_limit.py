@@ -0,0 +1,116 @@
+import asyncio
+import os
+import unittest
+
+try:  # pragma: no cover - SQLAlchemy может отсутствовать в среде теста
+    import sqlalchemy  # type: ignore[unused-ignore]
+except ImportError:  # pragma: no cover - используем skipIf
+    sqlalchemy = None  # type: ignore[assignment]
+
+if sqlalchemy is not None:  # pragma: no cover - для mypy
+    from supra.scripts.accounts.config import AccountsConfig
+    from supra.scripts.accounts.db import init_engine, reset_engine
+    from supra.scripts.realtime.rate_limit import (
+        ChatRateLimiter,
+        DatabaseRateLimitBackend,
+        InMemoryRateLimitBackend,
+        RateLimit,
+        RateLimited,
+        rate_limiter_from_env,
+    )
+else:  # pragma: no cover - заглушки для статического анализа
+    AccountsConfig = None  # type: ignore[assignment]
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@unittest.skipIf(sqlalchemy is None, "sqlalchemy не установлена")
+class ChatRateLimiterTests(unittest.TestCase):
+    def _exhaust(self, limiter: "ChatRateLimiter", address: str, room: str, count: int) -> None:
+        async def scenario() -> None:
+            for _ in range(count):
+                await limiter.check(address, room)
+
+        asyncio.run(scenario())
+
+    def test_address_bucket_refills_over_time(self) -> None:
+        clock = FakeClock()
+        limiter = ChatRateLimiter(
+            InMemoryRateLimitBackend(clock=clock), RateLimit(rate=0.5, burst=2), RateLimit(rate=100, burst=100)
+        )
+        self._exhaust(limiter, "0xa", "global", 2)
+        with self.assertRaises(RateLimited) as ctx:
+            self._exhaust(limiter, "0xa", "global", 1)
+        self.assertEqual(ctx.exception.scope, "address")
+        self.assertAlmostEqual(ctx.exception.retry_after, 2.0)
+        self._exhaust(limiter, "0xb", "global", 1)
+
+        clock.now += 2.0
+        self._exhaust(limiter, "0xa", "global", 1)
+        self.assertEqual(limiter.throttled, {"address": 1, "room": 0})
+        self.assertIn('supra_chat_throttled_total{scope="address"} 1', limiter.render("supra"))
+
+    def test_room_limit_does_not_spend_address_tokens(self) -> None:
+        clock = FakeClock()
+        limiter = ChatRateLimiter(
+            InMemoryRateLimitBackend(clock=clock), RateLimit(rate=1, burst=1), RateLimit(rate=1, burst=1)
+        )
+        self._exhaust(limiter, "0xa", "global", 1)
+        with self.assertRaises(RateLimited) as ctx:
+            self._exhaust(limiter, "0xb", "global", 1)
+        self.assertEqual(ctx.exception.scope, "room")
+        self._exhaust(limiter, "0xb", "other", 1)
+
+    def test_memory_backend_evicts_least_recent_keys(self) -> None:
+        backend = InMemoryRateLimitBackend(max_keys=2)
+        limit = RateLimit(rate=1, burst=1)
+        for key in ("a", "b", "c"):
+            self.assertEqual(backend.acquire([(key, limit)]), [0.0])
+        self.assertEqual(list(backend._buckets), ["b", "c"])
+
+    def test_database_backend_is_shared(self) -> None:
+        db_path = "test_rate_limit.db"
+        init_engine(AccountsConfig(database_url=f"sqlite:///./{db_path}"))
+        try:
+            clock = FakeClock()
+            limit = RateLimit(rate=1, burst=2)
+            first, second = DatabaseRateLimitBackend(clock), DatabaseRateLimitBackend(clock)
+
+            def acquire(backend: DatabaseRateLimitBackend) -> list:
+                return asyncio.run(backend.acquire([("address:0xa", limit)]))
+
+            self.assertEqual(acquire(first), [0.0])
+            self.assertEqual(acquire(second), [0.0])
+            self.assertEqual(acquire(first), [1.0])
+            clock.now += 1
+            self.assertEqual(acquire(second), [0.0])
+
+            # Новый ключ из двух воркеров сразу: без IntegrityError, токен один.
+            async def race() -> list:
+                fresh = RateLimit(rate=1, burst=1)
+                return await asyncio.gather(
+                    first.acquire([("address:0xnew", fresh)]), second.acquire([("address:0xnew", fresh)])
+                )
+
+            self.assertEqual(sorted(asyncio.run(race())), [[0.0], [1.0]])
+        finally:
+            reset_engine()
+            os.remove(db_path)
+
+    def test_config_from_env(self) -> None:
+        self.assertIsNone(rate_limiter_from_env({"SUPRA_CHAT_RATE_LIMIT": "off"}))
+        limiter = rate_limiter_from_env({"SUPRA_CHAT_ADDRESS_RATE": "2", "SUPRA_CHAT_ROOM_BURST": "10"})
+        self.assertEqual(limiter.per_address, RateLimit(2.0, 5.0))
+        self.assertEqual(limiter.per_room, RateLimit(20.0, 10.0))
+        with self.assertRaises(ValueError):
+            rate_limiter_from_env({"SUPRA_CHAT_RATE_LIMIT": "redis"})
+
+
+if __name__ == "__main__":  # pragma: no cover
+    unittest.main()
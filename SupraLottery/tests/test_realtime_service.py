@@ -0,0 +1,93 @@
+import asyncio
+import os
+import unittest
+
+try:  # pragma: no cover - SQLAlchemy может отсутствовать в среде теста
+    import sqlalchemy  # type: ignore[unused-ignore]
+except ImportError:  # pragma: no cover - используем skipIf
+    sqlalchemy = None  # type: ignore[assignment]
+
+if sqlalchemy is not None:  # pragma: no cover - для mypy
+    from sqlalchemy import text
+
+    from supra.scripts.accounts.config import AccountsConfig
+    from supra.scripts.accounts.db import get_async_session, get_session, init_engine, reset_engine
+    from supra.scripts.realtime.service import AnnouncementInput, MessageInput, RealtimeService
+else:  # pragma: no cover - заглушки для статического анализа
+    AccountsConfig = None  # type: ignore[assignment]
+
+
+@unittest.skipIf(sqlalchemy is None, "sqlalchemy не установлена")
+class RealtimeKeysetPaginationTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.db_path = "test_realtime_service.db"
+        try:
+            os.remove(self.db_path)
+        except FileNotFoundError:
+            pass
+        init_engine(AccountsConfig(database_url=f"sqlite:///./{self.db_path}"))
+
+        async def seed() -> None:
+            async with get_async_session() as session:
+                service = RealtimeService(session)
+                for index in range(10):
+                    await service.create_message(MessageInput(address="0x1", body=f"g{index}", room="global"))
+                    await service.create_message(MessageInput(address="0x1", body=f"o{index}", room="other"))
+                    await service.create_announcement(
+                        AnnouncementInput(title=f"a{index}", body="b", lottery_id=str(index % 2))
+                    )
+                await session.commit()
+
+        asyncio.run(seed())
+
+    def tearDown(self) -> None:
+        reset_engine()
+        try:
+            os.remove(self.db_path)
+        except FileNotFoundError:
+            pass
+
+    def test_message_pages_scroll_back_and_forward(self) -> None:
+        async def scenario() -> None:
+            async with get_async_session() as session:
+                service = RealtimeService(session)
+                latest = await service.list_messages("global", 4)
+                self.assertEqual([item.body for item in latest], ["g6", "g7", "g8", "g9"])
+
+                older = await service.list_messages("global", 4, before_id=latest[0].id)
+                self.assertEqual([item.body for item in older], ["g2", "g3", "g4", "g5"])
+
+                newer = await service.list_messages("global", 3, after_id=older[-1].id)
+                self.assertEqual([item.body for item in newer], ["g6", "g7", "g8"])
+
+                window = await service.list_messages("global", 50, after_id=older[0].id, before_id=latest[0].id)
+                self.assertEqual([item.body for item in window], ["g3", "g4", "g5"])
+
+        asyncio.run(scenario())
+
+    def test_announcement_pages_filtered_by_lottery(self) -> None:
+        async def scenario() -> None:
+            async with get_async_session() as session:
+                service = RealtimeService(session)
+                page = await service.list_announcements(2, "1")
+                self.assertEqual([item.title for item in page], ["a7", "a9"])
+                older = await service.list_announcements(10, "1", before_id=page[0].id)
+                self.assertEqual([item.title for item in older], ["a1", "a3", "a5"])
+
+        asyncio.run(scenario())
+
+    def test_keyset_queries_use_composite_indexes(self) -> None:
+        with get_session() as session:
+            plan = " ".join(
+                str(row[-1])
+                for row in session.execute(
+                    text("EXPLAIN QUERY PLAN SELECT id FROM chat_messages WHERE room = 'global' AND id < 5 ORDER BY id DESC LIMIT 10")
+                )
+            )
+            self.assertIn("ix_chat_messages_room_id", plan)
+            indexes = {row[1] for row in session.execute(text("PRAGMA index_list('lottery_announcements')"))}
+            self.assertIn("ix_lottery_announcements_lottery_id_id", indexes)
+
+
+if __name__ == "__main__":  # pragma: no cover
+    unittest.main()
@@ -0,0 +1,141 @@
+import asyncio
+import os
+import unittest
+
+try:  # pragma: no cover - SQLAlchemy может отсутствовать в среде теста
+    import sqlalchemy  # type: ignore[unused-ignore]
+except ImportError:  # pragma: no cover - используем skipIf
+    sqlalchemy = None  # type: ignore[assignment]
+
+if sqlalchemy is not None:  # pragma: no cover - для mypy
+    from supra.scripts.accounts.config import AccountsConfig
+    from supra.scripts.accounts.db import get_async_session, init_engine, reset_engine
+    from supra.scripts.realtime import write_behind
+    from supra.scripts.realtime.service import MessageInput, RealtimeService
+else:  # pragma: no cover - заглушки для статического анализа
+    AccountsConfig = None  # type: ignore[assignment]
+
+
+@unittest.skipIf(sqlalchemy is None, "sqlalchemy не установлена")
+class ChatWriteBehindTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.db_path = "test_write_behind.db"
+        try:
+            os.remove(self.db_path)
+        except FileNotFoundError:
+            pass
+        init_engine(AccountsConfig(database_url=f"sqlite:///./{self.db_path}"))
+
+    def tearDown(self) -> None:
+        reset_engine()
+        try:
+            os.remove(self.db_path)
+        except FileNotFoundError:
+            pass
+
+    def _messages(self) -> list:
+        async def load() -> list:
+            async with get_async_session() as session:
+                return await RealtimeService(session).list_messages("global", 200)
+
+        return asyncio.run(load())
+
+    def test_config_from_env(self) -> None:
+        self.assertFalse(write_behind.write_behind_config_from_env({}).enabled)
+        config = write_behind.write_behind_config_from_env(
+            {"SUPRA_CHAT_DURABILITY": "batch", "SUPRA_CHAT_BATCH_SIZE": "10", "SUPRA_CHAT_FLUSH_MS": "20"}
+        )
+        self.assertEqual((config.durability, config.batch_size, config.flush_interval), ("batch", 10, 0.02))
+        with self.assertRaises(ValueError):
+            write_behind.write_behind_config_from_env({"SUPRA_CHAT_DURABILITY": "never"})
+
+        # С backplane (несколько воркеров) id из блоков не упорядочены между воркерами.
+        with self.assertRaises(ValueError):
+            write_behind.configure_chat_writer_from_env({"SUPRA_CHAT_DURABILITY": "async"}, multi_worker=True)
+        self.assertIsNone(write_behind.get_chat_writer())
+        self.assertIsNone(write_behind.configure_chat_writer_from_env({}, multi_worker=True))
+
+    def test_allocators_reserve_disjoint_blocks_after_existing_rows(self) -> None:
+        async def scenario() -> list:
+            async with get_async_session() as session:
+                await RealtimeService(session).create_message(MessageInput(address="0x1", body="old"))
+                await session.commit()
+            first = write_behind.IdBlockAllocator(block_size=3)
+            second = write_behind.IdBlockAllocator(block_size=3)
+            return [await allocator.next_id() for allocator in (first, second, first, first, first)]
+
+        self.assertEqual(asyncio.run(scenario()), [2, 5, 3, 4, 8])
+
+    def test_sync_rows_inside_reserved_block_do_not_lose_batch(self) -> None:
+        config = write_behind.WriteBehindConfig(durability="batch", batch_size=10, flush_interval=0.01)
+
+        async def scenario() -> write_behind.ChatWriteBehind:
+            writer = write_behind.ChatWriteBehind(config, write_behind.IdBlockAllocator(block_size=4))
+
+            async def post(body: str) -> None:
+                message = await writer.assign(RealtimeService.build_message(MessageInput(address="0xA", body=body)))
+                await writer.persist(message)
+
+            await post("batch-1")
+            # sync-режим занимает id 2..4 из зарезервированного блока.
+            async with get_async_session() as session:
+                for index in range(3):
+                    await RealtimeService(session).create_message(MessageInput(address="0xB", body=f"sync-{index}"))
+                await session.commit()
+            await asyncio.gather(post("batch-2"), post("batch-3"))
+            await writer.close()
+            return writer
+
+        writer = asyncio.run(scenario())
+        self.assertEqual((writer.persisted, writer.lost), (3, 0))
+        self.assertEqual(
+            sorted(item.body for item in self._messages()),
+            ["batch-1", "batch-2", "batch-3", "sync-0", "sync-1", "sync-2"],
+        )
+
+        async def reserve() -> int:
+            return await write_behind.IdBlockAllocator(block_size=4).next_id()
+
+        # Новое резервирование начинается не ниже max(id) + 1.
+        self.assertGreater(asyncio.run(reserve()), max(item.id for item in self._messages()))
+
+    def test_batch_mode_groups_inserts_and_waits_for_commit(self) -> None:
+        config = write_behind.WriteBehindConfig(durability="batch", batch_size=10, flush_interval=0.01)
+
+        async def scenario() -> write_behind.ChatWriteBehind:
+            writer = write_behind.ChatWriteBehind(config)
+
+            async def post(index: int) -> None:
+                message = await writer.assign(
+                    RealtimeService.build_message(MessageInput(address="0xA", body=f"m{index}"))
+                )
+                await writer.persist(message)
+
+            await asyncio.gather(*(post(index) for index in range(25)))
+            await writer.close()
+            return writer
+
+        writer = asyncio.run(scenario())
+        self.assertEqual(writer.persisted, 25)
+        self.assertEqual(writer.flushes, 3)
+        messages = self._messages()
+        self.assertEqual([item.body for item in messages], [f"m{index}" for index in range(25)])
+        self.assertEqual(messages[0].sender_address, "0xa")
+
+    def test_async_mode_flushes_on_close(self) -> None:
+        config = write_behind.WriteBehindConfig(durability="async", batch_size=100, flush_interval=60)
+
+        async def scenario() -> int:
+            writer = write_behind.ChatWriteBehind(config)
+            message = await writer.assign(RealtimeService.build_message(MessageInput(address="0xB", body="x")))
+            await writer.persist(message)
+            pending = writer.pending
+            await writer.close()
+            return pending
+
+        self.assertEqual(asyncio.run(scenario()), 1)
+        self.assertEqual([item.body for item in self._messages()], ["x"])
+
+
+if __name__ == "__main__":  # pragma: no cover
+    unittest.main()
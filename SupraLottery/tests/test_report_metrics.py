@@ -0,0 +1,101 @@
+"""Тесты инкрементального рендера метрик Prometheus из отчёта мониторинга."""
+from __future__ import annotations
+
+import copy
+import unittest
+from unittest import mock
+
+from supra.scripts.lib import report_metrics
+
+
+def _lottery(lottery_id: int, tickets: int, prize: str = "100") -> dict:
+    return {
+        "lottery_id": lottery_id,
+        "registration": {"active": True},
+        "round": {
+            "snapshot": {
+                "ticket_count": tickets,
+                "draw_scheduled": tickets > 0,
+                "has_pending_request": False,
+            },
+            "pending_request_id": None,
+        },
+        "treasury": {"pool": {"prize_balance": prize, "operations_balance": "5"}},
+    }
+
+
+def _report() -> dict:
+    return {
+        "timestamp": "2024-01-01T00:00:00+00:00",
+        "profile": "testnet",
+        "addresses": {"lottery": "0x1", "client": "0x3", "hub": "0x1"},
+        "calculation": {"min_balance": "500", "per_request_fee": "50", "request_window": 30},
+        "lotteries": [_lottery(1, 7), _lottery(2, 0, prize="0")],
+        "deposit": {
+            "balance": "600",
+            "min_balance_reached": True,
+            "max_gas_price": "1000",
+            "max_gas_limit": "500000",
+            "subscription_info": {"active": True},
+        },
+        "treasury": {"jackpot_balance": "42"},
+    }
+
+
+class ReportMetricsRendererTests(unittest.TestCase):
+    def test_renders_per_lottery_series(self) -> None:
+        renderer = report_metrics.ReportMetricsRenderer()
+        text = renderer.render(_report())
+
+        self.assertIn(
+            'supra_dvrf_lottery_ticket_count{client_addr="0x3",hub_addr="0x1",'
+            'lottery_addr="0x1",lottery_id="1",profile="testnet"} 7',
+            text,
+        )
+        self.assertIn('lottery_id="2",profile="testnet"} 0', text)
+        self.assertIn("supra_dvrf_lottery_pool_prize_quants{", text)
+        self.assertIn("supra_dvrf_jackpot_balance_quants{", text)
+        self.assertIn("supra_dvrf_balance_ratio{", text)
+        self.assertEqual(text.count("# TYPE supra_dvrf_lottery_ticket_count gauge"), 1)
+
+    def test_same_report_is_not_rerendered(self) -> None:
+        renderer = report_metrics.ReportMetricsRenderer()
+        report = _report()
+        first = renderer.render(report)
+
+        with mock.patch.object(report_metrics, "lottery_gauge_values") as values:
+            second = renderer.render(report)
+        values.assert_not_called()
+        self.assertIs(first, second)
+
+    def test_only_changed_lotteries_are_reformatted(self) -> None:
+        renderer = report_metrics.ReportMetricsRenderer()
+        renderer.render(_report())
+
+        updated = copy.deepcopy(_report())
+        updated["lotteries"][0]["round"]["snapshot"]["ticket_count"] = 9
+        with mock.patch.object(
+            report_metrics, "format_labels", wraps=report_metrics.format_labels
+        ) as formatter:
+            text = renderer.render(updated)
+
+        # Одна лотерея + строка глобальных меток.
+        self.assertEqual(formatter.call_count, 2)
+        self.assertIn('lottery_id="1",profile="testnet"} 9', text)
+
+    def test_removed_lottery_disappears(self) -> None:
+        renderer = report_metrics.ReportMetricsRenderer()
+        renderer.render(_report())
+        updated = _report()
+        updated["lotteries"] = updated["lotteries"][:1]
+
+        text = renderer.render(updated)
+        self.assertNotIn('lottery_id="2"', text)
+
+    def test_report_age_without_report(self) -> None:
+        line = report_metrics.render_report_age("supra_dvrf", None)
+        self.assertIn("supra_dvrf_report_age_seconds -1.000", line)
+
+
+if __name__ == "__main__":  # pragma: no cover
+    unittest.main()
@@ -0,0 +1,105 @@
+"""Тесты симулятора Supra CLI и подключаемого исполнителя команд мониторинга."""
+from __future__ import annotations
+
+import io
+import json
+import unittest
+from contextlib import redirect_stdout
+from unittest import mock
+
+from supra.scripts.lib import monitoring
+from supra.scripts.lib.simulator import SimulatedChain, SimulatorConfig, simulator_config_from_env
+from supra.scripts.lib.vrf_audit import gather_vrf_log
+from supra.tools import fake_supra_cli
+
+
+def _config() -> monitoring.MonitorConfig:
+    return monitoring.MonitorConfig(
+        profile="sim",
+        lottery_addr="0x1",
+        deposit_addr="0x2",
+        client_addr="0x3",
+        max_gas_price=1000,
+        max_gas_limit=500000,
+        verification_gas=1,
+    )
+
+
+class SimulatorBackendTests(unittest.TestCase):
+    def tearDown(self) -> None:
+        monitoring.set_cli_backend(None)
+
+    def test_gather_data_covers_all_lotteries(self) -> None:
+        monitoring.set_cli_backend(SimulatedChain(SimulatorConfig(lottery_count=25)))
+        with mock.patch.object(monitoring.subprocess, "run") as run:
+            report = monitoring.gather_data(_config())
+
+        run.assert_not_called()
+        self.assertEqual(len(report["lotteries"]), 25)
+        self.assertEqual(report["hub"]["next_lottery_id"], "25")
+        self.assertEqual(len(report["vip"]["lotteries"]), 25)
+        self.assertIsNotNone(report["lotteries"][3]["round"]["snapshot"]["ticket_count"])
+
+    def test_state_is_deterministic_per_seed(self) -> None:
+        first = SimulatedChain(SimulatorConfig(lottery_count=100, seed=7))
+        second = SimulatedChain(SimulatorConfig(lottery_count=100, seed=7))
+        other = SimulatedChain(SimulatorConfig(lottery_count=100, seed=8))
+
+        snapshot = first.view("0x1::rounds::get_round_snapshot", ["u64:42"])
+        self.assertEqual(snapshot, second.view("0x1::rounds::get_round_snapshot", ["u64:42"]))
+        states = [chain.lottery(42) for chain in (first, other)]
+        self.assertNotEqual(states[0], states[1])
+        self.assertEqual(first.view("0x1::hub::get_registration", ["u64:100"]), [])
+
+    def test_uninitialized_modules_are_skipped(self) -> None:
+        chain = SimulatedChain(SimulatorConfig(lottery_count=3, uninitialized_modules=frozenset({"vip"})))
+        monitoring.set_cli_backend(chain)
+        report = monitoring.gather_data(_config())
+        self.assertFalse(report["vip"]["initialized"])
+        self.assertEqual(report["vip"]["lotteries"], [])
+
+    def test_error_rate_raises_cli_error(self) -> None:
+        monitoring.set_cli_backend(SimulatedChain(SimulatorConfig(error_rate=1.0)))
+        with self.assertRaises(monitoring.CliError):
+            monitoring.move_view(_config(), "0x1::hub::lottery_count")
+
+    def test_vrf_log_filters_events(self) -> None:
+        monitoring.set_cli_backend(SimulatedChain(SimulatorConfig(lottery_count=4, draws_per_lottery=2)))
+        log = gather_vrf_log(_config(), lottery_id=3, limit=50)
+
+        self.assertEqual(len(log["round"]["requests"]), 2)
+        self.assertEqual({event["lottery_id"] for event in log["hub"]["fulfillments"]}, {3})
+
+    def test_configure_backend_from_env(self) -> None:
+        backend = monitoring.configure_cli_backend_from_env(
+            {"SUPRA_CLI_BACKEND": "simulator", "SUPRA_SIM_LOTTERIES": "12"}
+        )
+        self.assertIsInstance(backend, SimulatedChain)
+        self.assertEqual(backend.config.lottery_count, 12)
+
+        self.assertIsNone(monitoring.configure_cli_backend_from_env({}))
+        with self.assertRaises(monitoring.ConfigError):
+            monitoring.configure_cli_backend_from_env({"SUPRA_CLI_BACKEND": "docker"})
+        with self.assertRaises(ValueError):
+            simulator_config_from_env({"SUPRA_SIM_ERROR_RATE": "often"})
+
+
+class FakeSupraCliTests(unittest.TestCase):
+    def test_stub_prints_view_result(self) -> None:
+        buffer = io.StringIO()
+        with mock.patch.dict("os.environ", {"SUPRA_SIM_LOTTERIES": "2"}):
+            with redirect_stdout(buffer):
+                code = fake_supra_cli.main(
+                    ["move", "tool", "view", "--profile", "p", "--function-id", "0x1::hub::lottery_count"]
+                )
+
+        self.assertEqual(code, 0)
+        self.assertEqual(json.loads(buffer.getvalue()), {"result": ["2"]})
+
+    def test_stub_fails_on_unknown_command(self) -> None:
+        with mock.patch("sys.stderr", new_callable=io.StringIO):
+            self.assertEqual(fake_supra_cli.main(["account", "list"]), 1)
+
+
+if __name__ == "__main__":  # pragma: no cover
+    unittest.main()
@@ -0,0 +1,87 @@
+"""Тесты общего фонового потока изменений отчёта /status."""
+from __future__ import annotations
+
+import asyncio
+import json
+import unittest
+
+try:
+    from supra.scripts.lib.json_patch import apply_patch
+    from supra.scripts.realtime.manager import ConnectionManager
+    from supra.scripts.realtime.status_stream import StatusStream
+except ImportError:  # pragma: no cover - FastAPI опционален
+    StatusStream = None  # type: ignore[assignment,misc]
+
+
+class FakeWebSocket:
+    def __init__(self) -> None:
+        self.sent: list[dict] = []
+
+    async def accept(self) -> None:
+        return None
+
+    async def send_text(self, text: str) -> None:
+        self.sent.append(json.loads(text))
+
+    async def close(self, code: int = 1000) -> None:
+        return None
+
+
+@unittest.skipIf(StatusStream is None, "fastapi не установлен")
+class StatusStreamTests(unittest.TestCase):
+    def test_single_refresh_snapshot_then_patches(self) -> None:
+        reports = [
+            {"lotteries": [{"id": 1, "tickets": 1}], "height": 10},
+            {"lotteries": [{"id": 1, "tickets": 1}], "height": 10},
+            {"lotteries": [{"id": 1, "tickets": 2}], "height": 11},
+        ]
+        calls = []
+
+        async def refresh() -> dict:
+            calls.append(1)
+            return reports[min(len(calls), len(reports)) - 1]
+
+        async def scenario() -> None:
+            manager = ConnectionManager(queue_size=10)
+            stream = StatusStream(manager, refresh, interval=3600)
+            first, second = FakeWebSocket(), FakeWebSocket()
+            await asyncio.gather(stream.subscribe(first), stream.subscribe(second))
+            self.assertEqual(len(calls), 1)
+
+            await stream.refresh_once()
+            await stream.refresh_once()
+            await asyncio.sleep(0)
+
+            for websocket in (first, second):
+                snapshot, patch = websocket.sent
+                self.assertEqual((snapshot["type"], snapshot["version"]), ("snapshot", 1))
+                self.assertEqual((patch["type"], patch["version"]), ("patch", 2))
+                self.assertEqual(apply_patch(snapshot["data"], patch["ops"]), reports[2])
+
+            late = FakeWebSocket()
+            await stream.subscribe(late)
+            await asyncio.sleep(0)
+            self.assertEqual(late.sent, [{"type": "snapshot", "version": 2, "data": reports[2]}])
+            await stream.close()
+
+        asyncio.run(scenario())
+
+    def test_refresh_error_is_broadcast(self) -> None:
+        async def refresh() -> dict:
+            raise RuntimeError("cli down")
+
+        async def scenario() -> None:
+            stream = StatusStream(ConnectionManager(queue_size=10), refresh, interval=3600)
+            websocket = FakeWebSocket()
+            await stream.subscribe(websocket)
+            await stream.refresh_once()
+            await asyncio.sleep(0)
+            self.assertEqual(websocket.sent[0]["type"], "error")
+            self.assertIsNone(stream.report)
+            await stream.close()
+
+        asyncio.run(scenario())
+
+
+if __name__ == "__main__":  # pragma: no cover
+    unittest.main()
@@ -1,6 +1,7 @@
 """Тесты подсистемы поддержки пользователей."""
 from __future__ import annotations
 
+import asyncio
 import os
 import unittest
 from unittest import mock
@@ -33,33 +34,36 @@ class SupportServiceTests(unittest.TestCase):
         self.addCleanup(reset_engine)
 
     def tearDown(self) -> None:
+        from supra.scripts.accounts import reset_engine
+
+        reset_engine()
         try:
             os.remove("test_support.db")
         except FileNotFoundError:
             pass
 
     def test_article_roundtrip(self) -> None:
-        created = self.service.create_or_update_article(
+        created = asyncio.run(self.service.create_or_update_article(
             {
                 "slug": "faq-wallet",
                 "title": "Как подключить кошелёк",
                 "body": "Инструкция по подключению",
                 "locale": "ru",
             }
-        )
+        ))
         self.assertEqual(created.slug, "faq-wallet")
 
-        fetched = self.service.get_article_by_slug("faq-wallet")
+        fetched = asyncio.run(self.service.get_article_by_slug("faq-wallet"))
         self.assertIsNotNone(fetched)
         assert fetched is not None
         self.assertEqual(fetched.title, "Как подключить кошелёк")
 
-        listing = self.service.list_articles(locale="ru")
+        listing = asyncio.run(self.service.list_articles(locale="ru"))
         self.assertEqual(len(listing), 1)
         self.assertEqual(listing[0].slug, "faq-wallet")
 
     def test_ticket_creation(self) -> None:
-        ticket = self.service.create_ticket(
+        ticket = asyncio.run(self.service.create_ticket(
             {
                 "address": "0xABC",
                 "email": "user@example.com",
@@ -67,7 +71,115 @@ class SupportServiceTests(unittest.TestCase):
                 "body": "Не пришло подтверждение",
                 "metadata": {"lottery_id": "1"},
             }
-        )
+        ))
         self.assertGreater(ticket.id, 0)
         self.assertEqual(ticket.address, "0xabc")
         self.assertEqual(ticket.status, "new")
+
+    def _article(self, slug: str, title: str, body: str, locale: str = "ru", **tags: str) -> None:
+        asyncio.run(self.service.create_or_update_article(
+            {"slug": slug, "title": title, "body": body, "locale": locale, "tags": tags}
+        ))
+
+    def test_listing_omits_body(self) -> None:
+        self._article("faq-wallet", "Кошелёк", "Длинная инструкция")
+        listing = asyncio.run(self.service.list_articles())
+        self.assertNotIn("body", listing[0].__dict__)
+
+    def test_search_is_ranked_paginated_and_synced(self) -> None:
+        from supra.scripts.support import search
+
+        self._article("faq-body", "Вопросы по оплате", "Как подключить кошелёк к лотерее и купить билет")
+        self._article("faq-title", "Кошелёк Supra", "Настройка расширения", category="wallet")
+        self._article("faq-en", "Wallet", "Connect a кошелёк", locale="en")
+
+        hits, total = asyncio.run(search.search_articles("кошел"))
+        self.assertEqual(total, 3)
+        self.assertEqual(hits[0].slug, "faq-title")
+        self.assertIn("<mark>", hits[0].snippet)
+
+        page, total = asyncio.run(search.search_articles("кошелёк", locale="ru", limit=1, offset=1))
+        self.assertEqual((total, [hit.slug for hit in page]), (2, ["faq-body"]))
+        self.assertIn("<mark>кошелёк</mark>", page[0].snippet)
+
+        self.assertEqual(asyncio.run(search.search_articles("wallet"))[1], 2)
+        self.assertEqual(asyncio.run(search.search_articles('"; DROP')), ([], 0))
+
+        self._article("faq-title", "Расширение Supra", "Настройка расширения")
+        hits, _ = asyncio.run(search.search_articles("кошелёк", locale="ru"))
+        self.assertEqual([hit.slug for hit in hits], ["faq-body"])
+
+    def test_search_snippets_are_html_escaped(self) -> None:
+        from supra.scripts.support import search
+
+        self._article("faq-xss", "Безопасность", "<img src=x onerror=alert(1)> & кошелёк", category="Кошелёк")
+        hits, _ = asyncio.run(search.search_articles("кошелёк"))
+        self.assertNotIn("<img", hits[0].snippet)
+        self.assertIn("&lt;img", hits[0].snippet)
+        self.assertIn("&amp; <mark>кошелёк</mark>", hits[0].snippet)
+
+        # Без FTS5 поиск идёт через LIKE, в том числе по тегам.
+        with mock.patch.dict(search._READY, mode="like"):
+            hits, total = asyncio.run(search.search_articles("кошелёк"))
+            self.assertEqual(total, 1)
+            self.assertTrue(hits[0].snippet.startswith("&lt;img"))
+            self._article("faq-tag", "Настройка", "Расширение браузера", category="кошелёк")
+            tagged, total = asyncio.run(search.search_articles("кошелёк"))
+            self.assertEqual((total, [hit.slug for hit in tagged]), (2, ["faq-xss", "faq-tag"]))
+
+    def test_search_index_is_marked_ready_only_after_commit(self) -> None:
+        from supra.scripts.accounts.db import get_async_session
+        from supra.scripts.support import search
+
+        async def rolled_back() -> str:
+            async with get_async_session() as session:
+                mode = await search.ensure_index(session)
+                await session.rollback()
+            return mode
+
+        self.assertEqual(asyncio.run(rolled_back()), "fts5")
+        self.assertFalse(search._index_ready())
+        self.assertEqual(asyncio.run(search.search_articles("кошелёк")), ([], 0))
+        self.assertTrue(search._index_ready())
+
+    def test_search_backfills_existing_articles(self) -> None:
+        from sqlalchemy import text
+
+        from supra.scripts.accounts import get_config_from_env, init_engine
+        from supra.scripts.accounts.db import get_async_session
+        from supra.scripts.support import search
+
+        self._article("faq-wallet", "Кошелёк", "Инструкция")
+
+        async def drop_index() -> None:
+            async with get_async_session() as session:
+                await session.execute(text(f"DROP TABLE {search.FTS_TABLE}"))
+                await session.commit()
+
+        asyncio.run(drop_index())
+        init_engine(get_config_from_env())
+        hits, total = asyncio.run(search.search_articles("инструкция"))
+        self.assertEqual((total, hits[0].slug), (1, "faq-wallet"))
+
+    def test_bulk_tickets_and_streaming_export(self) -> None:
+        from datetime import datetime, timedelta, timezone
+
+        ids = asyncio.run(self.service.create_tickets(
+            [{"address": f"0xA{index}", "subject": f"Тема {index}", "body": "Текст"} for index in range(5)]
+        ))
+        self.assertEqual(len(ids), 5)
+        self.assertEqual(ids, sorted(ids))
+        self.assertEqual(asyncio.run(self.service.create_tickets([])), [])
+
+        async def export(filters: object, batch_size: int) -> list:
+            return [list(rows) async for rows in self.service.iter_tickets(filters, batch_size=batch_size)]
+
+        batches = asyncio.run(export(self.service.TicketFilter(status="new"), 2))
+        self.assertEqual([len(rows) for rows in batches], [2, 2, 1])
+        first = dict(zip(self.service.TICKET_EXPORT_COLUMNS, batches[0][0]))
+        self.assertEqual((first["id"], first["address"], first["status"]), (ids[0], "0xa0", "new"))
+
+        self.assertEqual(asyncio.run(export(self.service.TicketFilter(status="closed"), 2)), [])
+        future = datetime.now(timezone.utc) + timedelta(days=1)
+        self.assertEqual(asyncio.run(export(self.service.TicketFilter(created_from=future), 2)), [])
+        self.assertEqual(sum(map(len, asyncio.run(export(self.service.TicketFilter(created_to=future), 10)))), 5)
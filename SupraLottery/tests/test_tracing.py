@@ -0,0 +1,95 @@
+"""Тесты локальной трассировки (спаны, выборка, SQLAlchemy-инструментация)."""
+from __future__ import annotations
+
+import json
+import os
+import tempfile
+import unittest
+
+try:  # pragma: no cover - SQLAlchemy может отсутствовать в минимальной среде
+    import sqlalchemy  # type: ignore[unused-ignore]
+except ImportError:  # pragma: no cover - используем skipIf
+    sqlalchemy = None  # type: ignore[assignment]
+
+from supra.scripts.lib import tracing
+
+
+class TracingTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.exporter = tracing.InMemorySpanExporter()
+        tracing.configure_tracing(self.exporter)
+
+    def tearDown(self) -> None:
+        tracing.configure_tracing(None)
+
+    def test_nested_spans_share_trace(self) -> None:
+        @tracing.traced("inner")
+        def inner() -> int:
+            return 42
+
+        with tracing.span("outer", lottery_id=1):
+            self.assertEqual(inner(), 42)
+
+        outer = self.exporter.spans("outer")[0]
+        child = self.exporter.spans("inner")[0]
+        self.assertEqual(child.trace_id, outer.trace_id)
+        self.assertEqual(child.parent_id, outer.span_id)
+        self.assertIsNone(outer.parent_id)
+        self.assertEqual(outer.attributes, {"lottery_id": 1})
+
+    def test_error_marks_span(self) -> None:
+        with self.assertRaises(RuntimeError):
+            with tracing.span("failing"):
+                raise RuntimeError("boom")
+
+        recorded = self.exporter.spans("failing")[0]
+        self.assertEqual(recorded.status, "error")
+        self.assertIn("boom", recorded.attributes["error"])
+
+    def test_unsampled_trace_drops_children(self) -> None:
+        tracing.configure_tracing(self.exporter, sample_rate=0.0)
+        with tracing.span("root"):
+            with tracing.span("child"):
+                pass
+        self.assertEqual(self.exporter.spans(), [])
+
+    def test_disabled_tracing_returns_noop(self) -> None:
+        tracing.configure_tracing(None)
+        self.assertIs(tracing.span("anything"), tracing.NOOP_SPAN)
+        self.assertFalse(tracing.tracing_enabled())
+
+    def test_configure_from_env_file_exporter(self) -> None:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "traces.jsonl")
+            tracer = tracing.configure_tracing_from_env(
+                {"SUPRA_TRACING": "file", "SUPRA_TRACING_FILE": path}
+            )
+            self.assertIsNotNone(tracer)
+            with tracing.span("file.span"):
+                pass
+            with open(path, encoding="utf-8") as handle:
+                record = json.loads(handle.readline())
+        self.assertEqual(record["name"], "file.span")
+
+        with self.assertRaises(ValueError):
+            tracing.configure_tracing_from_env({"SUPRA_TRACING": "jaeger"})
+
+    @unittest.skipIf(sqlalchemy is None, "sqlalchemy не установлена")
+    def test_engine_queries_emit_spans(self) -> None:
+        engine = sqlalchemy.create_engine("sqlite://")
+        tracing.instrument_engine(engine)
+        tracing.instrument_engine(engine)
+
+        with tracing.span("request"):
+            with engine.connect() as connection:
+                connection.execute(sqlalchemy.text("SELECT 1"))
+
+        queries = self.exporter.spans("db.query")
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(queries[0].attributes["db.system"], "sqlite")
+        self.assertEqual(queries[0].attributes["db.statement"], "SELECT 1")
+        self.assertEqual(queries[0].parent_id, self.exporter.spans("request")[0].span_id)
+
+
+if __name__ == "__main__":  # pragma: no cover
+    unittest.main()